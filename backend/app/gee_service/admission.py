@@ -0,0 +1,431 @@
+"""
+Admission control for Earth Engine analyses.
+
+Without a limit, a few state-sized ROIs can exhaust the Earth Engine quota and
+the worker threads, and then every small city query times out. Every analysis
+request is therefore admitted here before it runs:
+
+- Its cost is estimated as ROI area x (30 m / scale)^2 x (date span / 90 days),
+  i.e. in km² of 30 m pixels over one season.
+- It runs only if the global concurrency cap, the cap of its analysis type, the
+  per-user cap and the weighted capacity allow it. Part of the capacity is
+  reserved for small requests, so large ROIs can never starve them.
+- Otherwise it waits in a priority queue: small interactive requests first,
+  then interactive or small ones, then bulk (async job) requests. Waiters age
+  into better classes so nothing starves.
+- When the queue is saturated the request is rejected immediately with a
+  Retry-After estimate (bulk requests get only half of the queue).
+
+Configuration (environment):
+- GEE_ADMISSION_ENABLED: "true" (default) / "false"
+- GEE_ADMISSION_CAPACITY_UNITS: weighted capacity of concurrently running analyses (default 20000)
+- GEE_ADMISSION_SMALL_COST_UNITS: requests up to this cost count as small (default 1000)
+- GEE_ADMISSION_SMALL_RESERVE: share of the capacity reserved for small requests (default 0.2)
+- GEE_ADMISSION_MAX_CONCURRENT: analyses running at once (default 8)
+- GEE_ADMISSION_TYPE_LIMITS: per-type caps (default "ndvi=4,lulc=3,lst=3,uhi=2,water=4")
+- GEE_ADMISSION_PER_USER_LIMIT: analyses running at once per user (default 2)
+- GEE_ADMISSION_MAX_QUEUE: queued requests before rejecting (default 32)
+- GEE_ADMISSION_MAX_QUEUE_PER_USER: queued requests per user before rejecting (default 4)
+- GEE_ADMISSION_MAX_WAIT_SECONDS: queue wait of interactive requests (default 60)
+- GEE_ADMISSION_BULK_MAX_WAIT_SECONDS: queue wait of bulk requests (default 1800)
+"""
+
+import os
+import math
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_SCALE_M = 30.0
+REFERENCE_DAYS = 90.0
+
+DEFAULT_TYPE_LIMITS = {"ndvi": 4, "lulc": 3, "lst": 3, "uhi": 2, "water": 4}
+
+# Priority classes (lower runs first)
+PRIORITY_SMALL_INTERACTIVE = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_BULK = 2
+PRIORITY_NAMES = {0: "small_interactive", 1: "interactive", 2: "bulk"}
+
+
+def date_span_days(start_date: Optional[str], end_date: Optional[str]) -> Optional[int]:
+    """Number of days in an ISO date range (inclusive).
+
+    Args:
+        start_date: Start date (YYYY-MM-DD)
+        end_date: End date (YYYY-MM-DD)
+
+    Returns:
+        Day count, or None if the dates cannot be parsed
+    """
+    try:
+        return max((date.fromisoformat(end_date) - date.fromisoformat(start_date)).days + 1, 1)
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_cost(area_km2: float, scale: Optional[float], days: Optional[float] = None) -> float:
+    """Estimate the relative Earth Engine cost of an analysis.
+
+    Args:
+        area_km2: ROI area in km²
+        scale: Analysis scale in meters
+        days: Length of the analysed period (None for single-image datasets)
+
+    Returns:
+        Cost in units of km² at 30 m over 90 days
+    """
+    scale = max(float(scale or REFERENCE_SCALE_M), 1.0)
+    span = max(float(days), 1.0) if days else REFERENCE_DAYS
+    return max(float(area_km2 or 0.0), 0.01) * (REFERENCE_SCALE_M / scale) ** 2 * span / REFERENCE_DAYS
+
+
+def parse_type_limits(value: str) -> Dict[str, int]:
+    """Parse "ndvi=4,lulc=3" into a dictionary of per-type caps."""
+    limits = {}
+    for item in value.split(","):
+        name, _, limit = item.partition("=")
+        if name.strip() and limit.strip():
+            limits[name.strip().lower()] = int(limit)
+    return limits
+
+
+class AdmissionRejected(Exception):
+    """The analysis was not admitted (queue saturated or waited too long)."""
+
+    def __init__(self, message: str, retry_after: int, status_code: int = 429):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+class AdmissionTicket:
+    """A request for running one analysis."""
+
+    def __init__(self, analysis_type: str, user: str, cost: float, priority: int, sequence: int):
+        self.analysis_type = analysis_type
+        self.user = user
+        self.cost = cost
+        self.priority = priority
+        self.sequence = sequence
+        self.small = False
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.released = False
+        # Resolved when the ticket is granted
+        self.future: Future = Future()
+
+
+class AdmissionController:
+    """Weighted concurrency limits and a priority queue for GEE analyses."""
+
+    def __init__(
+        self,
+        capacity_units: float = 20000,
+        small_cost_units: float = 1000,
+        small_reserve: float = 0.2,
+        max_concurrent: int = 8,
+        type_limits: Optional[Dict[str, int]] = None,
+        per_user_limit: int = 2,
+        max_queue: int = 32,
+        max_queue_per_user: int = 4,
+        max_wait_seconds: float = 60,
+        bulk_max_wait_seconds: float = 1800,
+        aging_seconds: float = 30
+    ):
+        """Initialize the admission controller.
+
+        Args:
+            capacity_units: Weighted capacity of concurrently running analyses
+            small_cost_units: Requests up to this cost count as small
+            small_reserve: Share of the capacity only small requests may use
+            max_concurrent: Analyses running at once (also the worker thread count)
+            type_limits: Analyses running at once per analysis type
+            per_user_limit: Analyses running at once per user
+            max_queue: Queued requests before new ones are rejected
+            max_queue_per_user: Queued requests per user before new ones are rejected
+            max_wait_seconds: Longest queue wait of interactive requests
+            bulk_max_wait_seconds: Longest queue wait of bulk requests
+            aging_seconds: Waiting this long moves a request up one priority class
+        """
+        self.capacity_units = capacity_units
+        self.small_cost_units = small_cost_units
+        self.small_reserve = small_reserve
+        self.max_concurrent = max_concurrent
+        self.type_limits = dict(DEFAULT_TYPE_LIMITS if type_limits is None else type_limits)
+        self.per_user_limit = per_user_limit
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.max_wait_seconds = max_wait_seconds
+        self.bulk_max_wait_seconds = bulk_max_wait_seconds
+        self.aging_seconds = aging_seconds
+
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="gee-analysis")
+        self._lock = threading.Lock()
+        self._queue: List[AdmissionTicket] = []
+        self._running: List[AdmissionTicket] = []
+        self._sequence = 0
+        self._avg_run_seconds = 30.0
+
+        self._stats = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0, "completed": 0}
+
+    def request(self, analysis_type: str, cost: float, user: str = "anonymous", interactive: bool = True) -> AdmissionTicket:
+        """Ask to run an analysis; it is granted now or queued.
+
+        Args:
+            analysis_type: Analysis type ("ndvi", "lst", "water", "lulc", ...)
+            cost: Estimated cost from estimate_cost()
+            user: Caller identity for the per-user caps
+            interactive: False for bulk/background requests
+
+        Returns:
+            Ticket to pass to run() / run_sync()
+
+        Raises:
+            AdmissionRejected: If the queue is saturated (status 429)
+        """
+        small = cost <= self.small_cost_units
+        if interactive and small:
+            priority = PRIORITY_SMALL_INTERACTIVE
+        elif interactive or small:
+            priority = PRIORITY_INTERACTIVE
+        else:
+            priority = PRIORITY_BULK
+
+        with self._lock:
+            self._sequence += 1
+            ticket = AdmissionTicket(analysis_type.lower(), user, cost, priority, self._sequence)
+            ticket.small = small
+            self._queue.append(ticket)
+            self._dispatch()
+
+            if ticket.future.done():
+                return ticket
+
+            queue_limit = self.max_queue if priority < PRIORITY_BULK else self.max_queue // 2
+            user_queued = sum(1 for t in self._queue if t.user == user)
+            if len(self._queue) > queue_limit or user_queued > self.max_queue_per_user:
+                self._queue.remove(ticket)
+                self._stats["rejected"] += 1
+                retry_after = self._retry_after()
+                logger.warning(
+                    f"🚦 Rejected {analysis_type} request (cost {cost:.0f}, {PRIORITY_NAMES[priority]}): "
+                    f"{len(self._queue)} queued, retry after {retry_after}s"
+                )
+                raise AdmissionRejected(
+                    f"GEE analysis queue is full ({len(self._queue)} requests waiting), retry later",
+                    retry_after
+                )
+
+            self._stats["queued"] += 1
+            logger.info(
+                f"⏳ Queued {analysis_type} request (cost {cost:.0f}, {PRIORITY_NAMES[priority]}), "
+                f"position {len(self._queue)}"
+            )
+            return ticket
+
+    async def run(self, ticket: AdmissionTicket, fn: Callable[[], Any]) -> Any:
+        """Wait until the ticket is granted, then run fn on an analysis thread.
+
+        Args:
+            ticket: Ticket from request()
+            fn: Blocking function running the analysis
+
+        Returns:
+            fn's result
+
+        Raises:
+            AdmissionRejected: If the ticket was not granted within the queue wait (status 503)
+        """
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(ticket.future), timeout=self._max_wait(ticket))
+        except asyncio.TimeoutError:
+            raise self._timed_out(ticket)
+        except asyncio.CancelledError:
+            self._abandon(ticket)
+            raise
+
+        # The slot is held until the analysis thread finishes, even if the caller gives up
+        future = self._executor.submit(fn)
+        future.add_done_callback(lambda _: self.release(ticket))
+        return await asyncio.wrap_future(future)
+
+    def run_sync(self, ticket: AdmissionTicket, fn: Callable[[], Any]) -> Any:
+        """Blocking variant of run() for worker threads (runs fn on the calling thread).
+
+        Args:
+            ticket: Ticket from request()
+            fn: Blocking function running the analysis
+
+        Returns:
+            fn's result
+
+        Raises:
+            AdmissionRejected: If the ticket was not granted within the queue wait (status 503)
+        """
+        try:
+            ticket.future.result(timeout=self._max_wait(ticket))
+        except FutureTimeoutError:
+            raise self._timed_out(ticket)
+
+        try:
+            return fn()
+        finally:
+            self.release(ticket)
+
+    def release(self, ticket: AdmissionTicket) -> None:
+        """Free the slot of a finished analysis and admit waiting requests.
+
+        Args:
+            ticket: Granted ticket
+        """
+        with self._lock:
+            if ticket.released or ticket not in self._running:
+                return
+            ticket.released = True
+            self._running.remove(ticket)
+            self._stats["completed"] += 1
+            duration = time.monotonic() - (ticket.started_at or ticket.enqueued_at)
+            self._avg_run_seconds = 0.8 * self._avg_run_seconds + 0.2 * duration
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get admission statistics.
+
+        Returns:
+            Dictionary with running and queued work, counters and limits
+        """
+        with self._lock:
+            running_by_type: Dict[str, int] = {}
+            for ticket in self._running:
+                running_by_type[ticket.analysis_type] = running_by_type.get(ticket.analysis_type, 0) + 1
+            queued_by_priority: Dict[str, int] = {}
+            for ticket in self._queue:
+                name = PRIORITY_NAMES[ticket.priority]
+                queued_by_priority[name] = queued_by_priority.get(name, 0) + 1
+
+            return {
+                **self._stats,
+                "running": len(self._running),
+                "running_cost_units": round(sum(t.cost for t in self._running), 1),
+                "running_by_type": running_by_type,
+                "queue_length": len(self._queue),
+                "queued_by_priority": queued_by_priority,
+                "avg_run_seconds": round(self._avg_run_seconds, 1),
+                "capacity_units": self.capacity_units,
+                "max_concurrent": self.max_concurrent,
+                "type_limits": dict(self.type_limits),
+                "per_user_limit": self.per_user_limit
+            }
+
+    def _dispatch(self) -> None:
+        """Grant queued tickets that fit, best priority first (caller holds the lock)."""
+        now = time.monotonic()
+
+        def order(ticket: AdmissionTicket):
+            aged = int((now - ticket.enqueued_at) / self.aging_seconds) if self.aging_seconds > 0 else 0
+            return (max(ticket.priority - aged, 0), ticket.sequence)
+
+        for ticket in sorted(self._queue, key=order):
+            if len(self._running) >= self.max_concurrent:
+                break
+            if not self._fits(ticket):
+                continue
+            self._queue.remove(ticket)
+            if not ticket.future.set_running_or_notify_cancel():
+                # The waiter gave up
+                continue
+            ticket.started_at = now
+            self._running.append(ticket)
+            self._stats["admitted"] += 1
+            ticket.future.set_result(True)
+
+    def _fits(self, ticket: AdmissionTicket) -> bool:
+        """Whether a ticket can start now under every cap (caller holds the lock)."""
+        type_limit = self.type_limits.get(ticket.analysis_type, self.max_concurrent)
+        if sum(1 for t in self._running if t.analysis_type == ticket.analysis_type) >= type_limit:
+            return False
+        if sum(1 for t in self._running if t.user == ticket.user) >= self.per_user_limit:
+            return False
+
+        running_cost = sum(t.cost for t in self._running)
+        if ticket.small:
+            small_cost = sum(t.cost for t in self._running if t.small)
+            return (running_cost + ticket.cost <= self.capacity_units
+                    or small_cost + ticket.cost <= self.capacity_units * self.small_reserve)
+
+        large_cost = running_cost - sum(t.cost for t in self._running if t.small)
+        if large_cost == 0:
+            # A single oversized request may run on its own (within the large share)
+            return True
+        return (large_cost + ticket.cost <= self.capacity_units * (1 - self.small_reserve)
+                and running_cost + ticket.cost <= self.capacity_units)
+
+    def _max_wait(self, ticket: AdmissionTicket) -> float:
+        """Longest queue wait for a ticket."""
+        return self.bulk_max_wait_seconds if ticket.priority == PRIORITY_BULK else self.max_wait_seconds
+
+    def _abandon(self, ticket: AdmissionTicket) -> None:
+        """Withdraw a ticket whose caller stopped waiting."""
+        with self._lock:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+                return
+        # Granted in the meantime: give the slot back
+        self.release(ticket)
+
+    def _timed_out(self, ticket: AdmissionTicket) -> AdmissionRejected:
+        """Withdraw a ticket that waited too long and build the rejection."""
+        self._abandon(ticket)
+        with self._lock:
+            self._stats["timed_out"] += 1
+            retry_after = self._retry_after()
+        logger.warning(f"🚦 {ticket.analysis_type} request waited {self._max_wait(ticket):.0f}s without a slot")
+        return AdmissionRejected(
+            f"GEE analysis capacity busy, request waited {self._max_wait(ticket):.0f}s", retry_after, status_code=503
+        )
+
+    def _retry_after(self) -> int:
+        """Estimated seconds until queued work drains (caller holds the lock)."""
+        rounds = (len(self._queue) + 1) / max(self.max_concurrent, 1)
+        return int(min(max(math.ceil(self._avg_run_seconds * rounds), 1), 600))
+
+
+_admission_controller: Optional[AdmissionController] = None
+_admission_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """Get the process-wide admission controller.
+
+    Returns:
+        Shared AdmissionController, or None if disabled via GEE_ADMISSION_ENABLED
+    """
+    global _admission_controller
+
+    if os.environ.get("GEE_ADMISSION_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+
+    if _admission_controller is None:
+        with _admission_controller_lock:
+            if _admission_controller is None:
+                type_limits = os.environ.get("GEE_ADMISSION_TYPE_LIMITS")
+                _admission_controller = AdmissionController(
+                    capacity_units=float(os.environ.get("GEE_ADMISSION_CAPACITY_UNITS", "20000")),
+                    small_cost_units=float(os.environ.get("GEE_ADMISSION_SMALL_COST_UNITS", "1000")),
+                    small_reserve=float(os.environ.get("GEE_ADMISSION_SMALL_RESERVE", "0.2")),
+                    max_concurrent=int(os.environ.get("GEE_ADMISSION_MAX_CONCURRENT", "8")),
+                    type_limits=parse_type_limits(type_limits) if type_limits else None,
+                    per_user_limit=int(os.environ.get("GEE_ADMISSION_PER_USER_LIMIT", "2")),
+                    max_queue=int(os.environ.get("GEE_ADMISSION_MAX_QUEUE", "32")),
+                    max_queue_per_user=int(os.environ.get("GEE_ADMISSION_MAX_QUEUE_PER_USER", "4")),
+                    max_wait_seconds=float(os.environ.get("GEE_ADMISSION_MAX_WAIT_SECONDS", "60")),
+                    bulk_max_wait_seconds=float(os.environ.get("GEE_ADMISSION_BULK_MAX_WAIT_SECONDS", "1800"))
+                )
+    return _admission_controller
@@ -0,0 +1,458 @@
+"""
+Asynchronous job subsystem for long-running GEE analyses.
+
+Synchronous analysis endpoints hold the client, any proxy in between and an
+API worker open for the whole Earth Engine computation (minutes for large
+ROIs). With ``async=true`` the /ndvi, /lst, /water and /lulc endpoints submit
+the analysis here instead and return a job id immediately. A worker pool runs
+the analysis; progress and partial results are published on the job, and
+clients poll ``GET /gee/jobs/{job_id}`` or subscribe to
+``GET /gee/jobs/{job_id}/events`` (server-sent events).
+
+Analysis code reports progress with report_progress(), which is a no-op
+outside a job, so the GEE services keep working unchanged when called
+synchronously. Finished jobs (result or error) are stored in SQLite so they
+can be retrieved later, also after a restart.
+
+``DELETE /gee/jobs/{job_id}`` cancels a job: a queued job never starts, and a
+running job stops at its next report_progress() call (the Earth Engine
+request in progress at that moment still completes).
+
+Configuration (environment):
+- GEE_JOB_WORKERS: size of the worker pool (default 4)
+- GEE_JOB_STORE_PATH: SQLite file for finished jobs (default backend/data/gee_jobs.sqlite3)
+- GEE_JOB_RESULT_TTL_SECONDS: how long finished jobs are kept (default 7 days)
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import contextvars
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = Path(__file__).parent.parent.parent / "data" / "gee_jobs.sqlite3"
+
+FINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+_current = threading.local()
+
+
+class JobCancelled(BaseException):
+    """Raised inside a job's analysis when the job was cancelled.
+
+    Derives from BaseException (like asyncio.CancelledError) so the services'
+    broad ``except Exception`` handlers do not turn it into an error result.
+    """
+
+
+def report_progress(progress: float, message: str = "", partial: Optional[Dict[str, Any]] = None) -> None:
+    """Publish progress of the job running on this thread (no-op outside a job).
+
+    Args:
+        progress: Completion percentage (0-100)
+        message: Human-readable stage description
+        partial: Partial result available so far (merged into the job's partial result)
+
+    Raises:
+        JobCancelled: If the job was cancelled
+    """
+    job_manager, job_id = getattr(_current, "job", (None, None))
+    if job_manager is not None:
+        if job_manager.cancel_requested(job_id):
+            raise JobCancelled(job_id)
+        job_manager.update(job_id, progress=progress, message=message, partial=partial)
+
+
+def is_error_result(result: Any) -> bool:
+    """Whether a GEE service result describes a failure.
+
+    Args:
+        result: Dictionary returned by a GEE service
+
+    Returns:
+        True if the service reported an error
+    """
+    if not isinstance(result, dict):
+        return True
+    return result.get("success") is False or bool(result.get("error"))
+
+
+class GEEJobManager:
+    """Worker pool and registry of asynchronous GEE analysis jobs."""
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        db_path: Optional[str] = None,
+        result_ttl_seconds: float = 7 * 24 * 3600
+    ):
+        """Initialize the job manager.
+
+        Args:
+            max_workers: Number of analyses running concurrently
+            db_path: SQLite file for finished jobs (None keeps them in memory only)
+            result_ttl_seconds: How long finished jobs are kept
+        """
+        self.max_workers = max_workers
+        self.result_ttl_seconds = result_ttl_seconds
+        self.db_path = str(db_path) if db_path else None
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gee-job")
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        # job_id -> (event loop, event) of each events() subscriber, woken on every change
+        self._watchers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if self.db_path:
+            try:
+                Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS gee_jobs ("
+                    "job_id TEXT PRIMARY KEY, analysis_type TEXT, status TEXT, job TEXT, finished_at REAL)"
+                )
+                self._conn.execute(
+                    "DELETE FROM gee_jobs WHERE finished_at < ?", (time.time() - self.result_ttl_seconds,)
+                )
+                self._conn.commit()
+                logger.info(f"💾 GEE job store at {self.db_path}")
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ GEE job store unavailable ({e}), keeping jobs in memory only")
+                self._conn = None
+
+    def submit(
+        self,
+        analysis_type: str,
+        fn: Callable[[], Dict[str, Any]],
+        params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Queue an analysis on the worker pool.
+
+        Args:
+            analysis_type: Analysis type ("ndvi", "lst", "water", "lulc", ...)
+            fn: Blocking function running the analysis and returning the service result
+            params: Request parameters recorded on the job (without the geometry)
+
+        Returns:
+            Snapshot of the new job
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "analysis_type": analysis_type,
+            "status": "queued",
+            "progress": 0.0,
+            "message": "Queued",
+            "params": params or {},
+            "partial": {},
+            "result": None,
+            "error": None,
+            "error_type": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "cancel_requested": False,
+            "version": 0
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+
+        # Run in a copy of the caller's context so the job's spans join the request's trace
+        self._executor.submit(contextvars.copy_context().run, self._run, job_id, fn)
+        logger.info(f"📥 Queued {analysis_type} job {job_id}")
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a snapshot of a job.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Job dictionary, or None if unknown (or expired)
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job, partial=dict(job["partial"]))
+
+        if self._conn is not None:
+            try:
+                row = self._conn.execute("SELECT job FROM gee_jobs WHERE job_id = ?", (job_id,)).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"GEE job store read failed: {e}")
+                row = None
+            if row is not None:
+                return json.loads(row[0])
+        return None
+
+    def list_jobs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """List the most recent jobs of this process (without results).
+
+        Args:
+            limit: Maximum number of jobs
+
+        Returns:
+            Job summaries, newest first
+        """
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda j: j["created_at"], reverse=True)[:limit]
+            return [
+                {key: job[key] for key in ("job_id", "analysis_type", "status", "progress", "message", "created_at", "finished_at")}
+                for job in jobs
+            ]
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a job.
+
+        A queued job is cancelled immediately. A running job is flagged and
+        stops at its next report_progress() call. Finished jobs are unchanged.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Snapshot of the job, or None if unknown (or expired)
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            status = job["status"] if job is not None else None
+            requested = status in ("queued", "running") and not job["cancel_requested"]
+            if requested:
+                job.update(cancel_requested=True, message="Cancelling")
+                job["version"] += 1
+
+        if requested and status == "queued":
+            self._finish(job_id, "cancelled", result=None)
+        elif requested:
+            logger.info(f"🛑 Cancellation requested for GEE job {job_id}")
+            self._notify(job_id)
+        return self.get(job_id)
+
+    def cancel_requested(self, job_id: str) -> bool:
+        """Whether a job has been asked to stop.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            True if cancel() was called for the job
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job is not None and job["cancel_requested"]
+
+    def update(
+        self,
+        job_id: str,
+        progress: Optional[float] = None,
+        message: Optional[str] = None,
+        partial: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Publish progress on a running job.
+
+        Args:
+            job_id: Job identifier
+            progress: Completion percentage (0-100, never decreases)
+            message: Human-readable stage description
+            partial: Partial result merged into the job's partial result
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] in FINAL_STATUSES:
+                return
+            if progress is not None:
+                job["progress"] = max(job["progress"], min(float(progress), 99.0))
+            if message:
+                job["message"] = message
+            if partial:
+                job["partial"].update(partial)
+            job["version"] += 1
+        self._notify(job_id)
+
+    async def events(self, job_id: str, poll_interval: float = 5.0) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yield a job snapshot whenever it changes, until it finishes.
+
+        Updates wake subscribers immediately, so the last event arrives as soon
+        as the analysis finishes.
+
+        Args:
+            job_id: Job identifier
+            poll_interval: Longest wait between change checks
+
+        Yields:
+            Job snapshots (the last one has a final status)
+        """
+        changed = asyncio.Event()
+        watcher = (asyncio.get_running_loop(), changed)
+        with self._lock:
+            self._watchers.setdefault(job_id, []).append(watcher)
+
+        try:
+            last_version = -1
+            while True:
+                changed.clear()
+                job = self.get(job_id)
+                if job is None:
+                    return
+                if job.get("version", 0) != last_version or job["status"] in FINAL_STATUSES:
+                    last_version = job.get("version", 0)
+                    yield job
+                if job["status"] in FINAL_STATUSES:
+                    return
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._lock:
+                watchers = self._watchers.get(job_id, [])
+                if watcher in watchers:
+                    watchers.remove(watcher)
+                if not watchers:
+                    self._watchers.pop(job_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get job counts per status.
+
+        Returns:
+            Dictionary with worker count and job counts
+        """
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"workers": self.max_workers, "jobs": counts, "persistent": self._conn is not None}
+
+    def _run(self, job_id: str, fn: Callable[[], Dict[str, Any]]) -> None:
+        """Execute a job on a worker thread."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["cancel_requested"]:
+                # Cancelled while queued
+                return
+            job.update(status="running", started_at=time.time(), message="Running analysis", progress=5.0)
+            job["version"] += 1
+        self._notify(job_id)
+
+        _current.job = (self, job_id)
+        try:
+            result = fn()
+            if self.cancel_requested(job_id):
+                self._finish(job_id, "cancelled", result=None)
+            elif is_error_result(result):
+                self._finish(job_id, "failed", result=None,
+                             error=str((result or {}).get("error", "Unknown error")),
+                             error_type=(result or {}).get("error_type", "unknown"))
+            else:
+                self._finish(job_id, "succeeded", result=result)
+        except JobCancelled:
+            self._finish(job_id, "cancelled", result=None)
+        except Exception as e:
+            if self.cancel_requested(job_id):
+                self._finish(job_id, "cancelled", result=None)
+            else:
+                logger.error(f"❌ GEE job {job_id} failed: {e}")
+                self._finish(job_id, "failed", result=None, error=str(e), error_type=type(e).__name__)
+        finally:
+            _current.job = (None, None)
+
+    def _finish(
+        self,
+        job_id: str,
+        status: str,
+        result: Optional[Dict[str, Any]],
+        error: Optional[str] = None,
+        error_type: Optional[str] = None
+    ) -> None:
+        """Record the outcome of a job and store it."""
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(
+                status=status,
+                progress=100.0 if status == "succeeded" else job["progress"],
+                message={"succeeded": "Completed", "cancelled": "Cancelled"}.get(status, f"Failed: {error}"),
+                result=result,
+                error=error,
+                error_type=error_type,
+                finished_at=time.time()
+            )
+            job["version"] += 1
+            snapshot = dict(job)
+            self._evict_finished()
+        self._notify(job_id)
+
+        duration = snapshot["finished_at"] - (snapshot["started_at"] or snapshot["created_at"])
+        icon = {"succeeded": "✅", "cancelled": "🛑"}.get(status, "❌")
+        logger.info(f"{icon} GEE job {job_id} {status} in {duration:.1f}s")
+
+        if self._conn is not None:
+            try:
+                with self._lock:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO gee_jobs (job_id, analysis_type, status, job, finished_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (job_id, snapshot["analysis_type"], status, json.dumps(snapshot, default=str), snapshot["finished_at"])
+                    )
+                    self._conn.commit()
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.warning(f"GEE job store write failed: {e}")
+
+    def _notify(self, job_id: str) -> None:
+        """Wake the events() subscribers of a job (called from worker threads)."""
+        with self._lock:
+            watchers = list(self._watchers.get(job_id, ()))
+        for loop, changed in watchers:
+            try:
+                loop.call_soon_threadsafe(changed.set)
+            except RuntimeError:
+                # Subscriber's event loop already closed
+                pass
+
+    def _evict_finished(self, max_finished: int = 200) -> None:
+        """Drop expired and the oldest finished jobs from memory (caller holds the lock).
+
+        Jobs stay fetchable from the store when one is configured; without a
+        store, results are in-memory only and the cap keeps them from piling up.
+        """
+        cutoff = time.time() - self.result_ttl_seconds
+        finished = [j for j in self._jobs.values() if j["status"] in FINAL_STATUSES]
+        finished.sort(key=lambda j: j["finished_at"])
+        excess = max(0, len(finished) - max_finished)
+        for index, job in enumerate(finished):
+            if index < excess or job["finished_at"] < cutoff:
+                del self._jobs[job["job_id"]]
+
+
+_job_manager: Optional[GEEJobManager] = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> GEEJobManager:
+    """Get the process-wide GEE job manager.
+
+    Returns:
+        Shared GEEJobManager configured from the environment
+    """
+    global _job_manager
+
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = GEEJobManager(
+                    max_workers=int(os.environ.get("GEE_JOB_WORKERS", "4")),
+                    db_path=os.environ.get("GEE_JOB_STORE_PATH", str(DEFAULT_STORE_PATH)) or None,
+                    result_ttl_seconds=float(os.environ.get("GEE_JOB_RESULT_TTL_SECONDS", 7 * 24 * 3600))
+                )
+    return _job_manager
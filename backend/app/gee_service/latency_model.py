@@ -0,0 +1,560 @@
+"""
+Learned latency model for GEE analyses.
+
+Timeouts, analysis scale and maxPixels used to come from hand-written area
+buckets. Every analysis run by the GEE service is now recorded with its
+features (analysis type, ROI area, scale, date span, image count) and outcome
+(duration, success). A log-linear regression per analysis type is fitted from
+that history:
+
+    log(seconds) = b0 + b1 log(area_km2) + b2 log(scale) + b3 log(days) + b4 log(1 + images)
+
+Runs that timed out or were cancelled are censored: they only show that the
+analysis takes at least that long. Dropping them would fit the model to the
+runs that happened to finish and under-predict exactly the slow requests the
+timeouts are for, so they are kept as lower bounds (a Tobit regression fitted
+by EM: each censored run contributes its expected log duration given that it
+exceeded the observed one).
+
+The residual spread gives a latency quantile, which drives
+- timeouts (the upper quantile, with a safety factor),
+- the finest scale whose predicted latency still meets the latency SLO,
+- whether a request should go to the async job path.
+
+Each recorded run also stores the prediction made before it ran, so the report
+(GET /gee/latency-model/report) shows the model's actual online error. Until
+an analysis type has enough history, callers fall back to their buckets.
+
+Configuration (environment):
+- LATENCY_MODEL_ENABLED: "true" (default) / "false"
+- LATENCY_MODEL_PATH: SQLite file with the run history (default backend/data/gee_latency.sqlite3)
+- LATENCY_MODEL_MIN_SAMPLES: successful runs needed before predicting (default 20; censored runs come on top)
+- LATENCY_SLO_SECONDS: latency target used to choose the scale (default 60)
+- LATENCY_ASYNC_THRESHOLD_SECONDS: predicted latency above which requests run as jobs (default 120)
+"""
+
+import os
+import math
+import time
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = Path(__file__).parent.parent.parent / "data" / "gee_latency.sqlite3"
+
+# Scales (m) considered when choosing parameters, finest usable first
+CANDIDATE_SCALES = (10, 20, 30, 60, 100, 120, 200, 250, 500, 1000)
+# Native resolution of the datasets behind each analysis
+MIN_SCALES = {"ndvi": 10, "lulc": 10, "water": 30, "lst": 1000, "uhi": 1000}
+
+# z-scores of the latency quantiles
+Z_P90 = 1.2816
+Z_P99 = 2.3263
+
+# EM iterations of the censored regression (stops early once the coefficients settle)
+CENSORED_EM_ITERATIONS = 100
+
+TIMEOUT_MARKERS = ("timed out", "timeout", "deadline exceeded")
+
+IMAGE_COUNT_KEYS = ("image_count", "collection_size", "images_used", "modis_images_used", "sentinel2_images_used")
+
+
+def find_image_count(result: Any, depth: int = 3) -> Optional[int]:
+    """Find the number of images an analysis used in its (nested) result.
+
+    Args:
+        result: GEE service result dictionary
+        depth: Nesting levels to search
+
+    Returns:
+        Image count, or None if the result does not report one
+    """
+    if not isinstance(result, dict) or depth < 0:
+        return None
+    for key in IMAGE_COUNT_KEYS:
+        value = result.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return int(value)
+    for value in result.values():
+        if isinstance(value, dict):
+            found = find_image_count(value, depth - 1)
+            if found is not None:
+                return found
+    return None
+
+
+def is_censored_run(result: Any, error: Optional[BaseException] = None) -> bool:
+    """Whether a failed run stopped before finishing (timed out or cancelled).
+
+    Args:
+        result: GEE service result dictionary (None if the run raised)
+        error: Exception raised by the run
+
+    Returns:
+        True if the run's duration is only a lower bound of its latency
+    """
+    if error is not None:
+        if isinstance(error, TimeoutError) or type(error).__name__ in ("JobCancelled", "CancelledError"):
+            return True
+        text = str(error)
+    elif isinstance(result, dict):
+        if result.get("error_type") == "timeout":
+            return True
+        text = str(result.get("error") or "")
+    else:
+        return False
+    return any(marker in text.lower() for marker in TIMEOUT_MARKERS)
+
+
+def _normal_hazard(a: np.ndarray) -> np.ndarray:
+    """Inverse Mills ratio phi(a) / (1 - Phi(a)) of the standard normal."""
+    survival = np.array([0.5 * math.erfc(x / math.sqrt(2.0)) for x in a])
+    density = np.exp(-0.5 * a * a) / math.sqrt(2.0 * math.pi)
+    # Far in the tail the ratio approaches a
+    return np.where(survival > 1e-12, density / np.maximum(survival, 1e-300), a)
+
+
+def _features(area_km2: float, scale: float, days: float, image_count: float) -> List[float]:
+    """Regression features of one run."""
+    return [
+        1.0,
+        math.log(max(area_km2, 0.01)),
+        math.log(max(scale, 1.0)),
+        math.log(max(days, 1.0)),
+        math.log1p(max(image_count, 0.0)),
+    ]
+
+
+class LatencyModel:
+    """Run history and per-analysis-type latency regressions."""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        min_samples: int = 20,
+        slo_seconds: float = 60,
+        async_threshold_seconds: float = 120,
+        max_history: int = 5000,
+        refit_every: int = 10,
+        ridge: float = 1e-2
+    ):
+        """Initialize the model.
+
+        Args:
+            db_path: SQLite file for the run history (None keeps it in memory)
+            min_samples: Successful runs of a type needed before predicting it (censored runs come on top)
+            slo_seconds: Latency target used by choose_parameters()
+            async_threshold_seconds: Predicted p90 latency above which should_run_async() is True
+            max_history: Most recent runs per type used for fitting
+            refit_every: New runs of a type before its regression is refitted
+            ridge: L2 regularization of the regression (keeps sparse histories stable)
+        """
+        self.db_path = str(db_path) if db_path else ":memory:"
+        self.min_samples = min_samples
+        self.slo_seconds = slo_seconds
+        self.async_threshold_seconds = async_threshold_seconds
+        self.max_history = max_history
+        self.refit_every = refit_every
+        self.ridge = ridge
+
+        self._lock = threading.Lock()
+        # Serializes refits so concurrent predictions do not all refit the same type
+        self._fit_lock = threading.Lock()
+        # analysis_type -> {"coef", "sigma", "samples", "censored", "images_per_day", "fitted_at"}
+        self._fits: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, int] = {}
+
+        if self.db_path != ":memory:":
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS gee_run_history ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, analysis_type TEXT, area_km2 REAL, scale REAL, "
+            "days REAL, image_count INTEGER, duration_s REAL, success INTEGER, predicted_s REAL, created_at REAL, "
+            "censored INTEGER DEFAULT 0)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(gee_run_history)")]
+        if "censored" not in columns:
+            # History recorded before censored runs were tracked
+            self._conn.execute("ALTER TABLE gee_run_history ADD COLUMN censored INTEGER DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_gee_run_history_type ON gee_run_history (analysis_type, id)")
+        self._conn.commit()
+
+    def record(
+        self,
+        analysis_type: str,
+        area_km2: float,
+        scale: float,
+        days: float,
+        duration_s: float,
+        success: bool,
+        image_count: Optional[int] = None,
+        predicted_s: Optional[float] = None,
+        censored: bool = False
+    ) -> None:
+        """Record one analysis run.
+
+        Args:
+            analysis_type: Analysis type ("ndvi", "lst", ...)
+            area_km2: ROI area
+            scale: Analysis scale in meters
+            days: Length of the analysed period
+            duration_s: Wall-clock duration of the run
+            success: Whether the analysis succeeded
+            image_count: Number of images used (if reported)
+            predicted_s: Median latency predicted before the run
+            censored: The run timed out or was cancelled (duration is a lower bound)
+        """
+        analysis_type = analysis_type.lower()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT INTO gee_run_history (analysis_type, area_km2, scale, days, image_count, duration_s, "
+                    "success, predicted_s, created_at, censored) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (analysis_type, area_km2, scale, days, image_count, duration_s, int(success), predicted_s,
+                     time.time(), int(censored and not success))
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Latency history write failed: {e}")
+                return
+            if success or censored:
+                self._pending[analysis_type] = self._pending.get(analysis_type, 0) + 1
+
+    def predict(
+        self,
+        analysis_type: str,
+        area_km2: float,
+        scale: float,
+        days: float,
+        image_count: Optional[int] = None,
+        z: float = 0.0
+    ) -> Optional[float]:
+        """Predict the latency of an analysis.
+
+        Args:
+            analysis_type: Analysis type
+            area_km2: ROI area
+            scale: Analysis scale in meters
+            days: Length of the analysed period
+            image_count: Number of images (estimated from history if None)
+            z: Quantile z-score (0 = median, Z_P90, Z_P99, ...)
+
+        Returns:
+            Predicted seconds, or None if the type has too little history
+        """
+        fit = self._fit(analysis_type.lower())
+        if fit is None:
+            return None
+        if image_count is None:
+            image_count = fit["images_per_day"] * max(days, 1.0)
+        log_seconds = float(np.dot(fit["coef"], _features(area_km2, scale, days, image_count)))
+        return math.exp(log_seconds + z * fit["sigma"])
+
+    def timeout_for(
+        self,
+        analysis_type: str,
+        area_km2: float,
+        scale: float,
+        days: float,
+        safety: float = 1.5,
+        minimum: float = 30,
+        maximum: float = 1200
+    ) -> Optional[int]:
+        """Timeout covering (almost) every run of this size.
+
+        Args:
+            analysis_type: Analysis type
+            area_km2: ROI area
+            scale: Analysis scale in meters
+            days: Length of the analysed period
+            safety: Factor applied to the p99 latency
+            minimum: Lower bound in seconds
+            maximum: Upper bound in seconds
+
+        Returns:
+            Timeout in seconds, or None if the type has too little history
+        """
+        p99 = self.predict(analysis_type, area_km2, scale, days, z=Z_P99)
+        if p99 is None:
+            return None
+        return int(min(max(p99 * safety, minimum), maximum))
+
+    def should_run_async(self, analysis_type: str, area_km2: float, scale: float, days: float) -> Optional[bool]:
+        """Whether an analysis is expected to outlast a synchronous request.
+
+        Returns:
+            True/False, or None if the type has too little history
+        """
+        p90 = self.predict(analysis_type, area_km2, scale, days, z=Z_P90)
+        if p90 is None:
+            return None
+        return p90 > self.async_threshold_seconds
+
+    def choose_parameters(
+        self,
+        analysis_type: str,
+        area_km2: float,
+        days: float,
+        slo_seconds: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Pick the finest scale whose p90 latency meets the SLO.
+
+        Args:
+            analysis_type: Analysis type
+            area_km2: ROI area
+            days: Length of the analysed period
+            slo_seconds: Latency target (default: the configured SLO)
+
+        Returns:
+            Dictionary with scale, maxPixels, timeout, exactComputation and the
+            predicted latency, or None if the type has too little history
+        """
+        analysis_type = analysis_type.lower()
+        slo_seconds = slo_seconds or self.slo_seconds
+        if self._fit(analysis_type) is None:
+            return None
+
+        scales = [s for s in CANDIDATE_SCALES if s >= MIN_SCALES.get(analysis_type, 10)] or [CANDIDATE_SCALES[-1]]
+        scale = scales[-1]
+        for candidate in scales:
+            if self.predict(analysis_type, area_km2, candidate, days, z=Z_P90) <= slo_seconds:
+                scale = candidate
+                break
+
+        pixels = area_km2 * 1e6 / (scale * scale)
+        predicted = self.predict(analysis_type, area_km2, scale, days)
+        return {
+            "scale": scale,
+            "maxPixels": float(min(max(pixels * 2, 1e7), 1e10)),
+            "timeout": self.timeout_for(analysis_type, area_km2, scale, days),
+            # Exact reductions are affordable when even the p90 is well within the SLO
+            "exactComputation": self.predict(analysis_type, area_km2, scale, days, z=Z_P90) <= slo_seconds / 2,
+            "predicted_seconds": round(predicted, 1),
+            "source": "latency_model"
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """Model coefficients and prediction error per analysis type.
+
+        Online error compares the prediction stored before each run with its
+        actual duration; held-out error refits on the older 80% of the
+        history and scores the newest 20%.
+
+        Returns:
+            Dictionary keyed by analysis type
+        """
+        with self._lock:
+            types = [row[0] for row in self._conn.execute("SELECT DISTINCT analysis_type FROM gee_run_history")]
+
+        report = {}
+        for analysis_type in sorted(types):
+            rows = self._history(analysis_type, fit_rows_only=False)
+            successes = [r for r in rows if r["success"]]
+            censored = [r for r in rows if r["censored"]]
+            fit = self._fit(analysis_type)
+
+            online = [(r["predicted_s"], r["duration_s"]) for r in successes if r["predicted_s"]]
+            held_out = None
+            if len(successes) >= max(self.min_samples, 10):
+                split = int(len(successes) * 0.8)
+                train, test = successes[:split], successes[split:]
+                coef, _, _ = self._regress(train)
+                held_out = [
+                    (math.exp(float(np.dot(coef, _features(r["area_km2"], r["scale"], r["days"], r["image_count"])))),
+                     r["duration_s"])
+                    for r in test
+                ]
+
+            report[analysis_type] = {
+                "runs": len(rows),
+                "successful_runs": len(successes),
+                "censored_runs": len(censored),
+                "failure_rate": round(1 - len(successes) / len(rows), 3) if rows else 0.0,
+                "timeout_rate": round(len(censored) / len(rows), 3) if rows else 0.0,
+                "model_ready": fit is not None,
+                "coefficients": dict(zip(
+                    ("intercept", "log_area", "log_scale", "log_days", "log1p_images"),
+                    [round(float(c), 4) for c in fit["coef"]]
+                )) if fit else None,
+                "log_residual_std": round(fit["sigma"], 4) if fit else None,
+                "online_error": _error_summary(online),
+                "held_out_error": _error_summary(held_out) if held_out is not None else None
+            }
+        return {
+            "min_samples": self.min_samples,
+            "slo_seconds": self.slo_seconds,
+            "async_threshold_seconds": self.async_threshold_seconds,
+            "analysis_types": report
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Get history sizes and fitted types.
+
+        Returns:
+            Dictionary with run counts per type and the fitted types
+        """
+        with self._lock:
+            counts = dict(self._conn.execute(
+                "SELECT analysis_type, COUNT(*) FROM gee_run_history GROUP BY analysis_type"
+            ).fetchall())
+            fitted = sorted(self._fits)
+        return {"runs": counts, "fitted": fitted, "min_samples": self.min_samples}
+
+    def _current_fit(self, analysis_type: str) -> Optional[Dict[str, Any]]:
+        """The stored regression if it is still fresh (caller holds the lock)."""
+        fit = self._fits.get(analysis_type)
+        if fit is not None and self._pending.get(analysis_type, 0) < self.refit_every:
+            return fit
+        return None
+
+    def _fit(self, analysis_type: str) -> Optional[Dict[str, Any]]:
+        """Current regression for a type, refitted when enough new runs arrived."""
+        with self._lock:
+            fit = self._current_fit(analysis_type)
+        if fit is not None:
+            return fit
+
+        with self._fit_lock:
+            with self._lock:
+                # Another thread may have refitted while this one waited
+                fit = self._current_fit(analysis_type)
+                if fit is not None:
+                    return fit
+                self._pending[analysis_type] = 0
+
+            rows = self._history(analysis_type)
+            finished = sum(1 for r in rows if not r["censored"])
+            if finished < self.min_samples:
+                with self._lock:
+                    self._fits.pop(analysis_type, None)
+                return None
+
+            coef, sigma, images_per_day = self._regress(rows)
+            fit = {
+                "coef": coef,
+                "sigma": sigma,
+                "samples": len(rows),
+                "censored": len(rows) - finished,
+                "images_per_day": images_per_day,
+                "fitted_at": time.time()
+            }
+            with self._lock:
+                self._fits[analysis_type] = fit
+
+        logger.info(
+            f"📈 Fitted {analysis_type} latency model on {len(rows)} runs ({len(rows) - finished} censored, "
+            f"log residual std {sigma:.2f})"
+        )
+        return fit
+
+    def _regress(self, rows: Sequence[Dict[str, Any]]):
+        """Ridge regression of log duration on the run features.
+
+        Censored runs (timed out / cancelled) enter as lower bounds: starting
+        from their observed durations, each EM step replaces them with the
+        expected log duration of a run that exceeded its observed one under
+        the current fit, then refits.
+        """
+        images_per_day = float(np.median([
+            r["image_count"] / max(r["days"], 1.0) for r in rows if r["image_count"] is not None
+        ] or [0.0]))
+        for r in rows:
+            if r["image_count"] is None:
+                r["image_count"] = images_per_day * max(r["days"], 1.0)
+
+        X = np.array([_features(r["area_km2"], r["scale"], r["days"], r["image_count"]) for r in rows])
+        bounds = np.log(np.maximum([r["duration_s"] for r in rows], 0.01))
+        censored = np.array([bool(r.get("censored")) for r in rows])
+
+        penalty = self.ridge * np.eye(X.shape[1])
+        penalty[0, 0] = 0.0  # Do not shrink the intercept
+        dof = max(len(rows) - X.shape[1], 1)
+
+        y = bounds.copy()
+        # Conditional variance of the imputed censored durations (part of the residual spread)
+        censored_variance = 0.0
+        coef = None
+        for _ in range(CENSORED_EM_ITERATIONS if censored.any() else 1):
+            previous = coef
+            coef = np.linalg.solve(X.T @ X + penalty, X.T @ y)
+            residuals = y - X @ coef
+            sigma = max(float(math.sqrt((float(residuals @ residuals) + censored_variance) / dof)), 1e-3)
+            if not censored.any() or (previous is not None and np.max(np.abs(coef - previous)) < 1e-4):
+                break
+            mean = X[censored] @ coef
+            a = (bounds[censored] - mean) / sigma
+            hazard = _normal_hazard(a)
+            y[censored] = mean + sigma * hazard
+            censored_variance = float(np.sum(sigma * sigma * np.maximum(1 + a * hazard - hazard * hazard, 0.0)))
+        return coef, sigma, images_per_day
+
+    def _history(self, analysis_type: str, fit_rows_only: bool = True) -> List[Dict[str, Any]]:
+        """Most recent runs of a type, oldest first.
+
+        Args:
+            analysis_type: Analysis type
+            fit_rows_only: Only successful and censored runs (other failures say nothing about latency)
+        """
+        query = (
+            "SELECT area_km2, scale, days, image_count, duration_s, success, predicted_s, censored "
+            "FROM gee_run_history WHERE analysis_type = ?"
+            + (" AND (success = 1 OR censored = 1)" if fit_rows_only else "")
+            + " ORDER BY id DESC LIMIT ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(query, (analysis_type, self.max_history)).fetchall()
+        keys = ("area_km2", "scale", "days", "image_count", "duration_s", "success", "predicted_s", "censored")
+        return [dict(zip(keys, row)) for row in reversed(rows)]
+
+
+def _error_summary(pairs: Optional[List]) -> Optional[Dict[str, Any]]:
+    """Absolute percentage error statistics of (predicted, actual) pairs."""
+    if not pairs:
+        return None
+    errors = np.array([abs(predicted - actual) / max(actual, 0.01) for predicted, actual in pairs])
+    ratios = np.array([predicted / max(actual, 0.01) for predicted, actual in pairs])
+    return {
+        "samples": len(pairs),
+        "mape": round(float(errors.mean()), 3),
+        "median_ape": round(float(np.median(errors)), 3),
+        "p90_ape": round(float(np.percentile(errors, 90)), 3),
+        "median_predicted_to_actual": round(float(np.median(ratios)), 3)
+    }
+
+
+_latency_model: Optional[LatencyModel] = None
+_latency_model_lock = threading.Lock()
+
+
+def get_latency_model() -> Optional[LatencyModel]:
+    """Get the process-wide latency model.
+
+    Returns:
+        Shared LatencyModel, or None if disabled via LATENCY_MODEL_ENABLED
+    """
+    global _latency_model
+
+    if os.environ.get("LATENCY_MODEL_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+
+    if _latency_model is None:
+        with _latency_model_lock:
+            if _latency_model is None:
+                try:
+                    _latency_model = LatencyModel(
+                        db_path=os.environ.get("LATENCY_MODEL_PATH", str(DEFAULT_STORE_PATH)) or None,
+                        min_samples=int(os.environ.get("LATENCY_MODEL_MIN_SAMPLES", "20")),
+                        slo_seconds=float(os.environ.get("LATENCY_SLO_SECONDS", "60")),
+                        async_threshold_seconds=float(os.environ.get("LATENCY_ASYNC_THRESHOLD_SECONDS", "120"))
+                    )
+                except sqlite3.Error as e:
+                    logger.warning(f"⚠️ Latency history unavailable ({e}), keeping it in memory only")
+                    _latency_model = LatencyModel(db_path=None)
+    return _latency_model
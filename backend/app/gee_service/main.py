@@ -8,14 +8,19 @@ This service replaces heavy reduceRegion operations with:
 - Single dataset per endpoint for optimal performance
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, Any, Optional, List
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, model_validator
+from typing import Dict, Any, Optional, List, Callable
 import logging
+import json
+import time
 import os
 import sys
 import asyncio
+import contextvars
+import functools
 from concurrent.futures import ThreadPoolExecutor
 
 # Simplified GEE initialization - supports both file path and JSON string
@@ -91,6 +96,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Continue the caller's trace (traceparent header) and time each request
+try:
+    from ..utils.tracing import TracingMiddleware, get_tracer
+except ImportError:
+    from app.utils.tracing import TracingMiddleware, get_tracer
+
+app.add_middleware(TracingMiddleware, service_name="gee")
+
 # Logger already configured above
 
 # Global GEE status
@@ -119,8 +132,22 @@ async def startup_event():
         logger.warning(f"⚠️ Startup error: {e}")
         logger.info("💡 Service will run in fallback mode - endpoints will return service unavailable")
 
+# Request bodies may carry geometries in the compact wire format
+try:
+    from ..utils.geojson_utils import decode_geometries
+except ImportError:
+    from app.utils.geojson_utils import decode_geometries
+
 # Request/Response Models
-class GEERequest(BaseModel):
+class GeometryPayload(BaseModel):
+    """Request body whose geometries may be encoded polylines (X-Geometry-Encoding)"""
+    
+    @model_validator(mode="before")
+    @classmethod
+    def decode_compact_geometries(cls, data: Any) -> Any:
+        return decode_geometries(data) if isinstance(data, dict) else data
+
+class GEERequest(GeometryPayload):
     """Base request model for GEE analysis"""
     geometry: Dict[str, Any]  # GeoJSON geometry
     startDate: str = "2023-01-01"
@@ -155,7 +182,7 @@ class LSTSampleRequest(BaseModel):
     endDate: str = "2023-08-31"
     scale: int = 1000
 
-class LSTGridRequest(BaseModel):
+class LSTGridRequest(GeometryPayload):
     """Request model to generate LST vector grid over ROI."""
     roi: Dict[str, Any]  # GeoJSON geometry
     cellSizeKm: float = 1.0  # Grid cell size in km
@@ -179,7 +206,7 @@ class NDVISampleRequest(BaseModel):
     scale: int = 30
     cloudThreshold: float = 20
 
-class NDVIGridRequest(BaseModel):
+class NDVIGridRequest(GeometryPayload):
     """Request model to generate NDVI vector grid over ROI."""
     roi: Dict[str, Any]  # GeoJSON geometry
     cellSizeKm: float = 1.0  # Grid cell size in km
@@ -196,14 +223,14 @@ class NDVIBatchSampleRequest(BaseModel):
     scale: int = 30
     cloudThreshold: float = 20
 
-class WaterRequest(BaseModel):
+class WaterRequest(GeometryPayload):
     """Water analysis request parameters"""
     roi: Dict[str, Any]  # Region of interest (Polygon or Point)
     year: int = None  # Year for analysis (default: current year)
     threshold: int = 20  # Water occurrence threshold (default: 20%)
     include_seasonal: bool = True  # Include seasonal analysis
 
-class WaterChangeRequest(BaseModel):
+class WaterChangeRequest(GeometryPayload):
     """Water change analysis request parameters"""
     roi: Dict[str, Any]  # Region of interest
     start_year: int  # Start year for comparison
@@ -256,6 +283,11 @@ async def root():
             "/water/analyze",
             "/water/change",
             "/water/quality",
+            "/gee/jobs",
+            "/gee/jobs/{job_id}",
+            "/gee/jobs/{job_id}/events",
+            "/gee/admission",
+            "/gee/latency-model/report",
             "/docs"
         ]
     }
@@ -329,8 +361,251 @@ except ImportError as general_import_error:
             def analyze_water_presence(**kwargs):
                 raise Exception(f"WaterService fallback import failed: {water_fallback_error}")
 
+# Asynchronous job API and admission control
+try:
+    from .jobs import get_job_manager
+    from .admission import (
+        AdmissionRejected, AdmissionTicket, get_admission_controller, estimate_cost, date_span_days
+    )
+    from .jobs import is_error_result
+    from .latency_model import get_latency_model, find_image_count, is_censored_run
+    from ..utils.geojson_utils import geometry_area_km2
+except ImportError:
+    from jobs import get_job_manager
+    from admission import (
+        AdmissionRejected, AdmissionTicket, get_admission_controller, estimate_cost, date_span_days
+    )
+    from jobs import is_error_result
+    from latency_model import get_latency_model, find_image_count, is_censored_run
+    from app.utils.geojson_utils import geometry_area_km2
+
+def admission_http_error(error: AdmissionRejected) -> HTTPException:
+    """Map an admission rejection to an HTTP error with Retry-After."""
+    return HTTPException(
+        status_code=error.status_code,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+def admission_request(
+    analysis_type: str,
+    geometry: Dict[str, Any],
+    scale: Optional[float],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    http_request: Request,
+    async_mode: bool
+) -> Optional[Dict[str, Any]]:
+    """
+    Describe an analysis for admission control (None when admission control is off).
+    
+    Requests are interactive unless they run as jobs; callers can override this
+    with the X-Request-Priority header ("interactive" / "bulk"). Per-user caps
+    use the X-User-Id header, or the client address.
+    """
+    if get_admission_controller() is None:
+        return None
+    
+    priority = http_request.headers.get("X-Request-Priority", "").lower()
+    interactive = priority == "interactive" if priority in ("interactive", "bulk") else not async_mode
+    user = http_request.headers.get("X-User-Id") or (http_request.client.host if http_request.client else "anonymous")
+    cost = estimate_cost(geometry_area_km2(geometry), scale, date_span_days(start_date, end_date))
+    return {"analysis_type": analysis_type, "cost": cost, "user": user, "interactive": interactive}
+
+def admit_analysis(admission: Optional[Dict[str, Any]]) -> Optional[AdmissionTicket]:
+    """Request an admission ticket for a synchronous analysis (rejects fast with 429 when saturated)."""
+    if admission is None:
+        return None
+    try:
+        return get_admission_controller().request(**admission)
+    except AdmissionRejected as e:
+        raise admission_http_error(e)
+
+def with_latency_recording(
+    analysis_type: str,
+    run: Callable[[], Dict[str, Any]],
+    geometry: Dict[str, Any],
+    scale: Optional[float],
+    start_date: Optional[str],
+    end_date: Optional[str]
+) -> Callable[[], Dict[str, Any]]:
+    """
+    Wrap an analysis so it runs in a tracing span and its features, duration
+    and outcome feed the latency model.
+    
+    The model's prediction is taken before the run, so the report can show the
+    error callers actually experienced. Runs that time out or are cancelled are
+    recorded as censored (their duration is a lower bound).
+    """
+    model = get_latency_model()
+    area_km2 = geometry_area_km2(geometry)
+    scale = scale or 30
+    days = date_span_days(start_date, end_date) or 1
+    predicted = model.predict(analysis_type, area_km2, scale, days) if model is not None else None
+    attributes = {"gee.analysis_type": analysis_type, "gee.area_km2": round(area_km2, 1), "gee.scale": scale, "gee.days": days}
+    
+    def recorded_run() -> Dict[str, Any]:
+        started = time.time()
+        result = None
+        error = None
+        with get_tracer().span(f"gee.compute.{analysis_type}", attributes=attributes) as span:
+            try:
+                result = run()
+                if span is not None and is_error_result(result):
+                    span.set_error((result or {}).get("error", "analysis failed"))
+                return result
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                if model is not None:
+                    success = result is not None and not is_error_result(result)
+                    model.record(
+                        analysis_type, area_km2, scale, days,
+                        duration_s=time.time() - started,
+                        success=success,
+                        image_count=find_image_count(result),
+                        predicted_s=predicted,
+                        censored=not success and is_censored_run(result, error)
+                    )
+    
+    return recorded_run
+
+async def run_admitted(ticket: Optional[AdmissionTicket], run: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """Run a blocking analysis on a worker thread once its ticket is granted."""
+    # Worker threads run in a copy of this context so the analysis span joins the request's trace
+    run = functools.partial(contextvars.copy_context().run, run)
+    if ticket is None:
+        return await asyncio.get_event_loop().run_in_executor(None, run)
+    try:
+        return await get_admission_controller().run(ticket, run)
+    except AdmissionRejected as e:
+        raise admission_http_error(e)
+
+def submit_analysis_job(
+    analysis_type: str,
+    run: Callable[[], Dict[str, Any]],
+    request: BaseModel,
+    geometry_field: str = "geometry",
+    admission: Optional[Dict[str, Any]] = None
+) -> JSONResponse:
+    """
+    Submit an analysis to the job worker pool and return its job id (202 Accepted).
+    
+    The admission ticket is requested by the job worker right before the
+    analysis runs, not at submit time: a ticket granted to a job still waiting
+    for a worker would hold an analysis slot while the workers block on
+    tickets of their own. run_sync() releases the ticket when the analysis ends.
+    """
+    if admission is not None:
+        admitted_run = run
+        
+        def run() -> Dict[str, Any]:
+            controller = get_admission_controller()
+            return controller.run_sync(controller.request(**admission), admitted_run)
+    
+    job = get_job_manager().submit(
+        analysis_type,
+        run,
+        params=request.model_dump(exclude={geometry_field})
+    )
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job["job_id"],
+            "analysis_type": analysis_type,
+            "status": job["status"],
+            "status_url": f"/gee/jobs/{job['job_id']}",
+            "events_url": f"/gee/jobs/{job['job_id']}/events"
+        }
+    )
+
+@app.get("/gee/admission")
+async def get_admission_status():
+    """Running and queued GEE analyses, admission counters and limits."""
+    admission = get_admission_controller()
+    if admission is None:
+        return {"enabled": False}
+    return {"enabled": True, **admission.stats()}
+
+@app.get("/gee/latency-model/report")
+async def get_latency_model_report():
+    """
+    Latency model coefficients and prediction error per analysis type
+    
+    Returns:
+    - Run counts and failure rates
+    - Fitted coefficients and residual spread
+    - Online error (prediction made before each run vs. its duration)
+    - Held-out error (refit on older runs, scored on the newest)
+    """
+    model = get_latency_model()
+    if model is None:
+        return {"enabled": False}
+    return {"enabled": True, **await asyncio.get_event_loop().run_in_executor(None, model.report)}
+
+@app.get("/gee/jobs")
+async def list_gee_jobs(limit: int = 50):
+    """List recent analysis jobs of this worker and job counts per status."""
+    job_manager = get_job_manager()
+    return {"jobs": job_manager.list_jobs(limit), "stats": job_manager.stats()}
+
+@app.get("/gee/jobs/{job_id}")
+async def get_gee_job(job_id: str):
+    """
+    Get the status of an analysis job
+    
+    Returns:
+    - Status (queued/running/succeeded/failed/cancelled), progress and stage message
+    - Partial results published so far
+    - The full analysis result once the job succeeded, or the error
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+    return job
+
+@app.delete("/gee/jobs/{job_id}")
+async def cancel_gee_job(job_id: str):
+    """
+    Cancel an analysis job
+    
+    A queued job never starts; a running job stops at its next progress
+    checkpoint. Finished jobs are returned unchanged.
+    """
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+    return job
+
+@app.get("/gee/jobs/{job_id}/events")
+async def stream_gee_job_events(job_id: str):
+    """Stream job updates as server-sent events until the job finishes."""
+    job_manager = get_job_manager()
+    if job_manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+    
+    async def generate_job_events():
+        async for job in job_manager.events(job_id):
+            event_type = job["status"] if job["status"] in ("succeeded", "failed", "cancelled") else "progress"
+            yield f"data: {json.dumps({'type': event_type, **job}, default=str)}\n\n"
+    
+    return StreamingResponse(
+        generate_job_events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
 @app.post("/lulc/dynamic-world", response_model=TileResponse)
-async def analyze_lulc_dynamic_world(request: LULCRequest):
+async def analyze_lulc_dynamic_world(
+    request: LULCRequest,
+    http_request: Request,
+    async_mode: bool = Query(False, alias="async", description="Run as a background job and return its id")
+):
     """
     High-performance LULC analysis using Google Dynamic World
     
@@ -359,9 +634,8 @@ async def analyze_lulc_dynamic_world(request: LULCRequest):
     
     logger.info(f"🚀 Starting LULC analysis for geometry: {request.geometry.get('type', 'Unknown')}")
     
-    try:
-        # Call the optimized LULC service
-        result = LULCService.analyze_dynamic_world(
+    def run_lulc() -> Dict[str, Any]:
+        return LULCService.analyze_dynamic_world(
             geometry=request.geometry,
             start_date=request.startDate,
             end_date=request.endDate,
@@ -371,6 +645,18 @@ async def analyze_lulc_dynamic_world(request: LULCRequest):
             exact_computation=request.exactComputation,
             include_median_vis=request.includeMedianVis
         )
+    
+    run_lulc = with_latency_recording("lulc", run_lulc, request.geometry, request.scale,
+                                    request.startDate, request.endDate)
+    admission = admission_request("lulc", request.geometry, request.scale, request.startDate, request.endDate,
+                                 http_request, async_mode)
+    if async_mode:
+        return submit_analysis_job("lulc", run_lulc, request, admission=admission)
+    ticket = admit_analysis(admission)
+    
+    try:
+        # Call the optimized LULC service
+        result = await run_admitted(ticket, run_lulc)
         
         if not result.get("success", False):
             # Handle service-level errors
@@ -398,7 +684,11 @@ async def analyze_lulc_dynamic_world(request: LULCRequest):
         )
 
 @app.post("/ndvi/vegetation-analysis", response_model=TileResponse)
-async def analyze_ndvi_vegetation(request: NDVIRequest):
+async def analyze_ndvi_vegetation(
+    request: NDVIRequest,
+    http_request: Request,
+    async_mode: bool = Query(False, alias="async", description="Run as a background job and return its id")
+):
     """
     High-performance NDVI vegetation analysis using Sentinel-2
     
@@ -433,6 +723,26 @@ async def analyze_ndvi_vegetation(request: NDVIRequest):
     
     logger.info("✅ GEE checks passed, proceeding with analysis")
     
+    def run_ndvi() -> Dict[str, Any]:
+        return NDVIService.analyze_ndvi(
+            geometry=request.geometry,
+            start_date=request.startDate,
+            end_date=request.endDate,
+            cloud_threshold=request.cloudThreshold,
+            scale=request.scale,
+            max_pixels=request.maxPixels,
+            include_time_series=request.includeTimeSeries,
+            exact_computation=request.exactComputation
+        )
+    
+    run_ndvi = with_latency_recording("ndvi", run_ndvi, request.geometry, request.scale,
+                                    request.startDate, request.endDate)
+    admission = admission_request("ndvi", request.geometry, request.scale, request.startDate, request.endDate,
+                                 http_request, async_mode)
+    if async_mode:
+        return submit_analysis_job("ndvi", run_ndvi, request, admission=admission)
+    ticket = admit_analysis(admission)
+    
     try:
         # Debug: Log all parameters
         logger.info(f"📊 NDVI Request parameters:")
@@ -463,19 +773,7 @@ async def analyze_ndvi_vegetation(request: NDVIRequest):
             # Add timeout to prevent hanging
             import asyncio
             result = await asyncio.wait_for(
-                asyncio.get_event_loop().run_in_executor(
-                    None,
-                    lambda: NDVIService.analyze_ndvi(
-                        geometry=request.geometry,
-                        start_date=request.startDate,
-                        end_date=request.endDate,
-                        cloud_threshold=request.cloudThreshold,
-                        scale=request.scale,
-                        max_pixels=request.maxPixels,
-                        include_time_series=request.includeTimeSeries,
-                        exact_computation=request.exactComputation
-                    )
-                ),
+                run_admitted(ticket, run_ndvi),
                 timeout=300  # 5 minute timeout
             )
             logger.info("✅ NDVIService.analyze_ndvi completed successfully")
@@ -716,7 +1014,11 @@ async def sample_lst_batch(request: LSTBatchSampleRequest):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @app.post("/lst/land-surface-temperature", response_model=TileResponse)
-async def analyze_lst(request: LSTRequest):
+async def analyze_lst(
+    request: LSTRequest,
+    http_request: Request,
+    async_mode: bool = Query(False, alias="async", description="Run as a background job and return its id")
+):
     """
     Analyze Land Surface Temperature (LST) using MODIS MOD11A2 data.
     
@@ -744,17 +1046,28 @@ async def analyze_lst(request: LSTRequest):
             "area_km2": 0  # Will be calculated by service
         }
         
+        def run_lst() -> Dict[str, Any]:
+            return LSTService.analyze_lst_with_polygon(
+                roi_data=roi_data,
+                start_date=request.startDate,
+                end_date=request.endDate,
+                include_uhi=request.includeUHI,
+                include_time_series=request.includeTimeSeries,
+                scale=request.scale,
+                max_pixels=request.maxPixels,
+                exact_computation=request.exactComputation
+            )
+        
+        run_lst = with_latency_recording("lst", run_lst, request.geometry, request.scale,
+                                       request.startDate, request.endDate)
+        admission = admission_request("lst", request.geometry, request.scale, request.startDate, request.endDate,
+                                     http_request, async_mode)
+        if async_mode:
+            return submit_analysis_job("lst", run_lst, request, admission=admission)
+        ticket = admit_analysis(admission)
+        
         # Call LST service
-        result = LSTService.analyze_lst_with_polygon(
-            roi_data=roi_data,
-            start_date=request.startDate,
-            end_date=request.endDate,
-            include_uhi=request.includeUHI,
-            include_time_series=request.includeTimeSeries,
-            scale=request.scale,
-            max_pixels=request.maxPixels,
-            exact_computation=request.exactComputation
-        )
+        result = await run_admitted(ticket, run_lst)
         
         if not result.get("success", False):
             # Handle service-level errors
@@ -791,7 +1104,11 @@ async def analyze_lst(request: LSTRequest):
         )
 
 @app.post("/lst/urban-heat-island", response_model=TileResponse)
-async def analyze_uhi(request: LSTRequest):
+async def analyze_uhi(
+    request: LSTRequest,
+    http_request: Request,
+    async_mode: bool = Query(False, alias="async", description="Run as a background job and return its id")
+):
     """
     Analyze Urban Heat Island (UHI) intensity using LST data.
     
@@ -818,17 +1135,28 @@ async def analyze_uhi(request: LSTRequest):
             "area_km2": 0
         }
         
+        def run_uhi() -> Dict[str, Any]:
+            return LSTService.analyze_lst_with_polygon(
+                roi_data=roi_data,
+                start_date=request.startDate,
+                end_date=request.endDate,
+                include_uhi=True,  # Force UHI calculation
+                include_time_series=request.includeTimeSeries,
+                scale=request.scale,
+                max_pixels=request.maxPixels,
+                exact_computation=request.exactComputation
+            )
+        
+        run_uhi = with_latency_recording("uhi", run_uhi, request.geometry, request.scale,
+                                       request.startDate, request.endDate)
+        admission = admission_request("uhi", request.geometry, request.scale, request.startDate, request.endDate,
+                                     http_request, async_mode)
+        if async_mode:
+            return submit_analysis_job("uhi", run_uhi, request, admission=admission)
+        ticket = admit_analysis(admission)
+        
         # Call LST service with UHI enabled
-        result = LSTService.analyze_lst_with_polygon(
-            roi_data=roi_data,
-            start_date=request.startDate,
-            end_date=request.endDate,
-            include_uhi=True,  # Force UHI calculation
-            include_time_series=request.includeTimeSeries,
-            scale=request.scale,
-            max_pixels=request.maxPixels,
-            exact_computation=request.exactComputation
-        )
+        result = await run_admitted(ticket, run_uhi)
         
         if not result.get("success", False):
             # Handle service-level errors
@@ -865,7 +1193,11 @@ async def analyze_uhi(request: LSTRequest):
         )
 
 @app.post("/water/analyze")
-async def analyze_water_presence(request: WaterRequest):
+async def analyze_water_presence(
+    request: WaterRequest,
+    http_request: Request,
+    async_mode: bool = Query(False, alias="async", description="Run as a background job and return its id")
+):
     """
     Analyze water presence using JRC Global Surface Water dataset
     
@@ -896,15 +1228,25 @@ async def analyze_water_presence(request: WaterRequest):
     
     logger.info(f"🌊 Starting water analysis for ROI: {request.roi.get('type', 'Unknown')}")
     
-    try:
+    def run_water() -> Dict[str, Any]:
         # Create water service instance and call the method
         water_service = WaterService()
-        result = water_service.analyze_water_presence(
+        return water_service.analyze_water_presence(
             roi=request.roi,
             year=request.year,
             threshold=request.threshold,
             include_seasonal=request.include_seasonal
         )
+    
+    # JRC occurrence is a single image analysed at 30 m, so the date span does not add cost
+    run_water = with_latency_recording("water", run_water, request.roi, 30, None, None)
+    admission = admission_request("water", request.roi, 30, None, None, http_request, async_mode)
+    if async_mode:
+        return submit_analysis_job("water", run_water, request, geometry_field="roi", admission=admission)
+    ticket = admit_analysis(admission)
+    
+    try:
+        result = await run_admitted(ticket, run_water)
         
         if "error" in result:
             raise HTTPException(
@@ -46,6 +46,11 @@ except Exception as e:
     logger.error(f"❌ Failed to initialize Earth Engine: {e}")
     logger.info("💡 Run 'earthengine authenticate' to set up user credentials.")
 
+try:
+    from ..jobs import report_progress
+except ImportError:
+    from app.gee_service.jobs import report_progress
+
 class LSTService:
     """
     Advanced Land Surface Temperature analysis service using MODIS data.
@@ -496,6 +501,7 @@ class LSTService:
             
             # Calculate polygon area
             polygon_area_m2 = ee_polygon.area(maxError=1000).getInfo()
+            report_progress(20, "Median LST composite built")
             polygon_area_km2 = polygon_area_m2 / 1_000_000
             
             logger.info(f"🌡️ Polygon area: {polygon_area_km2:.2f} km²")
@@ -529,6 +535,8 @@ class LSTService:
                     "LST_stdDev": 0.0
                 }
             
+            report_progress(40, "LST statistics computed", {"lst_stats": formatted_lst_stats})
+            
             # Calculate UHI intensity if requested
             uhi_intensity = 0.0
             uhi_details = {}
@@ -539,6 +547,7 @@ class LSTService:
                 )
                 uhi_intensity = uhi_result.get("intensity", 0.0)
                 uhi_details = uhi_result.get("details", {})
+                report_progress(70, "Urban heat island intensity computed", {"uhi_intensity": uhi_intensity})
             
             # Generate visualization tiles
             vis_params = {
@@ -1070,6 +1079,8 @@ class LSTService:
                         "uhi_intensity": uhi_intensity,
                         "uhi_details": uhi_details
                     })
+                    report_progress(20 + 60 * (i + 1) / len(geometry_tiles),
+                                    f"Reduced tile {i + 1}/{len(geometry_tiles)}")
                     
                 except Exception as tile_e:
                     logger.error(f"Error processing tile {i+1}: {tile_e}")
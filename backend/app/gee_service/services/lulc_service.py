@@ -27,6 +27,11 @@ except Exception as e:
     logger.error(f"❌ Failed to initialize Earth Engine: {e}")
     logger.info("💡 Run 'earthengine authenticate' to set up user credentials.")
 
+try:
+    from ..jobs import report_progress
+except ImportError:
+    from app.gee_service.jobs import report_progress
+
 
 class LULCService:
     """High-performance LULC analysis service"""
@@ -291,6 +296,7 @@ class LULCService:
             # Get collection metadata
             collection_size = dw_collection.size().getInfo()
             logger.info(f"Found {collection_size} images in collection")
+            report_progress(20, f"Found {collection_size} Dynamic World images")
             
             # Filter by confidence with fallback
             dw_confident = dw_collection.select(['label', 'confidence']) \
@@ -307,6 +313,7 @@ class LULCService:
                 confidence_threshold_used = confidence_threshold
             
             logger.info(f"Using {confident_size} images after confidence filtering")
+            report_progress(30, f"Filtered to {confident_size} confident images")
             
             # Get the mode (most frequent class) for the time period
             logger.info("Computing mode across time period...")
@@ -338,6 +345,7 @@ class LULCService:
             histogram_method = histogram_data["method_used"]
             
             logger.info(f"Histogram computed using method: {histogram_method}")
+            report_progress(60, "Land cover histogram reduced")
             
             # Process histogram to get percentages (guaranteed to have data)
             total_pixels = sum(histogram.values())
@@ -29,6 +29,11 @@ except Exception as e:
     logger.error(f"❌ Failed to initialize Earth Engine: {e}")
     logger.info("💡 Run 'earthengine authenticate' to set up user credentials.")
 
+try:
+    from ..jobs import report_progress
+except ImportError:
+    from app.gee_service.jobs import report_progress
+
 
 class NDVIService:
     """High-performance NDVI analysis service with time-series capabilities"""
@@ -905,6 +910,7 @@ class NDVIService:
             
             collection_size = s2_collection.size().getInfo()
             logger.info(f"Found {collection_size} Sentinel-2 images")
+            report_progress(20, f"Found {collection_size} Sentinel-2 images")
             
             if collection_size == 0:
                 return {
@@ -976,6 +982,7 @@ class NDVIService:
             
             print(f"🔍 Polygon area: {polygon_area_km2:.2f} km²")
             logger.info(f"🔍 Polygon area: {polygon_area_km2:.2f} km²")
+            report_progress(30, "Median NDVI composite built")
             
             # Compute NDVI histogram using polygon geometry
             print(f"🔍 Computing NDVI histogram...")
@@ -998,6 +1005,7 @@ class NDVIService:
             
             print(f"🔍 Computing vegetation distribution...")
             vegetation_stats = NDVIService._analyze_vegetation_distribution(histogram)
+            report_progress(50, "NDVI histogram computed", {"vegetation_distribution": vegetation_stats})
             print(f"🔍 Vegetation distribution calculated")
             logger.info(f"🔍 Vegetation stats: {vegetation_stats}")
             
@@ -1189,6 +1197,8 @@ class NDVIService:
                             histogram_data["histogram"]
                         )
                     })
+                    report_progress(20 + 60 * (i + 1) / len(geometry_tiles),
+                                    f"Reduced tile {i + 1}/{len(geometry_tiles)}")
                     
                 except Exception as e:
                     logger.warning(f"Error processing tile {i+1}: {e}")
@@ -1416,6 +1426,7 @@ class NDVIService:
             # Get collection metadata
             collection_size = s2_collection.size().getInfo()
             logger.info(f"Found {collection_size} Sentinel-2 images")
+            report_progress(20, f"Found {collection_size} Sentinel-2 images")
             
             if collection_size == 0:
                 return {
@@ -1450,6 +1461,7 @@ class NDVIService:
             roi_area_km2 = roi_area_m2 / 1_000_000
             
             logger.info(f"ROI area: {roi_area_km2:.2f} km²")
+            report_progress(30, "Median NDVI composite built")
             
             # Compute NDVI histogram
             logger.info("Computing NDVI histogram...")
@@ -1466,6 +1478,7 @@ class NDVIService:
             
             # Process histogram to get vegetation categories
             vegetation_stats = NDVIService._analyze_vegetation_distribution(histogram)
+            report_progress(50, "NDVI histogram computed", {"vegetation_distribution": vegetation_stats})
             
             # Compute basic NDVI statistics
             ndvi_stats = median_ndvi.reduceRegion(
@@ -33,6 +33,11 @@ except Exception as e:
     logger.error(f"❌ Failed to initialize Earth Engine: {e}")
     logger.info("💡 Run 'earthengine authenticate' to set up user credentials.")
 
+try:
+    from ..jobs import report_progress
+except ImportError:
+    from app.gee_service.jobs import report_progress
+
 
 class WaterService:
     """High-performance water analysis service using JRC Global Surface Water"""
@@ -555,6 +560,8 @@ class WaterService:
             
             # Generate tile URL
             tile_url = self._generate_tile_url(water_mask, roi_geometry)
+            report_progress(50, "Water statistics and map tiles ready",
+                            {"urlFormat": tile_url, "mapStats": dict(water_stats, threshold_used=threshold)})
             
             # Prepare result
             result = {
@@ -574,6 +581,7 @@ class WaterService:
             
             # Add seasonal analysis if requested
             if include_seasonal:
+                report_progress(60, "Analyzing seasonal water patterns")
                 seasonal_stats = self._analyze_seasonal_water(roi_geometry, year, threshold)
                 result["mapStats"]["seasonal_comparison"] = seasonal_stats
             
@@ -3,6 +3,8 @@ from fastapi.middleware.cors import CORSMiddleware
 import os
 from .routers import query_router
 from .services.roi_parser import roi_parser
+from .utils.geojson_utils import GEOMETRY_ENCODING_HEADER
+from .utils.tracing import TRACE_ID_HEADER, TracingMiddleware
 
 app = FastAPI(
     title="GeoLLM MVP",
@@ -24,8 +26,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[GEOMETRY_ENCODING_HEADER, TRACE_ID_HEADER],
 )
 
+# Trace each request; the trace id is returned in X-Trace-Id
+app.add_middleware(TracingMiddleware, service_name="api")
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the GeoSpatial LLM API"}
@@ -21,6 +21,7 @@ from app.routers import ingest_router, retrieve_router
 from app.routers import embeddings_router
 from app.services.rag_store import RAGStore
 from app.config import settings
+from app.utils.tracing import TracingMiddleware
 
 
 @asynccontextmanager
@@ -59,6 +60,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Continue the Core LLM Agent's trace (traceparent header)
+app.add_middleware(TracingMiddleware, service_name="rag")
+
 # Include routers
 app.include_router(ingest_router.router, prefix="/api/v1", tags=["ingestion"])
 app.include_router(retrieve_router.router, prefix="/api/v1", tags=["retrieval"])
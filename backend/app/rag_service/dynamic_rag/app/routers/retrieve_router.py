@@ -51,6 +51,7 @@ class RetrieveRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=1000, description="Query string to search for")
     k: int = Field(default=5, ge=1, le=50, description="Number of similar documents to retrieve (1-50)")
     returnVectors: bool = Field(default=False, description="Include vectors for returned chunks")
+    returnQueryVector: bool = Field(default=False, description="Include the query embedding in the response")
 
 
 class DocumentResult(BaseModel):
@@ -71,6 +72,8 @@ class RetrieveResponse(BaseModel):
     results_count: int = Field(..., description="Number of documents returned")
     results: List[DocumentResult] = Field(..., description="Retrieved documents")
     processing_time_ms: float = Field(..., description="Processing time in milliseconds")
+    content_version: Optional[int] = Field(default=None, description="Session content version; changes whenever documents are added")
+    query_vector: Optional[list] = Field(default=None, description="Normalized query embedding if requested")
 
 
 class RetrieveError(BaseModel):
@@ -189,11 +192,15 @@ async def retrieve_documents(
         # Retrieve similar documents
         logger.info(f"Retrieving documents for session {retrieve_request.session_id} with query: '{retrieve_request.query[:50]}...'")
         
-        similar_docs = await rag_store.retrieve_similar_docs(
+        # The content version is read atomically with the index search
+        similar_docs, query_embedding, content_version = await rag_store.retrieve_similar_docs_versioned(
             session_id=retrieve_request.session_id,
             query=retrieve_request.query,
             k=retrieve_request.k
         )
+        query_vector = None
+        if retrieve_request.returnQueryVector and query_embedding is not None:
+            query_vector = query_embedding.tolist()
         
         # Convert to response format
         results = []
@@ -233,7 +240,9 @@ async def retrieve_documents(
             k=retrieve_request.k,
             results_count=len(results),
             results=results,
-            processing_time_ms=processing_time
+            processing_time_ms=processing_time,
+            content_version=content_version,
+            query_vector=query_vector
         )
         # Store latest detailed retrieval results
         setattr(request.app.state, "last_retrieval_detailed_latest", response_obj.dict())
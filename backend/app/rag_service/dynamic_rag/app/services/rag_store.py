@@ -49,6 +49,7 @@ class SessionData:
     document_count: int
     faiss_index: Optional[faiss.Index] = None
     metadata_store: List[Dict[str, Any]] = None
+    content_version: int = 0  # Bumped on every ingest; lets clients invalidate derived caches
 
 
 class RAGStore:
@@ -290,6 +291,7 @@ class RAGStore:
             
             # Update session data
             session_data.document_count += len(documents)
+            session_data.content_version += 1
             session_data.last_accessed = datetime.utcnow()
             
             # Update Redis metadata
@@ -333,15 +335,61 @@ class RAGStore:
         Returns:
             List of similar documents with metadata
         """
+        results, _ = await self.retrieve_similar_docs_with_query_vector(session_id, query, k)
+        return results
+    
+    async def retrieve_similar_docs_with_query_vector(
+        self, 
+        session_id: str, 
+        query: str, 
+        k: int = 5
+    ) -> Tuple[List[Dict[str, Any]], Optional[np.ndarray]]:
+        """
+        Retrieve similar documents for a query and return the query embedding too.
+        
+        Args:
+            session_id: Session identifier
+            query: Query string
+            k: Number of similar documents to retrieve
+            
+        Returns:
+            Tuple of (similar documents with metadata, normalized query embedding
+            or None if no search was performed)
+        """
+        results, query_vector, _ = await self.retrieve_similar_docs_versioned(session_id, query, k)
+        return results, query_vector
+    
+    async def retrieve_similar_docs_versioned(
+        self, 
+        session_id: str, 
+        query: str, 
+        k: int = 5
+    ) -> Tuple[List[Dict[str, Any]], Optional[np.ndarray], Optional[int]]:
+        """
+        Retrieve similar documents together with the content version they came from.
+        
+        The version is read in the same step as the index search (no await in
+        between, and ingestion bumps the version in the same step that extends
+        the index), so the results always belong to the reported version.
+        
+        Args:
+            session_id: Session identifier
+            query: Query string
+            k: Number of similar documents to retrieve
+            
+        Returns:
+            Tuple of (similar documents with metadata, normalized query embedding
+            or None if no search was performed, session content version)
+        """
         if session_id not in self.sessions:
             logger.error(f"Session {session_id} not found")
-            return []
+            return [], None, None
         
         session_data = self.sessions[session_id]
         
         if session_data.faiss_index is None or session_data.document_count == 0:
             logger.warning(f"No documents in session {session_id}")
-            return []
+            return [], None, session_data.content_version
         
         try:
             # Generate query embedding
@@ -349,6 +397,7 @@ class RAGStore:
             query_vector = query_embedding.reshape(1, -1).astype(np.float32)
             
             # Search FAISS index
+            content_version = session_data.content_version
             scores, indices = session_data.faiss_index.search(query_vector, min(k, session_data.document_count))
             
             # Retrieve documents
@@ -376,11 +425,11 @@ class RAGStore:
                 )
             
             logger.info(f"Retrieved {len(results)} similar documents for session {session_id}")
-            return results
+            return results, query_vector[0], content_version
             
         except Exception as e:
             logger.error(f"Error retrieving documents for session {session_id}: {str(e)}")
-            return []
+            return [], None, None
     
     async def get_session_info(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get information about a session."""
@@ -395,6 +444,7 @@ class RAGStore:
             "created_at": session_data.created_at.isoformat(),
             "last_accessed": session_data.last_accessed.isoformat(),
             "document_count": session_data.document_count,
+            "content_version": session_data.content_version,
             "has_index": session_data.faiss_index is not None
         }
     
@@ -0,0 +1,84 @@
+"""
+Request tracing for Dynamic RAG System.
+
+What: ASGI middleware that continues the caller's W3C trace context
+      (`traceparent` header) for every request.
+
+Why:  The Core LLM Agent traces each query across its stages and services;
+      RAG retrieval must show up in the same trace so slow retrievals can be
+      told apart from slow LLM calls.
+
+How:  Parses the incoming `traceparent`, opens a server span (new span id,
+      same trace id), logs its duration with the trace id, and returns
+      `X-Trace-Id` and `traceparent` response headers. The service runs
+      standalone, so it does not depend on the backend's tracing module.
+"""
+
+import time
+import uuid
+import logging
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = "traceparent"
+TRACE_ID_HEADER = "X-Trace-Id"
+
+# (trace_id, span_id) of the request being handled
+current_trace: ContextVar[Optional[Tuple[str, str]]] = ContextVar("current_trace", default=None)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Return (trace_id, parent_span_id) from a traceparent header, or None."""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    return parts[1].lower(), parts[2].lower()
+
+
+class TracingMiddleware:
+    """Continue the caller's trace and time each HTTP request."""
+
+    def __init__(self, app: Any, service_name: str = "rag"):
+        self.app = app
+        self.service_name = service_name
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        remote = parse_traceparent(headers.get(TRACEPARENT_HEADER))
+        trace_id, parent_span_id = remote if remote else (uuid.uuid4().hex, None)
+        span_id = uuid.uuid4().hex[:16]
+        traceparent = f"00-{trace_id}-{span_id}-01"
+        status = {"code": None}
+
+        async def send_with_trace(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message.get("status")
+                message["headers"] = list(message.get("headers", [])) + [
+                    (TRACE_ID_HEADER.lower().encode("latin-1"), trace_id.encode("latin-1")),
+                    (TRACEPARENT_HEADER.encode("latin-1"), traceparent.encode("latin-1")),
+                ]
+            await send(message)
+
+        token = current_trace.set((trace_id, span_id))
+        start = time.time()
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            current_trace.reset(token)
+            logger.info(
+                f"⏱️ {self.service_name} {scope.get('method')} {scope.get('path')} "
+                f"{status['code']} {(time.time() - start) * 1000:.1f}ms "
+                f"trace_id={trace_id} span_id={span_id} parent_id={parent_span_id}"
+            )
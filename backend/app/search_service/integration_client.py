@@ -2,13 +2,20 @@
 Integration client for connecting Search API Service to core LLM agent.
 
 This module provides functions to call the Search API Service from the
-core LLM agent, replacing the mocked websearch_tool_node.
+core LLM agent, replacing the mocked websearch_tool_node. Calls go through the
+service locator, so they are made in-process when the search routes are
+mounted in the same app and over HTTP otherwise.
 """
 
-import requests
+import httpx
 import logging
 from typing import Dict, List, Any, Optional
 
+try:
+    from ..service_locator import get_service_locator
+except ImportError:
+    from app.service_locator import get_service_locator
+
 logger = logging.getLogger(__name__)
 
 class SearchServiceClient:
@@ -18,6 +25,8 @@ class SearchServiceClient:
         import os
         self.base_url = base_url or os.getenv("SERVICE_BASE_URL", "http://localhost:8000")
         self.timeout = 60  # Increased timeout for enhanced analysis
+        # Calls the search routes in-process when they are mounted in this app
+        self.locator = get_service_locator()
     
     def get_location_data(
         self, 
@@ -35,8 +44,9 @@ class SearchServiceClient:
             Location data dictionary or None if failed
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/search/location-data",
+            response = self.locator.request_sync(
+                "search", "POST", "/search/location-data",
+                base_url=self.base_url,
                 json={
                     "location_name": location_name,
                     "location_type": location_type
@@ -77,8 +87,9 @@ class SearchServiceClient:
             Environmental context data or None if failed
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/search/environmental-context",
+            response = self.locator.request_sync(
+                "search", "POST", "/search/environmental-context",
+                base_url=self.base_url,
                 json={
                     "location": location,
                     "analysis_type": analysis_type,
@@ -120,8 +131,9 @@ class SearchServiceClient:
             Complete analysis data or None if failed
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/search/complete-analysis",
+            response = self.locator.request_sync(
+                "search", "POST", "/search/complete-analysis",
+                base_url=self.base_url,
                 json={
                     "query": query,
                     "locations": locations,
@@ -163,8 +175,9 @@ class SearchServiceClient:
             Enhanced analysis data or None if failed
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/search/enhanced-analysis",
+            response = self.locator.request_sync(
+                "search", "POST", "/search/enhanced-analysis",
+                base_url=self.base_url,
                 json={
                     "query": query,
                     "locations": locations,
@@ -185,11 +198,90 @@ class SearchServiceClient:
 
     def health_check(self) -> bool:
         """Check if Search API Service is healthy."""
+        if self.locator.is_local("search"):
+            return True
         try:
-            response = requests.get(f"{self.base_url}/health", timeout=5)
+            response = self.locator.request_sync("search", "GET", "/health", base_url=self.base_url, timeout=5)
             return response.status_code == 200
         except:
             return False
+    
+    async def health_check_async(self, client: httpx.AsyncClient) -> bool:
+        """Check if Search API Service is healthy without blocking the event loop."""
+        if self.locator.is_local("search"):
+            return True
+        try:
+            response = await client.get(f"{self.base_url}/health", timeout=5)
+            return response.status_code == 200
+        except Exception:
+            return False
+    
+    async def get_complete_analysis_async(
+        self, 
+        client: httpx.AsyncClient,
+        query: str, 
+        locations: List[Dict[str, Any]], 
+        analysis_type: str = "ndvi"
+    ) -> Optional[Dict[str, Any]]:
+        """Async variant of get_complete_analysis using the caller's HTTP client."""
+        try:
+            response = await self.locator.request(
+                "search", "POST", "/search/complete-analysis",
+                base_url=self.base_url,
+                json={
+                    "query": query,
+                    "locations": locations,
+                    "analysis_type": analysis_type
+                },
+                timeout=self.timeout,
+                client=client
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                if data.get("success", False):
+                    return data
+                else:
+                    logger.warning(f"Complete analysis failed: {data.get('error', 'Unknown error')}")
+                    return None
+            else:
+                logger.error(f"Complete analysis HTTP error: {response.status_code}")
+                return None
+                
+        except Exception as e:
+            logger.error(f"Error calling complete analysis: {e}")
+            return None
+    
+    async def get_enhanced_analysis_async(
+        self, 
+        client: httpx.AsyncClient,
+        query: str, 
+        locations: List[Dict[str, Any]], 
+        analysis_type: str = "ndvi"
+    ) -> Optional[Dict[str, Any]]:
+        """Async variant of get_enhanced_analysis using the caller's HTTP client."""
+        try:
+            response = await self.locator.request(
+                "search", "POST", "/search/enhanced-analysis",
+                base_url=self.base_url,
+                json={
+                    "query": query,
+                    "locations": locations,
+                    "analysis_type": analysis_type
+                },
+                timeout=self.timeout,
+                client=client
+            )
+            
+            if response.status_code == 200:
+                return response.json()
+            else:
+                logger.error(f"Enhanced analysis failed with status {response.status_code}: {response.text}")
+                return None
+                
+        except Exception as e:
+            logger.error(f"Error calling enhanced analysis: {e}")
+            return None
 
 # Global client instance
 search_client = SearchServiceClient()
@@ -224,29 +316,14 @@ def call_search_service_for_analysis(
         analysis_data = search_client.get_enhanced_analysis(query, locations, analysis_type)
         
         if analysis_data and analysis_data.get("success", False):
-            return {
-                "analysis": analysis_data.get("analysis", "Analysis generation failed"),
-                "roi": analysis_data.get("roi"),
-                "evidence": ["search_service:enhanced_analysis_success"],
-                "sources": analysis_data.get("sources", []),
-                "confidence": analysis_data.get("confidence", 0.0),
-                "structured_data": analysis_data.get("structured_data", {}),
-                "data_quality": analysis_data.get("data_quality", {}),
-                "extracted_metrics_count": analysis_data.get("extracted_metrics_count", 0)
-            }
+            return _enhanced_analysis_result(analysis_data)
         else:
             # Fallback to basic analysis if enhanced fails
             logger.warning("Enhanced analysis failed, falling back to basic analysis")
             analysis_data = search_client.get_complete_analysis(query, locations, analysis_type)
             
             if analysis_data:
-                return {
-                    "analysis": analysis_data.get("analysis", "Analysis generation failed"),
-                    "roi": analysis_data.get("roi"),
-                    "evidence": ["search_service:complete_analysis_success"],
-                    "sources": analysis_data.get("sources", []),
-                    "confidence": analysis_data.get("confidence", 0.0)
-                }
+                return _complete_analysis_result(analysis_data)
             else:
                 logger.warning("Search API Service returned no data, using fallback")
                 return _fallback_analysis(query, locations, analysis_type)
@@ -255,6 +332,77 @@ def call_search_service_for_analysis(
         logger.error(f"Error calling Search API Service: {e}")
         return _fallback_analysis(query, locations, analysis_type)
 
+async def call_search_service_for_analysis_async(
+    query: str, 
+    locations: List[Dict[str, Any]], 
+    analysis_type: str = "ndvi",
+    client: Optional[httpx.AsyncClient] = None
+) -> Dict[str, Any]:
+    """
+    Async variant of call_search_service_for_analysis.
+    
+    Args:
+        query: User query
+        locations: List of detected locations
+        analysis_type: Type of analysis
+        client: Shared async HTTP client (a temporary one is used if None)
+        
+    Returns:
+        Dictionary with analysis, roi, and evidence
+    """
+    if client is None:
+        async with httpx.AsyncClient() as temp_client:
+            return await call_search_service_for_analysis_async(query, locations, analysis_type, temp_client)
+    
+    try:
+        # Check if service is available
+        if not await search_client.health_check_async(client):
+            logger.warning("Search API Service not available, using fallback")
+            return _fallback_analysis(query, locations, analysis_type)
+        
+        # Try enhanced analysis first
+        analysis_data = await search_client.get_enhanced_analysis_async(client, query, locations, analysis_type)
+        
+        if analysis_data and analysis_data.get("success", False):
+            return _enhanced_analysis_result(analysis_data)
+        
+        # Fallback to basic analysis if enhanced fails
+        logger.warning("Enhanced analysis failed, falling back to basic analysis")
+        analysis_data = await search_client.get_complete_analysis_async(client, query, locations, analysis_type)
+        
+        if analysis_data:
+            return _complete_analysis_result(analysis_data)
+        
+        logger.warning("Search API Service returned no data, using fallback")
+        return _fallback_analysis(query, locations, analysis_type)
+            
+    except Exception as e:
+        logger.error(f"Error calling Search API Service: {e}")
+        return _fallback_analysis(query, locations, analysis_type)
+
+def _enhanced_analysis_result(analysis_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape an enhanced-analysis response for the core LLM agent."""
+    return {
+        "analysis": analysis_data.get("analysis", "Analysis generation failed"),
+        "roi": analysis_data.get("roi"),
+        "evidence": ["search_service:enhanced_analysis_success"],
+        "sources": analysis_data.get("sources", []),
+        "confidence": analysis_data.get("confidence", 0.0),
+        "structured_data": analysis_data.get("structured_data", {}),
+        "data_quality": analysis_data.get("data_quality", {}),
+        "extracted_metrics_count": analysis_data.get("extracted_metrics_count", 0)
+    }
+
+def _complete_analysis_result(analysis_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a complete-analysis response for the core LLM agent."""
+    return {
+        "analysis": analysis_data.get("analysis", "Analysis generation failed"),
+        "roi": analysis_data.get("roi"),
+        "evidence": ["search_service:complete_analysis_success"],
+        "sources": analysis_data.get("sources", []),
+        "confidence": analysis_data.get("confidence", 0.0)
+    }
+
 def _fallback_analysis(
     query: str, 
     locations: List[Dict[str, Any]], 
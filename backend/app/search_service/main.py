@@ -9,7 +9,8 @@ This service provides:
 Uses Tavily API for LLM-optimized web search.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Any
@@ -29,6 +30,10 @@ from .services.nominatim_client import NominatimClient
 from .services.tavily_client import TavilyClient
 from .services.location_resolver import LocationResolver
 from .services.result_processor import ResultProcessor
+from app.utils.geojson_utils import (
+    GEOMETRY_ENCODING_HEADER, POLYLINE_ENCODING, encode_geometries, requested_geometry_precision
+)
+from app.utils.tracing import TracingMiddleware
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -477,6 +482,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Continue the caller's trace (traceparent header) and time each request
+app.add_middleware(TracingMiddleware, service_name="search")
+
 # Initialize services
 tavily_client = TavilyClient()
 location_resolver = LocationResolver()
@@ -495,12 +503,15 @@ async def health_check():
 
 # Location resolution endpoint
 @app.post("/search/location-data", response_model=LocationResponse)
-async def get_location_data(request: LocationRequest):
+async def get_location_data(request: LocationRequest, http_request: Request):
     """
     Get location data including coordinates, boundaries, area, and polygon geometry.
     
     This endpoint resolves location names to geographical data using
     Nominatim for accurate polygon geometry and Tavily for environmental context.
+    
+    Clients sending "X-Geometry-Encoding: polyline" receive the polygon and its
+    tiles as encoded polylines (see app/utils/geojson_utils.py).
     """
     try:
         logger.info(f"Resolving location: {request.location_name} ({request.location_type})")
@@ -613,6 +624,12 @@ async def get_location_data(request: LocationRequest):
             logger.info(f"   🔍 is_tiled: {response.is_tiled}")
             logger.info(f"   🔍 is_fallback: {response.is_fallback}")
             
+            precision = requested_geometry_precision(http_request.headers.get(GEOMETRY_ENCODING_HEADER))
+            if precision is not None:
+                return JSONResponse(
+                    content=encode_geometries(response.model_dump(mode="json"), precision),
+                    headers={GEOMETRY_ENCODING_HEADER: f"{POLYLINE_ENCODING}{precision}"}
+                )
             return response
             
         except Exception as validation_error:
@@ -78,7 +78,7 @@ class LocationResolver:
             
             # Use Nominatim for accurate location data
             logger.info(f"Calling nominatim_client.search_by_query for {location_name}")
-            boundary_infos = self.nominatim_client.search_by_query(location_name, country_code="in", limit=1)
+            boundary_infos = await self.nominatim_client.search_by_query_async(location_name, country_code="in", limit=1)
             logger.info(f"Nominatim client returned: {len(boundary_infos)} results")
             
             if boundary_infos:
@@ -2,7 +2,11 @@
 Nominatim Client for OpenStreetMap geocoding and location data.
 
 This client provides accurate location data including coordinates, area, and boundaries
-using the free OpenStreetMap Nominatim service.
+using the free OpenStreetMap Nominatim service. Finished results (simplified
+geometry, tiles, area) are kept in the geocode cache shared with the Core LLM
+Agent, and places already in the offline gazetteer store are answered without
+a network call; new Nominatim results are written back to both. Polygons are
+reduced to the Earth Engine level of detail by the shared ROI geometry store.
 """
 
 import requests
@@ -11,6 +15,11 @@ import math
 import time
 from typing import Dict, Any, Optional, List
 
+try:
+    from ...utils.tracing import get_tracer
+except ImportError:
+    from app.utils.tracing import get_tracer
+
 logger = logging.getLogger(__name__)
 
 # Try to import geospatial libraries, but work without them
@@ -24,6 +33,33 @@ except ImportError as e:
     GEOSPATIAL_AVAILABLE = False
     logger.info(f"Working without geospatial libraries: {e}")
 
+# Geocode cache and offline gazetteer store shared with the Core LLM Agent's Nominatim client
+try:
+    from app.services.core_llm_agent.parsers.gazetteer_geocoder import get_gazetteer_geocoder
+    from app.services.core_llm_agent.geocode_cache import get_geocode_cache
+    GAZETTEER_AVAILABLE = True
+except ImportError:
+    try:
+        import sys
+        from pathlib import Path
+        backend_root = Path(__file__).resolve().parents[3]
+        if str(backend_root) not in sys.path:
+            sys.path.insert(0, str(backend_root))
+        from app.services.core_llm_agent.parsers.gazetteer_geocoder import get_gazetteer_geocoder
+        from app.services.core_llm_agent.geocode_cache import get_geocode_cache
+        GAZETTEER_AVAILABLE = True
+    except ImportError as e:
+        GAZETTEER_AVAILABLE = False
+        logger.info(f"Working without offline gazetteer geocoder: {e}")
+
+# Multi-resolution ROI geometry store (levels of detail per boundary)
+try:
+    from app.utils.geometry_store import get_geometry_store
+    GEOMETRY_STORE_AVAILABLE = True
+except ImportError as e:
+    GEOMETRY_STORE_AVAILABLE = False
+    logger.info(f"Working without ROI geometry store: {e}")
+
 class NominatimClient:
     """Fixed Nominatim client with working area calculation."""
     
@@ -68,6 +104,8 @@ class NominatimClient:
         }
         self.last_request_time = 0
         self.min_request_interval = 1.0
+        self.gazetteer = get_gazetteer_geocoder() if GAZETTEER_AVAILABLE else None
+        self.cache = get_geocode_cache() if GAZETTEER_AVAILABLE else None
     
     def _rate_limit(self):
         """Ensure we don't exceed Nominatim's rate limit."""
@@ -99,6 +137,23 @@ class NominatimClient:
         Search for location data using Nominatim with focus on polygon geometry.
         """
         try:
+            # Shared geocode cache first: already simplified, tiled and measured
+            if self.cache:
+                hit, cached = self.cache.get("search_location", location_name, location_type, "in")
+                if hit:
+                    logger.info(f"💾 Geocode cache hit for {location_name}" + ("" if cached else " (not found)"))
+                    return cached["location_data"] if cached else None
+            
+            # Offline gazetteer store next (boundary polygons only)
+            if self.gazetteer:
+                stored = self.gazetteer.lookup(location_name, location_type, require_polygon=True)
+                if stored:
+                    location_data = self._process_result(stored, location_name)
+                    if location_data:
+                        logger.info(f"📍 Gazetteer hit for {location_name}")
+                        self._cache_location(location_name, location_type, stored, location_data)
+                        return location_data
+            
             self._rate_limit()
             
             # Try multiple search strategies with different approaches
@@ -109,6 +164,9 @@ class NominatimClient:
                 f"{location_name} city"
             ]
             
+            # HTTP errors are transient: only a clean "nothing found" is cached as negative
+            had_http_error = False
+            
             for search_query in search_queries:
                 params = {
                     'q': search_query,
@@ -123,12 +181,13 @@ class NominatimClient:
                 
                 logger.info(f"Searching Nominatim for: {search_query}")
                 
-                response = requests.get(
-                    f"{self.base_url}/search",
-                    params=params,
-                    headers=self.headers,
-                    timeout=15
-                )
+                with get_tracer().span("nominatim.search", kind="client", attributes={"geocode.query": search_query}):
+                    response = requests.get(
+                        f"{self.base_url}/search",
+                        params=params,
+                        headers=self.headers,
+                        timeout=15
+                    )
                 
                 if response.status_code == 200:
                     results = response.json()
@@ -153,6 +212,9 @@ class NominatimClient:
                         location_data = self._process_result(best_result, location_name)
                         if location_data:
                             logger.info(f"Successfully processed {location_name}")
+                            if self.gazetteer:
+                                self.gazetteer.store(location_name, location_type, best_result)
+                            self._cache_location(location_name, location_type, best_result, location_data)
                             return location_data
                         else:
                             logger.warning(f"Failed to process result for {location_name}")
@@ -160,17 +222,28 @@ class NominatimClient:
                         logger.warning(f"No results found for query: {search_query}")
                 else:
                     logger.error(f"HTTP error {response.status_code} for query: {search_query}")
+                    had_http_error = True
                 
                 # Small delay between different queries
                 time.sleep(0.5)
             
             logger.error(f"All search strategies failed for {location_name}")
+            if self.cache and not had_http_error:
+                self.cache.set_negative("search_location", location_name, location_type, "in")
             return None
             
         except Exception as e:
             logger.error(f"Error searching for {location_name}: {e}")
             return None
     
+    def _cache_location(self, location_name: str, location_type: str, result: Dict, location_data: Dict[str, Any]):
+        """Store processed location data (and the raw result) in the shared geocode cache."""
+        if self.cache:
+            self.cache.set("search_location", location_name, location_type, "in", {
+                "raw": result,
+                "location_data": location_data
+            })
+    
     def _find_best_result(self, results: List[Dict], location_name: str) -> Optional[Dict]:
         """Find the best result prioritizing polygon geometry."""
         best_result = None
@@ -668,19 +741,18 @@ class NominatimClient:
             return 0
     
     def _extract_polygon_geometry(self, result: Dict) -> Optional[Dict]:
-        """Extract and simplify polygon geometry from Nominatim result."""
+        """Extract polygon geometry from Nominatim result at the Earth Engine level of detail."""
         if 'geojson' in result:
             geojson = result['geojson']
             if geojson.get('type') in ['Polygon', 'MultiPolygon']:
                 logger.info(f"Found {geojson.get('type')} geometry")
                 
-                # Simplify geometry to reduce coordinate points
-                simplified_geojson = self._simplify_geometry(geojson)
-                if simplified_geojson:
-                    logger.info(f"Simplified geometry: {self._count_coordinates(geojson)} → {self._count_coordinates(simplified_geojson)} points")
-                    return simplified_geojson
-                else:
+                # Earth Engine level of detail from the shared ROI geometry store
+                if not GEOMETRY_STORE_AVAILABLE:
                     return geojson
+                simplified_geojson = get_geometry_store().lod(geojson, "gee")
+                logger.info(f"Simplified geometry: {self._count_coordinates(geojson)} → {self._count_coordinates(simplified_geojson)} points")
+                return simplified_geojson
             else:
                 logger.warning(f"GeoJSON type {geojson.get('type')} not suitable for polygon analysis")
         
@@ -811,72 +883,6 @@ class NominatimClient:
                     pass
         return None
     
-    def _simplify_geometry(self, geojson: Dict) -> Optional[Dict]:
-        """Simplify geometry to reduce coordinate points while preserving topology."""
-        if not GEOSPATIAL_AVAILABLE:
-            logger.warning("Shapely not available, cannot simplify geometry")
-            return geojson
-        
-        try:
-            geom = shape(geojson)
-            if geom.is_empty:
-                return geojson
-            
-            # Calculate original area for comparison
-            original_area = self._calculate_area_from_geometry(geojson)
-            
-            # Determine tolerance based on geometry size - more aggressive for states
-            if original_area and original_area > 200000:  # Very large states (>200k km²)
-                tolerance = 0.005   # ~500m tolerance - aggressive but preserves shape
-            elif original_area and original_area > 100000:  # Large states (100-200k km²)
-                tolerance = 0.003   # ~300m tolerance  
-            elif original_area and original_area > 50000:   # Medium states (50-100k km²)
-                tolerance = 0.002   # ~200m tolerance
-            elif original_area and original_area > 10000:   # Large regions (10-50k km²)
-                tolerance = 0.001   # ~100m tolerance
-            elif original_area and original_area > 1000:    # Districts (1-10k km²)
-                tolerance = 0.0005  # ~50m tolerance
-            else:  # Cities (<1k km²)
-                tolerance = 0.0001  # ~10m tolerance
-            
-            # Simplify geometry
-            simplified_geom = geom.simplify(tolerance, preserve_topology=True)
-            
-            if simplified_geom.is_empty:
-                logger.warning("Simplified geometry is empty, returning original")
-                return geojson
-            
-            # Convert back to GeoJSON
-            simplified_geojson = {
-                "type": simplified_geom.geom_type,
-                "coordinates": self._geom_to_coordinates(simplified_geom)
-            }
-            
-            # Validate simplification - check area preservation with dynamic thresholds
-            simplified_area = self._calculate_area_from_geometry(simplified_geojson)
-            if original_area and simplified_area:
-                area_error = abs(original_area - simplified_area) / original_area
-                
-                # Allow higher error tolerance for larger areas
-                if original_area > 100000:      # Large states
-                    max_error = 0.05            # 5% error allowed
-                elif original_area > 10000:     # Medium regions
-                    max_error = 0.03            # 3% error allowed  
-                else:                           # Cities/small areas
-                    max_error = 0.02            # 2% error allowed
-                
-                if area_error > max_error:
-                    logger.warning(f"Simplification error too high: {area_error:.2%} (max: {max_error:.1%}), returning original")
-                    return geojson
-                else:
-                    logger.info(f"Simplification successful: {area_error:.2%} area error (tolerance: {tolerance:.4f})")
-            
-            return simplified_geojson
-            
-        except Exception as e:
-            logger.warning(f"Geometry simplification failed: {e}")
-            return geojson
-    
     def _count_coordinates(self, geojson: Dict) -> int:
         """Count total number of coordinate points in geometry."""
         try:
@@ -12,6 +12,11 @@ from typing import List, Dict, Any, Optional
 import asyncio
 import aiohttp
 
+try:
+    from ...utils.tracing import get_tracer
+except ImportError:
+    from app.utils.tracing import get_tracer
+
 logger = logging.getLogger(__name__)
 
 class TavilyClient:
@@ -31,6 +36,7 @@ class TavilyClient:
             self.session = aiohttp.ClientSession()
         return self.session
     
+    @get_tracer().traced("tavily.search", kind="client")
     async def search(
         self, 
         query: str, 
@@ -142,6 +148,7 @@ class TavilyClient:
         
         return results
     
+    @get_tracer().traced("tavily.search", kind="client")
     def search_sync(
         self, 
         query: str, 
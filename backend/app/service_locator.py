@@ -0,0 +1,452 @@
+"""
+Service locator for calls between the GEE, search and agent services.
+
+In the monolithic deployment (backend/app/main.py) the search and GEE routes
+are mounted into the same FastAPI app as the agent, yet the agent used to call
+them back over loopback HTTP, serializing multi-megabyte polygon GeoJSON in
+both directions. The locator calls the service's route handler directly when
+the service is loaded in this process, and falls back to HTTP when it is
+deployed separately.
+
+Local calls behave like HTTP calls for the caller: request bodies are
+validated into the endpoint's request model, responses go through the route's
+response model, HTTPExceptions become error statuses, and the returned object
+offers the httpx.Response interface used by callers (status_code, json(),
+text, raise_for_status()).
+
+HTTP calls can use the compact geometry wire format: geometries in request
+bodies are sent as encoded polylines, the X-Geometry-Encoding header asks the
+service for encoded geometries in its response, and encoded responses are
+decoded before they reach the caller.
+
+Every call runs in a client tracing span; HTTP calls carry the W3C
+traceparent header so the service continues the caller's trace.
+
+Configuration (environment):
+- SERVICE_CALL_MODE: "auto" (default, in-process when the service module is
+  already loaded), "local" (import the service if needed) or "http" (always HTTP)
+- GEOMETRY_WIRE_ENCODING: "none" (default, plain GeoJSON), "polyline" (1e-5°)
+  or "polylineN" (N decimal digits) for geometries sent over HTTP
+"""
+
+import os
+import json
+import asyncio
+import inspect
+import logging
+import importlib
+import sys
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from pydantic.fields import FieldInfo
+from starlette.responses import Response
+from starlette.routing import Match
+
+try:
+    from .config_urls import get_service_url
+    from .utils.geojson_utils import (
+        GEOMETRY_ENCODING_HEADER, POLYLINE_ENCODING, encode_geometries, decode_geometries,
+        requested_geometry_precision
+    )
+    from .utils.tracing import get_tracer
+except ImportError:
+    from app.config_urls import get_service_url
+    from app.utils.geojson_utils import (
+        GEOMETRY_ENCODING_HEADER, POLYLINE_ENCODING, encode_geometries, decode_geometries,
+        requested_geometry_precision
+    )
+    from app.utils.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+# Module holding each service's FastAPI app
+SERVICE_MODULES = {
+    "gee": "app.gee_service.main",
+    "search": "app.search_service.main",
+}
+
+
+class LocalResponse:
+    """Result of an in-process service call with the httpx.Response interface."""
+
+    def __init__(self, method: str, url: str, status_code: int, data: Any, headers: Optional[Dict[str, str]] = None):
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.headers = httpx.Headers(headers or {})
+        self._data = data
+
+    def json(self) -> Any:
+        """Response body (not serialized; callers get the objects directly)."""
+        return self._data
+
+    @property
+    def text(self) -> str:
+        """Response body serialized as JSON (for logging)."""
+        return json.dumps(self._data, default=str)
+
+    @property
+    def is_success(self) -> bool:
+        return 200 <= self.status_code < 300
+
+    def raise_for_status(self) -> "LocalResponse":
+        """Raise httpx.HTTPStatusError for error statuses, like httpx.Response."""
+        if self.status_code < 400:
+            return self
+        request = httpx.Request(self.method, self.url)
+        response = httpx.Response(self.status_code, json=self._data, headers=self.headers, request=request)
+        raise httpx.HTTPStatusError(
+            f"Server error '{self.status_code}' for in-process call {self.method} {self.url}",
+            request=request,
+            response=response
+        )
+
+
+class DecodedResponse(LocalResponse):
+    """HTTP response whose compact geometries were decoded (httpx.Response interface)."""
+
+
+class ServiceLocator:
+    """Routes service calls in-process when possible, over HTTP otherwise."""
+
+    def __init__(self, mode: str = "auto", geometry_precision: Optional[int] = None):
+        """Initialize the locator.
+
+        Args:
+            mode: "auto", "local" or "http" (see module docstring)
+            geometry_precision: Polyline precision for geometries sent over HTTP
+                (None sends plain GeoJSON)
+        """
+        self.mode = mode if mode in ("auto", "local", "http") else "auto"
+        self.geometry_precision = geometry_precision
+        self._apps: Dict[str, Any] = {}
+        self._unimportable = set()
+        self._lock = threading.Lock()
+        self._stats = {"local_calls": 0, "http_calls": 0, "local_errors": 0}
+
+    def is_local(self, service: str) -> bool:
+        """Whether calls to a service are made in-process.
+
+        Args:
+            service: Service name ("gee" or "search")
+
+        Returns:
+            True if the service's app is available in this process
+        """
+        return self._local_app(service) is not None
+
+    async def request(
+        self,
+        service: str,
+        method: str,
+        path: str,
+        base_url: Optional[str] = None,
+        json: Optional[Any] = None,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Any = None,
+        client: Optional[httpx.AsyncClient] = None
+    ) -> Any:
+        """Call a service endpoint.
+
+        Args:
+            service: Service name ("gee" or "search")
+            method: HTTP method
+            path: Endpoint path (e.g. "/ndvi/vegetation-analysis")
+            base_url: Base URL for HTTP calls (default: SERVICE_BASE_URL)
+            json: Request body
+            params: Query parameters
+            headers: Request headers
+            timeout: Timeout in seconds or httpx.Timeout (read timeout applies to local calls)
+            client: Async HTTP client for HTTP calls (default: shared client)
+
+        Returns:
+            httpx.Response or LocalResponse
+        """
+        with get_tracer().span(f"{service} {method.upper()} {path}", kind="client", attributes={"service": service}) as span:
+            response = await self._request(service, method, path, base_url, json, params, headers, timeout, client)
+            if span is not None:
+                span.set_attribute("http.status_code", response.status_code)
+                span.set_attribute("in_process", isinstance(response, LocalResponse))
+            return response
+
+    async def _request(
+        self,
+        service: str,
+        method: str,
+        path: str,
+        base_url: Optional[str],
+        json: Optional[Any],
+        params: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        timeout: Any,
+        client: Optional[httpx.AsyncClient]
+    ) -> Any:
+        """Call a service endpoint in-process when possible, otherwise over HTTP."""
+        app = self._local_app(service)
+        url = f"{base_url or get_service_url()}{path}"
+        if app is not None:
+            found = self._find_route(app, method, path)
+            if found is not None:
+                call = self._call_local(found[0], found[1], method, url, json, params, headers)
+                local_timeout = timeout.read if isinstance(timeout, httpx.Timeout) else timeout
+                if local_timeout is None:
+                    return await call
+                try:
+                    return await asyncio.wait_for(call, timeout=local_timeout)
+                except asyncio.TimeoutError:
+                    raise httpx.ReadTimeout(f"In-process call {method} {path} timed out after {local_timeout}s")
+
+        self._stats["http_calls"] += 1
+        if client is None:
+            try:
+                from .services.core_llm_agent.http_client import get_async_client
+            except ImportError:
+                from app.services.core_llm_agent.http_client import get_async_client
+            client = get_async_client()
+        kwargs = self._http_arguments(json, params, headers, timeout)
+        return self._decoded(method, url, await client.request(method, url, **kwargs))
+
+    def request_sync(
+        self,
+        service: str,
+        method: str,
+        path: str,
+        base_url: Optional[str] = None,
+        json: Optional[Any] = None,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Any = None
+    ) -> Any:
+        """Blocking variant of request() for synchronous callers.
+
+        Args:
+            service: Service name ("gee" or "search")
+            method: HTTP method
+            path: Endpoint path
+            base_url: Base URL for HTTP calls (default: SERVICE_BASE_URL)
+            json: Request body
+            params: Query parameters
+            headers: Request headers
+            timeout: Timeout in seconds or httpx.Timeout
+
+        Returns:
+            httpx.Response or LocalResponse
+        """
+        try:
+            from .services.core_llm_agent.http_client import get_sync_client, run_sync
+        except ImportError:
+            from app.services.core_llm_agent.http_client import get_sync_client, run_sync
+
+        if self.is_local(service):
+            return run_sync(self.request(service, method, path, base_url, json, params, headers, timeout))
+
+        self._stats["http_calls"] += 1
+        url = f"{base_url or get_service_url()}{path}"
+        with get_tracer().span(f"{service} {method.upper()} {path}", kind="client", attributes={"service": service}) as span:
+            kwargs = self._http_arguments(json, params, headers, timeout)
+            response = self._decoded(method, url, get_sync_client().request(method, url, **kwargs))
+            if span is not None:
+                span.set_attribute("http.status_code", response.status_code)
+            return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Get call statistics.
+
+        Returns:
+            Dictionary with mode, in-process services and call counters
+        """
+        return {
+            "mode": self.mode,
+            "local_services": sorted(name for name in SERVICE_MODULES if self.is_local(name)),
+            "geometry_encoding": f"{POLYLINE_ENCODING}{self.geometry_precision}" if self.geometry_precision else "none",
+            **self._stats
+        }
+
+    def _http_arguments(
+        self,
+        body: Optional[Any],
+        params: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        timeout: Any
+    ) -> Dict[str, Any]:
+        """httpx request arguments, with compact geometries when enabled and the trace context."""
+        headers = get_tracer().inject(headers)
+        if self.geometry_precision:
+            body = encode_geometries(body, self.geometry_precision)
+            headers = {**(headers or {}), GEOMETRY_ENCODING_HEADER: f"{POLYLINE_ENCODING}{self.geometry_precision}"}
+        kwargs = {"json": body, "params": params, "headers": headers}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        return kwargs
+
+    @staticmethod
+    def _decoded(method: str, url: str, response: Any) -> Any:
+        """Decode a response the service sent with compact geometries."""
+        if not response.headers.get(GEOMETRY_ENCODING_HEADER):
+            return response
+        return DecodedResponse(method, url, response.status_code, decode_geometries(response.json()), response.headers)
+
+    def _local_app(self, service: str) -> Optional[Any]:
+        """The service's FastAPI app if it can be called in-process."""
+        if self.mode == "http":
+            return None
+        app = self._apps.get(service)
+        if app is not None:
+            return app
+
+        module_name = SERVICE_MODULES.get(service)
+        module = sys.modules.get(module_name) if module_name else None
+        if module is None and self.mode == "local" and module_name and service not in self._unimportable:
+            with self._lock:
+                try:
+                    module = importlib.import_module(module_name)
+                except Exception as e:
+                    logger.warning(f"⚠️ {service} service not importable ({e}), using HTTP")
+                    self._unimportable.add(service)
+                    return None
+
+        # Modules still being imported have no app yet
+        app = getattr(module, "app", None) if module is not None else None
+        if app is not None:
+            self._apps[service] = app
+            logger.info(f"🔌 Calling {service} service in-process")
+        return app
+
+    @staticmethod
+    def _find_route(app: Any, method: str, path: str) -> Optional[Tuple[APIRoute, Dict[str, Any]]]:
+        """Find the route handling a request and its path parameters."""
+        scope = {"type": "http", "method": method.upper(), "path": path}
+        for route in app.routes:
+            if not isinstance(route, APIRoute):
+                continue
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                return route, child_scope.get("path_params", {})
+        return None
+
+    async def _call_local(
+        self,
+        route: APIRoute,
+        path_params: Dict[str, Any],
+        method: str,
+        url: str,
+        body: Optional[Any],
+        params: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]]
+    ) -> LocalResponse:
+        """Invoke a route handler directly and shape the outcome like an HTTP response."""
+        self._stats["local_calls"] += 1
+        try:
+            kwargs = self._endpoint_arguments(route, path_params, method, url, body, params, headers)
+            result = route.endpoint(**kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+        except HTTPException as e:
+            return LocalResponse(method, url, e.status_code, {"detail": e.detail}, e.headers)
+        except (ValidationError, RequestValidationError) as e:
+            self._stats["local_errors"] += 1
+            return LocalResponse(method, url, 422, {"detail": json_safe(e.errors())})
+        except Exception as e:
+            self._stats["local_errors"] += 1
+            logger.error(f"❌ In-process call {method} {route.path} failed: {e}")
+            return LocalResponse(method, url, 500, {"detail": f"Internal Server Error: {e}"})
+
+        if isinstance(result, Response):
+            data = result.body
+            try:
+                data = json.loads(data) if data else None
+            except (TypeError, ValueError):
+                pass
+            return LocalResponse(method, url, result.status_code, data, dict(result.headers))
+
+        if isinstance(result, BaseModel):
+            result = result.model_dump(mode="json")
+        response_model = route.response_model
+        if isinstance(response_model, type) and issubclass(response_model, BaseModel):
+            result = response_model.model_validate(result).model_dump(mode="json")
+        return LocalResponse(method, url, route.status_code or 200, result)
+
+    @staticmethod
+    def _endpoint_arguments(
+        route: APIRoute,
+        path_params: Dict[str, Any],
+        method: str,
+        url: str,
+        body: Optional[Any],
+        params: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]]
+    ) -> Dict[str, Any]:
+        """Build the handler's arguments from the body, query and path parameters."""
+        params = params or {}
+        kwargs = {}
+        for name, parameter in inspect.signature(route.endpoint).parameters.items():
+            annotation = parameter.annotation
+            if annotation is Request:
+                kwargs[name] = _local_request(method, url, headers)
+                continue
+            if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+                kwargs[name] = annotation.model_validate(body or {})
+                continue
+
+            default = parameter.default
+            if isinstance(default, FieldInfo):
+                key, default = default.alias or name, default.default
+            else:
+                key = name
+            value = path_params.get(name, params.get(key, default))
+            if value is inspect.Parameter.empty:
+                continue
+            if annotation is not inspect.Parameter.empty and value is not None:
+                value = TypeAdapter(annotation).validate_python(value)
+            kwargs[name] = value
+        return kwargs
+
+
+def json_safe(value: Any) -> Any:
+    """Round-trip a value through JSON (for error details with arbitrary objects)."""
+    return json.loads(json.dumps(value, default=str))
+
+
+def _local_request(method: str, url: str, headers: Optional[Dict[str, str]]) -> Request:
+    """Minimal Starlette request for handlers that read headers or the client."""
+    parsed = httpx.URL(url)
+    scope = {
+        "type": "http",
+        "method": method.upper(),
+        "path": parsed.path,
+        "query_string": b"",
+        "headers": [(k.lower().encode("latin-1"), str(v).encode("latin-1")) for k, v in (headers or {}).items()],
+        "client": ("in-process", 0),
+        "server": (parsed.host or "localhost", parsed.port or 80),
+        "scheme": parsed.scheme or "http",
+    }
+    return Request(scope)
+
+
+_locator: Optional[ServiceLocator] = None
+_locator_lock = threading.Lock()
+
+
+def get_service_locator() -> ServiceLocator:
+    """Get the process-wide service locator.
+
+    Returns:
+        Shared ServiceLocator configured from SERVICE_CALL_MODE
+    """
+    global _locator
+
+    if _locator is None:
+        with _locator_lock:
+            if _locator is None:
+                _locator = ServiceLocator(
+                    mode=os.environ.get("SERVICE_CALL_MODE", "auto").lower(),
+                    geometry_precision=requested_geometry_precision(os.environ.get("GEOMETRY_WIRE_ENCODING", "none"))
+                )
+    return _locator
@@ -6,7 +6,9 @@ It orchestrates the entire pipeline: location parsing, intent classification,
 service dispatch, and result formatting.
 """
 
+import os
 import time
+import asyncio
 import logging
 from typing import Dict, Any, Optional
 
@@ -14,10 +16,20 @@ try:
     # Try relative imports first (when used as module)
     from .parsers.location_parser import LocationParser
     from .intent.intent_classifier import IntentClassifier
+    from .intent.query_understanding import QueryUnderstanding
     from .dispatcher.service_dispatcher import ServiceDispatcher
     from .output.result_formatter import ResultFormatter
+    from .output.narrative_templates import get_narrative_engine
+    from .output.narrative_enrichment import get_narrative_enrichment
     from .models.intent import IntentResult
     from .models.location import LocationParseResult
+    from .http_client import run_sync
+    from .llm_cache import get_llm_cache
+    from .openrouter_client import get_openrouter_client
+    from .result_cache import get_result_cache, roi_fingerprint
+    from ...utils.geometry_store import get_geometry_store
+    from ...utils.tracing import get_tracer
+    from ...gee_service.latency_model import get_latency_model
 except ImportError:
     # Fall back to absolute imports (when run directly)
     import sys
@@ -26,10 +38,20 @@ except ImportError:
     
     from app.services.core_llm_agent.parsers.location_parser import LocationParser
     from app.services.core_llm_agent.intent.intent_classifier import IntentClassifier
+    from app.services.core_llm_agent.intent.query_understanding import QueryUnderstanding
     from app.services.core_llm_agent.dispatcher.service_dispatcher import ServiceDispatcher
     from app.services.core_llm_agent.output.result_formatter import ResultFormatter
+    from app.services.core_llm_agent.output.narrative_templates import get_narrative_engine
+    from app.services.core_llm_agent.output.narrative_enrichment import get_narrative_enrichment
     from app.services.core_llm_agent.models.intent import IntentResult
     from app.services.core_llm_agent.models.location import LocationParseResult
+    from app.services.core_llm_agent.http_client import run_sync
+    from app.services.core_llm_agent.llm_cache import get_llm_cache
+    from app.services.core_llm_agent.openrouter_client import get_openrouter_client
+    from app.services.core_llm_agent.result_cache import get_result_cache, roi_fingerprint
+    from app.utils.geometry_store import get_geometry_store
+    from app.utils.tracing import get_tracer
+    from app.gee_service.latency_model import get_latency_model
 
 logger = logging.getLogger(__name__)
 
@@ -41,7 +63,8 @@ class CoreLLMAgent:
         self, 
         model_name: str = None,
         nominatim_url: str = None,
-        enable_debug: bool = False
+        enable_debug: bool = False,
+        fused_understanding: Optional[bool] = None
     ):
         """Initialize the CoreLLMAgent with all pipeline components.
         
@@ -49,14 +72,21 @@ class CoreLLMAgent:
             model_name: Model name for LLM operations (uses env default if None)
             nominatim_url: Nominatim API URL (uses default if None)
             enable_debug: Whether to enable detailed debug output
+            fused_understanding: Extract locations and intent with one LLM call
+                (uses CORE_AGENT_FUSED_UNDERSTANDING env var, default off, if None)
         """
         self.enable_debug = enable_debug
         
+        if fused_understanding is None:
+            fused_understanding = os.environ.get("CORE_AGENT_FUSED_UNDERSTANDING", "false").lower() in ("1", "true", "yes")
+        
         # Initialize pipeline components
         self.location_parser = LocationParser(model_name, nominatim_url)
         self.intent_classifier = IntentClassifier(model_name)
+        self.query_understanding = QueryUnderstanding(model_name) if fused_understanding else None
         self.service_dispatcher = ServiceDispatcher()
         self.result_formatter = ResultFormatter()
+        self.result_cache = get_result_cache()
         
         # Log model configuration
         from .config import get_openrouter_config
@@ -71,16 +101,51 @@ class CoreLLMAgent:
     def process_query(self, query: str, rag_session_id: Optional[str] = None) -> Dict[str, Any]:
         """Process a user query through the complete pipeline.
         
+        Synchronous wrapper around process_query_async for the CLI, tests and
+        other callers without an event loop.
+        
+        Args:
+            query: User query string
+            rag_session_id: RAG session ID if documents were uploaded
+            
+        Returns:
+            Final result dictionary with analysis and roi
+        """
+        return run_sync(self.process_query_async(query, rag_session_id))
+    
+    async def process_query_async(self, query: str, rag_session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Process a user query through the complete pipeline.
+        
         This is the main entry point that replaces the LangGraph workflow
-        from the original core_llm_agent.py.
+        from the original core_llm_agent.py. Every stage awaits non-blocking
+        HTTP calls on the shared async client, so concurrent queries on one
+        API worker do not wait for each other's LLM, geocoding or GEE calls.
+        
+        Each stage runs in a tracing span. The trace id is returned in the
+        result metadata; debug results also carry the per-stage timing
+        breakdown there ("timing").
         
         Args:
             query: User query string
+            rag_session_id: RAG session ID if documents were uploaded
             
         Returns:
             Final result dictionary with analysis and roi
         """
+        tracer = get_tracer()
+        with tracer.span("agent.process_query", attributes={"rag_session": bool(rag_session_id)}) as span:
+            result = await self._process_query_async(query, rag_session_id)
+            if span is not None:
+                metadata = result.setdefault("metadata", {})
+                metadata["trace_id"] = span.trace_id
+                if self.enable_debug:
+                    metadata["timing"] = tracer.breakdown(span.trace_id)
+            return result
+    
+    async def _process_query_async(self, query: str, rag_session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Run the pipeline stages for process_query_async."""
         start_time = time.time()
+        tracer = get_tracer()
         
         try:
             logger.info(f"Processing query: {query[:100]}...")
@@ -94,62 +159,38 @@ class CoreLLMAgent:
                 logger.info(f"RAG session detected ({rag_session_id[:8]}...), bypassing location/intent parsing")
                 logger.info("Dispatching directly to RAG service...")
                 
-                # Create minimal location and intent results for RAG
-                from .models.location import LocationParseResult
-                from .models.intent import IntentResult, ServiceType
-                
-                location_result = LocationParseResult(
-                    success=True,
-                    entities=[],
-                    raw_text=query,
-                    processing_time=0.0
-                )
-                
-                intent_result = IntentResult(
-                    success=True,
-                    service_type=ServiceType.SEARCH,  # Placeholder
-                    confidence=1.0,
-                    reasoning="RAG session active",
-                    processing_time=0.0
-                )
-                
-                # Dispatch directly to RAG
-                service_response = self.service_dispatcher.dispatch(
-                    query, intent_result, location_result, rag_session_id=rag_session_id
-                )
-                
-                # Skip to result formatting
-                total_processing_time = time.time() - start_time
-                logger.info(f"RAG query processed in {total_processing_time:.2f}s")
-                
-                return {
-                    "analysis": service_response.get("analysis", "No response from RAG service"),
-                    "roi": service_response.get("roi"),
-                    "summary": f"Document-based response from RAG service",
-                    "evidence": ["rag:session_active"],
-                    "metadata": {
-                        "processing_time": total_processing_time,
-                        "service": "RAG",
-                        "session_id": rag_session_id
-                    },
-                    "sources": service_response.get("sources", []),
-                    "confidence": service_response.get("confidence", 0.0)
-                }
+                location_result, intent_result = self._rag_session_context(query)
+                with tracer.span("agent.dispatch", attributes={"service": "RAG"}):
+                    service_response = await self.service_dispatcher.dispatch_async(
+                        query, intent_result, location_result, rag_session_id=rag_session_id
+                    )
+                return self._rag_session_result(service_response, rag_session_id, start_time)
             
             # Normal path: Full pipeline for geospatial queries
-            # Step 1: Location Parsing (NER + Geocoding)
-            logger.info("Step 1: Parsing locations...")
-            location_result = self.location_parser.parse_query(query, resolve_locations=True)
+            # Optional fused mode: one LLM call for locations, intent, sub-intent and time range.
+            # Fields it could not provide are filled in by the individual components below.
+            understanding = None
+            if self.query_understanding:
+                logger.info("Step 0: Fused query understanding...")
+                with tracer.span("agent.query_understanding"):
+                    understanding = await self.query_understanding.understand_async(query)
+            
+            # Steps 1 and 2 are independent, so location parsing (NER + Geocoding)
+            # and intent classification (Top-level + GEE sub-classification) run concurrently
+            logger.info("Steps 1-2: Parsing locations and classifying intent...")
+            location_result, intent_result = await asyncio.gather(
+                tracer.trace_call("agent.location_parsing", self.location_parser.parse_query_async(
+                    query, resolve_locations=True,
+                    entities=understanding.get("locations") if understanding else None
+                )),
+                tracer.trace_call("agent.intent_classification", self.intent_classifier.classify_intent_async(query, understanding)),
+            )
             
             if not location_result.success:
                 logger.warning(f"Location parsing failed: {location_result.error}")
             else:
                 logger.info(f"Found {len(location_result.entities)} location entities")
             
-            # Step 2: Intent Classification (Top-level + GEE sub-classification)
-            logger.info("Step 2: Classifying intent...")
-            intent_result = self.intent_classifier.classify_intent(query)
-            
             if not intent_result.success:
                 logger.warning(f"Intent classification failed: {intent_result.error}")
             else:
@@ -158,24 +199,42 @@ class CoreLLMAgent:
                 logger.info(f"Classified as: {service_type_str}" +
                            (f" → {gee_sub_str}" if intent_result.gee_sub_intent else ""))
             
+            # Resolved GEE analyses are answered from the end-to-end result cache
+            cache_entry = self._result_cache_entry(intent_result, location_result)
+            if cache_entry:
+                cached = self.result_cache.get(cache_entry["key"])
+                if cached:
+                    cached_result, age_seconds = cached
+                    logger.info(f"♻️ Result cache hit for {cache_entry['analysis_type']} ({age_seconds:.0f}s old)")
+                    return self._cached_result(cached_result, query, age_seconds, start_time)
+            
             # Step 3: Service Dispatch
             service_type_str = intent_result.service_type.value if hasattr(intent_result.service_type, 'value') else str(intent_result.service_type)
             logger.info(f"Step 3: Dispatching to {service_type_str} service...")
-            service_response = self.service_dispatcher.dispatch(
-                query, intent_result, location_result, rag_session_id=None
-            )
+            with tracer.span("agent.dispatch", attributes={"service": service_type_str, "analysis_type": intent_result.analysis_type}):
+                service_response = await self.service_dispatcher.dispatch_async(
+                    query, intent_result, location_result, rag_session_id=None
+                )
             
             # Step 4: Result Formatting
             logger.info("Step 4: Formatting final result...")
             total_processing_time = time.time() - start_time
             
-            if self.enable_debug:
-                final_result = self.result_formatter.format_debug_result(
-                    query, intent_result, location_result, service_response, total_processing_time
-                )
-            else:
-                final_result = self.result_formatter.format_final_result(
-                    query, intent_result, location_result, service_response, total_processing_time
+            with tracer.span("agent.format_result"):
+                if self.enable_debug:
+                    final_result = await self.result_formatter.format_debug_result_async(
+                        query, intent_result, location_result, service_response, total_processing_time
+                    )
+                else:
+                    final_result = await self.result_formatter.format_final_result_async(
+                        query, intent_result, location_result, service_response, total_processing_time
+                    )
+            
+            final_result.setdefault("metadata", {})["from_cache"] = False
+            if cache_entry and self._is_cacheable(service_response):
+                self.result_cache.set(
+                    cache_entry["key"], final_result, cache_entry["service"],
+                    cache_entry["analysis_type"], cache_entry["roi"], cache_entry["period"]
                 )
             
             logger.info(f"Query processing complete in {total_processing_time:.2f}s")
@@ -186,6 +245,145 @@ class CoreLLMAgent:
             logger.error(f"Error in query processing: {e}")
             return self.result_formatter._error_result(query, str(e), total_processing_time)
     
+    def _result_cache_entry(
+        self,
+        intent_result: IntentResult,
+        location_result: LocationParseResult
+    ) -> Optional[Dict[str, Any]]:
+        """Build the result cache key for a resolved query.
+        
+        Only GEE analyses are cached; they are keyed by what is computed
+        (analysis type, ROI fingerprint, analysed period), not the query text.
+        
+        Args:
+            intent_result: Intent classification result
+            location_result: Location parsing result
+            
+        Returns:
+            Dictionary with key and its parts, or None if the query is not cacheable
+        """
+        if not self.result_cache or not intent_result.success:
+            return None
+        
+        service = intent_result.service_type.value if hasattr(intent_result.service_type, 'value') else str(intent_result.service_type)
+        if service != "GEE":
+            return None
+        
+        roi = roi_fingerprint(location_result)
+        if not roi:
+            return None
+        
+        analysis_type = intent_result.analysis_type
+        period = self.service_dispatcher.analysis_period(analysis_type)
+        return {
+            "key": self.result_cache.make_key(service, analysis_type, roi, period, "debug" if self.enable_debug else ""),
+            "service": service,
+            "analysis_type": analysis_type,
+            "roi": roi,
+            "period": period
+        }
+    
+    @staticmethod
+    def _is_cacheable(service_response: Dict[str, Any]) -> bool:
+        """Whether a service response is a successful analysis worth caching.
+        
+        Args:
+            service_response: Response from the dispatched service
+            
+        Returns:
+            True for successful GEE analyses (not errors or search fallbacks)
+        """
+        if service_response.get("error"):
+            return False
+        return any(str(item).endswith("_service:success") for item in service_response.get("evidence", []))
+    
+    def _cached_result(
+        self,
+        result: Dict[str, Any],
+        query: str,
+        age_seconds: float,
+        start_time: float
+    ) -> Dict[str, Any]:
+        """Mark a cached result as served from cache.
+        
+        Args:
+            result: Cached final result
+            query: Current user query
+            age_seconds: Age of the cached result
+            start_time: Request start time
+            
+        Returns:
+            Final result dictionary with from_cache metadata
+        """
+        metadata = result.setdefault("metadata", {})
+        metadata["original_processing_time"] = metadata.get("processing_time")
+        metadata["processing_time"] = time.time() - start_time
+        metadata["query"] = query
+        metadata["from_cache"] = True
+        metadata["cache_age_seconds"] = round(age_seconds, 1)
+        return result
+    
+    def _rag_session_context(self, query: str):
+        """Create minimal location and intent results for a RAG session query.
+        
+        Args:
+            query: User query string
+            
+        Returns:
+            Tuple of (LocationParseResult, IntentResult)
+        """
+        from .models.intent import ServiceType
+        
+        location_result = LocationParseResult(
+            success=True,
+            entities=[],
+            raw_text=query,
+            processing_time=0.0
+        )
+        
+        intent_result = IntentResult(
+            success=True,
+            service_type=ServiceType.SEARCH,  # Placeholder
+            confidence=1.0,
+            reasoning="RAG session active",
+            processing_time=0.0
+        )
+        
+        return location_result, intent_result
+    
+    def _rag_session_result(
+        self,
+        service_response: Dict[str, Any],
+        rag_session_id: str,
+        start_time: float
+    ) -> Dict[str, Any]:
+        """Build the final result for a RAG session query.
+        
+        Args:
+            service_response: Response from the RAG dispatch
+            rag_session_id: RAG session ID
+            start_time: Request start time
+            
+        Returns:
+            Final result dictionary
+        """
+        total_processing_time = time.time() - start_time
+        logger.info(f"RAG query processed in {total_processing_time:.2f}s")
+        
+        return {
+            "analysis": service_response.get("analysis", "No response from RAG service"),
+            "roi": service_response.get("roi"),
+            "summary": f"Document-based response from RAG service",
+            "evidence": ["rag:session_active"],
+            "metadata": {
+                "processing_time": total_processing_time,
+                "service": "RAG",
+                "session_id": rag_session_id
+            },
+            "sources": service_response.get("sources", []),
+            "confidence": service_response.get("confidence", 0.0)
+        }
+    
     def process_query_legacy(self, query: str, rag_session_id: Optional[str] = None) -> Dict[str, Any]:
         """Process query and return in legacy format for backward compatibility.
         
@@ -270,25 +468,45 @@ class CoreLLMAgent:
         Returns:
             Status dictionary for all components
         """
+        llm_cache = get_llm_cache()
+        local_classifier = self.intent_classifier.local_classifier
+        
         return {
             "location_parser": {
                 "ner_model": self.location_parser.ner.model_name,
                 "geocoder_url": self.location_parser.geocoder.base_url,
+                "gazetteer": self.location_parser.geocoder.gazetteer.stats() if self.location_parser.geocoder.gazetteer else {"enabled": False},
+                "geocode_cache": self.location_parser.geocoder.cache.stats() if self.location_parser.geocoder.cache else {"enabled": False},
                 "api_key_configured": bool(self.location_parser.ner.api_key)
             },
             "intent_classifier": {
                 "top_level_model": self.intent_classifier.top_level_classifier.model_name,
                 "gee_sub_model": self.intent_classifier.gee_subclassifier.model_name,
-                "api_key_configured": bool(self.intent_classifier.top_level_classifier.api_key)
+                "api_key_configured": bool(self.intent_classifier.top_level_classifier.api_key),
+                "local_classifier": local_classifier.stats() if local_classifier else {"enabled": False}
             },
             "service_dispatcher": {
                 "services_initialized": self.service_dispatcher.services_initialized,
                 "gee_services_available": getattr(self.service_dispatcher, 'gee_services_available', False),
-                "rag_service_available": getattr(self.service_dispatcher, 'rag_service_available', False)
+                "rag_service_available": getattr(self.service_dispatcher, 'rag_service_available', False),
+                "geometry_store": get_geometry_store().stats(),
+                "single_flight": self.service_dispatcher.single_flight.stats() if self.service_dispatcher.single_flight else {"enabled": False},
+                "service_locator": self.service_dispatcher.service_locator.stats(),
+                "latency_model": get_latency_model().stats() if get_latency_model() else {"enabled": False}
             },
+            "tracing": get_tracer().stats(),
+            "result_cache": self.result_cache.stats() if self.result_cache else {"enabled": False},
             "result_formatter": {
-                "debug_enabled": self.enable_debug
-            }
+                "debug_enabled": self.enable_debug,
+                "narrative_templates": get_narrative_engine().stats(),
+                "narrative_enrichment": get_narrative_enrichment().stats() if get_narrative_enrichment() else {"enabled": False}
+            },
+            "query_understanding": {
+                "fused": self.query_understanding is not None,
+                "model": self.query_understanding.model_name if self.query_understanding else None
+            },
+            "llm_cache": llm_cache.stats() if llm_cache else {"enabled": False},
+            "openrouter": get_openrouter_client().stats()
         }
 
 
@@ -296,7 +514,8 @@ class CoreLLMAgent:
 def create_agent(
     model_name: str = None,
     nominatim_url: str = None,
-    enable_debug: bool = False
+    enable_debug: bool = False,
+    fused_understanding: Optional[bool] = None
 ) -> CoreLLMAgent:
     """Create a CoreLLMAgent instance with specified configuration.
     
@@ -304,6 +523,7 @@ def create_agent(
         model_name: Model name for LLM operations
         nominatim_url: Nominatim API URL
         enable_debug: Enable debug output
+        fused_understanding: Use one fused LLM call for NER and intent (env default if None)
         
     Returns:
         Configured CoreLLMAgent instance
@@ -311,7 +531,8 @@ def create_agent(
     return CoreLLMAgent(
         model_name=model_name,
         nominatim_url=nominatim_url,
-        enable_debug=enable_debug
+        enable_debug=enable_debug,
+        fused_understanding=fused_understanding
     )
 
 
@@ -6,72 +6,35 @@ import logging
 import time
 import json
 from typing import Dict, Any, Optional
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, field_validator
 
 try:
     from .agent import CoreLLMAgent
+    from .output.narrative_templates import get_narrative_engine, location_name
+    from .output.narrative_enrichment import get_narrative_enrichment
+    from ...utils.tracing import TRACE_ID_HEADER, TracingMiddleware, get_tracer
+    from ...utils.geojson_utils import (
+        GEOMETRY_ENCODING_HEADER, POLYLINE_ENCODING, encode_geometries, decode_geometries,
+        requested_geometry_precision
+    )
 except ImportError:
     import sys
     from pathlib import Path
     sys.path.append(str(Path(__file__).parent.parent.parent))
     from app.services.core_llm_agent.agent import CoreLLMAgent
+    from app.services.core_llm_agent.output.narrative_templates import get_narrative_engine, location_name
+    from app.services.core_llm_agent.output.narrative_enrichment import get_narrative_enrichment
+    from app.utils.tracing import TRACE_ID_HEADER, TracingMiddleware, get_tracer
+    from app.utils.geojson_utils import (
+        GEOMETRY_ENCODING_HEADER, POLYLINE_ENCODING, encode_geometries, decode_geometries,
+        requested_geometry_precision
+    )
 
 logger = logging.getLogger(__name__)
 
-def generate_ndvi_analysis(mean_val, min_val, max_val, location="the region"):
-    """Generate natural language analysis of NDVI statistics."""
-    try:
-        mean_val = float(mean_val)
-        min_val = float(min_val) if min_val is not None else None
-        max_val = float(max_val) if max_val is not None else None
-    except (ValueError, TypeError):
-        return f"NDVI analysis completed for {location}, but statistical values could not be processed."
-    
-    # Interpret NDVI values
-    if mean_val > 0.6:
-        health_status = "excellent vegetation health"
-        vegetation_desc = "dense, healthy vegetation cover"
-    elif mean_val > 0.4:
-        health_status = "good vegetation health"
-        vegetation_desc = "moderate to dense vegetation"
-    elif mean_val > 0.2:
-        health_status = "moderate vegetation health"
-        vegetation_desc = "sparse to moderate vegetation"
-    elif mean_val > 0:
-        health_status = "poor vegetation health"
-        vegetation_desc = "very sparse vegetation"
-    else:
-        health_status = "minimal vegetation"
-        vegetation_desc = "predominantly non-vegetated areas"
-    
-    # Build natural language analysis
-    analysis = f"The NDVI analysis of {location} reveals {health_status} with an average NDVI value of {mean_val:.3f}. "
-    analysis += f"This indicates {vegetation_desc} across the analyzed area.\n\n"
-    
-    if min_val is not None and max_val is not None:
-        range_val = max_val - min_val
-        analysis += f"The vegetation shows significant spatial variation, with NDVI values ranging from {min_val:.3f} to {max_val:.3f} (range: {range_val:.3f}). "
-        
-        if min_val < -0.1:
-            analysis += "The negative minimum values suggest the presence of water bodies, urban infrastructure, or bare soil. "
-        
-        if max_val > 0.7:
-            analysis += "The high maximum values indicate areas of very healthy, dense vegetation such as parks, forests, or well-maintained green spaces. "
-        elif max_val > 0.4:
-            analysis += "The maximum values show good vegetation coverage in the healthiest areas. "
-    
-    # Contextual interpretation
-    if mean_val < 0.3:
-        analysis += f"\n\nFor an urban area like {location}, this NDVI pattern is typical, reflecting a mix of built-up areas, roads, and scattered green spaces. "
-        analysis += "The moderate values suggest opportunities for urban greening initiatives to improve vegetation coverage."
-    else:
-        analysis += f"\n\nThis vegetation profile indicates a good balance of green cover for {location}, suggesting effective urban planning or natural vegetation preservation."
-    
-    return analysis
-
 # Request/Response Models
 class QueryRequest(BaseModel):
     """Request model for the /query endpoint."""
@@ -87,6 +50,8 @@ class QueryResponse(BaseModel):
     success: bool = Field(..., description="Whether the query was successful")
     error: Optional[str] = Field(None, description="Error message if any")
     processing_time: float = Field(..., description="Processing time in seconds")
+    from_cache: bool = Field(False, description="Whether the result was served from the result cache")
+    narrative_enrichment_id: Optional[str] = Field(None, description="Id of the LLM narrative being generated in the background, if enabled")
 
 class HealthResponse(BaseModel):
     """Health check response."""
@@ -108,8 +73,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[GEOMETRY_ENCODING_HEADER, TRACE_ID_HEADER],
 )
 
+# Trace each request; the trace id is returned in X-Trace-Id
+app.add_middleware(TracingMiddleware, service_name="agent")
+
 # Initialize the agent
 agent = None
 
@@ -128,10 +97,81 @@ def get_agent() -> CoreLLMAgent:
             )
     return agent
 
+def build_query_response(result: Dict[str, Any], processing_time: float) -> QueryResponse:
+    """Convert an agent result dictionary into a QueryResponse.
+    
+    Args:
+        result: Result dictionary from CoreLLMAgent.process_query
+        processing_time: Endpoint processing time in seconds
+        
+    Returns:
+        QueryResponse with the combined analysis text
+    """
+    ai_analysis = result.get("analysis", "")
+    analysis_data = result.get("analysis_data", {})
+    engine = get_narrative_engine()
+    
+    if analysis_data and analysis_data.get("error") is not None:
+        # If backend signaled an error in analysis_data, surface that directly
+        analysis = analysis_data.get("error")
+    elif analysis_data and engine.supports(analysis_data.get("analysis_type")):
+        # Deterministic narrative and statistics rendered from the templates
+        analysis = engine.render(analysis_data.get("analysis_type"), analysis_data, location_name(result))["text"]
+    else:
+        # Last resort fallback
+        analysis = ai_analysis or "No analysis generated"
+        
+    service_used = result.get("metadata", {}).get("service_type", "unknown")
+    roi = result.get("roi")
+    success = result.get("success", True)
+    error = result.get("error")
+    
+    # Log the raw result for debugging
+    logger.info(f"Raw result keys: {list(result.keys())}")
+    if analysis_data:
+        logger.info(f"Analysis data keys: {list(analysis_data.keys())}")
+        logger.info(f"Analysis data values: {analysis_data}")
+    
+    logger.info(f"AI analysis length: {len(ai_analysis) if ai_analysis else 0}")
+    logger.info(f"AI analysis content: {ai_analysis[:100] if ai_analysis else 'None'}...")
+    logger.info(f"Final analysis length: {len(analysis) if analysis else 0}")
+    
+    return QueryResponse(
+        analysis=analysis,
+        service_used=service_used,
+        roi=roi,
+        analysis_data=analysis_data,
+        success=success,
+        error=error,
+        processing_time=processing_time,
+        from_cache=bool(result.get("metadata", {}).get("from_cache", False)),
+        narrative_enrichment_id=(result.get("metadata", {}).get("narrative_enrichment") or {}).get("enrichment_id")
+    )
+
+def get_rag_service():
+    """Get the agent's async RAG service, used for streaming answers.
+    
+    Streaming and /query share one RAGService, so they share its semantic
+    answer cache and generation limit.
+    """
+    rag_service = get_agent().service_dispatcher.async_rag_service
+    if rag_service is None:
+        raise HTTPException(status_code=503, detail="RAG service unavailable")
+    return rag_service
+
+def geometry_encoding_headers(precision: Optional[int]) -> Dict[str, str]:
+    """Response header announcing compact geometries (empty for plain GeoJSON)."""
+    return {GEOMETRY_ENCODING_HEADER: f"{POLYLINE_ENCODING}{precision}"} if precision else {}
+
 @app.post("/query", response_model=QueryResponse)
-async def process_query(request: QueryRequest) -> QueryResponse:
-    """Process a query using GEE or Search services."""
+async def process_query(request: QueryRequest, http_request: Request) -> QueryResponse:
+    """Process a query using GEE or Search services.
+    
+    Clients sending "X-Geometry-Encoding: polyline" receive ROI geometries as
+    encoded polylines.
+    """
     start_time = time.time()
+    precision = requested_geometry_precision(http_request.headers.get(GEOMETRY_ENCODING_HEADER))
     
     try:
         agent = get_agent()
@@ -142,151 +182,18 @@ async def process_query(request: QueryRequest) -> QueryResponse:
         else:
             logger.info("No RAG session ID provided")
         
-        # Process the query
-        result = agent.process_query(request.query, request.rag_session_id)
+        # Process the query without blocking the event loop
+        result = await agent.process_query_async(request.query, request.rag_session_id)
         
         processing_time = time.time() - start_time
         
-        # Extract the analysis text and service used
-        # Get the AI-generated analysis
-        ai_analysis = result.get("analysis", "")
-        analysis_data = result.get("analysis_data", {})
-        
-        # Build comprehensive analysis combining AI insights with raw data
-        # Check if ai_analysis is just formatted display text (starts with emoji/symbols)
-        is_display_format = ai_analysis and (ai_analysis.startswith('🔍') or ai_analysis.startswith('==') or 'Query:' in ai_analysis[:100])
-        
-        if ai_analysis and not ("analysis completed" in ai_analysis.lower() and len(ai_analysis) < 50) and not is_display_format:
-            # We have good AI analysis, enhance it with statistics
-            analysis = f"🤖 **AI Analysis:**\n{ai_analysis}\n\n"
-            
-            if analysis_data:
-                analysis_type = analysis_data.get("analysis_type", "analysis")
-                mean_val = analysis_data.get("mean_ndvi") or analysis_data.get("mean")
-                min_val = analysis_data.get("min_ndvi") or analysis_data.get("min")
-                max_val = analysis_data.get("max_ndvi") or analysis_data.get("max")
-                
-                analysis += f"📊 **Statistical Summary:**\n"
-                if mean_val is not None:
-                    analysis += f"• Mean NDVI: {mean_val}\n"
-                if min_val is not None:
-                    analysis += f"• Min NDVI: {min_val}\n"
-                if max_val is not None:
-                    analysis += f"• Max NDVI: {max_val}\n"
-                    
-        elif analysis_data:
-            # If backend signaled an error in analysis_data, surface that directly
-            has_error = analysis_data.get("error") is not None
-            if has_error:
-                analysis = analysis_data.get("error")
-                analysis_type = "error"
-                mean_val = min_val = max_val = None
-            else:
-                # Generate natural language analysis from raw data
-                analysis_type = analysis_data.get("analysis_type", "analysis")
-                mean_val = analysis_data.get("mean_ndvi") or analysis_data.get("mean")
-                min_val = analysis_data.get("min_ndvi") or analysis_data.get("min")
-                max_val = analysis_data.get("max_ndvi") or analysis_data.get("max")
-            
-            if not has_error and analysis_type.lower() == "ndvi" and mean_val is not None:
-                # Extract location from ROI if available
-                location_name = "the region"
-                if result.get("roi") and result["roi"].get("display_name"):
-                    location_name = result["roi"]["display_name"].split(',')[0]
-                
-                # Generate natural language NDVI analysis
-                natural_analysis = generate_ndvi_analysis(mean_val, min_val, max_val, location_name)
-                analysis = f"🤖 **AI Analysis:**\n{natural_analysis}\n\n"
-                analysis += f"📊 **Statistical Summary:**\n"
-                analysis += f"• Mean NDVI: {mean_val}\n"
-                if min_val is not None:
-                    analysis += f"• Min NDVI: {min_val}\n"
-                if max_val is not None:
-                    analysis += f"• Max NDVI: {max_val}\n"
-            elif not has_error and analysis_type.lower() == "water":
-                # Handle water analysis specifically
-                water_percentage = analysis_data.get("water_percentage")
-                non_water_percentage = analysis_data.get("non_water_percentage")
-                
-                # Extract location from ROI if available
-                location_name = "the region"
-                if result.get("roi") and result["roi"].get("display_name"):
-                    location_name = result["roi"]["display_name"].split(',')[0]
-                
-                if water_percentage is not None:
-                    water_pct = float(water_percentage)
-                    non_water_pct = float(non_water_percentage) if non_water_percentage else (100 - water_pct)
-                    
-                    # Generate natural language water analysis
-                    if water_pct > 50:
-                        water_status = "extensive water coverage"
-                        water_desc = "predominantly water bodies such as lakes, rivers, or wetlands"
-                    elif water_pct > 20:
-                        water_status = "significant water presence"
-                        water_desc = "substantial water bodies with mixed land cover"
-                    elif water_pct > 5:
-                        water_status = "moderate water coverage"
-                        water_desc = "scattered water bodies like ponds, streams, or small lakes"
-                    elif water_pct > 1:
-                        water_status = "limited water coverage"
-                        water_desc = "sparse water features with mostly dry land"
-                    else:
-                        water_status = "minimal water coverage"
-                        water_desc = "predominantly dry land with very few water features"
-                    
-                    natural_analysis = f"The water analysis of {location_name} reveals {water_status} with {water_pct:.2f}% of the area covered by water bodies. "
-                    natural_analysis += f"This indicates {water_desc} across the analyzed region.\n\n"
-                    natural_analysis += f"The remaining {non_water_pct:.2f}% consists of land areas including urban development, vegetation, and bare soil. "
-                    
-                    if water_pct < 1:
-                        natural_analysis += f"The low water coverage suggests {location_name} is primarily a terrestrial environment with limited surface water resources."
-                    elif water_pct > 10:
-                        natural_analysis += f"The substantial water coverage indicates {location_name} has significant aquatic ecosystems and water resources."
-                    
-                    analysis = f"🤖 **AI Analysis:**\n{natural_analysis}\n\n"
-                    analysis += f"💧 **Water Coverage Summary:**\n"
-                    analysis += f"• Water Coverage: {water_pct:.2f}%\n"
-                    analysis += f"• Land Coverage: {non_water_pct:.2f}%\n"
-                else:
-                    analysis = f"💧 **WATER Analysis Results:**\n\n"
-                    analysis += f"📊 Water analysis completed for {location_name}\n"
-            else:
-                # Fallback for other analysis types
-                analysis = f"🌱 **{analysis_type.upper()} Analysis Results:**\n\n"
-                analysis += f"📊 Mean Value: {mean_val}\n"
-                if min_val is not None:
-                    analysis += f"📉 Min Value: {min_val}\n"
-                if max_val is not None:
-                    analysis += f"📈 Max Value: {max_val}\n"
-                # Do NOT append a success line if we don't have tiles; leave concise
-        else:
-            # Last resort fallback
-            analysis = ai_analysis or "No analysis generated"
-            
-        service_used = result.get("metadata", {}).get("service_type", "unknown")
-        roi = result.get("roi")
-        success = result.get("success", True)
-        error = result.get("error")
-        
-        # Log the raw result for debugging
-        logger.info(f"Raw result keys: {list(result.keys())}")
-        if analysis_data:
-            logger.info(f"Analysis data keys: {list(analysis_data.keys())}")
-            logger.info(f"Analysis data values: {analysis_data}")
-        
-        logger.info(f"AI analysis length: {len(ai_analysis) if ai_analysis else 0}")
-        logger.info(f"AI analysis content: {ai_analysis[:100] if ai_analysis else 'None'}...")
-        logger.info(f"Final analysis length: {len(analysis) if analysis else 0}")
-        
-        return QueryResponse(
-            analysis=analysis,
-            service_used=service_used,
-            roi=roi,
-            analysis_data=analysis_data,
-            success=success,
-            error=error,
-            processing_time=processing_time
-        )
+        response = build_query_response(result, processing_time)
+        if precision is not None:
+            return JSONResponse(
+                content=encode_geometries(response.model_dump(mode="json"), precision),
+                headers=geometry_encoding_headers(precision)
+            )
+        return response
         
     except Exception as e:
         processing_time = time.time() - start_time
@@ -302,6 +209,84 @@ async def process_query(request: QueryRequest) -> QueryResponse:
             processing_time=processing_time
         )
 
+@app.post("/query-stream")
+async def stream_query(request: QueryRequest, http_request: Request):
+    """Process a query and stream the answer as server-sent events.
+    
+    Document questions (requests with a RAG session) stream answer tokens as the
+    LLM generates them, followed by a ``sources`` event. Other queries run the
+    normal pipeline and emit a single ``result`` event carrying the QueryResponse.
+    When LLM narrative enrichment is enabled, an ``enrichment`` event with the
+    LLM narrative follows once it is ready.
+    """
+    start_time = time.time()
+    precision = requested_geometry_precision(http_request.headers.get(GEOMETRY_ENCODING_HEADER))
+    
+    async def generate_query_stream():
+        try:
+            if request.rag_session_id:
+                logger.info(f"Streaming RAG answer for session {request.rag_session_id[:8]}...")
+                async for event in get_rag_service().ask_stream(
+                    query=request.query,
+                    session_id=request.rag_session_id
+                ):
+                    if event["type"] == "sources":
+                        event["service_used"] = "RAG"
+                    yield f"data: {json.dumps(event)}\n\n"
+                return
+            
+            result = await get_agent().process_query_async(request.query, None)
+            response = build_query_response(result, time.time() - start_time)
+            event = {'type': 'result', **response.model_dump()}
+            if precision is not None:
+                event = encode_geometries(event, precision)
+            yield f"data: {json.dumps(event)}\n\n"
+            
+            enrichment = get_narrative_enrichment()
+            if enrichment is not None and response.narrative_enrichment_id:
+                narrative = await enrichment.wait(response.narrative_enrichment_id)
+                if narrative is not None:
+                    yield f"data: {json.dumps({'type': 'enrichment', **narrative})}\n\n"
+            yield f"data: {json.dumps({'type': 'done', 'success': response.success, 'processing_time': time.time() - start_time})}\n\n"
+        except Exception as e:
+            logger.error(f"Error in query streaming: {e}")
+            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+    
+    return StreamingResponse(
+        generate_query_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+            **geometry_encoding_headers(precision)
+        }
+    )
+
+@app.get("/narrative/{enrichment_id}")
+async def get_narrative_enrichment_result(enrichment_id: str, wait: float = 0) -> Dict[str, Any]:
+    """Fetch the background LLM narrative of a /query response.
+    
+    Args:
+        enrichment_id: narrative_enrichment_id from the QueryResponse
+        wait: Seconds to wait for a pending narrative (0 returns immediately)
+    """
+    enrichment = get_narrative_enrichment()
+    if enrichment is None:
+        raise HTTPException(status_code=404, detail="Narrative enrichment is disabled (ENABLE_RESPONSE_LLM)")
+    narrative = await enrichment.wait(enrichment_id, min(wait, 60)) if wait > 0 else enrichment.get(enrichment_id)
+    if narrative is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired enrichment id")
+    return narrative
+
+@app.get("/traces/{trace_id}")
+async def get_trace(trace_id: str) -> Dict[str, Any]:
+    """Per-stage timing breakdown of a recent request (trace id from X-Trace-Id)."""
+    breakdown = get_tracer().breakdown(trace_id)
+    if not breakdown["spans"]:
+        raise HTTPException(status_code=404, detail="Unknown or expired trace id")
+    return breakdown
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check() -> HealthResponse:
     """Health check endpoint."""
@@ -332,16 +317,23 @@ async def health_check() -> HealthResponse:
 # Request model for COT streaming
 class COTStreamRequest(BaseModel):
     user_prompt: str = Field(..., description="User's analysis request")
-    roi: Optional[Dict[str, Any]] = Field(None, description="Region of Interest GeoJSON")
+    roi: Optional[Dict[str, Any]] = Field(None, description="Region of Interest GeoJSON (plain or encoded polylines)")
+    
+    @field_validator("roi", mode="before")
+    @classmethod
+    def decode_compact_roi(cls, value: Any) -> Any:
+        return decode_geometries(value)
 
 @app.post("/cot-stream")
-async def stream_cot_analysis(request: COTStreamRequest):
+async def stream_cot_analysis(request: COTStreamRequest, http_request: Request):
     """
     Stream Chain of Thought analysis step by step with real backend execution
     
     This endpoint provides real-time COT where each step is actually executed
-    in the backend before showing the next step to the user.
+    in the backend before showing the next step to the user. Clients sending
+    "X-Geometry-Encoding: polyline" receive the ROI as encoded polylines.
     """
+    precision = requested_geometry_precision(http_request.headers.get(GEOMETRY_ENCODING_HEADER))
     try:
         from .simple_step_processor import SimpleStepProcessor
         
@@ -350,6 +342,8 @@ async def stream_cot_analysis(request: COTStreamRequest):
         async def generate_cot_stream():
             try:
                 async for step in processor.process_analysis_steps(request.roi or {}, request.user_prompt):
+                    if precision is not None and "final_result" in step:
+                        step = encode_geometries(step, precision)
                     yield f"data: {json.dumps(step)}\n\n"
             except Exception as e:
                 logger.error(f"Error in COT streaming: {e}")
@@ -368,9 +362,12 @@ async def stream_cot_analysis(request: COTStreamRequest):
             headers={
                 "Cache-Control": "no-cache",
                 "Connection": "keep-alive",
+                "X-Accel-Buffering": "no",
+                **geometry_encoding_headers(precision),
                 "Access-Control-Allow-Origin": "*",
                 "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type"
+                "Access-Control-Allow-Headers": "Content-Type, X-Geometry-Encoding",
+                "Access-Control-Expose-Headers": f"{GEOMETRY_ENCODING_HEADER}, {TRACE_ID_HEADER}"
             }
         )
         
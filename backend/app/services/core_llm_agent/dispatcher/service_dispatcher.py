@@ -5,12 +5,22 @@ This module dispatches requests to GEE, RAG, or Search services based on
 intent classification results. It provides a unified interface for service calls.
 """
 
+import os
+import time
+import asyncio
+import httpx
 import logging
 from typing import Dict, Any, List, Optional
 
 try:
     from ..models.intent import IntentResult, ServiceType, GEESubIntent
     from ..models.location import LocationParseResult
+    from ..http_client import get_async_client, run_sync
+    from ..single_flight import SingleFlight, get_single_flight
+    from ....utils.geometry_store import get_geometry_store
+    from ....service_locator import get_service_locator
+    from ....gee_service.latency_model import get_latency_model
+    from ....gee_service.admission import date_span_days
 except ImportError:
     import sys
     from pathlib import Path
@@ -18,6 +28,12 @@ except ImportError:
     
     from app.services.core_llm_agent.models.intent import IntentResult, ServiceType, GEESubIntent
     from app.services.core_llm_agent.models.location import LocationParseResult
+    from app.services.core_llm_agent.http_client import get_async_client, run_sync
+    from app.services.core_llm_agent.single_flight import SingleFlight, get_single_flight
+    from app.utils.geometry_store import get_geometry_store
+    from app.service_locator import get_service_locator
+    from app.gee_service.latency_model import get_latency_model
+    from app.gee_service.admission import date_span_days
 
 logger = logging.getLogger(__name__)
 
@@ -25,17 +41,37 @@ logger = logging.getLogger(__name__)
 class ServiceDispatcher:
     """Dispatcher for routing requests to appropriate services."""
     
+    # Periods analysed by the GEE HTTP services (start, end) per analysis type
+    ANALYSIS_PERIODS = {
+        "ndvi": ("2023-06-01", "2023-08-31"),
+        "lst": ("2024-01-01", "2024-08-31"),
+        "water": ("2023-01-01", "2023-12-31"),
+        "lulc": ("2023-01-01", "2023-12-31"),
+    }
+    
+    # A user is waiting on chat analyses: admit them ahead of bulk jobs in the GEE service
+    GEE_REQUEST_HEADERS = {"X-Request-Priority": "interactive"}
+    
     def __init__(self):
         """Initialize the ServiceDispatcher."""
         self.services_initialized = False
+        self.single_flight = get_single_flight()
+        self.service_locator = get_service_locator()
+        # Long analyses run as GEE service jobs instead of one long-held request
+        self.async_jobs_enabled = os.environ.get("GEE_ASYNC_JOBS_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.job_poll_seconds = float(os.environ.get("GEE_JOB_POLL_SECONDS", "2.0"))
         self._init_services()
     
     def _init_services(self):
         """Initialize service connections and imports."""
         try:
             # Import services - these should already exist
-            from app.search_service.integration_client import call_search_service_for_analysis
+            from app.search_service.integration_client import (
+                call_search_service_for_analysis,
+                call_search_service_for_analysis_async
+            )
             self.search_service = call_search_service_for_analysis
+            self.search_service_async = call_search_service_for_analysis_async
             
             # Check if GEE services are available
             try:
@@ -50,11 +86,13 @@ class ServiceDispatcher:
                 self.gee_services_available = False
             
             # RAG service integration
+            self.async_rag_service = None
             try:
-                from ..rag.rag_sync_wrapper import create_sync_rag_service
-                self.rag_service = create_sync_rag_service()
+                from ..rag.rag_service import create_rag_service
+                # Native async service for dispatch_async; no thread bridge involved
+                self.async_rag_service = create_rag_service()
                 # Test if service is actually available
-                self.rag_service_available = self.rag_service.is_available()
+                self.rag_service_available = self._rag_service_available()
                 if self.rag_service_available:
                     logger.info("RAG service available for integration")
                 else:
@@ -62,7 +100,6 @@ class ServiceDispatcher:
             except ImportError as e:
                 logger.warning(f"RAG service not available: {e}")
                 self.rag_service_available = False
-                self.rag_service = None
             
             self.services_initialized = True
             logger.info("Service dispatcher initialized successfully")
@@ -71,19 +108,58 @@ class ServiceDispatcher:
             logger.error(f"Failed to initialize services: {e}")
             self.services_initialized = False
     
+    def _rag_service_available(self, timeout: float = 5.0) -> bool:
+        """Check whether the RAG service answers its health check.
+        
+        Args:
+            timeout: Health check timeout in seconds
+            
+        Returns:
+            True if the service reports healthy or degraded, False otherwise
+        """
+        try:
+            health = run_sync(asyncio.wait_for(self.async_rag_service.health_check(), timeout))
+            return health.get("status") in ("healthy", "degraded")
+        except Exception as e:
+            logger.warning(f"RAG health check failed: {e}")
+            return False
+    
     def dispatch(
         self, 
         query: str, 
         intent_result: IntentResult, 
         location_result: LocationParseResult,
         rag_session_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Dispatch request to appropriate service based on intent (synchronous wrapper).
+        
+        Args:
+            query: Original user query
+            intent_result: Intent classification result
+            location_result: Location parsing result
+            
+        Returns:
+            Service response dictionary with analysis, roi, and metadata
+        """
+        return run_sync(self.dispatch_async(query, intent_result, location_result, rag_session_id))
+    
+    async def dispatch_async(
+        self,
+        query: str,
+        intent_result: IntentResult,
+        location_result: LocationParseResult,
+        rag_session_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Dispatch request to appropriate service based on intent.
         
+        Service calls go through the shared async HTTP client, so a slow GEE
+        analysis only occupies its own request instead of an API worker.
+        
         Args:
             query: Original user query
             intent_result: Intent classification result
             location_result: Location parsing result
+            rag_session_id: RAG session ID if documents were uploaded
             
         Returns:
             Service response dictionary with analysis, roi, and metadata
@@ -106,13 +182,13 @@ class ServiceDispatcher:
             # Check for RAG session first (dynamic RAG usage when files uploaded)
             if rag_session_id and self.rag_service_available:
                 logger.info("RAG session detected; routing to RAG service")
-                return self._dispatch_rag(query, intent_result, location_result, rag_session_id)
+                return await self._dispatch_rag(query, intent_result, location_result, rag_session_id)
             
             # Route based on intent classification
             if service_type == ServiceType.GEE or service_type_value == "GEE":
-                return self._dispatch_gee(query, intent_result, location_result)
+                return await self._dispatch_gee(query, intent_result, location_result)
             elif service_type == ServiceType.SEARCH or service_type_value == "SEARCH":
-                return self._dispatch_search(query, intent_result, location_result)
+                return await self._dispatch_search(query, intent_result, location_result)
             else:
                 logger.error(f"Unknown service type: {intent_result.service_type}")
                 return self._error_response(f"Unknown service type: {intent_result.service_type}")
@@ -121,7 +197,7 @@ class ServiceDispatcher:
             logger.error(f"Error in service dispatch: {e}")
             return self._error_response(f"Service dispatch failed: {str(e)}")
     
-    def _dispatch_gee(
+    async def _dispatch_gee(
         self, 
         query: str, 
         intent_result: IntentResult, 
@@ -151,40 +227,65 @@ class ServiceDispatcher:
                 for entity in location_result.entities
             ]
         
-        # Import ROI handler for geometry resolution
         try:
-            from app.services.gee.roi_handler import ROIHandler
-            roi_handler = ROIHandler()
-            
-            # Get ROI geometry
-            roi_info = None
-            if locations_legacy:
-                roi_info = roi_handler.extract_roi_from_locations(locations_legacy)
-            elif location_result.roi_geometry:
-                # Use already resolved geometry
-                roi_info = {
-                    "geometry": location_result.roi_geometry,
-                    "area_km2": location_result.primary_location.area_km2 if location_result.primary_location else 0,
-                    "polygon_geometry": location_result.roi_geometry
-                }
-            
-            if not roi_info:
-                # Fallback to default ROI
-                roi_info = roi_handler.get_default_roi()
+            # ROI resolution uses the synchronous geocoding stack; keep it off the event loop
+            roi_info = await asyncio.to_thread(self._resolve_roi_info, locations_legacy, location_result)
             
             # Route to specific GEE service based on sub-intent
             analysis_type = intent_result.analysis_type
             
             # Always use HTTP service calls for reliability
-            return self._call_gee_http_service(analysis_type, roi_info, query)
+            return await self._call_gee_http_service(analysis_type, roi_info, query)
                 
         except Exception as e:
             logger.error(f"Error in GEE service dispatch: {e}")
             # Fallback to search service
             logger.info("Falling back to search service due to GEE error")
-            return self._dispatch_search(query, intent_result, location_result)
+            return await self._dispatch_search(query, intent_result, location_result)
+    
+    def _resolve_roi_info(
+        self,
+        locations_legacy: List[Dict[str, Any]],
+        location_result: LocationParseResult
+    ) -> Dict[str, Any]:
+        """Resolve the ROI geometry for a GEE request.
+        
+        Args:
+            locations_legacy: Location entities in legacy dictionary format
+            location_result: Location parsing result
+            
+        Returns:
+            ROI information dictionary (default ROI if nothing resolves)
+        """
+        # Import ROI handler for geometry resolution
+        from app.services.gee.roi_handler import ROIHandler
+        roi_handler = ROIHandler()
+        
+        # Get ROI geometry
+        roi_info = None
+        if locations_legacy:
+            roi_info = roi_handler.extract_roi_from_locations(locations_legacy)
+        elif location_result.roi_geometry:
+            # Use already resolved geometry
+            roi_info = {
+                "geometry": location_result.roi_geometry,
+                "area_km2": location_result.primary_location.area_km2 if location_result.primary_location else 0,
+                "polygon_geometry": location_result.roi_geometry
+            }
+        
+        if not roi_info:
+            # Fallback to default ROI
+            roi_info = roi_handler.get_default_roi()
+        
+        # GEE computation uses the Earth Engine level of detail of the boundary
+        geometry_store = get_geometry_store()
+        for key in ("geometry", "polygon_geometry"):
+            if isinstance(roi_info.get(key), dict):
+                roi_info[key] = geometry_store.lod(roi_info[key], "gee")
+        
+        return roi_info
     
-    def _call_ndvi_service(self, roi_info: Dict[str, Any], query: str) -> Dict[str, Any]:
+    async def _call_ndvi_service(self, roi_info: Dict[str, Any], query: str) -> Dict[str, Any]:
         """Call NDVI service directly.
         
         Args:
@@ -197,7 +298,8 @@ class ServiceDispatcher:
         try:
             # Use polygon-based analysis if available
             if roi_info.get("polygon_geometry"):
-                result = self.ndvi_service.analyze_ndvi_with_polygon(
+                result = await asyncio.to_thread(
+                    self.ndvi_service.analyze_ndvi_with_polygon,
                     roi_data=roi_info,
                     start_date="2023-06-01",
                     end_date="2023-08-31",
@@ -208,7 +310,8 @@ class ServiceDispatcher:
                     exact_computation=False
                 )
             else:
-                result = self.ndvi_service.analyze_ndvi(
+                result = await asyncio.to_thread(
+                    self.ndvi_service.analyze_ndvi,
                     geometry=roi_info["geometry"],
                     start_date="2023-06-01",
                     end_date="2023-08-31",
@@ -229,7 +332,7 @@ class ServiceDispatcher:
             logger.error(f"Error calling NDVI service: {e}")
             return self._error_response(f"NDVI service error: {str(e)}")
     
-    def _call_lst_service(self, roi_info: Dict[str, Any], query: str) -> Dict[str, Any]:
+    async def _call_lst_service(self, roi_info: Dict[str, Any], query: str) -> Dict[str, Any]:
         """Call LST service directly.
         
         Args:
@@ -242,7 +345,8 @@ class ServiceDispatcher:
         try:
             # Use polygon-based analysis if available
             if roi_info.get("polygon_geometry"):
-                result = self.lst_service.analyze_lst_with_polygon(
+                result = await asyncio.to_thread(
+                    self.lst_service.analyze_lst_with_polygon,
                     roi_data=roi_info,
                     start_date="2023-06-01",
                     end_date="2023-08-31",
@@ -254,7 +358,7 @@ class ServiceDispatcher:
                 )
             else:
                 # Fallback to HTTP service
-                return self._call_gee_http_service("lst", roi_info, query)
+                return await self._call_gee_http_service("lst", roi_info, query)
             
             if result.get("success"):
                 return self._format_gee_response(result, "lst", roi_info)
@@ -266,7 +370,18 @@ class ServiceDispatcher:
             logger.error(f"Error calling LST service: {e}")
             return self._error_response(f"LST service error: {str(e)}")
     
-    def _call_gee_http_service(
+    def analysis_period(self, analysis_type: str) -> tuple:
+        """Get the period a GEE analysis type is computed for.
+        
+        Args:
+            analysis_type: Type of analysis (ndvi, lulc, lst, etc.)
+            
+        Returns:
+            (start_date, end_date) ISO date tuple (LULC period for unknown types)
+        """
+        return self.ANALYSIS_PERIODS.get(analysis_type, self.ANALYSIS_PERIODS["lulc"])
+    
+    async def _call_gee_http_service(
         self, 
         analysis_type: str, 
         roi_info: Dict[str, Any], 
@@ -282,20 +397,19 @@ class ServiceDispatcher:
         Returns:
             GEE HTTP service response
         """
-        import requests
-        
         try:
             # Get base service URL from config
             from app.config_urls import get_service_url
             base_url = get_service_url()
+            start_date, end_date = self.analysis_period(analysis_type)
             
             # Determine service endpoint
             if analysis_type == "ndvi":
-                url = f"{base_url}/ndvi/vegetation-analysis"
+                path = "/ndvi/vegetation-analysis"
                 payload = {
                     "geometry": roi_info["geometry"],
-                    "startDate": "2023-06-01",
-                    "endDate": "2023-08-31",
+                    "startDate": start_date,
+                    "endDate": end_date,
                     "cloudThreshold": 30,
                     "scale": 30,
                     "maxPixels": 2e8,
@@ -303,11 +417,11 @@ class ServiceDispatcher:
                     "exactComputation": False
                 }
             elif analysis_type == "lst":
-                url = f"{base_url}/lst/land-surface-temperature"
+                path = "/lst/land-surface-temperature"
                 payload = {
                     "geometry": roi_info["geometry"],
-                    "startDate": "2024-01-01",
-                    "endDate": "2024-08-31",
+                    "startDate": start_date,
+                    "endDate": end_date,
                     "includeUHI": True,
                     "includeTimeSeries": False,
                     "scale": 1000,
@@ -315,19 +429,19 @@ class ServiceDispatcher:
                     "exactComputation": False
                 }
             elif analysis_type == "water":
-                url = f"{base_url}/water/analyze"
+                path = "/water/analyze"
                 payload = {
                     "roi": roi_info["geometry"],
-                    "year": 2023,
+                    "year": int(start_date[:4]),
                     "threshold": 20,
                     "include_seasonal": True
                 }
             elif analysis_type == "lulc":
-                url = f"{base_url}/lulc/dynamic-world"
+                path = "/lulc/dynamic-world"
                 payload = {
                     "geometry": roi_info["geometry"],
-                    "startDate": "2023-01-01",
-                    "endDate": "2023-12-31",
+                    "startDate": start_date,
+                    "endDate": end_date,
                     "confidenceThreshold": 0.3,
                     "scale": 20,
                     "maxPixels": 5e8,
@@ -335,11 +449,11 @@ class ServiceDispatcher:
                     "includeMedianVis": False
                 }
             else:  # Default to LULC
-                url = f"{base_url}/lulc/dynamic-world"
+                path = "/lulc/dynamic-world"
                 payload = {
                     "geometry": roi_info["geometry"],
-                    "startDate": "2023-01-01",
-                    "endDate": "2023-12-31",
+                    "startDate": start_date,
+                    "endDate": end_date,
                     "confidenceThreshold": 0.5,
                     "scale": 30,
                     "maxPixels": 1e9,
@@ -347,12 +461,17 @@ class ServiceDispatcher:
                     "includeMedianVis": False
                 }
             
-            # Calculate timeout based on area size
+            url = f"{base_url}{path}"
+            
+            # Calculate timeout from the latency model (area buckets until it has history)
             area_km2 = roi_info.get("area_km2", 0)
-            timeout = self._calculate_timeout_for_area(area_km2, analysis_type)
+            scale = payload.get("scale", 30)
+            days = date_span_days(start_date, end_date) or 1
+            timeout = self._calculate_timeout_for_area(area_km2, analysis_type, scale, days)
             # Cap timeouts to avoid very long stalls during development; separate connect vs read timeouts
             connect_timeout = 10
             read_timeout = min(timeout, 120)
+            run_as_job = self._should_run_as_job(area_km2, analysis_type, scale, days, timeout, read_timeout)
             
             # Check if area is too large for analysis
             if area_km2 > 35000:  # Areas larger than 35k km² are rejected
@@ -364,21 +483,33 @@ class ServiceDispatcher:
             
             # Standard single-request processing
             logger.info(
-                f"➡️  Calling GEE HTTP service {url} with timeout={read_timeout}s (connect={connect_timeout}s), area={area_km2:.0f} km²"
-            )
-            response = requests.post(
-                url,
-                json=payload,
-                timeout=(connect_timeout, read_timeout),
+                f"➡️  Calling GEE service {url} with timeout={read_timeout}s (connect={connect_timeout}s), area={area_km2:.0f} km²"
             )
-            logger.info(f"⬅️  GEE service responded with status {response.status_code}")
-            response.raise_for_status()
-            result = response.json()
+            async def run_analysis() -> Dict[str, Any]:
+                if run_as_job:
+                    return await self._run_gee_job(base_url, path, payload, timeout, connect_timeout)
+                # In-process when the GEE service is mounted in this app, HTTP otherwise
+                response = await self.service_locator.request(
+                    "gee", "POST", path,
+                    base_url=base_url,
+                    json=payload,
+                    headers=self.GEE_REQUEST_HEADERS,
+                    timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                )
+                logger.info(f"⬅️  GEE service responded with status {response.status_code}")
+                response.raise_for_status()
+                return response.json()
+            
+            # Identical concurrent analyses share one Earth Engine computation
+            if self.single_flight:
+                result = await self.single_flight.run(SingleFlight.signature(url, payload), run_analysis)
+            else:
+                result = await run_analysis()
             
             # GEE services return data directly, not wrapped in success/error
             return self._format_gee_response(result, analysis_type, roi_info)
                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"HTTP error calling GEE service: {e}")
             # Create a basic error response with analysis_data for consistency
             error_response = self._error_response(f"GEE service connection failed: {str(e)}")
@@ -399,16 +530,117 @@ class ServiceDispatcher:
             }
             return error_response
     
-    def _calculate_timeout_for_area(self, area_km2: float, analysis_type: str) -> int:
+    async def _run_gee_job(
+        self,
+        base_url: str,
+        path: str,
+        payload: Dict[str, Any],
+        timeout: float,
+        connect_timeout: float
+    ) -> Dict[str, Any]:
+        """Run a GEE analysis as a service job and poll it until it finishes.
+        
+        If the job does not finish (time budget exceeded, polling error or the
+        caller was cancelled) it is cancelled on the service, so the worker
+        slot is not held by an analysis nobody is waiting for.
+        
+        Args:
+            base_url: GEE service base URL
+            path: Analysis endpoint path
+            payload: Request payload
+            timeout: Overall time budget for the analysis in seconds
+            connect_timeout: Connect timeout per HTTP request
+            
+        Returns:
+            GEE service response (the job result)
+        """
+        request_timeout = httpx.Timeout(60, connect=connect_timeout)
+        
+        response = await self.service_locator.request(
+            "gee", "POST", path,
+            base_url=base_url,
+            json=payload,
+            params={"async": "true"},
+            headers=self.GEE_REQUEST_HEADERS,
+            timeout=request_timeout
+        )
+        response.raise_for_status()
+        if response.status_code != 202:
+            # Service without job support answered synchronously
+            return response.json()
+        
+        job = response.json()
+        status_path = job["status_url"]
+        logger.info(f"📥 GEE job {job['job_id']} submitted, polling {status_path}")
+        
+        deadline = time.monotonic() + timeout
+        last_progress = None
+        finished = False
+        try:
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.job_poll_seconds)
+                response = await self.service_locator.request(
+                    "gee", "GET", status_path, base_url=base_url, timeout=request_timeout
+                )
+                response.raise_for_status()
+                job = response.json()
+                
+                if job["status"] == "succeeded":
+                    finished = True
+                    logger.info(f"⬅️  GEE job {job['job_id']} succeeded")
+                    return job["result"]
+                if job["status"] in ("failed", "cancelled"):
+                    finished = True
+                    raise Exception(f"GEE job {job['status']} ({job.get('error_type')}): {job.get('error')}")
+                if job.get("progress") != last_progress:
+                    last_progress = job.get("progress")
+                    logger.info(f"⏳ GEE job {job['job_id']}: {last_progress:.0f}% {job.get('message', '')}")
+            
+            raise httpx.ReadTimeout(f"GEE job {job['job_id']} did not finish within {timeout:.0f}s")
+        finally:
+            if not finished:
+                await self._cancel_gee_job(base_url, status_path, connect_timeout)
+    
+    async def _cancel_gee_job(self, base_url: str, status_path: str, connect_timeout: float) -> None:
+        """Ask the GEE service to cancel an abandoned job (best effort)."""
+        try:
+            response = await self.service_locator.request(
+                "gee", "DELETE", status_path,
+                base_url=base_url,
+                timeout=httpx.Timeout(10, connect=connect_timeout)
+            )
+            response.raise_for_status()
+            logger.info(f"🛑 Cancelled abandoned GEE job {status_path.rsplit('/', 1)[-1]}")
+        except Exception as e:
+            logger.warning(f"Could not cancel GEE job {status_path}: {e}")
+    
+    def _calculate_timeout_for_area(
+        self,
+        area_km2: float,
+        analysis_type: str,
+        scale: Optional[float] = None,
+        days: Optional[float] = None
+    ) -> int:
         """Calculate appropriate timeout based on area size and analysis type.
         
+        Uses the latency model fitted on past GEE runs when it has enough
+        history for the analysis type, the area buckets below otherwise.
+        
         Args:
             area_km2: Area in square kilometers
             analysis_type: Type of analysis (water, ndvi, lulc, lst)
+            scale: Analysis scale in meters
+            days: Length of the analysed period in days
             
         Returns:
             Timeout in seconds
         """
+        model = get_latency_model()
+        if model is not None and scale:
+            predicted_timeout = model.timeout_for(analysis_type, area_km2, scale, days or 1)
+            if predicted_timeout is not None:
+                return predicted_timeout
+        
         # Base timeouts by analysis type (water is generally fastest)
         base_timeouts = {
             "water": 120,    # Water analysis is typically faster
@@ -432,6 +664,37 @@ class ServiceDispatcher:
         # Cap at reasonable maximum (20 minutes)
         return min(timeout, 1200)
     
+    def _should_run_as_job(
+        self,
+        area_km2: float,
+        analysis_type: str,
+        scale: float,
+        days: float,
+        timeout: int,
+        read_timeout: int
+    ) -> bool:
+        """Decide whether an analysis runs as a GEE service job.
+        
+        Args:
+            area_km2: Area in square kilometers
+            analysis_type: Type of analysis
+            scale: Analysis scale in meters
+            days: Length of the analysed period in days
+            timeout: Overall timeout in seconds
+            read_timeout: Timeout of a single request in seconds
+            
+        Returns:
+            True if the analysis is expected to outlast a single request
+        """
+        if not self.async_jobs_enabled:
+            return False
+        model = get_latency_model()
+        if model is not None:
+            predicted_async = model.should_run_async(analysis_type, area_km2, scale, days)
+            if predicted_async is not None:
+                return predicted_async
+        return timeout > read_timeout
+    
     def _log_area_warnings(self, area_km2: float, analysis_type: str, timeout: int) -> None:
         """Log appropriate warnings and information for area analysis.
         
@@ -517,53 +780,33 @@ class ServiceDispatcher:
             }
         }
     
-    def _dispatch_rag(
-        self, 
-        query: str, 
-        intent_result: IntentResult, 
+    async def _dispatch_rag(
+        self,
+        query: str,
+        intent_result: IntentResult,
         location_result: LocationParseResult,
         rag_session_id: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Dispatch to RAG service for document-based question answering.
+        """Dispatch to RAG service by awaiting it directly.
         
         Args:
             query: Original user query
             intent_result: Intent classification result
             location_result: Location parsing result
+            rag_session_id: RAG session ID for document context
             
         Returns:
             RAG service response with grounded answer and sources
         """
         logger.info("Dispatching to RAG service for document-based analysis")
         
-        if not self.rag_service_available:
-            # Fallback response when RAG service is not available
-            location_names = [entity.matched_name for entity in location_result.entities]
-            location_text = f"related to {', '.join(location_names)} " if location_names else ""
-            
-            return {
-                "analysis": (
-                    f"📚 RAG Analysis {location_text}\n"
-                    f"{'=' * 50}\n"
-                    f"⚠️ RAG service is currently unavailable\n"
-                    f"📝 Query: {query}\n"
-                    f"📍 Locations: {', '.join(location_names) if location_names else 'None detected'}\n\n"
-                    f"💡 The RAG service provides:\n"
-                    f"   • Document-based knowledge retrieval\n"
-                    f"   • Policy and regulation information\n"
-                    f"   • Historical data and context\n"
-                    f"   • Factual question answering\n\n"
-                    f"🔧 Please ensure the RAG service is running and try again."
-                ),
-                "roi": None,
-                "evidence": ["rag_service:unavailable"],
-                "sources": [],
-                "confidence": 0.0
-            }
+        if not self.rag_service_available or self.async_rag_service is None:
+            return self._rag_unavailable_response(query, location_result)
         
         try:
-            # Call the synchronous RAG service wrapper
-            response = self.rag_service.ask(
+            from ..rag.rag_service import format_dispatch_response
+            
+            rag_response = await self.async_rag_service.ask_with_intent(
                 query=query,
                 intent_result=intent_result,
                 location_result=location_result,
@@ -571,6 +814,7 @@ class ServiceDispatcher:
                 temperature=0.7,
                 session_id=rag_session_id
             )
+            response = format_dispatch_response(query, rag_response, location_result)
             
             logger.info(f"RAG service response received with confidence: {response.get('confidence', 0.0)}")
             return response
@@ -579,9 +823,46 @@ class ServiceDispatcher:
             logger.error(f"Error calling RAG service: {e}")
             # Fallback to search service on error
             logger.info("Falling back to search service due to RAG error")
-            return self._dispatch_search(query, intent_result, location_result)
+            return await self._dispatch_search(query, intent_result, location_result)
     
-    def _dispatch_search(
+    def _rag_unavailable_response(
+        self,
+        query: str,
+        location_result: LocationParseResult
+    ) -> Dict[str, Any]:
+        """Generate fallback response when the RAG service is not available.
+        
+        Args:
+            query: Original query
+            location_result: Location parsing result
+            
+        Returns:
+            Fallback response dictionary
+        """
+        location_names = [entity.matched_name for entity in location_result.entities]
+        location_text = f"related to {', '.join(location_names)} " if location_names else ""
+        
+        return {
+            "analysis": (
+                f"📚 RAG Analysis {location_text}\n"
+                f"{'=' * 50}\n"
+                f"⚠️ RAG service is currently unavailable\n"
+                f"📝 Query: {query}\n"
+                f"📍 Locations: {', '.join(location_names) if location_names else 'None detected'}\n\n"
+                f"💡 The RAG service provides:\n"
+                f"   • Document-based knowledge retrieval\n"
+                f"   • Policy and regulation information\n"
+                f"   • Historical data and context\n"
+                f"   • Factual question answering\n\n"
+                f"🔧 Please ensure the RAG service is running and try again."
+            ),
+            "roi": None,
+            "evidence": ["rag_service:unavailable"],
+            "sources": [],
+            "confidence": 0.0
+        }
+    
+    async def _dispatch_search(
         self, 
         query: str, 
         intent_result: IntentResult, 
@@ -614,7 +895,9 @@ class ServiceDispatcher:
             
             # Call search service
             logger.info(f"DEBUG - Calling search service with analysis_type: '{intent_result.analysis_type}'")
-            result = self.search_service(query, locations_legacy, intent_result.analysis_type)
+            result = await self.search_service_async(
+                query, locations_legacy, intent_result.analysis_type, client=get_async_client()
+            )
             
             # Debug: Log what search service returns
             logger.info(f"DEBUG - Search service result keys: {list(result.keys()) if result else 'None'}")
@@ -695,7 +978,7 @@ class ServiceDispatcher:
                     "analysis_type": analysis_type,
                     "processing_time": service_result.get("processing_time_seconds", 0)
                 },
-                "geometry": roi_info["geometry"]
+                "geometry": get_geometry_store().lod(roi_info["geometry"], "display")
             }
         
         return {
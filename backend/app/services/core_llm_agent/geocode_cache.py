@@ -0,0 +1,218 @@
+"""
+Persistent geocoding and boundary cache shared by both Nominatim clients.
+
+The Core LLM Agent's NominatimClient and the search service's NominatimClient
+resolve the same places over and over, and the search service also simplifies,
+tiles and measures the polygon on every call. Their finished results (raw
+Nominatim result, simplified geometry, tiles and area) are cached here, keyed
+by (kind, normalized name, type, country). "kind" identifies the output shape
+of the caller, so each client gets back exactly what it produced before.
+
+An in-memory LRU sits in front of a SQLite file so entries survive restarts
+(storage shared with the other persistent caches, see ttl_cache.py).
+Lookups that found nothing are cached as negative entries with a shorter TTL.
+
+Configuration (environment):
+- GEOCODE_CACHE_ENABLED: "true" (default) / "false"
+- GEOCODE_CACHE_PATH: SQLite file (default backend/data/geocode_cache.sqlite3)
+- GEOCODE_CACHE_TTL_SECONDS: lifetime of resolved entries (default 30 days)
+- GEOCODE_CACHE_NEGATIVE_TTL_SECONDS: lifetime of "not found" entries (default 1 day)
+- GEOCODE_CACHE_MEMORY_ENTRIES: size of the in-memory LRU (default 512)
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    from .ttl_cache import PersistentTTLCache, env_enabled
+except ImportError:
+    from app.services.core_llm_agent.ttl_cache import PersistentTTLCache, env_enabled
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent.parent / "data" / "geocode_cache.sqlite3"
+
+
+def normalize_place_name(name: str) -> str:
+    """Normalize a place name for lookups (case, whitespace, '&' vs 'and').
+
+    Args:
+        name: Place name
+
+    Returns:
+        Normalized name
+    """
+    text = name.strip().lower().replace("&", " and ")
+    text = re.sub(r"[^\w\s-]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class GeocodeCache(PersistentTTLCache):
+    """In-memory LRU backed by SQLite for resolved (and unresolvable) places."""
+
+    TABLE = "geocode_cache"
+    COLUMNS = ("kind", "name", "type", "country")
+    LABEL = "Geocode cache"
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        ttl_seconds: float = 30 * 24 * 3600,
+        negative_ttl_seconds: float = 24 * 3600,
+        max_memory_entries: int = 512
+    ):
+        """Initialize the cache.
+
+        Args:
+            db_path: SQLite file path (None keeps the cache in memory only)
+            ttl_seconds: Lifetime of a resolved entry
+            negative_ttl_seconds: Lifetime of a "not found" entry
+            max_memory_entries: Number of entries kept in the in-memory LRU
+        """
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+
+        # Statistics per kind
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        super().__init__(db_path, max_memory_entries)
+
+    @staticmethod
+    def make_key(kind: str, name: str, location_type: Optional[str], country: Optional[str]) -> str:
+        """Build the cache key for a lookup.
+
+        Args:
+            kind: Output shape of the caller (e.g. "core_boundary", "search_location")
+            name: Place name or free-form query (normalized here)
+            location_type: Location type ("city", "state", ...)
+            country: Country code
+
+        Returns:
+            Hex digest key
+        """
+        raw = "\x1f".join([
+            kind,
+            normalize_place_name(name),
+            (location_type or "").lower(),
+            (country or "").lower()
+        ])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, kind: str, name: str, location_type: Optional[str], country: Optional[str]) -> Tuple[bool, Optional[Any]]:
+        """Look up a cached result.
+
+        Args:
+            kind: Output shape of the caller
+            name: Place name or free-form query
+            location_type: Location type
+            country: Country code
+
+        Returns:
+            (hit, value) tuple; a negative entry is (True, None), a miss is (False, None)
+        """
+        entry = self._lookup(self.make_key(kind, name, location_type, country))
+        stats = self._kind_stats(kind)
+        if entry is None:
+            stats["misses"] += 1
+            return False, None
+        if entry.value is None:
+            stats["negative_hits"] += 1
+            return True, None
+        stats[f"{entry.tier}_hits"] += 1
+        return True, json.loads(entry.value)
+
+    def set(self, kind: str, name: str, location_type: Optional[str], country: Optional[str], value: Any) -> None:
+        """Store a resolved result.
+
+        Args:
+            kind: Output shape of the caller
+            name: Place name or free-form query
+            location_type: Location type
+            country: Country code
+            value: JSON-serializable result (raw result, geometry, tiles, area, ...)
+        """
+        self._store(kind, name, location_type, country, json.dumps(value))
+
+    def set_negative(self, kind: str, name: str, location_type: Optional[str], country: Optional[str]) -> None:
+        """Remember that a lookup found nothing.
+
+        Args:
+            kind: Output shape of the caller
+            name: Place name or free-form query
+            location_type: Location type
+            country: Country code
+        """
+        self._store(kind, name, location_type, country, None)
+
+    def _store(self, kind: str, name: str, location_type: Optional[str], country: Optional[str], value: Optional[str]) -> None:
+        """Write an entry to the LRU and the database."""
+        self._put(
+            self.make_key(kind, name, location_type, country), value,
+            self.ttl_seconds if value is not None else self.negative_ttl_seconds,
+            kind=kind, name=normalize_place_name(name), type=location_type, country=country
+        )
+        self._kind_stats(kind)["stores" if value is not None else "negative_stores"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss statistics.
+
+        Returns:
+            Dictionary with totals, hit ratio and per-kind counters
+        """
+        hits = sum(s["memory_hits"] + s["disk_hits"] + s["negative_hits"] for s in self._stats.values())
+        misses = sum(s["misses"] for s in self._stats.values())
+        lookups = hits + misses
+
+        return {
+            "lookups": lookups,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            **self.storage_stats(),
+            "ttl_seconds": self.ttl_seconds,
+            "negative_ttl_seconds": self.negative_ttl_seconds,
+            "kinds": {name: dict(s) for name, s in self._stats.items()}
+        }
+
+    def _kind_stats(self, kind: str) -> Dict[str, int]:
+        """Get (or create) the counters for a kind."""
+        stats = self._stats.get(kind)
+        if stats is None:
+            stats = self._stats.setdefault(kind, {
+                "memory_hits": 0, "disk_hits": 0, "negative_hits": 0,
+                "misses": 0, "stores": 0, "negative_stores": 0
+            })
+        return stats
+
+
+_cache: Optional[GeocodeCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_geocode_cache() -> Optional[GeocodeCache]:
+    """Get the process-wide geocode cache.
+
+    Returns:
+        Shared GeocodeCache, or None if disabled via GEOCODE_CACHE_ENABLED
+    """
+    global _cache
+
+    if not env_enabled("GEOCODE_CACHE_ENABLED"):
+        return None
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = GeocodeCache(
+                    db_path=os.environ.get("GEOCODE_CACHE_PATH", str(DEFAULT_CACHE_PATH)) or None,
+                    ttl_seconds=float(os.environ.get("GEOCODE_CACHE_TTL_SECONDS", 30 * 24 * 3600)),
+                    negative_ttl_seconds=float(os.environ.get("GEOCODE_CACHE_NEGATIVE_TTL_SECONDS", 24 * 3600)),
+                    max_memory_entries=int(os.environ.get("GEOCODE_CACHE_MEMORY_ENTRIES", "512"))
+                )
+    return _cache
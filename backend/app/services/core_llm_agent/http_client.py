@@ -0,0 +1,98 @@
+"""
+Shared async HTTP client for the Core LLM Agent pipeline.
+
+Every pipeline component (NER, geocoding, intent classification, service
+dispatch and response formatting) talks HTTP through one pooled
+httpx.AsyncClient so connections to OpenRouter, Nominatim and the local
+services are reused across requests. httpx connection pools belong to the
+event loop they were created on, so one client is kept per running loop.
+
+Synchronous entry points run the async pipeline through run_sync(). Code that
+is synchronous all the way down (e.g. the GEE HybridQueryAnalyzer) uses the
+thread-safe pooled client from get_sync_client() instead.
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, TypeVar
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+DEFAULT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_sync_client: "httpx.Client | None" = None
+_sync_client_lock = threading.Lock()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Get the shared async HTTP client for the running event loop.
+
+    Returns:
+        Pooled httpx.AsyncClient (created on first use in each loop)
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, limits=DEFAULT_LIMITS)
+        _clients[loop] = client
+        logger.debug("Created shared async HTTP client for event loop")
+    return client
+
+
+def get_sync_client() -> httpx.Client:
+    """Get the shared, thread-safe synchronous HTTP client.
+
+    Returns:
+        Pooled httpx.Client (created on first use)
+    """
+    global _sync_client
+    if _sync_client is None or _sync_client.is_closed:
+        with _sync_client_lock:
+            if _sync_client is None or _sync_client.is_closed:
+                _sync_client = httpx.Client(timeout=DEFAULT_TIMEOUT, limits=DEFAULT_LIMITS)
+    return _sync_client
+
+
+async def close_async_client() -> None:
+    """Close the shared async HTTP client of the running event loop, if any."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+async def _run_and_close(awaitable: Awaitable[T]) -> T:
+    """Await a coroutine, then close the loop's client before the loop goes away."""
+    try:
+        return await awaitable
+    finally:
+        await close_async_client()
+
+
+def run_sync(awaitable: Awaitable[T]) -> T:
+    """Run an async pipeline coroutine from synchronous code.
+
+    Uses a fresh event loop in the calling thread, or in a worker thread when
+    the caller is already inside a running loop (so the loop is never nested).
+
+    Args:
+        awaitable: Coroutine to run
+
+    Returns:
+        The coroutine's result
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_run_and_close(awaitable))
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="agent-sync") as executor:
+        return executor.submit(asyncio.run, _run_and_close(awaitable)).result()
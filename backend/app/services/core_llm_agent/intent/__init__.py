@@ -5,10 +5,17 @@ Components:
 - IntentClassifier: Main orchestrator for intent classification
 - TopLevelClassifier: GEE vs RAG vs Search classification
 - GEESubClassifier: NDVI vs LULC vs LST sub-classification for GEE
+- QueryUnderstanding: Optional fused LLM call for locations, intent and time range
+- LocalIntentClassifier: In-process TF-IDF fast path that skips the LLM when confident
 """
 
 from .intent_classifier import IntentClassifier
 from .top_level_classifier import TopLevelClassifier
 from .gee_subclassifier import GEESubClassifier
+from .query_understanding import QueryUnderstanding
+from .local_classifier import LocalIntentClassifier
 
-__all__ = ["IntentClassifier", "TopLevelClassifier", "GEESubClassifier"]
+__all__ = [
+    "IntentClassifier", "TopLevelClassifier", "GEESubClassifier",
+    "QueryUnderstanding", "LocalIntentClassifier"
+]
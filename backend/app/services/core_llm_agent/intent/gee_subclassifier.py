@@ -7,13 +7,15 @@ This module determines which specific GEE analysis should be performed
 
 import json
 import time
-import requests
 import logging
 from typing import Dict, Any, Optional
 
 try:
     from ..models.intent import GEESubIntent
     from ..config import get_openrouter_config
+    from ..http_client import run_sync
+    from ..openrouter_client import get_openrouter_client, OpenRouterClient
+    from ..llm_cache import get_llm_cache
 except ImportError:
     import sys
     from pathlib import Path
@@ -21,6 +23,9 @@ except ImportError:
     
     from app.services.core_llm_agent.models.intent import GEESubIntent
     from app.services.core_llm_agent.config import get_openrouter_config
+    from app.services.core_llm_agent.http_client import run_sync
+    from app.services.core_llm_agent.openrouter_client import get_openrouter_client, OpenRouterClient
+    from app.services.core_llm_agent.llm_cache import get_llm_cache
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +33,48 @@ logger = logging.getLogger(__name__)
 class GEESubClassifier:
     """Classifier for GEE sub-intent routing."""
     
+    # Bump when the system prompt changes so cached classifications are not reused
+    PROMPT_VERSION = "1"
+    
+    # Keyword patterns for each analysis type (keyword fallback and local classifier seeds)
+    KEYWORD_PATTERNS = {
+        GEESubIntent.LST: [
+            "temperature", "heat", "thermal", "lst", "land surface temperature",
+            "urban heat island", "uhi", "hot", "cool", "warming", "climate",
+            "surface temp", "thermal analysis", "heat island", "temperature analysis"
+        ],
+        GEESubIntent.NDVI: [
+            "ndvi", "vegetation", "greenness", "plant", "tree", "forest health",
+            "vegetation index", "canopy", "biomass", "chlorophyll", "photosynthesis",
+            "vegetation analysis", "vegetation health", "green cover", "leaf"
+        ],
+        GEESubIntent.LULC: [
+            "land use", "land cover", "lulc", "urban", "built", "classification",
+            "developed", "settlement", "infrastructure", "city", "agricultural",
+            "cropland", "farming", "development", "construction"
+        ],
+        GEESubIntent.CLIMATE: [
+            "weather", "precipitation", "rainfall", "climate", "meteorology",
+            "atmospheric", "wind", "humidity", "pressure"
+        ],
+        GEESubIntent.WATER: [
+            "water", "river", "lake", "hydrology", "watershed", "stream",
+            "water body", "aquatic", "marine", "coastal", "flood"
+        ],
+        GEESubIntent.SOIL: [
+            "soil", "erosion", "sediment", "agriculture", "farming",
+            "soil health", "soil quality", "degradation"
+        ],
+        GEESubIntent.POPULATION: [
+            "population", "demographics", "density", "people", "inhabitants",
+            "census", "urban population", "settlement patterns"
+        ],
+        GEESubIntent.TRANSPORTATION: [
+            "road", "highway", "transportation", "infrastructure", "network",
+            "connectivity", "accessibility", "traffic", "mobility"
+        ]
+    }
+    
     def __init__(self, model_name: str = None):
         """Initialize the GEESubClassifier.
         
@@ -37,14 +84,24 @@ class GEESubClassifier:
         config = get_openrouter_config()
         self.model_name = model_name or config["intent_model"]
         self.api_key = config["api_key"]
-        self.referrer = config["referrer"]
-        self.app_title = config["app_title"]
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
+        self.openrouter = get_openrouter_client()
+        self.cache = get_llm_cache()
         
         if not self.api_key:
             logger.warning("OPENROUTER_API_KEY not set. GEE sub-classification will use fallback.")
     
     def classify_gee_intent(self, query: str) -> Dict[str, Any]:
+        """Classify GEE sub-intent for specific analysis type (synchronous wrapper).
+        
+        Args:
+            query: User query string
+            
+        Returns:
+            Dictionary with gee_sub_intent, confidence, reasoning, and metadata
+        """
+        return run_sync(self.classify_gee_intent_async(query))
+    
+    async def classify_gee_intent_async(self, query: str) -> Dict[str, Any]:
         """Classify GEE sub-intent for specific analysis type.
         
         Args:
@@ -65,14 +122,14 @@ class GEESubClassifier:
         # Try LLM classification first, fallback to keyword matching
         if self.api_key:
             try:
-                return self._llm_classify_gee_intent(query)
+                return await self._llm_classify_gee_intent(query)
             except Exception as e:
                 logger.warning(f"LLM GEE classification failed: {e}, using keyword fallback")
         
         # Fallback to keyword-based classification
         return self._keyword_classify_gee_intent(query)
     
-    def _llm_classify_gee_intent(self, query: str) -> Dict[str, Any]:
+    async def _llm_classify_gee_intent(self, query: str) -> Dict[str, Any]:
         """LLM-based GEE sub-intent classification.
         
         Args:
@@ -81,13 +138,6 @@ class GEESubClassifier:
         Returns:
             Dictionary with classification results
         """
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": self.referrer,
-            "X-Title": self.app_title,
-        }
-        
         system_prompt = (
             "You are a geospatial analysis classifier. Given a query for geospatial analysis, "
             "determine the most appropriate analysis type and respond with JSON only:\n"
@@ -115,19 +165,15 @@ class GEESubClassifier:
         }
         
         start_time = time.time()
+        cached_content = self.cache.get("gee_sub", query, self.model_name, self.PROMPT_VERSION) if self.cache else None
         
-        resp = requests.post(self.base_url, headers=headers, data=json.dumps(payload), timeout=15)
-        resp.raise_for_status()
+        if cached_content is not None:
+            content = cached_content
+        else:
+            data = await self.openrouter.chat_completion(payload, timeout=15, component="gee_sub")
+            content = OpenRouterClient.message_content(data)
         processing_time = time.time() - start_time
         
-        data = resp.json()
-        content = (
-            data.get("choices", [{}])[0]
-            .get("message", {})
-            .get("content", "")
-            .strip()
-        )
-        
         if not content:
             raise RuntimeError("LLM returned empty content")
         
@@ -140,6 +186,8 @@ class GEESubClassifier:
         gee_sub_intent = None
         try:
             gee_sub_intent = GEESubIntent(analysis_type_str)
+            if self.cache and cached_content is None:
+                self.cache.set("gee_sub", query, self.model_name, self.PROMPT_VERSION, content)
         except ValueError:
             # Fallback if invalid analysis type returned
             logger.warning(f"Invalid analysis type from LLM: {analysis_type_str}")
@@ -157,6 +205,7 @@ class GEESubClassifier:
             "processing_time": processing_time,
             "model_used": self.model_name,
             "success": True,
+            "cache_hit": cached_content is not None,
             "raw_response": parsed
         }
     
@@ -172,48 +221,9 @@ class GEESubClassifier:
         start_time = time.time()
         query_lower = query.lower()
         
-        # Define keyword patterns for each analysis type
-        patterns = {
-            GEESubIntent.LST: [
-                "temperature", "heat", "thermal", "lst", "land surface temperature",
-                "urban heat island", "uhi", "hot", "cool", "warming", "climate",
-                "surface temp", "thermal analysis", "heat island", "temperature analysis"
-            ],
-            GEESubIntent.NDVI: [
-                "ndvi", "vegetation", "greenness", "plant", "tree", "forest health",
-                "vegetation index", "canopy", "biomass", "chlorophyll", "photosynthesis",
-                "vegetation analysis", "vegetation health", "green cover", "leaf"
-            ],
-            GEESubIntent.LULC: [
-                "land use", "land cover", "lulc", "urban", "built", "classification",
-                "developed", "settlement", "infrastructure", "city", "agricultural",
-                "cropland", "farming", "development", "construction"
-            ],
-            GEESubIntent.CLIMATE: [
-                "weather", "precipitation", "rainfall", "climate", "meteorology",
-                "atmospheric", "wind", "humidity", "pressure"
-            ],
-            GEESubIntent.WATER: [
-                "water", "river", "lake", "hydrology", "watershed", "stream",
-                "water body", "aquatic", "marine", "coastal", "flood"
-            ],
-            GEESubIntent.SOIL: [
-                "soil", "erosion", "sediment", "agriculture", "farming",
-                "soil health", "soil quality", "degradation"
-            ],
-            GEESubIntent.POPULATION: [
-                "population", "demographics", "density", "people", "inhabitants",
-                "census", "urban population", "settlement patterns"
-            ],
-            GEESubIntent.TRANSPORTATION: [
-                "road", "highway", "transportation", "infrastructure", "network",
-                "connectivity", "accessibility", "traffic", "mobility"
-            ]
-        }
-        
         # Score each analysis type
         scores = {}
-        for analysis_type, keywords in patterns.items():
+        for analysis_type, keywords in self.KEYWORD_PATTERNS.items():
             score = sum(1 for keyword in keywords if keyword in query_lower)
             if score > 0:
                 scores[analysis_type] = score
@@ -228,7 +238,7 @@ class GEESubClassifier:
             # Get the analysis type with highest score
             gee_sub_intent = max(scores.keys(), key=lambda k: scores[k])
             max_score = scores[gee_sub_intent]
-            total_keywords = len(patterns[gee_sub_intent])
+            total_keywords = len(self.KEYWORD_PATTERNS[gee_sub_intent])
             confidence = min(0.9, max_score / total_keywords + 0.1)  # Scale confidence
             gee_sub_str = gee_sub_intent.value if hasattr(gee_sub_intent, 'value') else str(gee_sub_intent)
             reasoning = f"Keyword match: {max_score} keywords found for {gee_sub_str}"
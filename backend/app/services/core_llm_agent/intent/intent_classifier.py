@@ -5,14 +5,19 @@ This module combines top-level service routing with GEE sub-classification
 to provide complete intent analysis for query routing.
 """
 
+import os
 import time
+import asyncio
 import logging
 from typing import Dict, Any, Optional
 
 try:
     from .top_level_classifier import TopLevelClassifier
     from .gee_subclassifier import GEESubClassifier
+    from .local_classifier import LocalIntentClassifier
+    from ..llm_cache import get_llm_cache
     from ..models.intent import IntentResult, ServiceType, GEESubIntent
+    from ..http_client import run_sync
 except ImportError:
     import sys
     from pathlib import Path
@@ -20,7 +25,10 @@ except ImportError:
     
     from app.services.core_llm_agent.intent.top_level_classifier import TopLevelClassifier
     from app.services.core_llm_agent.intent.gee_subclassifier import GEESubClassifier
+    from app.services.core_llm_agent.intent.local_classifier import LocalIntentClassifier
+    from app.services.core_llm_agent.llm_cache import get_llm_cache
     from app.services.core_llm_agent.models.intent import IntentResult, ServiceType, GEESubIntent
+    from app.services.core_llm_agent.http_client import run_sync
 
 logger = logging.getLogger(__name__)
 
@@ -28,30 +36,99 @@ logger = logging.getLogger(__name__)
 class IntentClassifier:
     """Main orchestrator for hierarchical intent classification."""
     
-    def __init__(self, model_name: str = None):
+    def __init__(
+        self,
+        model_name: str = None,
+        speculative_gee: Optional[bool] = None,
+        local_fast_path: Optional[bool] = None
+    ):
         """Initialize the IntentClassifier.
         
         Args:
             model_name: Model name for classification (uses env default if None)
+            speculative_gee: Start GEE sub-classification alongside the top-level
+                call (uses INTENT_SPECULATIVE_GEE env var, default on, if None)
+            local_fast_path: Skip the LLM when the local classifier is confident
+                (uses LOCAL_INTENT_CLASSIFIER_ENABLED env var, default on, if None);
+                it only answers once calibrated on held-out real labelled queries
         """
         self.top_level_classifier = TopLevelClassifier(model_name)
         self.gee_subclassifier = GEESubClassifier(model_name)
+        
+        if speculative_gee is None:
+            speculative_gee = os.environ.get("INTENT_SPECULATIVE_GEE", "true").lower() in ("1", "true", "yes")
+        self.speculative_gee = speculative_gee
+        
+        if local_fast_path is None:
+            local_fast_path = os.environ.get("LOCAL_INTENT_CLASSIFIER_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.local_classifier = None
+        if local_fast_path:
+            try:
+                self.local_classifier = LocalIntentClassifier(
+                    threshold=float(os.environ.get("LOCAL_INTENT_CLASSIFIER_THRESHOLD", "0.9")),
+                    cache=get_llm_cache(),
+                    training_file=os.environ.get("LOCAL_INTENT_CLASSIFIER_TRAINING_FILE"),
+                    target_precision=float(os.environ.get("LOCAL_INTENT_CLASSIFIER_TARGET_PRECISION", "0.97")),
+                    min_calibration_examples=int(os.environ.get("LOCAL_INTENT_CLASSIFIER_MIN_CALIBRATION", "200"))
+                )
+            except Exception as e:
+                logger.warning(f"Local intent classifier unavailable, using LLM only: {e}")
     
-    def classify_intent(self, query: str) -> IntentResult:
+    def classify_intent(self, query: str, understanding: Optional[Dict[str, Any]] = None) -> IntentResult:
+        """Perform complete hierarchical intent classification (synchronous wrapper).
+        
+        Args:
+            query: User query string
+            understanding: Optional QueryUnderstanding result with pre-computed fields
+            
+        Returns:
+            IntentResult with complete classification results
+        """
+        return run_sync(self.classify_intent_async(query, understanding))
+    
+    async def classify_intent_async(self, query: str, understanding: Optional[Dict[str, Any]] = None) -> IntentResult:
         """Perform complete hierarchical intent classification.
         
+        With speculative_gee enabled the GEE sub-classification request is sent
+        together with the top-level request and cancelled if the query is not
+        routed to GEE, so a GEE query costs one LLM round trip instead of two.
+        
+        Fields already validated by a fused QueryUnderstanding call
+        ("top_level", "gee_sub", "time_range") are used as-is; only the missing
+        ones are classified by the individual components. Before any LLM call
+        the local classifier is consulted, and its prediction replaces the LLM
+        whenever its calibrated confidence clears the threshold.
+        
         Args:
             query: User query string
+            understanding: Optional QueryUnderstanding result with pre-computed fields
             
         Returns:
             IntentResult with complete classification results
         """
         start_time = time.time()
+        understanding = understanding or {}
+        
+        # Local fast path: confident in-process predictions skip the LLM calls
+        if self.local_classifier and "top_level" not in understanding and query.strip():
+            local_result = self.local_classifier.fast_path(query)
+            if local_result:
+                logger.info("⚡ Local classifier confident, skipping LLM classification")
+                understanding = {**local_result, **understanding}
+        
+        top_level_result = understanding.get("top_level")
+        gee_result = understanding.get("gee_sub")
+        gee_task = None
         
         try:
+            # Speculatively start GEE sub-classification while routing is decided
+            if self.speculative_gee and top_level_result is None and gee_result is None and query.strip():
+                gee_task = asyncio.create_task(self.gee_subclassifier.classify_gee_intent_async(query))
+            
             # Step 1: Top-level classification (GEE vs RAG vs Search)
-            logger.info(f"Classifying top-level intent for: {query[:100]}...")
-            top_level_result = self.top_level_classifier.classify_intent(query)
+            if top_level_result is None:
+                logger.info(f"Classifying top-level intent for: {query[:100]}...")
+                top_level_result = await self.top_level_classifier.classify_intent_async(query)
             
             if not top_level_result.get("success", False):
                 logger.warning(f"Top-level classification failed: {top_level_result.get('error')}")
@@ -66,8 +143,15 @@ class IntentClassifier:
             analysis_type = "general"
             
             if service_type == ServiceType.GEE:
-                logger.info("Performing GEE sub-classification...")
-                gee_result = self.gee_subclassifier.classify_gee_intent(query)
+                if gee_result is not None:
+                    logger.info("Using pre-computed GEE sub-classification")
+                elif gee_task is not None:
+                    logger.info("Awaiting speculative GEE sub-classification...")
+                    gee_result = await gee_task
+                    gee_task = None
+                else:
+                    logger.info("Performing GEE sub-classification...")
+                    gee_result = await self.gee_subclassifier.classify_gee_intent_async(query)
                 
                 if gee_result.get("success", True):  # Keyword fallback always succeeds
                     gee_sub_intent = gee_result["gee_sub_intent"]
@@ -84,7 +168,10 @@ class IntentClassifier:
                     analysis_type = "lulc"
             
             # Step 3: Extract additional parameters
-            time_range = self._extract_time_range(query)
+            if "time_range" in understanding:
+                time_range = understanding["time_range"]
+            else:
+                time_range = self._extract_time_range(query)
             metrics = self._extract_metrics(query)
             
             processing_time = time.time() - start_time
@@ -131,6 +218,27 @@ class IntentClassifier:
                 success=False,
                 error=str(e)
             )
+        
+        finally:
+            # Non-GEE routing (or an error): drop the speculative request
+            if gee_task is not None:
+                await self._cancel_speculative_task(gee_task)
+    
+    @staticmethod
+    async def _cancel_speculative_task(task: asyncio.Task) -> None:
+        """Cancel a speculative sub-classification task and wait for it to finish.
+        
+        Args:
+            task: Task running GEESubClassifier.classify_gee_intent_async
+        """
+        if not task.done():
+            task.cancel()
+            logger.debug("Cancelled speculative GEE sub-classification")
+        # asyncio.wait does not raise the task's own cancellation, while a
+        # cancellation of the caller still propagates from here
+        await asyncio.wait([task])
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Speculative GEE sub-classification failed: {task.exception()}")
     
     def _extract_time_range(self, query: str) -> Optional[Dict[str, str]]:
         """Extract time range from query if specified.
@@ -0,0 +1,629 @@
+"""
+Local fast-path intent classifier.
+
+A TF-IDF + multinomial logistic regression model that runs in-process in well
+under a millisecond. It is trained at startup from the keyword tables of
+TopLevelClassifier and GEESubClassifier (expanded with query templates and
+place names from data/indian_cities.json) plus logged traffic: queries the
+LLM already classified, read from the persistent LLM classification cache,
+and an optional labelled JSONL file.
+
+Calibration never uses the synthetic templates: a fixed share of the real
+labelled queries (chosen by a hash of the query, so it is stable across
+restarts) is held out of training. The softmax temperature is fitted on that
+held-out set, and the fast path of each model (routing, GEE sub-intent) only
+switches on once the held-out set is large enough and the predictions at or
+above the confidence threshold reach the target precision there. Until
+enough real traffic has been logged the classifier stays inactive and every
+query goes to the LLM.
+
+Queries containing a time-sensitive search keyword ("latest", "current",
+"live", ...) always go to the LLM, following the routing policy of the LLM
+prompt and TopLevelClassifier._fallback_classification.
+"""
+
+import re
+import json
+import time
+import zlib
+import random
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+import numpy as np
+
+try:
+    from .top_level_classifier import TopLevelClassifier
+    from .gee_subclassifier import GEESubClassifier
+    from ..models.intent import ServiceType, GEESubIntent
+    from ..llm_cache import LLMClassificationCache
+except ImportError:
+    import sys
+    sys.path.append(str(Path(__file__).parent.parent.parent.parent.parent))
+
+    from app.services.core_llm_agent.intent.top_level_classifier import TopLevelClassifier
+    from app.services.core_llm_agent.intent.gee_subclassifier import GEESubClassifier
+    from app.services.core_llm_agent.models.intent import ServiceType, GEESubIntent
+    from app.services.core_llm_agent.llm_cache import LLMClassificationCache
+
+logger = logging.getLogger(__name__)
+
+GAZETTEER_PATH = Path(__file__).parent.parent.parent.parent.parent / "data" / "indian_cities.json"
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+GEE_TEMPLATES = [
+    "{kw}",
+    "{kw} in {place}",
+    "analyze {kw} in {place}",
+    "show {kw} for {place}",
+    "{kw} analysis of {place}",
+    "map {kw} around {place}",
+    "what is the {kw} of {place}",
+    "how has {kw} changed in {place}",
+]
+
+SEARCH_TEMPLATES = [
+    "{kw} {topic} in {place}",
+    "{kw} {topic} {place}",
+    "what is the {kw} {topic} about {place}",
+    "{topic} from {place} {kw}",
+    "tell me the {kw} {topic} for {place}",
+]
+
+SEARCH_TOPICS = ["news", "updates", "events", "headlines", "information", "reports", "announcements"]
+
+GENERAL_QUESTIONS = [
+    "who is the chief minister of {place}",
+    "history of {place}",
+    "famous tourist places in {place}",
+    "best time to visit {place}",
+    "what is {place} known for",
+    "population of {place} according to wikipedia",
+]
+
+# Time-sensitive search keywords veto the fast path (whole words only)
+SEARCH_KEYWORD_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(keyword) for keyword in TopLevelClassifier.SEARCH_KEYWORDS) + r")\b"
+)
+
+# Logged (LLM-labelled) queries count this many times during training
+LOGGED_EXAMPLE_WEIGHT = 3
+
+# Share of real labelled queries held out for calibration (by query hash)
+CALIBRATION_FRACTION = 0.3
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word unigrams and bigrams.
+
+    Args:
+        text: Input text
+
+    Returns:
+        List of unigram and bigram tokens
+    """
+    words = TOKEN_PATTERN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class TfidfSoftmaxClassifier:
+    """TF-IDF features with a temperature-calibrated multinomial logistic regression head."""
+
+    def __init__(
+        self,
+        labels: List[str],
+        vocabulary: Dict[str, int],
+        idf: np.ndarray,
+        weights: np.ndarray,
+        bias: np.ndarray,
+        temperature: float = 1.0
+    ):
+        """Initialize a trained classifier.
+
+        Args:
+            labels: Class labels (row order of weights)
+            vocabulary: Token -> feature index
+            idf: Inverse document frequency per feature
+            weights: Weight matrix of shape (n_labels, n_features)
+            bias: Bias vector of shape (n_labels,)
+            temperature: Softmax temperature from calibration
+        """
+        self.labels = labels
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+        self.temperature = temperature
+
+    @classmethod
+    def fit(
+        cls,
+        texts: List[str],
+        labels: List[str],
+        epochs: int = 200,
+        learning_rate: float = 0.1,
+        l2: float = 1e-4,
+        min_df: int = 2,
+        exclude_tokens: Optional[Set[str]] = None
+    ) -> "TfidfSoftmaxClassifier":
+        """Train a classifier (temperature 1.0 until calibrate() is called).
+
+        Args:
+            texts: Training texts
+            labels: Label per text
+            epochs: Full-batch Adam steps
+            learning_rate: Adam learning rate
+            l2: L2 regularization strength
+            min_df: Minimum number of texts a token must appear in
+            exclude_tokens: Tokens never used as features (e.g. place names)
+
+        Returns:
+            Trained TfidfSoftmaxClassifier
+        """
+        label_names = sorted(set(labels))
+        label_index = {label: i for i, label in enumerate(label_names)}
+        y = np.array([label_index[label] for label in labels])
+        tokens = [tokenize(text) for text in texts]
+
+        doc_freq: Dict[str, int] = {}
+        for doc in tokens:
+            for token in set(doc):
+                doc_freq[token] = doc_freq.get(token, 0) + 1
+        exclude_tokens = exclude_tokens or set()
+        kept = sorted(
+            token for token, count in doc_freq.items()
+            if count >= min_df and not any(word in exclude_tokens for word in token.split())
+        )
+        vocabulary = {token: i for i, token in enumerate(kept)}
+
+        idf = np.log((1 + len(texts)) / (1 + np.array([doc_freq[t] for t in kept], dtype=np.float64))) + 1.0
+        model = cls(label_names, vocabulary, idf, np.zeros((len(label_names), len(vocabulary))), np.zeros(len(label_names)))
+        X = model._transform(tokens)
+
+        model.weights, model.bias = cls._train(X, y, len(label_names), epochs, learning_rate, l2)
+        return model
+
+    def calibrate(self, texts: List[str], labels: List[str]) -> int:
+        """Fit the softmax temperature on held-out labelled texts.
+
+        Args:
+            texts: Held-out texts (never used for training)
+            labels: Label per text
+
+        Returns:
+            Number of texts used (labels unknown to the model are skipped)
+        """
+        label_index = {label: i for i, label in enumerate(self.labels)}
+        pairs = [(text, label_index[label]) for text, label in zip(texts, labels) if label in label_index]
+        if not pairs:
+            return 0
+        logits = np.stack([self.logits(text) for text, _ in pairs])
+        self.temperature = self._calibrate_temperature(logits, np.array([y for _, y in pairs]))
+        return len(pairs)
+
+    def logits(self, text: str) -> np.ndarray:
+        """Uncalibrated class logits for one text (zeros for unknown text)."""
+        indices, values = self._features(tokenize(text))
+        if len(indices) == 0:
+            return np.zeros(len(self.labels))
+        return self.weights[:, indices] @ values + self.bias
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """Predict calibrated class probabilities for one text.
+
+        Args:
+            text: Input text
+
+        Returns:
+            Label -> probability
+        """
+        # Unknown text has all-zero logits: a uniform, never confident prediction
+        probs = self._softmax(self.logits(text) / self.temperature)
+        return dict(zip(self.labels, probs.tolist()))
+
+    def _features(self, doc: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Sparse L2-normalized TF-IDF vector (indices, values) for one token list."""
+        counts: Dict[int, int] = {}
+        for token in doc:
+            index = self.vocabulary.get(token)
+            if index is not None:
+                counts[index] = counts.get(index, 0) + 1
+        if not counts:
+            return np.array([], dtype=np.int64), np.array([])
+
+        indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        values = (1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))) * self.idf[indices]
+        return indices, values / np.linalg.norm(values)
+
+    def _transform(self, docs: List[List[str]]) -> np.ndarray:
+        """Dense TF-IDF matrix for training."""
+        X = np.zeros((len(docs), len(self.vocabulary)))
+        for row, doc in enumerate(docs):
+            indices, values = self._features(doc)
+            X[row, indices] = values
+        return X
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        """Numerically stable softmax over the last axis."""
+        shifted = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(shifted)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    @classmethod
+    def _train(
+        cls,
+        X: np.ndarray,
+        y: np.ndarray,
+        n_labels: int,
+        epochs: int,
+        learning_rate: float,
+        l2: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Fit softmax regression weights with full-batch Adam."""
+        n_samples, n_features = X.shape
+        targets = np.eye(n_labels)[y]
+        params = [np.zeros((n_labels, n_features)), np.zeros(n_labels)]
+        moments = [[np.zeros_like(p), np.zeros_like(p)] for p in params]
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+
+        for step in range(1, epochs + 1):
+            weights, bias = params
+            error = (cls._softmax(X @ weights.T + bias) - targets) / n_samples
+            grads = [error.T @ X + l2 * weights, error.sum(axis=0)]
+
+            for param, grad, moment in zip(params, grads, moments):
+                moment[0] = beta1 * moment[0] + (1 - beta1) * grad
+                moment[1] = beta2 * moment[1] + (1 - beta2) * grad ** 2
+                m_hat = moment[0] / (1 - beta1 ** step)
+                v_hat = moment[1] / (1 - beta2 ** step)
+                param -= learning_rate * m_hat / (np.sqrt(v_hat) + eps)
+
+        return params[0], params[1]
+
+    @classmethod
+    def _calibrate_temperature(cls, logits: np.ndarray, y: np.ndarray) -> float:
+        """Pick the softmax temperature that minimizes held-out negative log-likelihood."""
+        best_temperature, best_nll = 1.0, float("inf")
+        for temperature in np.linspace(0.5, 5.0, 37):
+            probs = cls._softmax(logits / temperature)
+            nll = -np.mean(np.log(probs[np.arange(len(y)), y] + 1e-12))
+            if nll < best_nll:
+                best_temperature, best_nll = float(temperature), nll
+        return best_temperature
+
+
+class LocalIntentClassifier:
+    """Confidence-gated in-process classifier for top-level intent and GEE sub-intent."""
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        cache: Optional[LLMClassificationCache] = None,
+        training_file: Optional[str] = None,
+        seed: int = 0,
+        target_precision: float = 0.97,
+        min_calibration_examples: int = 200
+    ):
+        """Initialize, train and calibrate the LocalIntentClassifier.
+
+        Args:
+            threshold: Minimum calibrated confidence for skipping the LLM
+            cache: LLM classification cache to read logged traffic from
+            training_file: Optional JSONL of {"query", "service_type", "gee_sub_intent"}
+            seed: Random seed for training data sampling
+            target_precision: Held-out precision a model needs at the threshold
+                before its fast path switches on
+            min_calibration_examples: Held-out real queries a model needs
+                before its fast path can switch on
+        """
+        self.threshold = threshold
+        self.target_precision = target_precision
+        self.min_calibration_examples = min_calibration_examples
+        self.model_name = "local_tfidf"
+
+        # Statistics
+        self.predictions = 0
+        self.fast_path_hits = 0
+        self.search_keyword_vetoes = 0
+
+        start_time = time.time()
+        places = self._load_places()
+        top_level_data, gee_sub_data, top_level_heldout, gee_sub_heldout = self._build_training_data(
+            places, cache, training_file, seed
+        )
+
+        # Place names carry no intent signal; keep them out of the vocabulary
+        place_tokens = {word for place in places for word in TOKEN_PATTERN.findall(place.lower())}
+        place_tokens -= {word for keywords in GEESubClassifier.KEYWORD_PATTERNS.values() for kw in keywords for word in kw.split()}
+        place_tokens -= {word for kw in TopLevelClassifier.GEE_KEYWORDS + TopLevelClassifier.SEARCH_KEYWORDS for word in kw.split()}
+
+        self.top_level_model = TfidfSoftmaxClassifier.fit(*zip(*top_level_data), exclude_tokens=place_tokens)
+        self.gee_sub_model = TfidfSoftmaxClassifier.fit(*zip(*gee_sub_data), exclude_tokens=place_tokens)
+        self.calibration = {
+            "top_level": self._calibrate(self.top_level_model, top_level_heldout),
+            "gee_sub": self._calibrate(self.gee_sub_model, gee_sub_heldout),
+        }
+        self.training_time = time.time() - start_time
+
+        logger.info(
+            f"⚡ Local intent classifier trained on {len(top_level_data)} routing / "
+            f"{len(gee_sub_data)} sub-intent examples in {self.training_time:.2f}s"
+        )
+        for name, report in self.calibration.items():
+            if report["active"]:
+                logger.info(
+                    f"⚡ Local {name} fast path active: held-out precision {report['precision']:.3f} "
+                    f"at coverage {report['coverage']:.2f} ({report['examples']} real queries)"
+                )
+            else:
+                logger.info(f"Local {name} fast path inactive: {report['reason']}")
+
+    def _calibrate(self, model: TfidfSoftmaxClassifier, heldout: List[Tuple[str, str]]) -> Dict[str, Any]:
+        """Calibrate a model on held-out real queries and decide whether its fast path is reliable.
+
+        Args:
+            model: Trained model
+            heldout: Held-out (query, label) pairs from real labelled traffic
+
+        Returns:
+            Calibration report with examples, temperature, precision and
+            coverage at the threshold, and whether the fast path is active
+        """
+        report: Dict[str, Any] = {
+            "examples": 0, "temperature": model.temperature, "precision": None,
+            "coverage": 0.0, "active": False, "reason": None
+        }
+        if heldout:
+            report["examples"] = model.calibrate(*zip(*heldout))
+            report["temperature"] = model.temperature
+        if report["examples"] < self.min_calibration_examples:
+            report["reason"] = f"{report['examples']}/{self.min_calibration_examples} held-out real queries"
+            return report
+
+        confident = correct = 0
+        for query, label in heldout:
+            probs = model.predict_proba(query)
+            predicted = max(probs, key=probs.get)
+            if probs[predicted] >= self.threshold:
+                confident += 1
+                correct += predicted == label
+        report["coverage"] = confident / len(heldout)
+        report["precision"] = correct / confident if confident else None
+        if not confident:
+            report["reason"] = f"no held-out query reaches confidence {self.threshold:.2f}"
+        elif report["precision"] < self.target_precision:
+            report["reason"] = (
+                f"held-out precision {report['precision']:.3f} < target {self.target_precision:.3f} "
+                f"at threshold {self.threshold:.2f}"
+            )
+        else:
+            report["active"] = True
+        return report
+
+    def predict(self, query: str) -> Dict[str, Any]:
+        """Predict top-level and GEE sub-intent with calibrated confidences.
+
+        Args:
+            query: User query string
+
+        Returns:
+            Dictionary with service_type, confidence, gee_sub_intent, gee_confidence
+            and processing_time
+        """
+        start_time = time.time()
+
+        top_probs = self.top_level_model.predict_proba(query)
+        service_label = max(top_probs, key=top_probs.get)
+        sub_probs = self.gee_sub_model.predict_proba(query)
+        sub_label = max(sub_probs, key=sub_probs.get)
+
+        return {
+            "service_type": ServiceType(service_label),
+            "confidence": top_probs[service_label],
+            "gee_sub_intent": GEESubIntent(sub_label),
+            "gee_confidence": sub_probs[sub_label],
+            "processing_time": time.time() - start_time
+        }
+
+    def fast_path(self, query: str) -> Dict[str, Any]:
+        """Return the classifications confident enough to skip the LLM.
+
+        Args:
+            query: User query string
+
+        Returns:
+            Dictionary with "top_level" and, for confident GEE queries, "gee_sub"
+            in the same shape as the LLM classifiers' results (empty if the
+            query is not confident enough or contains a search keyword)
+        """
+        self.predictions += 1
+        if not self.calibration["top_level"]["active"]:
+            return {}
+        if SEARCH_KEYWORD_PATTERN.search(query.lower()):
+            self.search_keyword_vetoes += 1
+            return {}
+        prediction = self.predict(query)
+        if prediction["confidence"] < self.threshold:
+            return {}
+
+        self.fast_path_hits += 1
+        reasoning = f"Local classifier (confidence {prediction['confidence']:.2f} >= {self.threshold:.2f})"
+        result = {
+            "top_level": {
+                "service_type": prediction["service_type"],
+                "confidence": prediction["confidence"],
+                "reasoning": reasoning,
+                "processing_time": prediction["processing_time"],
+                "model_used": self.model_name,
+                "success": True,
+                "local_fast_path": True
+            }
+        }
+
+        if (
+            prediction["service_type"] == ServiceType.GEE
+            and self.calibration["gee_sub"]["active"]
+            and prediction["gee_confidence"] >= self.threshold
+        ):
+            result["gee_sub"] = {
+                "gee_sub_intent": prediction["gee_sub_intent"],
+                "confidence": prediction["gee_confidence"],
+                "reasoning": f"Local classifier (confidence {prediction['gee_confidence']:.2f})",
+                "processing_time": prediction["processing_time"],
+                "model_used": self.model_name,
+                "success": True,
+                "local_fast_path": True
+            }
+
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Get fast-path statistics.
+
+        Returns:
+            Dictionary with prediction counts, fast-path ratio and model info
+        """
+        return {
+            "threshold": self.threshold,
+            "predictions": self.predictions,
+            "fast_path_hits": self.fast_path_hits,
+            "search_keyword_vetoes": self.search_keyword_vetoes,
+            "fast_path_ratio": self.fast_path_hits / self.predictions if self.predictions else 0.0,
+            "training_time": self.training_time,
+            "active": self.calibration["top_level"]["active"],
+            "calibration": self.calibration
+        }
+
+    def _build_training_data(
+        self,
+        places: List[str],
+        cache: Optional[LLMClassificationCache],
+        training_file: Optional[str],
+        seed: int
+    ) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]], List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """Build (text, label) examples for the routing and sub-intent models.
+
+        Real labelled queries are split by query hash: CALIBRATION_FRACTION of
+        them are held out for calibration, the rest join the synthetic
+        examples for training.
+
+        Args:
+            places: Place names substituted into the query templates
+            cache: LLM classification cache with logged traffic
+            training_file: Optional JSONL of labelled queries
+            seed: Random seed for template/place sampling
+
+        Returns:
+            (top_level_examples, gee_sub_examples, top_level_heldout, gee_sub_heldout)
+        """
+        rng = random.Random(seed)
+
+        top_level: List[Tuple[str, str]] = []
+        gee_sub: List[Tuple[str, str]] = []
+
+        # Seed examples from the keyword tables
+        for keyword in TopLevelClassifier.GEE_KEYWORDS:
+            for template in GEE_TEMPLATES:
+                top_level.append((template.format(kw=keyword, place=rng.choice(places)), ServiceType.GEE.value))
+
+        search_examples = []
+        for keyword in TopLevelClassifier.SEARCH_KEYWORDS:
+            for template in SEARCH_TEMPLATES:
+                search_examples.append(template.format(kw=keyword, topic=rng.choice(SEARCH_TOPICS), place=rng.choice(places)))
+        for template in GENERAL_QUESTIONS:
+            for _ in range(8):
+                search_examples.append(template.format(place=rng.choice(places)))
+        # Balance the classes: there are far fewer search keywords
+        while len(search_examples) < len(top_level) // 2:
+            search_examples.extend(search_examples[:len(top_level) // 2 - len(search_examples)])
+        top_level.extend((text, ServiceType.SEARCH.value) for text in search_examples)
+
+        for sub_intent, keywords in GEESubClassifier.KEYWORD_PATTERNS.items():
+            for keyword in keywords:
+                for template in GEE_TEMPLATES:
+                    gee_sub.append((template.format(kw=keyword, place=rng.choice(places)), sub_intent.value))
+
+        # Logged traffic: queries the LLM already classified
+        logged_top, logged_sub = self._load_logged_examples(cache, training_file)
+        train_top, heldout_top = self._split_heldout(logged_top)
+        train_sub, heldout_sub = self._split_heldout(logged_sub)
+        top_level.extend(train_top * LOGGED_EXAMPLE_WEIGHT)
+        gee_sub.extend(train_sub * LOGGED_EXAMPLE_WEIGHT)
+        if logged_top or logged_sub:
+            logger.info(f"Local intent classifier using {len(logged_top)} logged routing / {len(logged_sub)} sub-intent queries")
+
+        return top_level, gee_sub, heldout_top, heldout_sub
+
+    @staticmethod
+    def _split_heldout(examples: List[Tuple[str, str]]) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """Split labelled queries into (train, held-out) by a stable hash of the query text."""
+        unique = dict((query.strip().lower(), (query, label)) for query, label in examples)
+        train: List[Tuple[str, str]] = []
+        heldout: List[Tuple[str, str]] = []
+        for key, example in unique.items():
+            if zlib.crc32(key.encode("utf-8")) % 1000 < CALIBRATION_FRACTION * 1000:
+                heldout.append(example)
+            else:
+                train.append(example)
+        return train, heldout
+
+    @staticmethod
+    def _load_places() -> List[str]:
+        """Load place names from the gazetteer (a few defaults if it is missing)."""
+        try:
+            with open(GAZETTEER_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            places = [location for state_info in data.values() for location in state_info["locations"]]
+            places.extend(data.keys())
+            if places:
+                return places
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not load gazetteer for local classifier: {e}")
+        return ["Mumbai", "Delhi", "Bangalore", "Chennai", "Kolkata", "Hyderabad", "Pune", "Jaipur"]
+
+    @staticmethod
+    def _load_logged_examples(
+        cache: Optional[LLMClassificationCache],
+        training_file: Optional[str]
+    ) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """Load LLM-labelled queries from the classification cache and a JSONL file."""
+        top_level: List[Tuple[str, str]] = []
+        gee_sub: List[Tuple[str, str]] = []
+
+        if cache is not None:
+            for query, content in cache.entries("top_level"):
+                try:
+                    intent = str(json.loads(content).get("intent", "")).upper()
+                except (ValueError, AttributeError):
+                    continue
+                if intent in (ServiceType.GEE.value, ServiceType.SEARCH.value):
+                    top_level.append((query, intent))
+
+            for query, content in cache.entries("gee_sub"):
+                try:
+                    analysis_type = str(json.loads(content).get("analysis_type", "")).upper()
+                except (ValueError, AttributeError):
+                    continue
+                if analysis_type in GEESubIntent.__members__:
+                    gee_sub.append((query, analysis_type))
+
+        if training_file:
+            try:
+                with open(training_file, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        record = json.loads(line)
+                        service_type = str(record.get("service_type", "")).upper()
+                        if service_type in (ServiceType.GEE.value, ServiceType.SEARCH.value):
+                            top_level.append((record["query"], service_type))
+                        sub_intent = str(record.get("gee_sub_intent") or "").upper()
+                        if sub_intent in GEESubIntent.__members__:
+                            gee_sub.append((record["query"], sub_intent))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Could not load local classifier training file {training_file}: {e}")
+
+        return top_level, gee_sub
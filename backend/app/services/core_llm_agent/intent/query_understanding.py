@@ -0,0 +1,316 @@
+"""
+Fused query understanding - one LLM call for locations, intent and sub-intent.
+
+LocationNER, TopLevelClassifier and GEESubClassifier each send their own
+OpenRouter request for the same query. This module asks for all of their
+outputs (plus a time range) in a single structured-JSON completion.
+
+Every field is validated on its own. Valid fields are returned in the same
+shape the individual components produce; invalid or missing fields are left
+out so LocationParser and IntentClassifier fall back to their own LLM calls
+for just those fields.
+"""
+
+import json
+import time
+import httpx
+import logging
+from datetime import date
+from typing import Dict, Any, List, Optional
+
+try:
+    from ..models.intent import ServiceType, GEESubIntent
+    from ..models.location import LocationEntity
+    from ..parsers.location_ner import LocationNER
+    from ..config import get_openrouter_config
+    from ..http_client import run_sync
+    from ..openrouter_client import get_openrouter_client, OpenRouterClient
+    from ..llm_cache import get_llm_cache
+except ImportError:
+    import sys
+    from pathlib import Path
+    sys.path.append(str(Path(__file__).parent.parent.parent.parent.parent))
+    
+    from app.services.core_llm_agent.models.intent import ServiceType, GEESubIntent
+    from app.services.core_llm_agent.models.location import LocationEntity
+    from app.services.core_llm_agent.parsers.location_ner import LocationNER
+    from app.services.core_llm_agent.config import get_openrouter_config
+    from app.services.core_llm_agent.http_client import run_sync
+    from app.services.core_llm_agent.openrouter_client import get_openrouter_client, OpenRouterClient
+    from app.services.core_llm_agent.llm_cache import get_llm_cache
+
+logger = logging.getLogger(__name__)
+
+
+class QueryUnderstanding:
+    """Single-call LLM extraction of locations, service type, GEE sub-intent and time range."""
+    
+    # Bump when the system prompt changes so cached results are not reused
+    PROMPT_VERSION = "1"
+    
+    def __init__(self, model_name: str = None):
+        """Initialize the QueryUnderstanding.
+        
+        Args:
+            model_name: Model name for the fused call (uses env intent model if None)
+        """
+        config = get_openrouter_config()
+        self.model_name = model_name or config["intent_model"]
+        self.api_key = config["api_key"]
+        self.openrouter = get_openrouter_client()
+        self.cache = get_llm_cache()
+        
+        if not self.api_key:
+            logger.warning("OPENROUTER_API_KEY not set. Fused understanding will fall back to individual components.")
+    
+    def understand(self, query: str) -> Dict[str, Any]:
+        """Extract locations, intent and time range in one call (synchronous wrapper).
+        
+        Args:
+            query: User query string
+        
+        Returns:
+            Dictionary of validated fields (see understand_async)
+        """
+        return run_sync(self.understand_async(query))
+    
+    async def understand_async(self, query: str) -> Dict[str, Any]:
+        """Extract locations, intent and time range in one call.
+        
+        Args:
+            query: User query string
+        
+        Returns:
+            Dictionary with success, processing_time and model_used, plus each
+            field that passed validation:
+            - locations: List[LocationEntity]
+            - top_level: TopLevelClassifier.classify_intent-style result
+            - gee_sub: GEESubClassifier.classify_gee_intent-style result (GEE only)
+            - time_range: {"start", "end"} dict or None when no period is mentioned
+        """
+        start_time = time.time()
+        
+        if not self.api_key or not query.strip():
+            return self._failure("OPENROUTER_API_KEY missing" if not self.api_key else "Empty query", start_time)
+        
+        system_prompt = (
+            "You are the query understanding step of a geospatial assistant for Indian geography. "
+            "Given a user query, respond ONLY with a compact JSON object of the form\n"
+            "{\"locations\": [{\"matched_name\": \"Mumbai\", \"type\": \"city\", \"confidence\": 95}], "
+            "\"intent\": \"GEE|SEARCH\", \"intent_confidence\": 0.95, "
+            "\"analysis_type\": \"NDVI|LULC|LST|CLIMATE|WATER|SOIL|POPULATION|TRANSPORTATION\", "
+            "\"analysis_confidence\": 0.9, "
+            "\"time_range\": {\"start\": \"YYYY-MM-DD\", \"end\": \"YYYY-MM-DD\"}, "
+            "\"reasoning\": \"brief explanation\"}.\n"
+            "Fields:\n"
+            "- locations: Indian cities, states and geographic regions in the query, properly capitalized; "
+            "type 'city' or 'state'; confidence 90-100 for exact matches, 70-89 for fuzzy; [] if none.\n"
+            "- intent: GEE for satellite/remote sensing analysis (vegetation/NDVI, land use/LULC, "
+            "temperature/LST/heat islands, water/floods, maps, ROI/coordinates); SEARCH for current events, "
+            "news, weather updates, latest/real-time information and general knowledge.\n"
+            "- analysis_type: the most specific GEE analysis (NDVI vegetation, LULC land use/cover, "
+            "LST temperature, CLIMATE weather/precipitation, WATER hydrology, SOIL soil/erosion, "
+            "POPULATION demographics, TRANSPORTATION roads); null when intent is SEARCH.\n"
+            "- intent_confidence, analysis_confidence: 0.0-1.0.\n"
+            "- time_range: ISO dates for the period the query asks about; null if none is mentioned.\n"
+            "- reasoning: 1 short sentence.\n"
+            "Output JSON only."
+        )
+        
+        payload = {
+            "model": self.model_name,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": query},
+            ],
+            "temperature": 0.1,
+            "response_format": {"type": "json_object"},
+        }
+        
+        cached_content = self.cache.get("query_understanding", query, self.model_name, self.PROMPT_VERSION) if self.cache else None
+        
+        try:
+            if cached_content is not None:
+                content = cached_content
+            else:
+                data = await self.openrouter.chat_completion(payload, timeout=20, component="query_understanding")
+                content = OpenRouterClient.message_content(data)
+            processing_time = time.time() - start_time
+            
+            if not content:
+                raise RuntimeError("LLM returned empty content")
+            
+            parsed = json.loads(content)
+            if not isinstance(parsed, dict):
+                raise ValueError(f"Unexpected LLM response type: {type(parsed)}")
+        
+        except httpx.HTTPError as e:
+            logger.error(f"HTTP error in fused query understanding: {e}")
+            return self._failure(str(e), start_time)
+        except (json.JSONDecodeError, ValueError, RuntimeError) as e:
+            logger.error(f"Parsing error in fused query understanding: {e}")
+            return self._failure(str(e), start_time)
+        
+        result = {
+            "success": True,
+            "processing_time": processing_time,
+            "model_used": self.model_name,
+            "cache_hit": cached_content is not None,
+            "raw_response": parsed
+        }
+        reasoning = parsed.get("reasoning") if isinstance(parsed.get("reasoning"), str) else "Fused understanding"
+        
+        locations = self._validate_locations(parsed.get("locations"))
+        if locations is not None:
+            result["locations"] = locations
+        
+        top_level = self._validate_top_level(parsed, reasoning, processing_time)
+        if top_level is not None:
+            result["top_level"] = top_level
+            
+            if top_level["service_type"] == ServiceType.GEE:
+                gee_sub = self._validate_gee_sub(parsed, reasoning, processing_time)
+                if gee_sub is not None:
+                    result["gee_sub"] = gee_sub
+        
+        if "time_range" in parsed:
+            valid, time_range = self._validate_time_range(parsed["time_range"])
+            if valid:
+                result["time_range"] = time_range
+        
+        fallback_fields = [
+            name for name in ("locations", "top_level", "time_range") if name not in result
+        ]
+        if top_level is not None and top_level["service_type"] == ServiceType.GEE and "gee_sub" not in result:
+            fallback_fields.append("gee_sub")
+        result["fallback_fields"] = fallback_fields
+        
+        # Only fully valid responses are cached; partial ones keep falling back
+        if self.cache and cached_content is None and not fallback_fields:
+            self.cache.set("query_understanding", query, self.model_name, self.PROMPT_VERSION, content)
+        
+        logger.info(f"Fused understanding in {processing_time:.2f}s" +
+                    (f" (falling back for: {', '.join(fallback_fields)})" if fallback_fields else ""))
+        return result
+    
+    def _failure(self, error: str, start_time: float) -> Dict[str, Any]:
+        """Build a result with no usable fields, so every component falls back."""
+        return {
+            "success": False,
+            "error": error,
+            "processing_time": time.time() - start_time,
+            "model_used": self.model_name,
+            "fallback_fields": ["locations", "top_level", "gee_sub", "time_range"]
+        }
+    
+    def _validate_locations(self, value: Any) -> Optional[List[LocationEntity]]:
+        """Validate the locations field.
+        
+        Args:
+            value: Raw "locations" value from the LLM
+        
+        Returns:
+            List of LocationEntity objects, or None if the field is unusable
+        """
+        if not isinstance(value, list):
+            return None
+        
+        entities = LocationNER.build_entities(value)
+        if value and not entities:
+            # Non-empty list where nothing validated: let LocationNER retry
+            return None
+        return entities
+    
+    def _validate_top_level(self, parsed: Dict[str, Any], reasoning: str, processing_time: float) -> Optional[Dict[str, Any]]:
+        """Validate the intent fields into a TopLevelClassifier-style result.
+        
+        Args:
+            parsed: Parsed LLM JSON object
+            reasoning: Reasoning text from the LLM
+            processing_time: Time taken by the fused call
+        
+        Returns:
+            Top-level classification dictionary, or None if invalid
+        """
+        intent_str = str(parsed.get("intent", "")).upper()
+        confidence = self._validate_confidence(parsed.get("intent_confidence"))
+        
+        if intent_str not in (ServiceType.GEE.value, ServiceType.SEARCH.value) or confidence is None:
+            return None
+        
+        return {
+            "service_type": ServiceType(intent_str),
+            "confidence": confidence,
+            "reasoning": reasoning,
+            "processing_time": processing_time,
+            "model_used": self.model_name,
+            "success": True,
+            "raw_response": parsed
+        }
+    
+    def _validate_gee_sub(self, parsed: Dict[str, Any], reasoning: str, processing_time: float) -> Optional[Dict[str, Any]]:
+        """Validate the analysis type fields into a GEESubClassifier-style result.
+        
+        Args:
+            parsed: Parsed LLM JSON object
+            reasoning: Reasoning text from the LLM
+            processing_time: Time taken by the fused call
+        
+        Returns:
+            GEE sub-classification dictionary, or None if invalid
+        """
+        analysis_type_str = str(parsed.get("analysis_type") or "").upper()
+        confidence = self._validate_confidence(parsed.get("analysis_confidence"))
+        
+        try:
+            gee_sub_intent = GEESubIntent(analysis_type_str)
+        except ValueError:
+            return None
+        if confidence is None:
+            return None
+        
+        return {
+            "gee_sub_intent": gee_sub_intent,
+            "confidence": confidence,
+            "reasoning": reasoning,
+            "processing_time": processing_time,
+            "model_used": self.model_name,
+            "success": True,
+            "raw_response": parsed
+        }
+    
+    @staticmethod
+    def _validate_confidence(value: Any) -> Optional[float]:
+        """Return a confidence in [0, 1], or None if the value is unusable."""
+        try:
+            confidence = float(value)
+        except (TypeError, ValueError):
+            return None
+        if not 0.0 <= confidence <= 1.0:
+            return None
+        return confidence
+    
+    @staticmethod
+    def _validate_time_range(value: Any) -> tuple:
+        """Validate the time range field.
+        
+        Args:
+            value: Raw "time_range" value from the LLM
+        
+        Returns:
+            (valid, time_range) tuple; time_range is None when no period was mentioned
+        """
+        if value is None:
+            return True, None
+        if not isinstance(value, dict):
+            return False, None
+        
+        try:
+            start = date.fromisoformat(str(value.get("start")))
+            end = date.fromisoformat(str(value.get("end")))
+        except ValueError:
+            return False, None
+        if start > end:
+            return False, None
+        
+        return True, {"start": start.isoformat(), "end": end.isoformat()}
@@ -7,13 +7,16 @@ Extracted from the original llm_parse_intent_openrouter function.
 
 import json
 import time
-import requests
+import httpx
 import logging
 from typing import Dict, Any, Optional
 
 try:
     from ..models.intent import ServiceType
     from ..config import get_openrouter_config
+    from ..http_client import run_sync
+    from ..openrouter_client import get_openrouter_client, OpenRouterClient
+    from ..llm_cache import get_llm_cache
 except ImportError:
     import sys
     from pathlib import Path
@@ -21,6 +24,9 @@ except ImportError:
     
     from app.services.core_llm_agent.models.intent import ServiceType
     from app.services.core_llm_agent.config import get_openrouter_config
+    from app.services.core_llm_agent.http_client import run_sync
+    from app.services.core_llm_agent.openrouter_client import get_openrouter_client, OpenRouterClient
+    from app.services.core_llm_agent.llm_cache import get_llm_cache
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +34,48 @@ logger = logging.getLogger(__name__)
 class TopLevelClassifier:
     """LLM-based classifier for top-level service routing."""
     
+    # Bump when the system prompt changes so cached classifications are not reused
+    PROMPT_VERSION = "1"
+    
+    # GEE keywords - comprehensive coverage for all services
+    GEE_KEYWORDS = [
+        # NDVI/Vegetation keywords
+        "ndvi", "vegetation", "greenness", "forest", "trees", "canopy", "deforestation", 
+        "afforestation", "vegetation health", "plant", "crop", "agriculture", "biomass",
+        "photosynthesis", "chlorophyll", "leaf area", "green cover",
+        
+        # Water/Flood keywords  
+        "water", "surface water", "water bodies", "water coverage", "water conditions",
+        "lakes", "rivers", "wetlands", "reservoir", "pond", "stream", "flood",
+        "flooding", "water presence", "water change", "seasonal water", "monsoon water",
+        "dry season water", "water quality", "water analysis", "hydrological",
+        
+        # LST/Temperature keywords
+        "temperature", "lst", "land surface temperature", "thermal", "heat island", 
+        "uhi", "urban heat island", "surface temperature", "thermal analysis",
+        "hot spots", "cooling", "heating", "climate", "thermal comfort",
+        "heat stress", "temperature variation", "thermal mapping",
+        
+        # LULC/Land Cover keywords
+        "land use", "lulc", "land cover", "land use land cover", "dynamic world",
+        "urban", "built", "bare", "cropland", "grass", "shrub", "tree cover",
+        "built area", "urban area", "agricultural", "natural", "developed",
+        "impervious", "pervious", "settlement", "infrastructure", "land classification",
+        
+        # General GEE/Satellite keywords
+        "satellite", "imagery", "remote sensing", "earth observation", "modis", 
+        "landsat", "sentinel", "roi", "polygon", "coordinates", "lat", "lng",
+        "geospatial", "map", "gis", "spatial analysis", "earth engine", "gee",
+        "raster", "pixel", "resolution", "time series", "temporal analysis"
+    ]
+    
+    # Search keywords - for time-sensitive or current information queries
+    SEARCH_KEYWORDS = [
+        "latest", "current", "today", "now", "weather", "news", "update",
+        "recent", "live", "real-time", "current events", "breaking news",
+        "today's", "this week", "this month", "this year"
+    ]
+    
     def __init__(self, model_name: str = None):
         """Initialize the TopLevelClassifier.
         
@@ -37,14 +85,24 @@ class TopLevelClassifier:
         config = get_openrouter_config()
         self.model_name = model_name or config["intent_model"]
         self.api_key = config["api_key"]
-        self.referrer = config["referrer"]
-        self.app_title = config["app_title"]
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
+        self.openrouter = get_openrouter_client()
+        self.cache = get_llm_cache()
         
         if not self.api_key:
             logger.warning("OPENROUTER_API_KEY not set. Intent classification will fail.")
     
     def classify_intent(self, query: str) -> Dict[str, Any]:
+        """Classify query intent for service routing (synchronous wrapper).
+        
+        Args:
+            query: User query string
+            
+        Returns:
+            Dictionary with service_type, confidence, reasoning, and metadata
+        """
+        return run_sync(self.classify_intent_async(query))
+    
+    async def classify_intent_async(self, query: str) -> Dict[str, Any]:
         """Classify query intent for service routing.
         
         Args:
@@ -65,13 +123,6 @@ class TopLevelClassifier:
                 "error": "Empty query"
             }
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": self.referrer,
-            "X-Title": self.app_title,
-        }
-        
         system_prompt = (
             "You are an intent classifier for a geospatial assistant. "
             "Given a user query, respond ONLY with a compact JSON object of the form\n"
@@ -103,20 +154,16 @@ class TopLevelClassifier:
         }
         
         start_time = time.time()
+        cached_content = self.cache.get("top_level", query, self.model_name, self.PROMPT_VERSION) if self.cache else None
         
         try:
-            resp = requests.post(self.base_url, headers=headers, data=json.dumps(payload), timeout=20)
-            resp.raise_for_status()
+            if cached_content is not None:
+                content = cached_content
+            else:
+                data = await self.openrouter.chat_completion(payload, timeout=20, component="top_level")
+                content = OpenRouterClient.message_content(data)
             processing_time = time.time() - start_time
             
-            data = resp.json()
-            content = (
-                data.get("choices", [{}])[0]
-                .get("message", {})
-                .get("content", "")
-                .strip()
-            )
-            
             if not content:
                 raise RuntimeError("LLM returned empty content")
             
@@ -128,10 +175,10 @@ class TopLevelClassifier:
             
             # Validate and convert intent
             service_type = None
-            if intent_str == "GEE":
-                service_type = ServiceType.GEE
-            elif intent_str == "SEARCH":
-                service_type = ServiceType.SEARCH
+            if intent_str in ("GEE", "SEARCH"):
+                service_type = ServiceType(intent_str)
+                if self.cache and cached_content is None:
+                    self.cache.set("top_level", query, self.model_name, self.PROMPT_VERSION, content)
             else:
                 # Fallback logic based on keywords if invalid response
                 service_type = self._fallback_classification(query)
@@ -148,10 +195,11 @@ class TopLevelClassifier:
                 "processing_time": processing_time,
                 "model_used": self.model_name,
                 "success": True,
+                "cache_hit": cached_content is not None,
                 "raw_response": parsed
             }
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             processing_time = time.time() - start_time
             logger.error(f"HTTP error in intent classification: {e}")
             
@@ -210,48 +258,9 @@ class TopLevelClassifier:
         """
         query_lower = query.lower()
         
-        # GEE keywords - comprehensive coverage for all services
-        gee_keywords = [
-            # NDVI/Vegetation keywords
-            "ndvi", "vegetation", "greenness", "forest", "trees", "canopy", "deforestation", 
-            "afforestation", "vegetation health", "plant", "crop", "agriculture", "biomass",
-            "photosynthesis", "chlorophyll", "leaf area", "green cover",
-            
-            # Water/Flood keywords  
-            "water", "surface water", "water bodies", "water coverage", "water conditions",
-            "lakes", "rivers", "wetlands", "reservoir", "pond", "stream", "flood",
-            "flooding", "water presence", "water change", "seasonal water", "monsoon water",
-            "dry season water", "water quality", "water analysis", "hydrological",
-            
-            # LST/Temperature keywords
-            "temperature", "lst", "land surface temperature", "thermal", "heat island", 
-            "uhi", "urban heat island", "surface temperature", "thermal analysis",
-            "hot spots", "cooling", "heating", "climate", "thermal comfort",
-            "heat stress", "temperature variation", "thermal mapping",
-            
-            # LULC/Land Cover keywords
-            "land use", "lulc", "land cover", "land use land cover", "dynamic world",
-            "urban", "built", "bare", "cropland", "grass", "shrub", "tree cover",
-            "built area", "urban area", "agricultural", "natural", "developed",
-            "impervious", "pervious", "settlement", "infrastructure", "land classification",
-            
-            # General GEE/Satellite keywords
-            "satellite", "imagery", "remote sensing", "earth observation", "modis", 
-            "landsat", "sentinel", "roi", "polygon", "coordinates", "lat", "lng",
-            "geospatial", "map", "gis", "spatial analysis", "earth engine", "gee",
-            "raster", "pixel", "resolution", "time series", "temporal analysis"
-        ]
-        
-        # Search keywords - for time-sensitive or current information queries
-        search_keywords = [
-            "latest", "current", "today", "now", "weather", "news", "update",
-            "recent", "live", "real-time", "current events", "breaking news",
-            "today's", "this week", "this month", "this year"
-        ]
-        
         # Count keyword matches
-        gee_score = sum(1 for keyword in gee_keywords if keyword in query_lower)
-        search_score = sum(1 for keyword in search_keywords if keyword in query_lower)
+        gee_score = sum(1 for keyword in self.GEE_KEYWORDS if keyword in query_lower)
+        search_score = sum(1 for keyword in self.SEARCH_KEYWORDS if keyword in query_lower)
         
         # Priority logic: 
         # 1. Time-sensitive queries -> SEARCH
@@ -0,0 +1,205 @@
+"""
+Persistent cache for query-understanding LLM calls.
+
+TopLevelClassifier, GEESubClassifier, LocationNER and QueryUnderstanding see
+the same popular questions over and over. Their raw LLM completions are
+cached here keyed by (component, normalized query text, model name, prompt
+version), with an in-memory LRU in front of a SQLite file so entries survive
+restarts (storage shared with the other persistent caches, see ttl_cache.py).
+Only completions that parsed successfully are stored; the
+components re-run their normal parsing on a cache hit.
+
+Configuration (environment):
+- LLM_CACHE_ENABLED: "true" (default) / "false"
+- LLM_CACHE_PATH: SQLite file (default backend/data/llm_classification_cache.sqlite3)
+- LLM_CACHE_TTL_SECONDS: entry lifetime (default 7 days)
+- LLM_CACHE_MEMORY_ENTRIES: size of the in-memory LRU (default 1024)
+"""
+
+import os
+import re
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    from .ttl_cache import PersistentTTLCache, env_enabled
+except ImportError:
+    from app.services.core_llm_agent.ttl_cache import PersistentTTLCache, env_enabled
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent.parent / "data" / "llm_classification_cache.sqlite3"
+
+
+def normalize_query(query: str) -> str:
+    """Normalize query text for cache keys (case, whitespace, trailing punctuation).
+
+    Args:
+        query: User query string
+
+    Returns:
+        Normalized query text
+    """
+    text = re.sub(r"\s+", " ", query.strip().lower())
+    return text.rstrip(" ?!.")
+
+
+class LLMClassificationCache(PersistentTTLCache):
+    """In-memory LRU backed by SQLite for query-understanding LLM completions."""
+
+    TABLE = "llm_cache"
+    COLUMNS = ("component", "model", "prompt_version", "query")
+    LABEL = "LLM classification cache"
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_memory_entries: int = 1024
+    ):
+        """Initialize the cache.
+
+        Args:
+            db_path: SQLite file path (None keeps the cache in memory only)
+            ttl_seconds: Lifetime of a cached completion
+            max_memory_entries: Number of entries kept in the in-memory LRU
+        """
+        self.ttl_seconds = ttl_seconds
+
+        # Statistics per component
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        super().__init__(db_path, max_memory_entries)
+
+    @staticmethod
+    def make_key(component: str, query: str, model: str, prompt_version: str) -> str:
+        """Build the cache key for a component call.
+
+        Args:
+            component: Component name (e.g. "top_level")
+            query: User query string (normalized here)
+            model: LLM model name
+            prompt_version: Version of the component's system prompt
+
+        Returns:
+            Hex digest key
+        """
+        raw = "\x1f".join([component, model, prompt_version, normalize_query(query)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, component: str, query: str, model: str, prompt_version: str) -> Optional[str]:
+        """Look up a cached LLM completion.
+
+        Args:
+            component: Component name
+            query: User query string
+            model: LLM model name
+            prompt_version: Version of the component's system prompt
+
+        Returns:
+            Cached completion content, or None on a miss
+        """
+        entry = self._lookup(self.make_key(component, query, model, prompt_version))
+        stats = self._component_stats(component)
+        if entry is None:
+            stats["misses"] += 1
+            return None
+        stats[f"{entry.tier}_hits"] += 1
+        return entry.value
+
+    def set(self, component: str, query: str, model: str, prompt_version: str, value: str) -> None:
+        """Store an LLM completion that parsed successfully.
+
+        Args:
+            component: Component name
+            query: User query string
+            model: LLM model name
+            prompt_version: Version of the component's system prompt
+            value: Raw completion content
+        """
+        self._put(
+            self.make_key(component, query, model, prompt_version), value, self.ttl_seconds,
+            component=component, model=model, prompt_version=prompt_version, query=normalize_query(query)
+        )
+        self._component_stats(component)["stores"] += 1
+
+    def entries(self, component: str) -> List[Tuple[str, str]]:
+        """List the live (normalized query, completion) pairs stored for a component.
+
+        Args:
+            component: Component name
+
+        Returns:
+            List of (query, value) tuples from the database
+        """
+        if self._conn is None:
+            return []
+        with self._lock:
+            try:
+                return self._conn.execute(
+                    "SELECT query, value FROM llm_cache WHERE component = ? AND expires_at > ? AND value IS NOT NULL",
+                    (component, time.time())
+                ).fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache read failed: {e}")
+                return []
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss statistics.
+
+        Returns:
+            Dictionary with totals, hit ratio and per-component counters
+        """
+        hits = sum(s["memory_hits"] + s["disk_hits"] for s in self._stats.values())
+        misses = sum(s["misses"] for s in self._stats.values())
+        lookups = hits + misses
+
+        return {
+            "lookups": lookups,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            **self.storage_stats(),
+            "ttl_seconds": self.ttl_seconds,
+            "components": {name: dict(s) for name, s in self._stats.items()}
+        }
+
+    def _component_stats(self, component: str) -> Dict[str, int]:
+        """Get (or create) the counters for a component."""
+        stats = self._stats.get(component)
+        if stats is None:
+            stats = self._stats.setdefault(
+                component, {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+            )
+        return stats
+
+
+_cache: Optional[LLMClassificationCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMClassificationCache]:
+    """Get the process-wide LLM classification cache.
+
+    Returns:
+        Shared LLMClassificationCache, or None if disabled via LLM_CACHE_ENABLED
+    """
+    global _cache
+
+    if not env_enabled("LLM_CACHE_ENABLED"):
+        return None
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMClassificationCache(
+                    db_path=os.environ.get("LLM_CACHE_PATH", str(DEFAULT_CACHE_PATH)) or None,
+                    ttl_seconds=float(os.environ.get("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600)),
+                    max_memory_entries=int(os.environ.get("LLM_CACHE_MEMORY_ENTRIES", "1024"))
+                )
+    return _cache
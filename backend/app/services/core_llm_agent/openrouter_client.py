@@ -0,0 +1,410 @@
+"""
+Shared OpenRouter chat-completions client.
+
+Every OpenRouter caller (intent classifiers, location NER, fused query
+understanding, the result formatter and the GEE HybridQueryAnalyzer) sends
+its requests through one OpenRouterClient so they share:
+
+- pooled keep-alive connections (http_client.get_async_client / get_sync_client)
+- a per-model concurrency limit, so bursts do not trip provider rate limits
+- retry with exponential backoff on 429/5xx and transport errors, honoring Retry-After
+- per-model and per-component latency, retry and token usage counters
+
+Configuration (environment):
+- OPENROUTER_MAX_CONCURRENCY_PER_MODEL: in-flight requests per model (default 4)
+- OPENROUTER_MAX_RETRIES: retries after the first attempt (default 2)
+- OPENROUTER_BACKOFF_SECONDS: base backoff delay (default 0.5)
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+import weakref
+import httpx
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    from .config import get_openrouter_config
+    from .http_client import get_async_client, get_sync_client
+    from ...utils.tracing import get_tracer
+except ImportError:
+    import sys
+    from pathlib import Path
+    sys.path.append(str(Path(__file__).parent.parent.parent.parent))
+
+    from app.services.core_llm_agent.config import get_openrouter_config
+    from app.services.core_llm_agent.http_client import get_async_client, get_sync_client
+    from app.utils.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+OPENROUTER_CHAT_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+# Status codes worth retrying: rate limiting and transient upstream failures
+RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Upper bound for a single backoff sleep, including Retry-After values
+MAX_BACKOFF_SECONDS = 10.0
+
+
+class OpenRouterClient:
+    """Pooled, rate-limited OpenRouter client with retry and usage accounting."""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        referrer: Optional[str] = None,
+        app_title: Optional[str] = None,
+        max_concurrency_per_model: int = 4,
+        max_retries: int = 2,
+        backoff_seconds: float = 0.5
+    ):
+        """Initialize the client.
+
+        Args:
+            api_key: OpenRouter API key (uses env config if None)
+            referrer: HTTP-Referer header value (uses env config if None)
+            app_title: Default X-Title header value (uses env config if None)
+            max_concurrency_per_model: Maximum in-flight requests per model
+            max_retries: Retries after the first attempt on retryable failures
+            backoff_seconds: Base delay for exponential backoff
+        """
+        config = get_openrouter_config()
+        self.api_key = api_key if api_key is not None else config["api_key"]
+        self.referrer = referrer or config["referrer"]
+        self.app_title = app_title or config["app_title"]
+        self.base_url = OPENROUTER_CHAT_URL
+        self.max_concurrency_per_model = max(1, max_concurrency_per_model)
+        self.max_retries = max(0, max_retries)
+        self.backoff_seconds = backoff_seconds
+
+        # asyncio semaphores are bound to an event loop, so keep one set per loop
+        self._async_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+        self._sync_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._limits_lock = threading.Lock()
+
+        # Usage counters keyed by ("model", name) and ("component", name)
+        self._stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+
+    def headers(self, api_key: Optional[str] = None, app_title: Optional[str] = None) -> Dict[str, str]:
+        """Build request headers.
+
+        Args:
+            api_key: Override for the configured API key
+            app_title: Override for the X-Title header
+
+        Returns:
+            Header dictionary
+        """
+        return {
+            "Authorization": f"Bearer {api_key or self.api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": self.referrer,
+            "X-Title": app_title or self.app_title,
+        }
+
+    async def chat_completion(
+        self,
+        payload: Dict[str, Any],
+        timeout: float = 20,
+        component: str = "unknown",
+        api_key: Optional[str] = None,
+        app_title: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Send a chat completion request on the shared async connection pool.
+
+        Args:
+            payload: Chat completions request body (must include "model")
+            timeout: Per-attempt timeout in seconds
+            component: Caller name used for statistics
+            api_key: Override for the configured API key
+            app_title: Override for the X-Title header
+
+        Returns:
+            Parsed JSON response
+
+        Raises:
+            httpx.HTTPError: If the request still fails after all retries
+        """
+        model = payload.get("model", "unknown")
+        headers = self.headers(api_key, app_title)
+        body = json.dumps(payload)
+
+        with get_tracer().span("openrouter.chat_completion", kind="client", attributes={"llm.model": model, "component": component}) as span:
+            async with self._async_limit(model):
+                start_time = time.time()
+                attempt = 0
+                while True:
+                    try:
+                        resp = await get_async_client().post(self.base_url, headers=headers, content=body, timeout=timeout)
+                    except httpx.HTTPError as e:
+                        delay = self._retry_delay(model, component, attempt, error=e)
+                        if delay is None:
+                            self._record_call(model, component, time.time() - start_time, None, error=True)
+                            raise
+                    else:
+                        delay = self._retry_delay(model, component, attempt, resp=resp)
+                        if delay is None:
+                            return self._finish(model, component, start_time, resp, attempt, span)
+                    attempt += 1
+                    await asyncio.sleep(delay)
+
+    def chat_completion_sync(
+        self,
+        payload: Dict[str, Any],
+        timeout: float = 20,
+        component: str = "unknown",
+        api_key: Optional[str] = None,
+        app_title: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Send a chat completion request on the shared synchronous connection pool.
+
+        For callers that are synchronous all the way down; async code should
+        use chat_completion().
+
+        Args:
+            payload: Chat completions request body (must include "model")
+            timeout: Per-attempt timeout in seconds
+            component: Caller name used for statistics
+            api_key: Override for the configured API key
+            app_title: Override for the X-Title header
+
+        Returns:
+            Parsed JSON response
+
+        Raises:
+            httpx.HTTPError: If the request still fails after all retries
+        """
+        model = payload.get("model", "unknown")
+        headers = self.headers(api_key, app_title)
+        body = json.dumps(payload)
+
+        with get_tracer().span("openrouter.chat_completion", kind="client", attributes={"llm.model": model, "component": component}) as span:
+            with self._sync_limit(model):
+                start_time = time.time()
+                attempt = 0
+                while True:
+                    try:
+                        resp = get_sync_client().post(self.base_url, headers=headers, content=body, timeout=timeout)
+                    except httpx.HTTPError as e:
+                        delay = self._retry_delay(model, component, attempt, error=e)
+                        if delay is None:
+                            self._record_call(model, component, time.time() - start_time, None, error=True)
+                            raise
+                    else:
+                        delay = self._retry_delay(model, component, attempt, resp=resp)
+                        if delay is None:
+                            return self._finish(model, component, start_time, resp, attempt, span)
+                    attempt += 1
+                    time.sleep(delay)
+
+    def _retry_delay(
+        self,
+        model: str,
+        component: str,
+        attempt: int,
+        resp: Optional[httpx.Response] = None,
+        error: Optional[Exception] = None
+    ) -> Optional[float]:
+        """Decide whether a failed attempt is retried (shared by both call paths).
+
+        Transport errors and RETRY_STATUS_CODES responses are retried until
+        max_retries is reached; anything else is final.
+
+        Args:
+            model: Model name (for statistics and logs)
+            component: Caller name (for statistics and logs)
+            attempt: Zero-based attempt number
+            resp: Response of the attempt, if one was received
+            error: Exception raised by the attempt, if any
+
+        Returns:
+            Seconds to wait before the next attempt, or None if the attempt is final
+        """
+        if attempt >= self.max_retries:
+            return None
+        if error is not None:
+            if not isinstance(error, httpx.TransportError):
+                return None
+            delay = self._backoff_delay(attempt)
+            logger.warning(f"⏳ OpenRouter transport error for {model} ({component}): {error}, retrying in {delay:.1f}s")
+        elif resp is not None and resp.status_code in RETRY_STATUS_CODES:
+            delay = self._backoff_delay(attempt, resp)
+            logger.warning(f"⏳ OpenRouter {resp.status_code} for {model} ({component}), retrying in {delay:.1f}s")
+        else:
+            return None
+        self._record_retry(model, component)
+        return delay
+
+    def _finish(
+        self,
+        model: str,
+        component: str,
+        start_time: float,
+        resp: httpx.Response,
+        attempt: int,
+        span: Any
+    ) -> Dict[str, Any]:
+        """Turn the final response into parsed JSON or an error (shared by both call paths).
+
+        Raises:
+            httpx.HTTPStatusError: For an error status
+            ValueError: If the body is not JSON
+        """
+        try:
+            resp.raise_for_status()
+            data = resp.json()
+        except (httpx.HTTPError, ValueError):
+            self._record_call(model, component, time.time() - start_time, None, error=True)
+            raise
+
+        self._record_call(model, component, time.time() - start_time, data.get("usage"))
+        if span is not None:
+            span.set_attribute("retries", attempt)
+        return data
+
+    @staticmethod
+    def message_content(data: Dict[str, Any]) -> str:
+        """Extract the first choice's message content from a response.
+
+        Args:
+            data: Parsed chat completions response
+
+        Returns:
+            Stripped content string ("" if missing)
+        """
+        return (
+            (data.get("choices") or [{}])[0]
+            .get("message", {})
+            .get("content", "")
+            or ""
+        ).strip()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get latency, retry and token usage counters.
+
+        Returns:
+            Dictionary with totals plus per-model and per-component counters
+        """
+        with self._stats_lock:
+            snapshot = {key: dict(value) for key, value in self._stats.items()}
+
+        def finish(counters: Dict[str, float]) -> Dict[str, Any]:
+            calls = counters["calls"]
+            counters["avg_latency_ms"] = counters["total_latency_ms"] / calls if calls else 0.0
+            return counters
+
+        models = {name: finish(c) for (kind, name), c in snapshot.items() if kind == "model"}
+        components = {name: finish(c) for (kind, name), c in snapshot.items() if kind == "component"}
+
+        return {
+            "calls": sum(c["calls"] for c in models.values()),
+            "errors": sum(c["errors"] for c in models.values()),
+            "retries": sum(c["retries"] for c in models.values()),
+            "total_tokens": sum(c["total_tokens"] for c in models.values()),
+            "max_concurrency_per_model": self.max_concurrency_per_model,
+            "max_retries": self.max_retries,
+            "models": models,
+            "components": components
+        }
+
+    def _async_limit(self, model: str) -> asyncio.Semaphore:
+        """Get the per-model semaphore for the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._limits_lock:
+            limits = self._async_limits.get(loop)
+            if limits is None:
+                limits = self._async_limits[loop] = {}
+            semaphore = limits.get(model)
+            if semaphore is None:
+                semaphore = limits[model] = asyncio.Semaphore(self.max_concurrency_per_model)
+        return semaphore
+
+    def _sync_limit(self, model: str) -> threading.BoundedSemaphore:
+        """Get the per-model semaphore for synchronous callers."""
+        with self._limits_lock:
+            semaphore = self._sync_limits.get(model)
+            if semaphore is None:
+                semaphore = self._sync_limits[model] = threading.BoundedSemaphore(self.max_concurrency_per_model)
+        return semaphore
+
+    def _backoff_delay(self, attempt: int, resp: Optional[httpx.Response] = None) -> float:
+        """Compute the delay before the next attempt.
+
+        Args:
+            attempt: Zero-based index of the attempt that just failed
+            resp: Failed response, checked for a Retry-After header
+
+        Returns:
+            Delay in seconds
+        """
+        if resp is not None:
+            retry_after = resp.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(max(float(retry_after), 0.0), MAX_BACKOFF_SECONDS)
+                except ValueError:
+                    pass
+        delay = self.backoff_seconds * (2 ** attempt)
+        return min(delay + random.uniform(0, delay / 2), MAX_BACKOFF_SECONDS)
+
+    def _counters(self, kind: str, name: str) -> Dict[str, float]:
+        """Get (or create) a counter block; caller holds the stats lock."""
+        counters = self._stats.get((kind, name))
+        if counters is None:
+            counters = self._stats[(kind, name)] = {
+                "calls": 0, "errors": 0, "retries": 0,
+                "total_latency_ms": 0.0, "max_latency_ms": 0.0,
+                "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0
+            }
+        return counters
+
+    def _record_retry(self, model: str, component: str) -> None:
+        """Count a retried attempt."""
+        with self._stats_lock:
+            for key in (("model", model), ("component", component)):
+                self._counters(*key)["retries"] += 1
+
+    def _record_call(self, model: str, component: str, latency: float, usage: Optional[Dict[str, Any]], error: bool = False) -> None:
+        """Count a finished call (including retries) with its latency and token usage."""
+        latency_ms = latency * 1000
+        usage = usage if isinstance(usage, dict) else {}
+        with self._stats_lock:
+            for key in (("model", model), ("component", component)):
+                counters = self._counters(*key)
+                counters["calls"] += 1
+                counters["errors"] += int(error)
+                counters["total_latency_ms"] += latency_ms
+                counters["max_latency_ms"] = max(counters["max_latency_ms"], latency_ms)
+                for field in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                    value = usage.get(field)
+                    if isinstance(value, (int, float)):
+                        counters[field] += int(value)
+
+
+_client: Optional[OpenRouterClient] = None
+_client_lock = threading.Lock()
+
+
+def get_openrouter_client() -> OpenRouterClient:
+    """Get the process-wide OpenRouter client.
+
+    Returns:
+        Shared OpenRouterClient configured from the environment
+    """
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenRouterClient(
+                    max_concurrency_per_model=int(os.environ.get("OPENROUTER_MAX_CONCURRENCY_PER_MODEL", "4")),
+                    max_retries=int(os.environ.get("OPENROUTER_MAX_RETRIES", "2")),
+                    backoff_seconds=float(os.environ.get("OPENROUTER_BACKOFF_SECONDS", "0.5"))
+                )
+    return _client
@@ -3,8 +3,18 @@ Output formatting module - Format consistent results.
 
 Components:
 - ResultFormatter: Format service results into consistent output format
+- NarrativeEngine: Render analysis narratives from compiled templates
+- NarrativeEnrichmentManager: Optional background LLM narratives
 """
 
 from .result_formatter import ResultFormatter
+from .narrative_templates import NarrativeEngine, get_narrative_engine
+from .narrative_enrichment import NarrativeEnrichmentManager, get_narrative_enrichment
 
-__all__ = ["ResultFormatter"]
+__all__ = [
+    "ResultFormatter",
+    "NarrativeEngine",
+    "get_narrative_engine",
+    "NarrativeEnrichmentManager",
+    "get_narrative_enrichment",
+]
@@ -0,0 +1,211 @@
+"""
+Narrative Enrichment - Optional LLM narratives computed in the background.
+
+The response text is rendered from templates (narrative_templates) and never
+waits for an LLM. When ENABLE_RESPONSE_LLM is set, the result formatter also
+submits the structured analysis context here; a small worker pool asks the
+response model for a richer narrative while the response is already on its
+way. The enrichment id travels in the result metadata, and clients pick the
+narrative up from the ``enrichment`` event of /query-stream or by polling
+``GET /narrative/{enrichment_id}``.
+
+Configuration (environment):
+- ENABLE_RESPONSE_LLM: submit LLM narrative enrichments (default false)
+- NARRATIVE_ENRICHMENT_WORKERS: concurrent enrichment calls (default 2)
+- NARRATIVE_ENRICHMENT_TIMEOUT_SECONDS: response model timeout (default 25)
+- NARRATIVE_ENRICHMENT_TTL_SECONDS: how long finished narratives are kept (default 600)
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+try:
+    from ..config import get_openrouter_config
+    from ..openrouter_client import get_openrouter_client, OpenRouterClient
+except ImportError:
+    import sys
+    from pathlib import Path
+    sys.path.append(str(Path(__file__).parent.parent.parent.parent.parent))
+
+    from app.services.core_llm_agent.config import get_openrouter_config
+    from app.services.core_llm_agent.openrouter_client import get_openrouter_client, OpenRouterClient
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = (
+    "You are a geospatial analysis writer. Given structured analysis data and map stats, write a concise, factual narrative tailored to the user's query. "
+    "Do not invent numbers. Use only provided metrics. Include key metrics (means, percentages, dominant classes, UHI) and what they imply. If a tile_url is present, note that a map layer is available. Keep it under 10 sentences."
+)
+
+
+class NarrativeEnrichmentManager:
+    """Worker pool and registry of background LLM narrative enrichments."""
+
+    def __init__(self, max_workers: int = 2, timeout: float = 25.0, ttl_seconds: float = 600.0):
+        """Initialize the enrichment manager.
+
+        Args:
+            max_workers: Concurrent response LLM calls
+            timeout: Response LLM request timeout in seconds
+            ttl_seconds: How long finished enrichments are kept
+        """
+        self.timeout = timeout
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="narrative-enrichment")
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "succeeded": 0, "failed": 0, "expired": 0}
+
+    def submit(self, context: Dict[str, Any]) -> Optional[str]:
+        """Queue an LLM narrative for a formatted result.
+
+        Args:
+            context: Structured analysis context (query, analysis_type, analysis_data, ...)
+
+        Returns:
+            Enrichment id, or None if the response model is not configured
+        """
+        cfg = get_openrouter_config()
+        api_key = cfg.get("api_key", "").strip()
+        model = cfg.get("response_model")
+        if not api_key or not model:
+            logger.warning("Response LLM disabled: missing API key or response model")
+            return None
+
+        enrichment_id = uuid.uuid4().hex
+        with self._lock:
+            self._evict_expired()
+            self._entries[enrichment_id] = {
+                "enrichment_id": enrichment_id,
+                "status": "pending",
+                "narrative": None,
+                "error": None,
+                "model": model,
+                "created_at": time.time(),
+                "finished_at": None,
+            }
+            self._stats["submitted"] += 1
+            self._futures[enrichment_id] = self._executor.submit(self._run, enrichment_id, model, api_key, context)
+        logger.info(f"📝 Queued narrative enrichment {enrichment_id[:8]} ({context.get('analysis_type')})")
+        return enrichment_id
+
+    def get(self, enrichment_id: str) -> Optional[Dict[str, Any]]:
+        """Current state of an enrichment.
+
+        Args:
+            enrichment_id: Id returned by submit()
+
+        Returns:
+            Enrichment dictionary (status pending/succeeded/failed), or None if unknown or expired
+        """
+        with self._lock:
+            entry = self._entries.get(enrichment_id)
+            return dict(entry) if entry else None
+
+    async def wait(self, enrichment_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait until an enrichment finishes without blocking the event loop.
+
+        Args:
+            enrichment_id: Id returned by submit()
+            timeout: Maximum seconds to wait (default: the response LLM timeout)
+
+        Returns:
+            Enrichment dictionary, still pending if the wait timed out, or None if unknown
+        """
+        with self._lock:
+            future = self._futures.get(enrichment_id)
+        if future is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout or self.timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.get(enrichment_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return enrichment statistics."""
+        with self._lock:
+            pending = sum(1 for entry in self._entries.values() if entry["status"] == "pending")
+            return {"enabled": True, "pending": pending, "stored": len(self._entries), **self._stats}
+
+    def _run(self, enrichment_id: str, model: str, api_key: str, context: Dict[str, Any]) -> None:
+        """Call the response model on a worker thread and store the narrative."""
+        payload = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": f"Context JSON:\n{json.dumps(context, ensure_ascii=False, default=str)}\n\nWrite the final analysis."},
+            ],
+            "temperature": 0.2,
+        }
+        narrative, error = None, None
+        try:
+            data = get_openrouter_client().chat_completion_sync(payload, api_key=api_key, timeout=self.timeout, component="response_llm")
+            narrative = OpenRouterClient.message_content(data) or None
+            if narrative is None:
+                error = "Response model returned no content"
+        except Exception as e:
+            error = str(e)
+            logger.warning(f"⚠️ Narrative enrichment {enrichment_id[:8]} failed: {e}")
+
+        with self._lock:
+            entry = self._entries.get(enrichment_id)
+            if entry is not None:
+                entry.update({
+                    "status": "succeeded" if narrative else "failed",
+                    "narrative": narrative,
+                    "error": error,
+                    "finished_at": time.time(),
+                })
+            self._stats["succeeded" if narrative else "failed"] += 1
+        if narrative:
+            logger.info(f"✅ Narrative enrichment {enrichment_id[:8]} ready")
+
+    def _evict_expired(self) -> None:
+        """Drop finished enrichments older than the TTL (caller holds the lock)."""
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            enrichment_id for enrichment_id, entry in self._entries.items()
+            if entry["finished_at"] is not None and entry["finished_at"] < cutoff
+        ]
+        for enrichment_id in expired:
+            self._entries.pop(enrichment_id, None)
+            self._futures.pop(enrichment_id, None)
+        self._stats["expired"] += len(expired)
+
+
+def is_enrichment_enabled() -> bool:
+    """Whether LLM narrative enrichment is switched on (ENABLE_RESPONSE_LLM)."""
+    return os.environ.get("ENABLE_RESPONSE_LLM", "false").lower() in ("1", "true", "yes")
+
+
+_manager: Optional[NarrativeEnrichmentManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_narrative_enrichment() -> Optional[NarrativeEnrichmentManager]:
+    """Get the process-wide enrichment manager.
+
+    Returns:
+        Shared NarrativeEnrichmentManager, or None when ENABLE_RESPONSE_LLM is off
+    """
+    global _manager
+
+    if not is_enrichment_enabled():
+        return None
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = NarrativeEnrichmentManager(
+                    max_workers=int(os.environ.get("NARRATIVE_ENRICHMENT_WORKERS", "2")),
+                    timeout=float(os.environ.get("NARRATIVE_ENRICHMENT_TIMEOUT_SECONDS", "25")),
+                    ttl_seconds=float(os.environ.get("NARRATIVE_ENRICHMENT_TTL_SECONDS", "600"))
+                )
+    return _manager
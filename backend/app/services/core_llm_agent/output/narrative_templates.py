@@ -0,0 +1,453 @@
+"""
+Narrative Templates - Deterministic, data-driven analysis narratives.
+
+Every number in an analysis narrative is already computed by the GEE services,
+so the final text is rendered in-process from per-analysis-type templates
+instead of asking an LLM to restate it. Each NarrativeSpec declares:
+
+- metrics: which analysis_data keys feed each metric (first present key wins)
+- derived: metrics computed from other metrics (ranges, complements, shares)
+- bands: thresholds mapping a metric to a qualitative label and description
+- summary / paragraphs: sentences with {metric:format} placeholders and
+  optional conditions; a sentence is skipped when a metric it needs is missing
+- statistics: the bullet list under the narrative
+
+Specs are compiled once at import (placeholders parsed, conditions bound to
+operators, bands turned into sorted threshold lists), so rendering is a few
+dictionary lookups and string joins per sentence.
+
+Usage:
+    text = get_narrative_engine().render("ndvi", analysis_data, "Delhi")["text"]
+"""
+
+import bisect
+import logging
+import operator
+import string
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCATION = "the region"
+
+# A condition is (metric, operator, value); all conditions of a sentence must hold
+Condition = Tuple[str, str, float]
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+@dataclass(frozen=True)
+class Band:
+    """Qualitative band for metric values above a threshold."""
+    above: float
+    label: str
+    description: str = ""
+
+
+@dataclass(frozen=True)
+class Sentence:
+    """Template sentence rendered when its metrics are present and conditions hold."""
+    template: str
+    when: Tuple[Condition, ...] = ()
+
+
+@dataclass(frozen=True)
+class NarrativeSpec:
+    """Narrative definition for one analysis type."""
+    analysis_type: str
+    metrics: Dict[str, Tuple[str, ...]]
+    summary: Tuple[Sentence, ...]
+    paragraphs: Tuple[Tuple[Sentence, ...], ...]
+    statistics_heading: str
+    statistics: Tuple[Sentence, ...]
+    fallback: str
+    derived: Dict[str, Callable[[Dict[str, Any]], Any]] = field(default_factory=dict)
+    bands: Dict[str, Tuple[Band, ...]] = field(default_factory=dict)
+    # Metrics that are labels (e.g. a class name) rather than numbers
+    text_metrics: Tuple[str, ...] = ()
+
+
+class CompiledSentence:
+    """Sentence template with its placeholders parsed and conditions bound."""
+
+    __slots__ = ("segments", "fields", "conditions")
+
+    def __init__(self, sentence: Sentence):
+        self.segments: List[Tuple[str, Optional[str], str]] = []
+        for literal, field_name, format_spec, _conversion in string.Formatter().parse(sentence.template):
+            self.segments.append((literal, field_name, format_spec or ""))
+        self.fields = {name for _, name, _ in self.segments if name}
+        self.conditions = [(metric, _OPERATORS[op], value) for metric, op, value in sentence.when]
+        self.fields.update(metric for metric, _, _ in self.conditions)
+
+    def render(self, values: Dict[str, Any]) -> Optional[str]:
+        """Render the sentence, or None if a metric is missing or a condition fails."""
+        for name in self.fields:
+            if values.get(name) is None:
+                return None
+        for metric, compare, value in self.conditions:
+            if not compare(values[metric], value):
+                return None
+        parts = []
+        for literal, name, format_spec in self.segments:
+            parts.append(literal)
+            if name:
+                parts.append(format(values[name], format_spec))
+        return "".join(parts)
+
+
+class CompiledSpec:
+    """NarrativeSpec compiled for rendering."""
+
+    def __init__(self, spec: NarrativeSpec):
+        self.spec = spec
+        self.summary = [CompiledSentence(s) for s in spec.summary]
+        self.paragraphs = [[CompiledSentence(s) for s in paragraph] for paragraph in spec.paragraphs]
+        self.statistics = [CompiledSentence(s) for s in spec.statistics]
+        self.bands: Dict[str, Tuple[List[float], List[Band]]] = {}
+        for metric, bands in spec.bands.items():
+            ordered = sorted(bands, key=lambda band: band.above)
+            # Values at or below the lowest threshold fall into the first band
+            self.bands[metric] = ([band.above for band in ordered[1:]], ordered)
+
+    def values(self, analysis_data: Dict[str, Any], location: str) -> Dict[str, Any]:
+        """Extract metrics, derived metrics and band labels from analysis_data."""
+        values: Dict[str, Any] = {"location": location}
+        for metric, keys in self.spec.metrics.items():
+            raw = next((analysis_data[key] for key in keys if analysis_data.get(key) is not None), None)
+            if metric in self.spec.text_metrics:
+                values[metric] = raw
+            else:
+                values[metric] = _as_number(raw)
+
+        for metric, derive in self.spec.derived.items():
+            if values.get(metric) is not None:
+                continue
+            try:
+                values[metric] = derive(values)
+            except (TypeError, ValueError, KeyError, ZeroDivisionError):
+                values[metric] = None
+
+        for metric, (thresholds, bands) in self.bands.items():
+            value = values.get(metric)
+            if value is None:
+                continue
+            band = bands[bisect.bisect_left(thresholds, value)]
+            values[f"{metric}_band"] = band.label
+            values[f"{metric}_band_text"] = band.description
+        return values
+
+
+def _as_number(value: Any) -> Optional[float]:
+    """Coerce a metric to float, or None if it is missing or not numeric."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _render_sentences(sentences: List[CompiledSentence], values: Dict[str, Any]) -> str:
+    """Join the sentences that render with the given values."""
+    return " ".join(text for text in (s.render(values) for s in sentences) if text)
+
+
+def _top_classes(values: Dict[str, Any], limit: int = 3) -> Optional[str]:
+    """Largest land cover classes as "Class (12.3%)" list."""
+    classes = values.get("classes")
+    if not isinstance(classes, dict) or not classes:
+        return None
+    ranked = sorted(classes.items(), key=lambda item: float(item[1]), reverse=True)[:limit]
+    return ", ".join(f"{name} ({float(share):.1f}%)" for name, share in ranked)
+
+
+NDVI_SPEC = NarrativeSpec(
+    analysis_type="ndvi",
+    metrics={"mean": ("mean_ndvi", "mean"), "min": ("min_ndvi", "min"), "max": ("max_ndvi", "max")},
+    derived={"range": lambda v: v["max"] - v["min"]},
+    bands={"mean": (
+        Band(float("-inf"), "minimal vegetation", "predominantly non-vegetated areas"),
+        Band(0.0, "poor vegetation health", "very sparse vegetation"),
+        Band(0.2, "moderate vegetation health", "sparse to moderate vegetation"),
+        Band(0.4, "good vegetation health", "moderate to dense vegetation"),
+        Band(0.6, "excellent vegetation health", "dense, healthy vegetation cover"),
+    )},
+    summary=(
+        Sentence("Vegetation analysis of {location} shows {mean_band} with an average NDVI of {mean:.3f}."),
+    ),
+    paragraphs=(
+        (
+            Sentence("The NDVI analysis of {location} reveals {mean_band} with an average NDVI value of {mean:.3f}."),
+            Sentence("This indicates {mean_band_text} across the analyzed area."),
+        ),
+        (
+            Sentence("NDVI values vary across the area from {min:.3f} to {max:.3f} (range: {range:.3f})."),
+            Sentence("The negative minimum values suggest the presence of water bodies, urban infrastructure, or bare soil.",
+                     when=(("min", "<", -0.1),)),
+            Sentence("The high maximum values indicate areas of very healthy, dense vegetation such as parks, forests, or well-maintained green spaces.",
+                     when=(("max", ">", 0.7),)),
+            Sentence("The maximum values show good vegetation coverage in the healthiest areas.",
+                     when=(("max", ">", 0.4), ("max", "<=", 0.7))),
+        ),
+        (
+            Sentence("A mean NDVI this low is typical of built-up areas with roads and scattered green spaces, suggesting room for greening initiatives.",
+                     when=(("mean", "<", 0.3),)),
+            Sentence("This vegetation profile indicates a good balance of green cover for {location}.",
+                     when=(("mean", ">=", 0.3),)),
+        ),
+    ),
+    statistics_heading="📊 **Statistical Summary:**",
+    statistics=(
+        Sentence("• Mean NDVI: {mean:.3f}"),
+        Sentence("• Min NDVI: {min:.3f}"),
+        Sentence("• Max NDVI: {max:.3f}"),
+    ),
+    fallback="Vegetation health analysis was completed for {location}. Review the detailed results for NDVI values.",
+)
+
+LST_SPEC = NarrativeSpec(
+    analysis_type="lst",
+    metrics={
+        "mean": ("mean_lst", "LST_mean"),
+        "min": ("min_lst", "LST_min"),
+        "max": ("max_lst", "LST_max"),
+        "uhi": ("uhi_intensity",),
+    },
+    bands={
+        "mean": (
+            Band(float("-inf"), "cool"),
+            Band(20.0, "moderate"),
+            Band(30.0, "warm"),
+            Band(40.0, "hot"),
+        ),
+        "uhi": (
+            Band(float("-inf"), "minimal", "little difference between built-up and surrounding areas"),
+            Band(2.0, "moderate", "built-up areas noticeably warmer than their surroundings"),
+            Band(5.0, "significant", "built-up areas much warmer than their surroundings"),
+        ),
+    },
+    summary=(
+        Sentence("{location} has a {mean_band} surface temperature averaging {mean:.1f}°C."),
+        Sentence("A {uhi_band} urban heat island effect of {uhi:.1f}°C was detected."),
+    ),
+    paragraphs=(
+        (
+            Sentence("The land surface temperature analysis of {location} shows a {mean_band} surface averaging {mean:.1f}°C."),
+            Sentence("Surface temperatures range from {min:.1f}°C to {max:.1f}°C."),
+        ),
+        (
+            Sentence("The urban heat island intensity is {uhi:.1f}°C, a {uhi_band} effect with {uhi_band_text}."),
+            Sentence("Shade trees, green roofs and reflective surfaces are the usual levers to reduce it.",
+                     when=(("uhi", ">", 2.0),)),
+        ),
+    ),
+    statistics_heading="🌡️ **Temperature Summary:**",
+    statistics=(
+        Sentence("• Mean LST: {mean:.1f}°C"),
+        Sentence("• Min LST: {min:.1f}°C"),
+        Sentence("• Max LST: {max:.1f}°C"),
+        Sentence("• UHI Intensity: {uhi:.1f}°C"),
+    ),
+    fallback="Surface temperature analysis was completed for {location}. Check detailed results for temperature metrics.",
+)
+
+WATER_SPEC = NarrativeSpec(
+    analysis_type="water",
+    metrics={"water": ("water_percentage",), "land": ("non_water_percentage",)},
+    derived={"land": lambda v: 100.0 - v["water"]},
+    bands={"water": (
+        Band(float("-inf"), "minimal water coverage", "predominantly dry land with very few water features"),
+        Band(1.0, "limited water coverage", "sparse water features with mostly dry land"),
+        Band(5.0, "moderate water coverage", "scattered water bodies like ponds, streams, or small lakes"),
+        Band(20.0, "significant water presence", "substantial water bodies with mixed land cover"),
+        Band(50.0, "extensive water coverage", "predominantly water bodies such as lakes, rivers, or wetlands"),
+    )},
+    summary=(
+        Sentence("Water covers {water:.1f}% of {location}, showing {water_band}."),
+    ),
+    paragraphs=(
+        (
+            Sentence("The water analysis of {location} reveals {water_band} with {water:.2f}% of the area covered by water bodies."),
+            Sentence("This indicates {water_band_text} across the analyzed region."),
+        ),
+        (
+            Sentence("The remaining {land:.2f}% consists of land areas including urban development, vegetation, and bare soil."),
+            Sentence("The low water coverage suggests {location} is primarily a terrestrial environment with limited surface water resources.",
+                     when=(("water", "<", 1.0),)),
+            Sentence("The substantial water coverage indicates {location} has significant aquatic ecosystems and water resources.",
+                     when=(("water", ">", 10.0),)),
+        ),
+    ),
+    statistics_heading="💧 **Water Coverage Summary:**",
+    statistics=(
+        Sentence("• Water Coverage: {water:.2f}%"),
+        Sentence("• Land Coverage: {land:.2f}%"),
+    ),
+    fallback="Water coverage analysis was performed for {location}. Check the detailed results for specific percentages.",
+)
+
+LULC_SPEC = NarrativeSpec(
+    analysis_type="lulc",
+    metrics={"dominant": ("dominant_class",), "classes": ("class_percentages",)},
+    text_metrics=("dominant", "classes"),
+    derived={
+        "dominant_share": lambda v: float(v["classes"][v["dominant"]]),
+        "class_count": lambda v: float(len(v["classes"])),
+        "top_classes": _top_classes,
+    },
+    bands={"dominant_share": (
+        Band(float("-inf"), "a mixed landscape", "no single land use covering half of the area"),
+        Band(50.0, "a landscape dominated by one class", "more than half of the area under one land use"),
+        Band(80.0, "a nearly uniform landscape", "almost the entire area under one land use"),
+    )},
+    summary=(
+        Sentence("Land cover analysis reveals {dominant} as the dominant land use type in {location}."),
+        Sentence("It covers {dominant_share:.1f}% of the area."),
+    ),
+    paragraphs=(
+        (
+            Sentence("The land use / land cover classification of {location} identifies {dominant} as the dominant class."),
+            Sentence("At {dominant_share:.1f}% of the area, this describes {dominant_share_band}, with {dominant_share_band_text}."),
+        ),
+        (
+            Sentence("The largest classes are {top_classes}."),
+        ),
+    ),
+    statistics_heading="🗺️ **Land Cover Summary:**",
+    statistics=(
+        Sentence("• Dominant Class: {dominant}"),
+        Sentence("• Dominant Share: {dominant_share:.1f}%"),
+        Sentence("• Classes Present: {class_count:.0f}"),
+        Sentence("• Largest Classes: {top_classes}"),
+    ),
+    fallback="Land cover classification analysis was completed for {location}. Check the detailed results for land use distribution.",
+)
+
+NARRATIVE_SPECS: Dict[str, NarrativeSpec] = {
+    spec.analysis_type: spec for spec in (NDVI_SPEC, LST_SPEC, WATER_SPEC, LULC_SPEC)
+}
+
+
+class NarrativeEngine:
+    """Render analysis narratives from compiled templates."""
+
+    def __init__(self, specs: Optional[Dict[str, NarrativeSpec]] = None):
+        """Initialize the engine and compile the templates.
+
+        Args:
+            specs: Narrative specs by analysis type (default NARRATIVE_SPECS)
+        """
+        self._compiled = {
+            analysis_type: CompiledSpec(spec)
+            for analysis_type, spec in (specs or NARRATIVE_SPECS).items()
+        }
+        self._renders = 0
+
+    def supports(self, analysis_type: Optional[str]) -> bool:
+        """Whether a narrative template exists for the analysis type."""
+        return (analysis_type or "").lower() in self._compiled
+
+    def render(
+        self,
+        analysis_type: Optional[str],
+        analysis_data: Optional[Dict[str, Any]],
+        location: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Render the narrative for an analysis result.
+
+        Args:
+            analysis_type: Analysis type (ndvi, lst, water, lulc)
+            analysis_data: Normalized analysis_data from the service dispatcher
+            location: Location name used in the text (default "the region")
+
+        Returns:
+            Dictionary with summary, narrative, statistics (list of lines) and
+            text (narrative followed by the statistics block)
+        """
+        self._renders += 1
+        analysis_type = (analysis_type or "").lower()
+        data = analysis_data or {}
+        location = location or DEFAULT_LOCATION
+
+        if data.get("error"):
+            message = (
+                f"Sorry, I encountered an issue while processing your request: {data['error']}. "
+                "Please try again later."
+            )
+            return {"analysis_type": analysis_type, "summary": message, "narrative": message, "statistics": [], "text": message}
+
+        compiled = self._compiled.get(analysis_type)
+        if compiled is None:
+            message = f"{analysis_type.title() if analysis_type else 'Geospatial'} analysis was completed successfully."
+            return {"analysis_type": analysis_type, "summary": message, "narrative": message, "statistics": [], "text": message}
+
+        values = compiled.values(data, location)
+        summary = _render_sentences(compiled.summary, values)
+        paragraphs = [text for text in (_render_sentences(p, values) for p in compiled.paragraphs) if text]
+        statistics = [text for text in (s.render(values) for s in compiled.statistics) if text]
+
+        if not summary:
+            fallback = compiled.spec.fallback.format(location=location)
+            return {"analysis_type": analysis_type, "summary": fallback, "narrative": fallback, "statistics": [], "text": fallback}
+
+        narrative = "\n\n".join(paragraphs) or summary
+        text = narrative
+        if statistics:
+            text += f"\n\n{compiled.spec.statistics_heading}\n" + "\n".join(statistics)
+        return {
+            "analysis_type": analysis_type,
+            "summary": summary,
+            "narrative": narrative,
+            "statistics": statistics,
+            "text": text,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Return engine statistics."""
+        return {
+            "analysis_types": sorted(self._compiled),
+            "renders": self._renders,
+        }
+
+
+def location_name(result: Dict[str, Any]) -> Optional[str]:
+    """Short location name from an agent result's ROI, if it carries one.
+
+    Args:
+        result: Agent result dictionary
+
+    Returns:
+        First component of the ROI display name, or None
+    """
+    roi = result.get("roi") or {}
+    if not isinstance(roi, dict):
+        return None
+    name = roi.get("display_name") or (roi.get("properties") or {}).get("display_name")
+    return name.split(",")[0].strip() if isinstance(name, str) and name else None
+
+
+_engine: Optional[NarrativeEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_narrative_engine() -> NarrativeEngine:
+    """Get the process-wide narrative engine (templates compiled once).
+
+    Returns:
+        Shared NarrativeEngine
+    """
+    global _engine
+
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = NarrativeEngine()
+    return _engine
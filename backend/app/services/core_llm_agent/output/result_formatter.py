@@ -6,14 +6,16 @@ ensuring a unified output format regardless of the underlying service used.
 """
 
 import time
-import os
-import json
 import logging
 from typing import Dict, Any, List, Optional
 
 try:
     from ..models.intent import IntentResult
     from ..models.location import LocationParseResult
+    from ..http_client import run_sync
+    from .narrative_templates import get_narrative_engine
+    from .narrative_enrichment import get_narrative_enrichment
+    from ....utils.geometry_store import get_geometry_store
 except ImportError:
     import sys
     from pathlib import Path
@@ -21,6 +23,10 @@ except ImportError:
     
     from app.services.core_llm_agent.models.intent import IntentResult
     from app.services.core_llm_agent.models.location import LocationParseResult
+    from app.services.core_llm_agent.http_client import run_sync
+    from app.services.core_llm_agent.output.narrative_templates import get_narrative_engine
+    from app.services.core_llm_agent.output.narrative_enrichment import get_narrative_enrichment
+    from app.utils.geometry_store import get_geometry_store
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +45,30 @@ class ResultFormatter:
         location_result: LocationParseResult,
         service_response: Dict[str, Any],
         total_processing_time: float
+    ) -> Dict[str, Any]:
+        """Format the final result for the agent contract (synchronous wrapper).
+        
+        Args:
+            query: Original user query
+            intent_result: Intent classification result
+            location_result: Location parsing result
+            service_response: Response from the dispatched service
+            total_processing_time: Total processing time for the request
+            
+        Returns:
+            Final formatted result matching the agent contract
+        """
+        return run_sync(self.format_final_result_async(
+            query, intent_result, location_result, service_response, total_processing_time
+        ))
+    
+    async def format_final_result_async(
+        self,
+        query: str,
+        intent_result: IntentResult,
+        location_result: LocationParseResult,
+        service_response: Dict[str, Any],
+        total_processing_time: float
     ) -> Dict[str, Any]:
         """Format the final result for the agent contract.
         
@@ -57,19 +87,9 @@ class ResultFormatter:
             analysis = service_response.get("analysis", "Analysis completed")
             roi = service_response.get("roi")
             
-            # Optionally post-process analysis via response LLM using structured data
-            llm_analysis = self._maybe_generate_response_llm(
-                query=query,
-                intent_result=intent_result,
-                location_result=location_result,
-                service_response=service_response,
-                total_processing_time=total_processing_time,
-                fallback_text=analysis,
-            )
-
             # Enhance analysis with metadata if needed
             enhanced_analysis = self._enhance_analysis(
-                llm_analysis, query, intent_result, location_result, total_processing_time
+                analysis, query, intent_result, location_result, total_processing_time
             )
             
             # Format ROI if needed
@@ -82,7 +102,7 @@ class ResultFormatter:
             
             # Create final result
             # Build natural-language summary from normalized analysis_data if present
-            nl_summary = self._build_natural_language_summary(intent_result, service_response)
+            nl_summary = self._build_natural_language_summary(intent_result, service_response, location_result)
             logger.info(f"Generated natural language summary: {nl_summary[:100]}...")  # Log first 100 chars
 
             result = {
@@ -115,6 +135,11 @@ class ResultFormatter:
 
             if "service_result" in service_response:
                 result["service_result"] = service_response["service_result"]
+
+            # Optional LLM narrative, computed in the background (never awaited here)
+            enrichment_id = self._submit_narrative_enrichment(query, intent_result, location_result, service_response)
+            if enrichment_id:
+                result["metadata"]["narrative_enrichment"] = {"enrichment_id": enrichment_id, "status": "pending"}
             
             service_type_str = intent_result.service_type.value if hasattr(intent_result.service_type, 'value') else str(intent_result.service_type)
             logger.info(f"Formatted final result for {service_type_str} service")
@@ -124,175 +149,62 @@ class ResultFormatter:
             logger.error(f"Error formatting final result: {e}")
             return self._error_result(query, str(e), total_processing_time)
 
-    def _maybe_generate_response_llm(
+    def _submit_narrative_enrichment(
         self,
         query: str,
         intent_result: IntentResult,
         location_result: LocationParseResult,
         service_response: Dict[str, Any],
-        total_processing_time: float,
-        fallback_text: str,
-    ) -> str:
-        """Optionally use a response LLM to produce a final narrative from structured data.
+    ) -> Optional[str]:
+        """Queue an LLM narrative for this result in the background.
 
-        Controlled via env flag ENABLE_RESPONSE_LLM. Falls back to provided text on error.
+        Controlled via env flag ENABLE_RESPONSE_LLM. The response does not wait
+        for it; clients fetch the narrative later by its enrichment id.
+
+        Returns:
+            Enrichment id, or None if enrichment is disabled or not applicable
         """
         try:
-            if os.environ.get("ENABLE_RESPONSE_LLM", "false").lower() not in ("1", "true", "yes"):  # disabled by default
-                return fallback_text
-
-            # Import OpenRouter config lazily
-            try:
-                from app.services.core_llm_agent.config import get_openrouter_config
-            except Exception as e:  # pragma: no cover
-                logger.warning(f"Response LLM disabled: cannot load config ({e})")
-                return fallback_text
-
-            cfg = get_openrouter_config()
-            api_key = cfg.get("api_key", "").strip()
-            model = cfg.get("response_model")
-            if not api_key or not model:
-                logger.warning("Response LLM disabled: missing API key or response model")
-                return fallback_text
-
-            base_url = "https://openrouter.ai/api/v1/chat/completions"
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": cfg.get("referrer") or "http://localhost",
-                "X-Title": cfg.get("app_title") or "GeoLLM Agent",
-            }
+            enrichment = get_narrative_enrichment()
+            if enrichment is None or not service_response.get("analysis_data"):
+                return None
 
             # Build compact structured context
+            service_result = service_response.get("service_result") or {}
             context: Dict[str, Any] = {
                 "query": query,
                 "analysis_type": getattr(intent_result, 'analysis_type', None),
                 "locations": [getattr(e, 'matched_name', None) for e in location_result.entities] if getattr(location_result, 'entities', None) else [],
                 "analysis_data": service_response.get("analysis_data", {}),
                 "service_result_keys": list(service_response.keys()),
-                "map_stats": service_response.get("service_result", {}).get("mapStats", {}),
-                "tile_url": service_response.get("service_result", {}).get("urlFormat") or service_response.get("analysis_data", {}).get("tile_url"),
-                "datasets_used": service_response.get("service_result", {}).get("datasets_used", []),
+                "map_stats": service_result.get("mapStats", {}),
+                "tile_url": service_result.get("urlFormat") or service_response.get("analysis_data", {}).get("tile_url"),
+                "datasets_used": service_result.get("datasets_used", []),
             }
-
-            system_prompt = (
-                "You are a geospatial analysis writer. Given structured analysis data and map stats, write a concise, factual narrative tailored to the user's query. "
-                "Do not invent numbers. Use only provided metrics. Include key metrics (means, percentages, dominant classes, UHI) and what they imply. If a tile_url is present, note that a map layer is available. Keep it under 10 sentences."
-            )
-
-            user_content = json.dumps(context, ensure_ascii=False)
-
-            payload = {
-                "model": model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Context JSON:\n{user_content}\n\nWrite the final analysis."},
-                ],
-                "temperature": 0.2,
-            }
-
-            import requests
-            resp = requests.post(base_url, headers=headers, data=json.dumps(payload), timeout=25)
-            resp.raise_for_status()
-            data = resp.json()
-            content = (
-                data.get("choices", [{}])[0]
-                .get("message", {})
-                .get("content", "")
-                .strip()
-            )
-            if content:
-                return content
-            return fallback_text
+            return enrichment.submit(context)
         except Exception as e:  # pragma: no cover
-            logger.warning(f"Response LLM failed; using fallback text: {e}")
-            return fallback_text
+            logger.warning(f"Narrative enrichment not queued: {e}")
+            return None
 
-    def _build_natural_language_summary(self, intent_result: IntentResult, service_response: Dict[str, Any]) -> str:
-        """Create a concise natural language summary based on analysis_data, handling errors gracefully."""
+    def _build_natural_language_summary(
+        self,
+        intent_result: IntentResult,
+        service_response: Dict[str, Any],
+        location_result: Optional[LocationParseResult] = None
+    ) -> str:
+        """Create a concise natural language summary from the narrative templates, handling errors gracefully."""
         try:
             analysis_type = getattr(intent_result, 'analysis_type', None)
             if hasattr(analysis_type, 'value'):
                 analysis_type = analysis_type.value
-            analysis_type = (analysis_type or '').lower()
-
-            data = service_response.get("analysis_data", {})
 
-            # Check if there's an error in the data
-            if data.get("error"):
-                error_msg = data.get("error", "Unknown error")
-                return f"Sorry, I encountered an issue while processing your request: {error_msg}. Please try again later."
+            location = None
+            if location_result is not None and location_result.primary_location:
+                location = location_result.primary_location.display_name.split(",")[0].strip() or None
 
-            # Generate meaningful summaries based on analysis type
-            if analysis_type == "water":
-                wp = data.get("water_percentage")
-                if wp is not None:
-                    try:
-                        wp_float = float(wp)
-                        if wp_float > 50:
-                            return f"The area shows extensive water coverage at {wp_float:.1f}%, indicating significant water bodies, lakes, or coastal regions."
-                        elif wp_float > 20:
-                            return f"Moderate water coverage of {wp_float:.1f}% was found, suggesting mixed land-water usage."
-                        else:
-                            return f"Low water coverage at {wp_float:.1f}% indicates mostly dry land with limited water features."
-                    except (ValueError, TypeError):
-                        return f"Water coverage analysis shows {wp}% in the selected area."
-                else:
-                    return "Water coverage analysis was performed. Check the detailed results for specific percentages."
-
-            elif analysis_type == "ndvi":
-                mean_ndvi = data.get("mean_ndvi")
-                if mean_ndvi is not None:
-                    try:
-                        ndvi_float = float(mean_ndvi)
-                        if ndvi_float > 0.6:
-                            health = "excellent vegetation health"
-                        elif ndvi_float > 0.4:
-                            health = "good vegetation health"
-                        elif ndvi_float > 0.2:
-                            health = "moderate vegetation health"
-                        else:
-                            health = "sparse or stressed vegetation"
-                        return f"Vegetation analysis shows {health} with an average NDVI of {ndvi_float:.3f}."
-                    except (ValueError, TypeError):
-                        return f"Vegetation health analysis completed with average NDVI of {mean_ndvi}."
-                else:
-                    return "Vegetation health analysis was completed. Review the detailed results for NDVI values."
-
-            elif analysis_type == "lulc":
-                dom = data.get("dominant_class")
-                if dom:
-                    return f"Land cover analysis reveals {dom} as the dominant land use type in the selected area."
-                else:
-                    return "Land cover classification analysis was completed. Check the detailed results for land use distribution."
-
-            elif analysis_type == "lst":
-                mean_lst = data.get("mean_lst")
-                uhi = data.get("uhi_intensity")
-                if mean_lst is not None:
-                    try:
-                        lst_float = float(mean_lst)
-                        temp_desc = f"hot" if lst_float > 40 else f"warm" if lst_float > 30 else f"moderate" if lst_float > 20 else "cool"
-                        summary = f"The area has a {temp_desc} surface temperature averaging {lst_float:.1f}°C."
-                        if uhi is not None:
-                            try:
-                                uhi_float = float(uhi)
-                                if uhi_float > 5:
-                                    summary += f" A significant urban heat island effect of {uhi_float:.1f}°C was detected."
-                                elif uhi_float > 2:
-                                    summary += f" Moderate urban heat island effect of {uhi_float:.1f}°C observed."
-                                else:
-                                    summary += " Minimal urban heat island effect detected."
-                            except (ValueError, TypeError):
-                                summary += f" Urban heat island intensity measured at {uhi}°C."
-                        return summary
-                    except (ValueError, TypeError):
-                        return f"Surface temperature analysis shows average LST of {mean_lst}°C."
-                else:
-                    return "Surface temperature analysis was completed. Check detailed results for temperature metrics."
-
-            # Default summary for unknown analysis types
-            return f"{analysis_type.title() if analysis_type else 'Geospatial'} analysis was completed successfully."
+            return get_narrative_engine().render(
+                analysis_type, service_response.get("analysis_data", {}), location
+            )["summary"]
 
         except Exception as e:
             logger.warning(f"Error building natural language summary: {e}")
@@ -377,7 +289,7 @@ class ResultFormatter:
                     "source": location_result.roi_source,
                     "center": location_result.primary_location.center
                 },
-                "geometry": location_result.roi_geometry
+                "geometry": get_geometry_store().lod(location_result.roi_geometry, "display")
             }
         
         return None
@@ -499,6 +411,30 @@ class ResultFormatter:
         location_result: LocationParseResult,
         service_response: Dict[str, Any],
         total_processing_time: float
+    ) -> Dict[str, Any]:
+        """Format detailed debug result with all intermediate data (synchronous wrapper).
+        
+        Args:
+            query: Original user query
+            intent_result: Intent classification result
+            location_result: Location parsing result
+            service_response: Response from the dispatched service
+            total_processing_time: Total processing time
+            
+        Returns:
+            Detailed debug result
+        """
+        return run_sync(self.format_debug_result_async(
+            query, intent_result, location_result, service_response, total_processing_time
+        ))
+    
+    async def format_debug_result_async(
+        self,
+        query: str,
+        intent_result: IntentResult,
+        location_result: LocationParseResult,
+        service_response: Dict[str, Any],
+        total_processing_time: float
     ) -> Dict[str, Any]:
         """Format detailed debug result with all intermediate data.
         
@@ -512,7 +448,7 @@ class ResultFormatter:
         Returns:
             Detailed debug result
         """
-        regular_result = self.format_final_result(
+        regular_result = await self.format_final_result_async(
             query, intent_result, location_result, service_response, total_processing_time
         )
         
@@ -5,10 +5,12 @@ Components:
 - LocationParser: Orchestrates location extraction and resolution
 - LocationNER: LLM-based named entity recognition for locations
 - NominatimClient: OSM Nominatim API integration for geocoding
+- GazetteerGeocoder: Offline gazetteer + write-back geometry store consulted before Nominatim
 """
 
 from .location_parser import LocationParser
 from .location_ner import LocationNER
 from .nominatim_client import NominatimClient
+from .gazetteer_geocoder import GazetteerGeocoder, get_gazetteer_geocoder
 
-__all__ = ["LocationParser", "LocationNER", "NominatimClient"]
+__all__ = ["LocationParser", "LocationNER", "NominatimClient", "GazetteerGeocoder", "get_gazetteer_geocoder"]
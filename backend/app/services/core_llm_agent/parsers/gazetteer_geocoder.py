@@ -0,0 +1,451 @@
+"""
+Offline gazetteer geocoder.
+
+Indexes the bundled data/indian_cities.json gazetteer (states and their
+cities) together with a local store of geocoded places: centroid, bounding
+box and a simplified boundary polygon in Nominatim's result format. Both
+Nominatim clients (core agent and search service) consult this store first
+and only call Nominatim on a miss; Nominatim results for places that resolve
+to a gazetteer entry are written back so the next lookup is answered
+in-process. Free-form or misspelled names are never stored.
+
+Records are keyed by (name, type, state), so duplicate city names in
+different states (Aurangabad, Maharashtra / Aurangabad, Bihar) and a city
+sharing a state's name stay separate. A name that matches more than one
+gazetteer entry of the requested type is ambiguous and is not answered
+offline.
+
+The store has two layers:
+- a precomputed table (data/gazetteer_geometry.json) that can be shipped with
+  the repo, built with `python -m app.services.core_llm_agent.parsers.gazetteer_geocoder --build`
+- a SQLite overlay (data/gazetteer_geocoder.sqlite3) holding written-back results
+
+Configuration (environment):
+- GAZETTEER_GEOCODER_ENABLED: "true" (default) / "false"
+- GAZETTEER_TABLE_PATH: precomputed JSON table path
+- GAZETTEER_STORE_PATH: SQLite write-back store path
+- GAZETTEER_SIMPLIFY_TOLERANCE: maximum polygon simplification tolerance in degrees (default 0.001);
+  the applied tolerance is 0.1% of the polygon's extent, never below 0.0001
+"""
+
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+try:
+    from ..geocode_cache import normalize_place_name
+    from ....utils.geojson_utils import simplify_geometry, count_coordinates, geometry_extent
+except (ImportError, ValueError):
+    import sys
+    sys.path.append(str(Path(__file__).parent.parent.parent.parent.parent))
+
+    from app.services.core_llm_agent.geocode_cache import normalize_place_name
+    from app.utils.geojson_utils import simplify_geometry, count_coordinates, geometry_extent
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent.parent.parent.parent.parent / "data"
+GAZETTEER_PATH = DATA_DIR / "indian_cities.json"
+DEFAULT_TABLE_PATH = DATA_DIR / "gazetteer_geometry.json"
+DEFAULT_STORE_PATH = DATA_DIR / "gazetteer_geocoder.sqlite3"
+
+# Nominatim result fields kept in the store
+RESULT_FIELDS = (
+    "lat", "lon", "boundingbox", "geojson", "display_name", "place_id",
+    "importance", "address", "class", "type", "osm_type", "osm_id"
+)
+
+POLYGON_TYPES = ("Polygon", "MultiPolygon")
+
+# Gazetteer entry types; other entity types (country, district, ...) are not in the gazetteer
+PLACE_TYPES = ("city", "state")
+
+# Simplification tolerance as a fraction of the polygon's extent, and its floor (degrees)
+RELATIVE_SIMPLIFY_TOLERANCE = 0.001
+MIN_SIMPLIFY_TOLERANCE = 0.0001
+
+
+def is_polygon_result(result: Optional[Dict[str, Any]]) -> bool:
+    """Check whether a Nominatim-style result carries a boundary polygon."""
+    geometry = (result or {}).get("geojson") or {}
+    return geometry.get("type") in POLYGON_TYPES
+
+
+def record_key(name: str, place_type: Optional[str], state: Optional[str]) -> str:
+    """Store key of a gazetteer place: normalized name, type and state."""
+    return "|".join((normalize_place_name(name), place_type or "", normalize_place_name(state) if state else ""))
+
+
+class GazetteerGeocoder:
+    """In-process geocoder over the bundled gazetteer and a write-back geometry store."""
+
+    def __init__(
+        self,
+        gazetteer_path: Optional[str] = None,
+        table_path: Optional[str] = None,
+        db_path: Optional[str] = None,
+        simplify_tolerance: float = 0.001
+    ):
+        """Initialize the geocoder.
+
+        Args:
+            gazetteer_path: indian_cities.json path (uses bundled file if None)
+            table_path: Precomputed geometry table (JSON); skipped if missing
+            db_path: SQLite write-back store (None keeps written-back results in memory only)
+            simplify_tolerance: Maximum Douglas-Peucker tolerance (degrees) applied to stored polygons
+        """
+        self.gazetteer_path = Path(gazetteer_path) if gazetteer_path else GAZETTEER_PATH
+        self.table_path = Path(table_path) if table_path else None
+        self.db_path = str(db_path) if db_path else None
+        self.simplify_tolerance = simplify_tolerance
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        # normalized name -> gazetteer entries ({"name", "type", "state"})
+        self.places: Dict[str, List[Dict[str, Optional[str]]]] = {}
+        # record_key(name, type, state) -> stored Nominatim-style result (plus "_meta")
+        self._records: Dict[str, Dict[str, Any]] = {}
+
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "table_records": 0, "stored_records": 0}
+
+        self._load_gazetteer()
+        self._load_table()
+        self._open_store()
+
+    def _load_gazetteer(self) -> None:
+        """Index state and city names from indian_cities.json."""
+        try:
+            with open(self.gazetteer_path, "r", encoding="utf-8") as f:
+                gazetteer = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️ Gazetteer unavailable ({e}), geocoder will rely on stored results only")
+            return
+
+        for raw_state, data in gazetteer.items():
+            state = raw_state.strip()
+            # Keys with leading whitespace are district groupings, not states
+            is_state = raw_state == state and state.lower() != "india"
+            if is_state:
+                self._index_place(state, "state", None)
+            elif state and state.lower() != "india":
+                self._index_place(state, "city", None)
+
+            for city in data.get("locations", []):
+                if city and city.strip():
+                    self._index_place(city.strip(), "city", state if is_state else None)
+
+        logger.info(f"📍 Gazetteer indexed {len(self.places)} place names")
+
+    def _index_place(self, name: str, place_type: str, state: Optional[str]) -> None:
+        """Add a gazetteer entry to the name index."""
+        entries = self.places.setdefault(normalize_place_name(name), [])
+        entry = {"name": name, "type": place_type, "state": state}
+        if entry not in entries:
+            entries.append(entry)
+
+    def _load_table(self) -> None:
+        """Load the precomputed geometry table, if present."""
+        if not self.table_path or not self.table_path.exists():
+            return
+        try:
+            with open(self.table_path, "r", encoding="utf-8") as f:
+                table = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️ Gazetteer geometry table unreadable ({e})")
+            return
+
+        for key, record in table.get("places", {}).items():
+            if isinstance(record, dict) and "lat" in record and "lon" in record:
+                self._add_record(key, record)
+        self._stats["table_records"] = len(self._records)
+        logger.info(f"📍 Loaded {len(self._records)} precomputed place geometries")
+
+    def _open_store(self) -> None:
+        """Open the SQLite write-back store and merge its records."""
+        if not self.db_path:
+            return
+        try:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS places ("
+                "key TEXT PRIMARY KEY, name TEXT, type TEXT, result TEXT, source TEXT, updated_at REAL)"
+            )
+            self._conn.commit()
+
+            rows = self._conn.execute("SELECT key, result FROM places").fetchall()
+            for key, result in rows:
+                try:
+                    self._add_record(key, json.loads(result))
+                except json.JSONDecodeError:
+                    continue
+            self._stats["stored_records"] = len(rows)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Gazetteer store unavailable ({e}), written-back results kept in memory only")
+            self._conn = None
+
+    def _add_record(self, key: str, record: Dict[str, Any]) -> None:
+        """Index a loaded record, re-keying records stored under a bare name."""
+        if "|" not in key:
+            meta = record.get("_meta") or {}
+            entry = self.known_place(meta.get("name") or key, meta.get("type"), meta.get("state"))
+            if entry is None:
+                return
+            key = record_key(entry["name"], entry["type"], entry["state"])
+        self._records[key] = record
+
+    def known_place(
+        self,
+        name: str,
+        location_type: Optional[str] = None,
+        state: Optional[str] = None
+    ) -> Optional[Dict[str, Optional[str]]]:
+        """Resolve a name to a single gazetteer entry.
+
+        Args:
+            name: Place name
+            location_type: Required type ("city" or "state"); None accepts either
+            state: State used to tell apart cities sharing a name
+
+        Returns:
+            Gazetteer entry {"name", "type", "state"}, or None if the name is
+            unknown, has no entry of the requested type, or is ambiguous
+        """
+        entries = self.places.get(normalize_place_name(name)) or []
+        if location_type:
+            entries = [entry for entry in entries if entry["type"] == location_type]
+        if len(entries) > 1 and state:
+            entries = [
+                entry for entry in entries
+                if entry["state"] and normalize_place_name(entry["state"]) == normalize_place_name(state)
+            ]
+        return entries[0] if len(entries) == 1 else None
+
+    def lookup(self, name: str, location_type: Optional[str] = None, require_polygon: bool = False) -> Optional[Dict[str, Any]]:
+        """Answer a geocoding lookup from the local store.
+
+        Args:
+            name: Place name
+            location_type: Entity type ("city" or "state"); other types are never answered
+            require_polygon: Only return records that carry a boundary polygon
+
+        Returns:
+            Nominatim-style result dictionary, or None on a miss
+        """
+        entry = self.known_place(name, location_type) if location_type in PLACE_TYPES + (None,) else None
+        record = self._records.get(record_key(entry["name"], entry["type"], entry["state"])) if entry else None
+        if record is None or (require_polygon and not is_polygon_result(record)):
+            self._stats["misses"] += 1
+            return None
+
+        self._stats["hits"] += 1
+        result = {field: record[field] for field in RESULT_FIELDS if field in record}
+        result["source"] = "gazetteer"
+        return result
+
+    def store(self, name: str, location_type: Optional[str], result: Dict[str, Any], source: str = "nominatim") -> bool:
+        """Write a Nominatim result back into the local store.
+
+        Only names that resolve to a single gazetteer entry of the given type
+        are stored; the result's address state disambiguates duplicate city
+        names and must agree with the entry's state. The boundary polygon is
+        simplified before storing. An existing polygon record is never
+        replaced by a point-only result.
+
+        Args:
+            name: Place name the result was looked up for
+            location_type: Entity type ("city", "state", ...)
+            result: Nominatim search result
+            source: Where the result came from
+
+        Returns:
+            True if the record was stored
+        """
+        if "lat" not in result or "lon" not in result or location_type not in PLACE_TYPES + (None,):
+            return False
+
+        result_state = (result.get("address") or {}).get("state")
+        entry = self.known_place(name, location_type, result_state)
+        if entry is None:
+            return False
+        if entry["state"] and result_state and normalize_place_name(entry["state"]) != normalize_place_name(result_state):
+            logger.debug(f"Not storing {name}: result is in {result_state}, gazetteer entry is in {entry['state']}")
+            return False
+
+        key = record_key(entry["name"], entry["type"], entry["state"])
+        existing = self._records.get(key)
+        if existing is not None and is_polygon_result(existing) and not is_polygon_result(result):
+            return False
+
+        record = {field: result[field] for field in RESULT_FIELDS if field in result}
+        if is_polygon_result(record) and self.simplify_tolerance > 0:
+            tolerance = self._tolerance_for(record["geojson"])
+            original_points = count_coordinates(record["geojson"])
+            record["geojson"] = simplify_geometry(record["geojson"], tolerance)
+            logger.debug(
+                f"Simplified {name} boundary {original_points} -> {count_coordinates(record['geojson'])} points "
+                f"(tolerance {tolerance:.5f}°)"
+            )
+
+        record["_meta"] = {
+            "name": entry["name"],
+            "type": entry["type"],
+            "state": entry["state"],
+            "source": source,
+            "updated_at": time.time()
+        }
+
+        with self._lock:
+            self._records[key] = record
+            self._stats["writes"] += 1
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO places (key, name, type, result, source, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, entry["name"], entry["type"], json.dumps(record), source, record["_meta"]["updated_at"])
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Gazetteer store write failed: {e}")
+        return True
+
+    def _tolerance_for(self, geometry: Dict[str, Any]) -> float:
+        """Simplification tolerance scaled to the polygon's extent.
+
+        A fixed tolerance that suits a state flattens a small city, so the
+        tolerance is a fraction of the polygon's bounding box, clamped to
+        [MIN_SIMPLIFY_TOLERANCE, simplify_tolerance].
+        """
+        scaled = geometry_extent(geometry) * RELATIVE_SIMPLIFY_TOLERANCE
+        return min(self.simplify_tolerance, max(MIN_SIMPLIFY_TOLERANCE, scaled))
+
+    def missing_places(self) -> List[Dict[str, Optional[str]]]:
+        """List gazetteer places that have no stored geometry yet."""
+        return [
+            entry
+            for entries in self.places.values()
+            for entry in entries
+            if record_key(entry["name"], entry["type"], entry["state"]) not in self._records
+        ]
+
+    def export_table(self, path: Optional[str] = None) -> int:
+        """Write every stored record to the precomputed JSON table.
+
+        Args:
+            path: Output path (defaults to the configured table path)
+
+        Returns:
+            Number of records written
+        """
+        output = Path(path) if path else (self.table_path or DEFAULT_TABLE_PATH)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "places": self._records}, f, ensure_ascii=False, separators=(",", ":"))
+        logger.info(f"💾 Exported {len(self._records)} place geometries to {output}")
+        return len(self._records)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get lookup statistics.
+
+        Returns:
+            Dictionary with hit/miss counters and store sizes
+        """
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "lookups": lookups,
+            "hit_ratio": self._stats["hits"] / lookups if lookups else 0.0,
+            "gazetteer_places": len(self.places),
+            "records": len(self._records),
+            "persistent": self._conn is not None
+        }
+
+
+_geocoder: Optional[GazetteerGeocoder] = None
+_geocoder_lock = threading.Lock()
+
+
+def get_gazetteer_geocoder() -> Optional[GazetteerGeocoder]:
+    """Get the process-wide gazetteer geocoder.
+
+    Returns:
+        Shared GazetteerGeocoder, or None if disabled via GAZETTEER_GEOCODER_ENABLED
+    """
+    global _geocoder
+
+    if os.environ.get("GAZETTEER_GEOCODER_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+
+    if _geocoder is None:
+        with _geocoder_lock:
+            if _geocoder is None:
+                _geocoder = GazetteerGeocoder(
+                    table_path=os.environ.get("GAZETTEER_TABLE_PATH", str(DEFAULT_TABLE_PATH)),
+                    db_path=os.environ.get("GAZETTEER_STORE_PATH", str(DEFAULT_STORE_PATH)) or None,
+                    simplify_tolerance=float(os.environ.get("GAZETTEER_SIMPLIFY_TOLERANCE", "0.001"))
+                )
+    return _geocoder
+
+
+async def build_table(limit: Optional[int] = None) -> int:
+    """Geocode gazetteer places that have no stored geometry yet (respects the Nominatim rate limit).
+
+    Args:
+        limit: Maximum number of places to geocode
+
+    Returns:
+        Number of places resolved
+    """
+    try:
+        from .nominatim_client import NominatimClient
+        from ..models.location import LocationEntity
+    except ImportError:
+        from app.services.core_llm_agent.parsers.nominatim_client import NominatimClient
+        from app.services.core_llm_agent.models.location import LocationEntity
+
+    geocoder = get_gazetteer_geocoder()
+    if geocoder is None:
+        logger.error("Gazetteer geocoder is disabled (GAZETTEER_GEOCODER_ENABLED)")
+        return 0
+
+    client = NominatimClient()
+    missing = geocoder.missing_places()[:limit] if limit else geocoder.missing_places()
+    logger.info(f"🌍 Geocoding {len(missing)} gazetteer places via Nominatim...")
+
+    resolved = 0
+    for place in missing:
+        entity = LocationEntity(matched_name=place["name"], type=place["type"], confidence=100)
+        if await client.geocode_location_async(entity):
+            resolved += 1
+    return resolved
+
+
+if __name__ == "__main__":
+    import asyncio
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Build the offline gazetteer geometry table")
+    parser.add_argument("--build", action="store_true", help="Geocode gazetteer places missing from the store")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of places to geocode")
+    parser.add_argument("--export", nargs="?", const="", default=None, help="Export the store to the JSON table")
+    args = parser.parse_args()
+
+    if args.build:
+        count = asyncio.run(build_table(args.limit))
+        print(f"✅ Resolved {count} places")
+    if args.export is not None:
+        geocoder = get_gazetteer_geocoder()
+        if geocoder:
+            print(f"✅ Exported {geocoder.export_table(args.export or None)} places")
+    if not args.build and args.export is None:
+        geocoder = get_gazetteer_geocoder()
+        print(json.dumps(geocoder.stats() if geocoder else {"enabled": False}, indent=2))
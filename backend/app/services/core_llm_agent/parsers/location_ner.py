@@ -8,13 +8,16 @@ Extracted from the original llm_extract_locations_openrouter function.
 import json
 import sys
 import time
-import requests
+import httpx
 import logging
 from typing import List, Dict, Any
 
 try:
     from ..models.location import LocationEntity
     from ..config import get_openrouter_config
+    from ..http_client import run_sync
+    from ..openrouter_client import get_openrouter_client, OpenRouterClient
+    from ..llm_cache import get_llm_cache
 except ImportError:
     import sys
     from pathlib import Path
@@ -22,6 +25,9 @@ except ImportError:
     
     from app.services.core_llm_agent.models.location import LocationEntity
     from app.services.core_llm_agent.config import get_openrouter_config
+    from app.services.core_llm_agent.http_client import run_sync
+    from app.services.core_llm_agent.openrouter_client import get_openrouter_client, OpenRouterClient
+    from app.services.core_llm_agent.llm_cache import get_llm_cache
 
 logger = logging.getLogger(__name__)
 
@@ -29,15 +35,17 @@ logger = logging.getLogger(__name__)
 class LocationNER:
     """LLM-based Named Entity Recognition for location extraction."""
     
+    # Bump when the system prompt changes so cached extractions are not reused
+    PROMPT_VERSION = "1"
+    
     def __init__(self, model_name: str = None):
         """Initialize the LocationNER with model configuration."""
         config = get_openrouter_config()
         # Use dedicated NER model for faster, more efficient location extraction
         self.model_name = model_name or config["ner_model"]
         self.api_key = config["api_key"]
-        self.referrer = config["referrer"]
-        self.app_title = config["app_title"]
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
+        self.openrouter = get_openrouter_client()
+        self.cache = get_llm_cache()
         
         if not self.api_key:
             logger.warning("OPENROUTER_API_KEY not set. Location extraction will fail.")
@@ -118,6 +126,17 @@ class LocationNER:
         return ""
     
     def extract_locations(self, query: str) -> List[LocationEntity]:
+        """Extract location entities from a query string (synchronous wrapper).
+        
+        Args:
+            query: User query string
+            
+        Returns:
+            List of LocationEntity objects with extracted locations
+        """
+        return run_sync(self.extract_locations_async(query))
+    
+    async def extract_locations_async(self, query: str) -> List[LocationEntity]:
         """Extract location entities from a query string.
         
         Args:
@@ -133,13 +152,6 @@ class LocationNER:
         if not query.strip():
             return []
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": self.referrer,
-            "X-Title": self.app_title,
-        }
-
         system_prompt = (
             "You are a location entity extractor for Indian geography.\n"
             "Extract city names, state names, and geographic locations from the user query.\n"
@@ -164,17 +176,14 @@ class LocationNER:
 
         try:
             start_time = time.time()
-            resp = requests.post(self.base_url, headers=headers, data=json.dumps(payload), timeout=10)
-            resp.raise_for_status()
-            processing_time = time.time() - start_time
+            cached_content = self.cache.get("location_ner", query, self.model_name, self.PROMPT_VERSION) if self.cache else None
             
-            data = resp.json()
-            content = (
-                data.get("choices", [{}])[0]
-                .get("message", {})
-                .get("content", "")
-                .strip()
-            )
+            if cached_content is not None:
+                content = cached_content
+            else:
+                data = await self.openrouter.chat_completion(payload, timeout=10, component="location_ner")
+                content = OpenRouterClient.message_content(data)
+            processing_time = time.time() - start_time
             
             if not content:
                 logger.warning("LLM returned empty content for location extraction")
@@ -212,38 +221,15 @@ class LocationNER:
                 return []
                 
             # Validate and convert to LocationEntity objects
-            entities = []
-            seen_names = set()  # Track unique location names to avoid duplicates
+            entities = self.build_entities(locations_data)
             
-            for loc_data in locations_data:
-                if (isinstance(loc_data, dict) and 
-                    "matched_name" in loc_data and 
-                    "type" in loc_data and 
-                    "confidence" in loc_data):
-                    try:
-                        matched_name = loc_data["matched_name"].strip()
-                        
-                        # Skip duplicates (case-insensitive)
-                        if matched_name.lower() in seen_names:
-                            logger.info(f"Skipping duplicate location: {matched_name}")
-                            continue
-                        
-                        seen_names.add(matched_name.lower())
-                        
-                        entity = LocationEntity(
-                            matched_name=matched_name,
-                            type=loc_data["type"],
-                            confidence=float(loc_data["confidence"])
-                        )
-                        entities.append(entity)
-                    except Exception as e:
-                        logger.warning(f"Failed to create LocationEntity: {e}")
-                        continue
+            if self.cache and cached_content is None and (entities or not locations_data):
+                self.cache.set("location_ner", query, self.model_name, self.PROMPT_VERSION, json_content)
             
             logger.info(f"Extracted {len(entities)} location entities in {processing_time:.2f}s")
             return entities
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"HTTP error in location extraction: {e}")
             # Fallback to simple regex extraction for common Indian cities
             return self._fallback_location_extraction(query)
@@ -257,6 +243,46 @@ class LocationNER:
             # Fallback to simple regex extraction for common Indian cities
             return self._fallback_location_extraction(query)
     
+    @staticmethod
+    def build_entities(locations_data: List[Any]) -> List[LocationEntity]:
+        """Validate raw LLM location objects and convert them to LocationEntity objects.
+        
+        Args:
+            locations_data: List of dicts with matched_name, type and confidence
+            
+        Returns:
+            List of unique LocationEntity objects (invalid items are skipped)
+        """
+        entities = []
+        seen_names = set()  # Track unique location names to avoid duplicates
+        
+        for loc_data in locations_data:
+            if (isinstance(loc_data, dict) and 
+                "matched_name" in loc_data and 
+                "type" in loc_data and 
+                "confidence" in loc_data):
+                try:
+                    matched_name = loc_data["matched_name"].strip()
+                    
+                    # Skip duplicates (case-insensitive)
+                    if matched_name.lower() in seen_names:
+                        logger.info(f"Skipping duplicate location: {matched_name}")
+                        continue
+                    
+                    seen_names.add(matched_name.lower())
+                    
+                    entity = LocationEntity(
+                        matched_name=matched_name,
+                        type=loc_data["type"],
+                        confidence=float(loc_data["confidence"])
+                    )
+                    entities.append(entity)
+                except Exception as e:
+                    logger.warning(f"Failed to create LocationEntity: {e}")
+                    continue
+        
+        return entities
+    
     def _fallback_location_extraction(self, query: str) -> List[LocationEntity]:
         """Fallback location extraction using regex patterns for common Indian cities.
         
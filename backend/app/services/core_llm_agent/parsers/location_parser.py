@@ -13,6 +13,8 @@ try:
     from .location_ner import LocationNER
     from .nominatim_client import NominatimClient
     from ..models.location import LocationParseResult, LocationEntity, BoundaryInfo
+    from ..http_client import run_sync
+    from ....utils.tracing import get_tracer
 except ImportError:
     import sys
     from pathlib import Path
@@ -21,6 +23,8 @@ except ImportError:
     from app.services.core_llm_agent.parsers.location_ner import LocationNER
     from app.services.core_llm_agent.parsers.nominatim_client import NominatimClient
     from app.services.core_llm_agent.models.location import LocationParseResult, LocationEntity, BoundaryInfo
+    from app.services.core_llm_agent.http_client import run_sync
+    from app.utils.tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
@@ -38,12 +42,36 @@ class LocationParser:
         self.ner = LocationNER(ner_model)
         self.geocoder = NominatimClient(nominatim_url) if nominatim_url else NominatimClient()
         
-    def parse_query(self, query: str, resolve_locations: bool = True) -> LocationParseResult:
+    def parse_query(
+        self,
+        query: str,
+        resolve_locations: bool = True,
+        entities: Optional[List[LocationEntity]] = None
+    ) -> LocationParseResult:
+        """Parse a query to extract and resolve locations (synchronous wrapper).
+        
+        Args:
+            query: User query string
+            resolve_locations: Whether to geocode extracted locations
+            entities: Pre-extracted entities (e.g. from fused understanding); skips NER
+            
+        Returns:
+            LocationParseResult with extracted entities and resolved boundaries
+        """
+        return run_sync(self.parse_query_async(query, resolve_locations, entities))
+    
+    async def parse_query_async(
+        self,
+        query: str,
+        resolve_locations: bool = True,
+        entities: Optional[List[LocationEntity]] = None
+    ) -> LocationParseResult:
         """Parse a query to extract and resolve locations.
         
         Args:
             query: User query string
             resolve_locations: Whether to geocode extracted locations
+            entities: Pre-extracted entities (e.g. from fused understanding); skips NER
             
         Returns:
             LocationParseResult with extracted entities and resolved boundaries
@@ -51,9 +79,11 @@ class LocationParser:
         start_time = time.time()
         
         try:
-            # Step 1: Extract location entities using NER
-            logger.info(f"Extracting locations from query: {query[:100]}...")
-            entities = self.ner.extract_locations(query)
+            # Step 1: Extract location entities using NER (unless already extracted)
+            if entities is None:
+                logger.info(f"Extracting locations from query: {query[:100]}...")
+                with get_tracer().span("location.ner"):
+                    entities = await self.ner.extract_locations_async(query)
             
             if not entities:
                 logger.info("No location entities found in query")
@@ -73,7 +103,8 @@ class LocationParser:
             resolved_locations = []
             if resolve_locations:
                 logger.info("Resolving locations to geographic boundaries...")
-                resolved_locations = self.geocoder.geocode_locations(entities)
+                with get_tracer().span("location.geocoding", attributes={"entities": len(entities)}):
+                    resolved_locations = await self.geocoder.geocode_locations_async(entities)
                 
                 if not resolved_locations:
                     logger.warning("Failed to resolve any locations to boundaries")
@@ -2,23 +2,35 @@
 Nominatim client for geocoding location entities.
 
 This module provides geocoding functionality using the OpenStreetMap Nominatim API
-to resolve location names into geographic boundaries and coordinates.
+to resolve location names into geographic boundaries and coordinates. Lookups are
+answered from the shared geocode cache, then the offline gazetteer store;
+Nominatim is only called on a miss and its result is written back to both.
 """
 
 import time
-import requests
+import asyncio
+import threading
+import httpx
 import logging
 from typing import List, Optional, Dict, Any
 from urllib.parse import quote
 
 try:
     from ..models.location import LocationEntity, BoundaryInfo
+    from ..http_client import get_async_client, run_sync
+    from .gazetteer_geocoder import get_gazetteer_geocoder
+    from ..geocode_cache import get_geocode_cache
+    from ....utils.tracing import get_tracer
 except ImportError:
     import sys
     from pathlib import Path
     sys.path.append(str(Path(__file__).parent.parent.parent.parent.parent))
     
     from app.services.core_llm_agent.models.location import LocationEntity, BoundaryInfo
+    from app.services.core_llm_agent.http_client import get_async_client, run_sync
+    from app.services.core_llm_agent.parsers.gazetteer_geocoder import get_gazetteer_geocoder
+    from app.services.core_llm_agent.geocode_cache import get_geocode_cache
+    from app.utils.tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
@@ -33,21 +45,46 @@ class NominatimClient:
             base_url: Base URL for Nominatim API
         """
         self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.headers = {
             'User-Agent': 'GeoLLM/1.0 (geospatial analysis application)'
-        })
+        }
         self.rate_limit_delay = 1.0  # Nominatim rate limit: max 1 request per second
         self.last_request_time = 0
+        self._rate_lock = threading.Lock()
+        self.gazetteer = get_gazetteer_geocoder()
+        self.cache = get_geocode_cache()
+    
+    def _reserve_request_slot(self) -> float:
+        """Reserve the next request slot allowed by the Nominatim rate limit.
+        
+        Returns:
+            Seconds to wait before sending the request
+        """
+        with self._rate_lock:
+            now = time.time()
+            slot = max(now, self.last_request_time + self.rate_limit_delay)
+            self.last_request_time = slot
+            return slot - now
     
-    def _rate_limit(self):
-        """Enforce rate limiting for Nominatim API."""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.rate_limit_delay:
-            time.sleep(self.rate_limit_delay - elapsed)
-        self.last_request_time = time.time()
+    async def _rate_limit(self):
+        """Enforce rate limiting for Nominatim API without blocking the event loop."""
+        delay = self._reserve_request_slot()
+        if delay > 0:
+            await asyncio.sleep(delay)
     
     def geocode_location(self, entity: LocationEntity, country_code: str = "in") -> Optional[BoundaryInfo]:
+        """Geocode a single location entity (synchronous wrapper).
+        
+        Args:
+            entity: LocationEntity to geocode
+            country_code: Country code to restrict search (default: "in" for India)
+            
+        Returns:
+            BoundaryInfo with resolved geographic data, or None if geocoding fails
+        """
+        return run_sync(self.geocode_location_async(entity, country_code))
+    
+    async def geocode_location_async(self, entity: LocationEntity, country_code: str = "in") -> Optional[BoundaryInfo]:
         """Geocode a single location entity.
         
         Args:
@@ -57,7 +94,26 @@ class NominatimClient:
         Returns:
             BoundaryInfo with resolved geographic data, or None if geocoding fails
         """
-        self._rate_limit()
+        # Shared geocode cache first (includes remembered misses)
+        if self.cache:
+            hit, cached = self.cache.get("core_boundary", entity.matched_name, entity.type, country_code)
+            if hit:
+                logger.info(f"💾 Geocode cache hit for {entity.matched_name}" + ("" if cached else " (not found)"))
+                return BoundaryInfo(**cached["boundary"]) if cached else None
+        
+        # Offline gazetteer store next: no network call and no rate limit
+        if self.gazetteer:
+            stored = self.gazetteer.lookup(entity.matched_name, entity.type)
+            if stored:
+                try:
+                    logger.info(f"📍 Gazetteer hit for {entity.matched_name}")
+                    boundary_info = self._boundary_from_result(stored, entity.matched_name)
+                    self._cache_boundary(entity, country_code, stored, boundary_info)
+                    return boundary_info
+                except (KeyError, ValueError, TypeError) as e:
+                    logger.warning(f"Ignoring unusable gazetteer record for {entity.matched_name}: {e}")
+        
+        await self._rate_limit()
         
         # Build search query - prioritize city-level results
         query = entity.matched_name
@@ -77,12 +133,15 @@ class NominatimClient:
         try:
             url = f"{self.base_url}/search"
             logger.info(f"DEBUG - Geocoding query: '{query}' with params: {params}")
-            response = self.session.get(url, params=params, timeout=10)
+            with get_tracer().span("nominatim.search", kind="client", attributes={"geocode.query": query}):
+                response = await get_async_client().get(url, params=params, headers=self.headers, timeout=10)
             response.raise_for_status()
             
             results = response.json()
             if not results:
                 logger.warning(f"No geocoding results for: {entity.matched_name}")
+                if self.cache:
+                    self.cache.set_negative("core_boundary", entity.matched_name, entity.type, country_code)
                 return None
             
             logger.info(f"DEBUG - Geocoding results for '{entity.matched_name}': {len(results)} results")
@@ -91,47 +150,16 @@ class NominatimClient:
             
             # Select the best city-level result
             result = self._select_best_city_result(results, entity.matched_name)
+            boundary_info = self._boundary_from_result(result, entity.matched_name)
             
-            # Extract coordinates
-            lat = float(result['lat'])
-            lon = float(result['lon'])
-            
-            # Extract bounding box
-            bbox = None
-            if 'boundingbox' in result:
-                bbox_str = result['boundingbox']
-                bbox = [
-                    float(bbox_str[2]),  # min_lng (west)
-                    float(bbox_str[0]),  # min_lat (south)
-                    float(bbox_str[3]),  # max_lng (east)
-                    float(bbox_str[1])   # max_lat (north)
-                ]
+            # Write back so the next lookup is answered offline
+            if self.gazetteer:
+                self.gazetteer.store(entity.matched_name, entity.type, result)
+            self._cache_boundary(entity, country_code, result, boundary_info)
             
-            # Extract geometry
-            geometry = result.get('geojson')
-            if not geometry:
-                # Fallback: create point geometry
-                geometry = {
-                    "type": "Point",
-                    "coordinates": [lon, lat]
-                }
+            return boundary_info
             
-            # Calculate area for polygons
-            area_km2 = None
-            if geometry.get('type') in ['Polygon', 'MultiPolygon']:
-                area_km2 = self._estimate_area_from_bbox(bbox) if bbox else None
-            
-            return BoundaryInfo(
-                geometry=geometry,
-                bbox=bbox or [lon, lat, lon, lat],  # Fallback to point bbox
-                area_km2=area_km2,
-                center=[lon, lat],
-                display_name=result.get('display_name', entity.matched_name),
-                place_id=result.get('place_id'),
-                importance=float(result.get('importance', 0)) if result.get('importance') else None
-            )
-            
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"HTTP error in geocoding {entity.matched_name}: {e}")
             return None
         except (KeyError, ValueError, TypeError) as e:
@@ -141,9 +169,81 @@ class NominatimClient:
             logger.error(f"Unexpected error in geocoding {entity.matched_name}: {e}")
             return None
     
+    def _cache_boundary(self, entity: LocationEntity, country_code: str, result: Dict[str, Any], boundary_info: BoundaryInfo) -> None:
+        """Store a resolved boundary (and its raw result) in the shared geocode cache."""
+        if self.cache:
+            self.cache.set("core_boundary", entity.matched_name, entity.type, country_code, {
+                "raw": result,
+                "boundary": boundary_info.model_dump()
+            })
+    
+    def _boundary_from_result(self, result: Dict[str, Any], name: str) -> BoundaryInfo:
+        """Convert a Nominatim-style search result into BoundaryInfo.
+        
+        Args:
+            result: Nominatim search result (or gazetteer store record)
+            name: Location name used as display name fallback
+            
+        Returns:
+            BoundaryInfo for the result
+        """
+        # Extract coordinates
+        lat = float(result['lat'])
+        lon = float(result['lon'])
+        
+        # Extract bounding box
+        bbox = None
+        if 'boundingbox' in result:
+            bbox_str = result['boundingbox']
+            bbox = [
+                float(bbox_str[2]),  # min_lng (west)
+                float(bbox_str[0]),  # min_lat (south)
+                float(bbox_str[3]),  # max_lng (east)
+                float(bbox_str[1])   # max_lat (north)
+            ]
+        
+        # Extract geometry
+        geometry = result.get('geojson')
+        if not geometry:
+            # Fallback: create point geometry
+            geometry = {
+                "type": "Point",
+                "coordinates": [lon, lat]
+            }
+        
+        # Calculate area for polygons
+        area_km2 = None
+        if geometry.get('type') in ['Polygon', 'MultiPolygon']:
+            area_km2 = self._estimate_area_from_bbox(bbox) if bbox else None
+        
+        return BoundaryInfo(
+            geometry=geometry,
+            bbox=bbox or [lon, lat, lon, lat],  # Fallback to point bbox
+            area_km2=area_km2,
+            center=[lon, lat],
+            display_name=result.get('display_name', name),
+            place_id=result.get('place_id'),
+            importance=float(result.get('importance', 0)) if result.get('importance') else None
+        )
+    
     def geocode_locations(self, entities: List[LocationEntity], country_code: str = "in") -> List[BoundaryInfo]:
+        """Geocode multiple location entities (synchronous wrapper).
+        
+        Args:
+            entities: List of LocationEntity objects to geocode
+            country_code: Country code to restrict search (default: "in" for India)
+            
+        Returns:
+            List of BoundaryInfo objects (excludes failed geocoding attempts)
+        """
+        return run_sync(self.geocode_locations_async(entities, country_code))
+    
+    async def geocode_locations_async(self, entities: List[LocationEntity], country_code: str = "in") -> List[BoundaryInfo]:
         """Geocode multiple location entities.
         
+        Requests start one rate-limit slot apart but are awaited together, so
+        slow responses overlap instead of adding up.
+        
         Args:
             entities: List of LocationEntity objects to geocode
             country_code: Country code to restrict search (default: "in" for India)
@@ -153,8 +253,11 @@ class NominatimClient:
         """
         resolved = []
         
-        for entity in entities:
-            boundary_info = self.geocode_location(entity, country_code)
+        results = await asyncio.gather(
+            *(self.geocode_location_async(entity, country_code) for entity in entities)
+        )
+        
+        for entity, boundary_info in zip(entities, results):
             if boundary_info:
                 resolved.append(boundary_info)
             else:
@@ -212,6 +315,19 @@ class NominatimClient:
         return results[0]
     
     def search_by_query(self, query: str, country_code: str = "in", limit: int = 5) -> List[BoundaryInfo]:
+        """Search locations by free-form query (synchronous wrapper).
+        
+        Args:
+            query: Free-form search query
+            country_code: Country code to restrict search
+            limit: Maximum number of results
+            
+        Returns:
+            List of BoundaryInfo objects
+        """
+        return run_sync(self.search_by_query_async(query, country_code, limit))
+    
+    async def search_by_query_async(self, query: str, country_code: str = "in", limit: int = 5) -> List[BoundaryInfo]:
         """Search locations by free-form query.
         
         Args:
@@ -222,7 +338,24 @@ class NominatimClient:
         Returns:
             List of BoundaryInfo objects
         """
-        self._rate_limit()
+        cache_type = f"query:{limit}"
+        if self.cache:
+            hit, cached = self.cache.get("core_search", query, cache_type, country_code)
+            if hit:
+                logger.info(f"💾 Geocode cache hit for query: {query}")
+                return [BoundaryInfo(**b) for b in cached["boundaries"]] if cached else []
+        
+        # Single-place lookups of known gazetteer names are answered offline
+        known_place = self.gazetteer.known_place(query) if self.gazetteer else None
+        if known_place and limit == 1:
+            stored = self.gazetteer.lookup(query, known_place["type"])
+            if stored:
+                try:
+                    return [self._boundary_from_result(stored, query)]
+                except (KeyError, ValueError, TypeError) as e:
+                    logger.warning(f"Ignoring unusable gazetteer record for {query}: {e}")
+        
+        await self._rate_limit()
         
         params = {
             'q': query,
@@ -235,12 +368,16 @@ class NominatimClient:
         
         try:
             url = f"{self.base_url}/search"
-            response = self.session.get(url, params=params, timeout=10)
+            with get_tracer().span("nominatim.search", kind="client", attributes={"geocode.query": query}):
+                response = await get_async_client().get(url, params=params, headers=self.headers, timeout=10)
             response.raise_for_status()
             
             results = response.json()
             boundary_infos = []
             
+            if known_place and results:
+                self.gazetteer.store(query, known_place["type"], results[0])
+            
             for result in results:
                 try:
                     lat = float(result['lat'])
@@ -279,9 +416,17 @@ class NominatimClient:
                     continue
             
             logger.info(f"Found {len(boundary_infos)} results for query: {query}")
+            if self.cache:
+                if boundary_infos:
+                    self.cache.set("core_search", query, cache_type, country_code, {
+                        "raw": results,
+                        "boundaries": [b.model_dump() for b in boundary_infos]
+                    })
+                else:
+                    self.cache.set_negative("core_search", query, cache_type, country_code)
             return boundary_infos
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"HTTP error in search query '{query}': {e}")
             return []
         except Exception as e:
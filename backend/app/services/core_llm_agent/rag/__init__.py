@@ -5,16 +5,18 @@ This package contains all RAG integration components that bridge the dynamic RAG
 with the Core LLM Agent system.
 """
 
-from .rag_client import RAGServiceClient, RetrievedChunk, create_rag_client
+from .rag_client import RAGServiceClient, RetrievedChunk, DetailedRetrieval, create_rag_client
 from .rag_prompt_builder import RAGPromptBuilder, PromptTemplate, create_prompt_builder
 from .rag_llm_client import RAGLLMClient, LLMResponse, create_rag_llm_client
-from .rag_service import RAGService, RAGResponse, create_rag_service
+from .rag_answer_cache import SemanticAnswerCache
+from .rag_service import RAGService, RAGResponse, create_rag_service, format_dispatch_response
 from .rag_sync_wrapper import SyncRAGService, create_sync_rag_service
 
 __all__ = [
     # Client components
     "RAGServiceClient",
     "RetrievedChunk", 
+    "DetailedRetrieval",
     "create_rag_client",
     
     # Prompt building
@@ -31,6 +33,8 @@ __all__ = [
     "RAGService",
     "RAGResponse", 
     "create_rag_service",
+    "format_dispatch_response",
+    "SemanticAnswerCache",
     
     # Synchronous wrapper
     "SyncRAGService",
@@ -0,0 +1,282 @@
+"""
+Semantic Answer Cache for RAG questions.
+
+Answers are cached per (session_id, content_version) together with the query
+embedding returned by the dynamic RAG service, the ids of the chunks that
+were retrieved for the question and a signature of every other prompt input
+(rendered system and context messages, which carry the template, location
+context and packed spans, plus the generation parameters). A later question is
+answered from cache when its embedding lies within a configurable cosine
+distance of a cached question and everything else the LLM would have been
+given is identical. Uploading documents bumps the session content version,
+which retires every answer cached for the older version; answers generated
+from an older version than one already seen are not stored.
+
+The cache is shared by callers on different threads and event loops, so all
+state is guarded by a lock.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple, FrozenSet
+from dataclasses import dataclass
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AnswerCacheKey:
+    """Everything needed to look up or store a cached answer."""
+    session_id: str
+    content_version: int
+    query_vector: np.ndarray
+    chunk_ids: FrozenSet[int]
+    template_used: str
+    prompt_signature: str
+
+
+@dataclass
+class CachedAnswer:
+    """A cached RAG answer and the question it was generated for."""
+    query: str
+    query_vector: np.ndarray
+    chunk_ids: FrozenSet[int]
+    template_used: str
+    prompt_signature: str
+    response: Any  # RAGResponse; typed loosely to avoid a circular import
+    tokens_used: int
+    llm_processing_time: float
+    created_at: float
+    hits: int = 0
+
+
+class SemanticAnswerCache:
+    """In-memory semantic cache of RAG answers keyed by session content version."""
+
+    def __init__(
+        self,
+        max_distance: float = 0.05,
+        ttl_seconds: float = 3600.0,
+        max_entries_per_session: int = 256
+    ):
+        """Initialize the answer cache.
+
+        Args:
+            max_distance: Maximum cosine distance (1 - cosine similarity) for a hit
+            ttl_seconds: Lifetime of a cached answer
+            max_entries_per_session: Oldest answers are evicted beyond this count
+        """
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_session = max_entries_per_session
+
+        self._entries: Dict[Tuple[str, int], List[CachedAnswer]] = {}
+        # Newest content version seen per session
+        self._latest_versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self.llm_seconds_saved = 0.0
+
+    @staticmethod
+    def make_key(
+        session_id: Optional[str],
+        content_version: Optional[int],
+        query_vector: Optional[List[float]],
+        chunks: List[Any],
+        prompt_parts: Dict[str, Any],
+        generation_params: Tuple[Any, ...] = ()
+    ) -> Optional[AnswerCacheKey]:
+        """Build a cache key from a detailed retrieval and the rendered prompt.
+
+        Args:
+            session_id: Session identifier
+            content_version: Session content version reported by the RAG service
+            query_vector: Query embedding reported by the RAG service
+            chunks: Retrieved chunks (must carry ``index_id``)
+            prompt_parts: Prompt from RAGPromptBuilder.build_prompt
+            generation_params: LLM parameters the answer depends on (temperature, max_tokens)
+
+        Returns:
+            AnswerCacheKey, or None if the retrieval cannot be cached
+        """
+        if not session_id or content_version is None or not query_vector or not chunks:
+            return None
+
+        chunk_ids = [getattr(chunk, "index_id", None) for chunk in chunks]
+        if any(chunk_id is None for chunk_id in chunk_ids):
+            return None
+
+        vector = np.asarray(query_vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+
+        return AnswerCacheKey(
+            session_id=session_id,
+            content_version=int(content_version),
+            query_vector=vector / norm,
+            chunk_ids=frozenset(chunk_ids),
+            template_used=prompt_parts["template_used"],
+            prompt_signature=SemanticAnswerCache.prompt_signature(prompt_parts, generation_params)
+        )
+
+    @staticmethod
+    def prompt_signature(prompt_parts: Dict[str, Any], generation_params: Tuple[Any, ...] = ()) -> str:
+        """Hash every prompt input except the question itself.
+
+        The user message only embeds the question (covered by the embedding
+        match) into the template's fixed format, so it is represented by the
+        template name.
+
+        Args:
+            prompt_parts: Prompt from RAGPromptBuilder.build_prompt
+            generation_params: LLM parameters the answer depends on
+
+        Returns:
+            Hex digest identifying the prompt
+        """
+        material = "\x00".join([
+            prompt_parts["template_used"],
+            prompt_parts["system"],
+            prompt_parts["context"],
+            repr(tuple(generation_params)),
+        ])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def lookup(self, key: AnswerCacheKey) -> Optional[Tuple[CachedAnswer, float]]:
+        """Find a cached answer for a semantically equivalent question.
+
+        Args:
+            key: Cache key of the incoming question
+
+        Returns:
+            Tuple of (cached answer, cosine distance), or None on a miss
+        """
+        with self._lock:
+            self._note_version(key.session_id, key.content_version)
+            entries = self._live_entries(key.session_id, key.content_version)
+            candidates = [
+                entry for entry in entries
+                if entry.chunk_ids == key.chunk_ids and entry.prompt_signature == key.prompt_signature
+            ]
+
+            if candidates:
+                matrix = np.stack([entry.query_vector for entry in candidates])
+                distances = 1.0 - matrix @ key.query_vector
+                best = int(np.argmin(distances))
+                distance = float(distances[best])
+
+                if distance <= self.max_distance:
+                    entry = candidates[best]
+                    entry.hits += 1
+                    self.hits += 1
+                    self.tokens_saved += entry.tokens_used
+                    self.llm_seconds_saved += entry.llm_processing_time
+                    logger.info(f"💾 Semantic cache hit (distance {distance:.4f}) for session {key.session_id}")
+                    return entry, distance
+
+            self.misses += 1
+            return None
+
+    def store(
+        self,
+        key: AnswerCacheKey,
+        query: str,
+        response: Any,
+        tokens_used: Optional[int],
+        llm_processing_time: float
+    ) -> None:
+        """Cache a freshly generated answer.
+
+        Args:
+            key: Cache key of the question
+            query: Original question text
+            response: Successful RAGResponse to cache
+            tokens_used: Tokens spent generating the answer
+            llm_processing_time: Seconds spent in the LLM call
+        """
+        with self._lock:
+            if key.content_version < self._latest_versions.get(key.session_id, key.content_version):
+                # Documents were added while the answer was generated; it can never hit again
+                logger.info(f"Skipping cache store for stale content version of session {key.session_id}")
+                return
+            self._note_version(key.session_id, key.content_version)
+
+            entries = self._live_entries(key.session_id, key.content_version)
+            entries.append(CachedAnswer(
+                query=query,
+                query_vector=key.query_vector,
+                chunk_ids=key.chunk_ids,
+                template_used=key.template_used,
+                prompt_signature=key.prompt_signature,
+                response=response,
+                tokens_used=tokens_used or 0,
+                llm_processing_time=llm_processing_time or 0.0,
+                created_at=time.time()
+            ))
+
+            if len(entries) > self.max_entries_per_session:
+                del entries[:len(entries) - self.max_entries_per_session]
+
+            self._entries[(key.session_id, key.content_version)] = entries
+
+    def invalidate_session(self, session_id: str) -> None:
+        """Drop every cached answer for a session.
+
+        Args:
+            session_id: Session identifier
+        """
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] == session_id]:
+                del self._entries[cache_key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics.
+
+        Returns:
+            Dictionary with hit ratio and savings
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            entries = sum(len(entries) for entries in self._entries.values())
+        return {
+            "lookups": lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "llm_calls_saved": self.hits,
+            "tokens_saved": self.tokens_saved,
+            "llm_seconds_saved": round(self.llm_seconds_saved, 3),
+            "entries": entries,
+            "max_distance": self.max_distance
+        }
+
+    def _note_version(self, session_id: str, content_version: int) -> None:
+        """Record a session content version, dropping answers of older versions (caller holds the lock)."""
+        if content_version <= self._latest_versions.get(session_id, -1):
+            return
+        self._latest_versions[session_id] = content_version
+        # Answers for older content versions of this session can never hit again
+        for cache_key in [k for k in self._entries if k[0] == session_id and k[1] < content_version]:
+            del self._entries[cache_key]
+
+    def _live_entries(self, session_id: str, content_version: int) -> List[CachedAnswer]:
+        """Return unexpired entries for a session version, pruning expired ones (caller holds the lock)."""
+        cutoff = time.time() - self.ttl_seconds
+        entries = [
+            entry for entry in self._entries.get((session_id, content_version), [])
+            if entry.created_at >= cutoff
+        ]
+        if entries:
+            self._entries[(session_id, content_version)] = entries
+        else:
+            self._entries.pop((session_id, content_version), None)
+        return entries
@@ -5,11 +5,13 @@ This module provides a FastAPI wrapper around the RAG service to expose
 the /ask endpoint for external clients and integration with the core system.
 """
 
+import json
 import logging
 import time
 from typing import Dict, Any, List, Optional
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from contextlib import asynccontextmanager
 
@@ -210,6 +212,52 @@ async def ask_question(
         )
 
 
+@app.post(
+    "/ask/stream",
+    summary="Ask a question with RAG (streaming)",
+    description="""
+    Same as `/ask`, but the answer is streamed as server-sent events while the
+    LLM generates it.
+    
+    **Events** (each sent as `data: {json}`):
+    - `token`: incremental answer text
+    - `sources`: source citations, confidence and metadata (sent after the answer)
+    - `done`: end of stream
+    - `error`: generation failed; terminates the stream
+    """
+)
+async def ask_question_stream(
+    request: AskRequest,
+    service: RAGService = Depends(get_rag_service)
+) -> StreamingResponse:
+    """Streaming RAG endpoint for question answering."""
+    async def event_stream():
+        try:
+            async for event in service.ask_stream(
+                query=request.query,
+                session_id=request.session_id,
+                k=request.k,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+                template_name=request.template_name,
+                include_metadata=request.include_metadata
+            ):
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            logger.error(f"Error in ask stream endpoint: {e}")
+            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @app.get(
     "/health",
     response_model=HealthResponse,
@@ -271,6 +319,7 @@ async def root():
         "status": "running",
         "endpoints": {
             "ask": "/ask",
+            "ask_stream": "/ask/stream",
             "health": "/health",
             "templates": "/templates",
             "docs": "/docs"
@@ -11,6 +11,11 @@ import asyncio
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 
+try:
+    from ....utils.tracing import get_tracer
+except ImportError:
+    from app.utils.tracing import get_tracer
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,6 +25,7 @@ class RetrievedChunk:
     content: str
     metadata: Dict[str, Any]
     score: float
+    index_id: Optional[int] = None
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
@@ -30,6 +36,14 @@ class RetrievedChunk:
         }
 
 
+@dataclass
+class DetailedRetrieval:
+    """Result of a detailed retrieval, including the query embedding."""
+    chunks: List[RetrievedChunk]
+    query_vector: Optional[List[float]] = None
+    content_version: Optional[int] = None
+
+
 class RAGServiceClient:
     """Client for interacting with the dynamic RAG service."""
     
@@ -70,10 +84,12 @@ class RAGServiceClient:
         """
         try:
             async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/v1/retrieve",
-                    json={"query": query}
-                )
+                with get_tracer().span("rag.retrieve", kind="client"):
+                    response = await client.post(
+                        f"{self.base_url}/api/v1/retrieve",
+                        json={"query": query},
+                        headers=get_tracer().inject()
+                    )
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -110,16 +126,40 @@ class RAGServiceClient:
         Returns:
             List of retrieved chunks with full metadata
         """
+        retrieval = await self.retrieve_detailed_with_query(session_id, query, k, return_query_vector=False)
+        return retrieval.chunks
+    
+    async def retrieve_detailed_with_query(
+        self, 
+        session_id: str, 
+        query: str, 
+        k: int = 5,
+        return_query_vector: bool = True
+    ) -> DetailedRetrieval:
+        """Retrieve documents along with the query embedding and session content version.
+        
+        Args:
+            session_id: Session identifier
+            query: Query string to search for
+            k: Number of documents to retrieve
+            return_query_vector: Ask the service to include the query embedding
+            
+        Returns:
+            DetailedRetrieval with chunks, query vector and content version
+        """
         try:
             async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/v1/retrieve/detailed",
-                    json={
-                        "session_id": session_id,
-                        "query": query,
-                        "k": k
-                    }
-                )
+                with get_tracer().span("rag.retrieve_detailed", kind="client", attributes={"rag.k": k}):
+                    response = await client.post(
+                        f"{self.base_url}/api/v1/retrieve/detailed",
+                        json={
+                            "session_id": session_id,
+                            "query": query,
+                            "k": k,
+                            "returnQueryVector": return_query_vector
+                        },
+                        headers=get_tracer().inject()
+                    )
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -128,20 +168,25 @@ class RAGServiceClient:
                         chunk = RetrievedChunk(
                             content=result["content"],
                             metadata=result["metadata"],
-                            score=result["similarity_score"]
+                            score=result["similarity_score"],
+                            index_id=result.get("index_id")
                         )
                         chunks.append(chunk)
-                    return chunks
+                    return DetailedRetrieval(
+                        chunks=chunks,
+                        query_vector=data.get("query_vector"),
+                        content_version=data.get("content_version")
+                    )
                 elif response.status_code == 404:
                     logger.warning(f"Session {session_id} not found")
-                    return []
+                    return DetailedRetrieval(chunks=[])
                 else:
                     logger.error(f"RAG detailed retrieve failed: HTTP {response.status_code}")
-                    return []
+                    return DetailedRetrieval(chunks=[])
                     
         except Exception as e:
             logger.error(f"Error retrieving detailed from RAG service: {e}")
-            return []
+            return DetailedRetrieval(chunks=[])
     
     async def get_active_sessions(self) -> List[str]:
         """Get list of active session IDs.
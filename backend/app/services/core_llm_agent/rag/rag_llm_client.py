@@ -7,21 +7,30 @@ using the same OpenRouter configuration as the core LLM agent.
 
 import logging
 import json
+import time
 import httpx
 import asyncio
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator
 from dataclasses import dataclass
 
 try:
     from app.services.core_llm_agent.config import get_openrouter_config
+    from app.utils.tracing import get_tracer
 except ImportError:
     import sys
     from pathlib import Path
     sys.path.append(str(Path(__file__).parent.parent.parent.parent))
     from app.services.core_llm_agent.config import get_openrouter_config
+    from app.utils.tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
+# Models tried, in order, when the configured response model fails
+DEFAULT_FALLBACK_MODELS = [
+    "openai/gpt-oss-20b:free",
+    "meta-llama/llama-3.2-3b-instruct:free"
+]
+
 
 @dataclass
 class LLMResponse:
@@ -80,32 +89,7 @@ class RAGLLMClient:
             )
         
         try:
-            # Prepare messages for chat completion
-            messages = []
-            
-            # Add system message if available
-            if prompt_parts.get("system"):
-                system_msg = prompt_parts["system"]
-                if include_sources:
-                    system_msg += "\n\nIMPORTANT: Always cite your sources by referencing the specific context sections when making claims."
-                
-                messages.append({
-                    "role": "system",
-                    "content": system_msg
-                })
-            
-            # Combine context and user message
-            user_content = ""
-            if prompt_parts.get("context"):
-                user_content += prompt_parts["context"] + "\n\n"
-            
-            if prompt_parts.get("user"):
-                user_content += prompt_parts["user"]
-            
-            messages.append({
-                "role": "user",
-                "content": user_content
-            })
+            messages = self._build_messages(prompt_parts, include_sources)
             
             # Prepare API request
             payload = {
@@ -116,23 +100,18 @@ class RAGLLMClient:
                 "stream": False
             }
             
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": self.config.get("referrer", "http://localhost"),
-                "X-Title": self.config.get("app_title", "GeoLLM RAG Agent")
-            }
+            headers = self._build_headers()
             
             # Make API call
-            import time
             start_time = time.time()
             
             async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json=payload
-                )
+                with get_tracer().span("openrouter.chat_completion", kind="client", attributes={"llm.model": self.model_name, "component": "rag_llm"}):
+                    response = await client.post(
+                        f"{self.base_url}/chat/completions",
+                        headers=headers,
+                        json=payload
+                    )
                 
                 processing_time = time.time() - start_time
                 
@@ -195,6 +174,206 @@ class RAGLLMClient:
                 error=str(e)
             )
     
+    async def stream_response(
+        self,
+        prompt_parts: Dict[str, str],
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        include_sources: bool = True,
+        model: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a response as OpenRouter server-sent event deltas arrive.
+        
+        Yields ``{"type": "token", "content": ...}`` events for every content
+        delta, followed by exactly one terminal event: ``{"type": "done", ...}``
+        with usage and timing, or ``{"type": "error", "error": ...}``.
+        
+        Args:
+            prompt_parts: Dictionary with 'system', 'context', 'user' components
+            temperature: Sampling temperature (0-1)
+            max_tokens: Maximum tokens to generate
+            include_sources: Whether to ask for source citations
+            model: Model to stream from (default: the client's model)
+            
+        Yields:
+            Stream event dictionaries
+        """
+        model = model or self.model_name
+        if not self.api_key:
+            yield {"type": "error", "error": "missing_api_key", "model_used": model}
+            return
+        
+        payload = {
+            "model": model,
+            "messages": self._build_messages(prompt_parts, include_sources),
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        }
+        
+        start_time = time.time()
+        first_token_time = None
+        tokens_used = None
+        finish_reason = None
+        
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                async with client.stream(
+                    "POST",
+                    f"{self.base_url}/chat/completions",
+                    headers=self._build_headers(),
+                    json=payload
+                ) as response:
+                    if response.status_code != 200:
+                        body = await response.aread()
+                        error_msg = f"HTTP {response.status_code}"
+                        try:
+                            error_data = json.loads(body)
+                            if "error" in error_data:
+                                error_msg = error_data["error"].get("message", error_msg)
+                        except Exception:
+                            pass
+                        logger.error(f"LLM streaming call failed: {error_msg}")
+                        yield {"type": "error", "error": error_msg, "model_used": model}
+                        return
+                    
+                    async for line in response.aiter_lines():
+                        # SSE comments (": OPENROUTER PROCESSING") and blank keep-alives
+                        if not line or not line.startswith("data:"):
+                            continue
+                        
+                        data_str = line[len("data:"):].strip()
+                        if data_str == "[DONE]":
+                            break
+                        
+                        try:
+                            data = json.loads(data_str)
+                        except json.JSONDecodeError:
+                            logger.debug(f"Skipping malformed SSE line: {data_str[:100]}")
+                            continue
+                        
+                        if "error" in data:
+                            error_msg = data["error"].get("message", "stream_error")
+                            logger.error(f"LLM stream reported error: {error_msg}")
+                            yield {"type": "error", "error": error_msg, "model_used": model}
+                            return
+                        
+                        if data.get("usage"):
+                            tokens_used = data["usage"].get("total_tokens")
+                        
+                        for choice in data.get("choices") or []:
+                            delta = (choice.get("delta") or {}).get("content")
+                            if choice.get("finish_reason"):
+                                finish_reason = choice["finish_reason"]
+                            if delta:
+                                if first_token_time is None:
+                                    first_token_time = time.time() - start_time
+                                yield {"type": "token", "content": delta}
+            
+            yield {
+                "type": "done",
+                "model_used": model,
+                "tokens_used": tokens_used,
+                "finish_reason": finish_reason,
+                "time_to_first_token": first_token_time,
+                "processing_time": time.time() - start_time
+            }
+            
+        except Exception as e:
+            logger.error(f"Error in LLM streaming: {e}")
+            yield {"type": "error", "error": str(e), "model_used": model}
+    
+    async def stream_with_fallback(
+        self,
+        prompt_parts: Dict[str, str],
+        fallback_models: Optional[List[str]] = None,
+        **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a response, switching to fallback models until the first token.
+        
+        An error or an empty answer before any token was forwarded moves on to
+        the next model; once tokens have been sent, the stream's own terminal
+        event is final.
+        
+        Args:
+            prompt_parts: Prompt components
+            fallback_models: List of fallback models to try
+            **kwargs: Additional arguments for stream_response
+            
+        Yields:
+            Stream event dictionaries (same events as stream_response)
+        """
+        if fallback_models is None:
+            fallback_models = DEFAULT_FALLBACK_MODELS
+        models = [self.model_name] + [m for m in fallback_models if m != self.model_name]
+        
+        for index, model in enumerate(models):
+            if index:
+                logger.info(f"Trying fallback model: {model}")
+            streamed = False
+            async for event in self.stream_response(prompt_parts, model=model, **kwargs):
+                if event["type"] == "token":
+                    streamed = True
+                    yield event
+                elif streamed or index == len(models) - 1:
+                    yield event
+                    return
+                else:
+                    logger.warning(f"Streaming from {model} failed before the first token: {event.get('error', 'empty_content')}")
+                    break
+    
+    def _build_messages(self, prompt_parts: Dict[str, str], include_sources: bool) -> List[Dict[str, str]]:
+        """Build chat completion messages from RAG prompt components.
+        
+        Args:
+            prompt_parts: Dictionary with 'system', 'context', 'user' components
+            include_sources: Whether to ask for source citations
+            
+        Returns:
+            List of chat messages
+        """
+        messages = []
+        
+        # Add system message if available
+        if prompt_parts.get("system"):
+            system_msg = prompt_parts["system"]
+            if include_sources:
+                system_msg += "\n\nIMPORTANT: Always cite your sources by referencing the specific context sections when making claims."
+            
+            messages.append({
+                "role": "system",
+                "content": system_msg
+            })
+        
+        # Combine context and user message
+        user_content = ""
+        if prompt_parts.get("context"):
+            user_content += prompt_parts["context"] + "\n\n"
+        
+        if prompt_parts.get("user"):
+            user_content += prompt_parts["user"]
+        
+        messages.append({
+            "role": "user",
+            "content": user_content
+        })
+        
+        return messages
+    
+    def _build_headers(self) -> Dict[str, str]:
+        """Build OpenRouter request headers.
+        
+        Returns:
+            Header dictionary
+        """
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": self.config.get("referrer", "http://localhost"),
+            "X-Title": self.config.get("app_title", "GeoLLM RAG Agent")
+        }
+    
     async def generate_simple_response(
         self, 
         combined_prompt: str,
@@ -239,10 +418,7 @@ class RAGLLMClient:
         
         # Try fallback models
         if fallback_models is None:
-            fallback_models = [
-                "openai/gpt-oss-20b:free",
-                "meta-llama/llama-3.2-3b-instruct:free"
-            ]
+            fallback_models = DEFAULT_FALLBACK_MODELS
         
         original_model = self.model_name
         
@@ -6,12 +6,46 @@ with retrieved document context for grounded LLM responses.
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from .rag_client import RetrievedChunk
 
 logger = logging.getLogger(__name__)
 
+# Overlap shorter than this many words is treated as coincidence, not chunker overlap
+MIN_OVERLAP_WORDS = 5
+MAX_OVERLAP_WORDS = 200
+
+_encoding = None
+_encoding_loaded = False
+
+
+def count_tokens(text: str) -> int:
+    """Count model tokens in a piece of text.
+    
+    Uses tiktoken's cl100k_base encoding when it is installed; otherwise falls
+    back to a ~4 characters per token estimate, which is close for English prose.
+    
+    Args:
+        text: Text to measure
+        
+    Returns:
+        Number of tokens
+    """
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            logger.info("tiktoken not available, estimating context tokens from characters")
+            _encoding = None
+    
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return max(len(text.split()), (len(text) + 3) // 4)
+
 
 @dataclass
 class PromptTemplate:
@@ -20,6 +54,14 @@ class PromptTemplate:
     context_format: str
     user_format: str
     max_context_length: int = 4000
+    max_context_tokens: Optional[int] = None
+    
+    @property
+    def context_token_budget(self) -> int:
+        """Token budget for context sections (derived from max_context_length if unset)."""
+        if self.max_context_tokens is not None:
+            return self.max_context_tokens
+        return self.max_context_length // 4
     
     
 class RAGPromptBuilder:
@@ -139,59 +181,225 @@ class RAGPromptBuilder:
         
         return "default"
     
-    def format_context_sections(self, chunks: List[RetrievedChunk], max_length: int) -> str:
+    def format_context_sections(self, chunks: List[RetrievedChunk], max_tokens: int) -> str:
         """Format retrieved chunks into context sections.
         
         Args:
             chunks: Retrieved document chunks
-            max_length: Maximum total length of context
+            max_tokens: Maximum total context size in model tokens
             
         Returns:
             Formatted context string
         """
+        packed = self.pack_context(chunks, max_tokens)
+        return self._render_sections(packed)
+    
+    def pack_context(self, chunks: List[RetrievedChunk], max_tokens: int) -> List[RetrievedChunk]:
+        """Select the context spans that go into the prompt.
+        
+        Overlapping or adjacent chunks from the same file and page are merged
+        into one span first, so overlap added by the ingestion chunker is only
+        paid for once. Spans are then added in relevance order (score per token
+        only breaks ties between spans of the same rounded score) until the
+        token budget is used up; the first span that does not fit is truncated
+        to the remaining budget rather than skipped, so the most relevant span
+        is never dropped for a less relevant one.
+        
+        Args:
+            chunks: Retrieved document chunks
+            max_tokens: Maximum total context size in model tokens
+            
+        Returns:
+            Packed spans in the order they appear as "Context 1..N"
+        """
         if not chunks:
-            return "No relevant context found."
+            return []
+        
+        spans = self.merge_overlapping_chunks(chunks)
+        
+        costs = [count_tokens(self._format_section(0, span)) for span in spans]
+        order = sorted(
+            range(len(spans)),
+            key=lambda i: (round(spans[i].score, 2), spans[i].score / max(costs[i], 1)),
+            reverse=True
+        )
+        
+        selected = []
+        used_tokens = 0
+        for i in order:
+            if used_tokens + costs[i] <= max_tokens:
+                selected.append(spans[i])
+                used_tokens += costs[i]
+                continue
+            truncated = self._truncate_span(spans[i], max_tokens - used_tokens)
+            if truncated is not None:
+                selected.append(truncated)
+            break
+        
+        selected.sort(key=lambda span: span.score, reverse=True)
+        
+        logger.info(
+            f"Packed {len(chunks)} chunks into {len(selected)} context spans "
+            f"(~{sum(count_tokens(self._format_section(0, span)) for span in selected)}/{max_tokens} tokens)"
+        )
+        return selected
+    
+    def _truncate_span(self, span: RetrievedChunk, max_tokens: int) -> Optional[RetrievedChunk]:
+        """Shorten a span so its context section fits the token budget.
+        
+        Args:
+            span: Context span to shorten
+            max_tokens: Tokens available for the section
+            
+        Returns:
+            Truncated span, or None if not even a few words fit
+        """
+        content = span.content
+        while content and count_tokens(self._format_section(0, self._with_content(span, content + "..."))) > max_tokens:
+            content = content[:int(len(content) * 0.9)]
+        if not content.strip():
+            return None
+        return self._with_content(span, content + "...")
+    
+    def merge_overlapping_chunks(self, chunks: List[RetrievedChunk]) -> List[RetrievedChunk]:
+        """Merge overlapping or adjacent chunks from the same file and page.
         
-        sections = []
-        current_length = 0
-        
-        for i, chunk in enumerate(chunks, 1):
-            # Format chunk with metadata if available
-            source_info = ""
-            if chunk.metadata:
-                source_name = chunk.metadata.get("source", chunk.metadata.get("filename", "Unknown"))
-                page_info = ""
-                if "page" in chunk.metadata:
-                    page_info = f" (Page {chunk.metadata['page']})"
-                elif "chunk_id" in chunk.metadata:
-                    page_info = f" (Section {chunk.metadata['chunk_id']})"
-                
-                source_info = f"**Source:** {source_name}{page_info}\n"
-                if "year" in chunk.metadata:
-                    source_info += f"**Year:** {chunk.metadata['year']}\n"
+        Chunks are adjacent when their index ids are consecutive (the RAG store
+        assigns ids in ingestion order), and overlapping when one contains the
+        other or the end of one repeats the start of the other. Merging repeats
+        until no two spans connect, and a merged span keeps the highest score
+        of its members.
+        
+        Args:
+            chunks: Retrieved document chunks
             
-            # Format the section
-            section = f"### Context {i}\n{source_info}**Relevance Score:** {chunk.score:.3f}\n\n{chunk.content.strip()}\n"
+        Returns:
+            Merged spans, most relevant first
+        """
+        groups: Dict[Tuple[Any, Any], List[RetrievedChunk]] = {}
+        for chunk in chunks:
+            groups.setdefault(self._span_key(chunk), []).append(chunk)
+        
+        spans: List[RetrievedChunk] = []
+        for key, group in groups.items():
+            if key == (None, None):
+                spans.extend(group)
+                continue
             
-            # Check if adding this section would exceed the limit
-            if current_length + len(section) > max_length and sections:
-                break
+            if all(chunk.index_id is not None for chunk in group):
+                group = sorted(group, key=lambda chunk: chunk.index_id)
             
-            sections.append(section)
-            current_length += len(section)
-        
-        if not sections:
-            # If even the first chunk is too long, truncate it
-            first_chunk = chunks[0]
-            content = first_chunk.content[:max_length - 200]  # Leave room for metadata
-            source_info = ""
-            if first_chunk.metadata:
-                source_name = first_chunk.metadata.get("source", "Unknown")
-                source_info = f"**Source:** {source_name}\n"
+            group_spans: List[Tuple[RetrievedChunk, List[int]]] = [
+                (chunk, [chunk.index_id] if chunk.index_id is not None else []) for chunk in group
+            ]
+            # Merge pairwise until nothing changes, so spans that only connect
+            # through an already merged span (A-B, then AB-C) are joined too
+            merged_any = True
+            while merged_any:
+                merged_any = False
+                for i in range(len(group_spans)):
+                    for j in range(i + 1, len(group_spans)):
+                        merged = self._merge_spans(group_spans[i], group_spans[j])
+                        if merged is not None:
+                            group_spans[i] = merged
+                            del group_spans[j]
+                            merged_any = True
+                            break
+                    if merged_any:
+                        break
             
-            sections.append(f"### Context 1\n{source_info}**Relevance Score:** {first_chunk.score:.3f}\n\n{content}...\n")
+            for span, ids in group_spans:
+                if len(ids) > 1:
+                    metadata = dict(span.metadata)
+                    metadata["merged_index_ids"] = sorted(ids)
+                    span = RetrievedChunk(content=span.content, metadata=metadata, score=span.score, index_id=span.index_id)
+                spans.append(span)
         
-        return "\n".join(sections)
+        return sorted(spans, key=lambda span: span.score, reverse=True)
+    
+    def _merge_spans(
+        self,
+        first: Tuple[RetrievedChunk, List[int]],
+        second: Tuple[RetrievedChunk, List[int]]
+    ) -> Optional[Tuple[RetrievedChunk, List[int]]]:
+        """Merge two (span, index ids) pairs if they overlap or are adjacent; None otherwise."""
+        if first[1] and second[1] and min(second[1]) < min(first[1]):
+            first, second = second, first
+        (span, ids), (other, other_ids) = first, second
+        adjacent = bool(ids and other_ids) and (
+            min(other_ids) == max(ids) + 1 or min(ids) == max(other_ids) + 1
+        )
+        merged = self._join_overlapping(span.content, other.content, adjacent)
+        if merged is None:
+            return None
+        return self._with_content(span, merged, max(span.score, other.score)), ids + other_ids
+    
+    def _join_overlapping(self, first: str, second: str, adjacent: bool) -> Optional[str]:
+        """Join two chunk texts if they overlap (or are adjacent); None otherwise."""
+        first, second = first.strip(), second.strip()
+        if second in first:
+            return first
+        if first in second:
+            return second
+        
+        first_words, second_words = first.split(), second.split()
+        for head, tail, head_words, tail_words in (
+            (first, second, first_words, second_words),
+            (second, first, second_words, first_words),
+        ):
+            limit = min(len(head_words), len(tail_words), MAX_OVERLAP_WORDS)
+            for k in range(limit, MIN_OVERLAP_WORDS - 1, -1):
+                if head_words[-k:] == tail_words[:k]:
+                    return " ".join(head_words + tail_words[k:])
+        
+        if adjacent:
+            return f"{first} {second}"
+        return None
+    
+    def _span_key(self, chunk: RetrievedChunk) -> Tuple[Any, Any]:
+        """Group key for merging: (source file, page)."""
+        metadata = chunk.metadata or {}
+        source = metadata.get("source", metadata.get("filename"))
+        page = metadata.get("page", metadata.get("page_number"))
+        return source, page
+    
+    def _with_content(
+        self, 
+        chunk: RetrievedChunk, 
+        content: str, 
+        score: Optional[float] = None
+    ) -> RetrievedChunk:
+        """Copy a chunk with new content (and optionally a new score)."""
+        return RetrievedChunk(
+            content=content,
+            metadata=chunk.metadata,
+            score=chunk.score if score is None else score,
+            index_id=chunk.index_id
+        )
+    
+    def _format_section(self, number: int, chunk: RetrievedChunk) -> str:
+        """Format a single context section with its source information."""
+        source_info = ""
+        if chunk.metadata:
+            source_name = chunk.metadata.get("source", chunk.metadata.get("filename", "Unknown"))
+            page_info = ""
+            page = chunk.metadata.get("page", chunk.metadata.get("page_number"))
+            if page is not None:
+                page_info = f" (Page {page})"
+            elif "chunk_id" in chunk.metadata:
+                page_info = f" (Section {chunk.metadata['chunk_id']})"
+            
+            source_info = f"**Source:** {source_name}{page_info}\n"
+            if "year" in chunk.metadata:
+                source_info += f"**Year:** {chunk.metadata['year']}\n"
+        
+        return f"### Context {number}\n{source_info}**Relevance Score:** {chunk.score:.3f}\n\n{chunk.content.strip()}\n"
+    
+    def _render_sections(self, spans: List[RetrievedChunk]) -> str:
+        """Render packed spans as numbered context sections."""
+        if not spans:
+            return "No relevant context found."
+        return "\n".join(self._format_section(i, span) for i, span in enumerate(spans, 1))
     
     def build_prompt(
         self, 
@@ -200,7 +408,7 @@ class RAGPromptBuilder:
         template_name: Optional[str] = None,
         include_location_context: bool = True,
         location_names: Optional[List[str]] = None
-    ) -> Dict[str, str]:
+    ) -> Dict[str, Any]:
         """Build a complete RAG prompt with system message, context, and user query.
         
         Args:
@@ -211,7 +419,8 @@ class RAGPromptBuilder:
             location_names: List of location names from query parsing
             
         Returns:
-            Dictionary with 'system', 'context', and 'user' components
+            Dictionary with 'system', 'context', and 'user' components, plus
+            'context_chunks' (the packed spans numbered as Context 1..N)
         """
         # Select template
         if template_name is None:
@@ -223,8 +432,9 @@ class RAGPromptBuilder:
         
         template = self.templates[template_name]
         
-        # Format context sections
-        context_sections = self.format_context_sections(context_chunks, template.max_context_length)
+        # Pack context sections into the template's token budget
+        packed_chunks = self.pack_context(context_chunks, template.context_token_budget)
+        context_sections = self._render_sections(packed_chunks)
         
         # Add location context if requested
         if include_location_context and location_names:
@@ -241,7 +451,9 @@ class RAGPromptBuilder:
             "context": context_message,
             "user": user_message,
             "template_used": template_name,
-            "chunks_used": len(context_chunks)
+            "chunks_used": len(context_chunks),
+            "context_chunks": packed_chunks,
+            "context_tokens": count_tokens(context_sections)
         }
     
     def build_simple_prompt(self, query: str, context_chunks: List[RetrievedChunk]) -> str:
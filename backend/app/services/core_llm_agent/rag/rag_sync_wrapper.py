@@ -2,7 +2,8 @@
 Synchronous RAG Service Wrapper for Core LLM Agent Integration.
 
 This module provides a synchronous wrapper around the async RAG service
-to enable integration with the synchronous service dispatcher.
+to enable integration with the synchronous service dispatcher. Async callers
+should use ServiceDispatcher.dispatch_async, which awaits RAGService directly.
 """
 
 import logging
@@ -12,7 +13,7 @@ from typing import Dict, Any, Optional
 from concurrent.futures import ThreadPoolExecutor
 
 try:
-    from .rag_service import RAGService, create_rag_service
+    from .rag_service import RAGService, create_rag_service, format_dispatch_response
     from ..models.intent import IntentResult
     from ..models.location import LocationParseResult
 except ImportError:
@@ -20,7 +21,7 @@ except ImportError:
     from pathlib import Path
     sys.path.append(str(Path(__file__).parent))
     
-    from rag_service import RAGService, create_rag_service
+    from rag_service import RAGService, create_rag_service, format_dispatch_response
 
 logger = logging.getLogger(__name__)
 
@@ -117,70 +118,7 @@ class SyncRAGService:
             )
             
             # Convert RAG response to service dispatcher format
-            location_names = []
-            if location_result.entities:
-                location_names = [entity.matched_name for entity in location_result.entities]
-            
-            location_text = f"for {', '.join(location_names)} " if location_names else ""
-            
-            if rag_response.success:
-                # Format successful response
-                analysis_text = (
-                    f"📚 RAG Analysis {location_text}\n"
-                    f"{'=' * 50}\n"
-                    f"{rag_response.answer}\n\n"
-                    f"📊 Analysis Details:\n"
-                    f"   • Confidence: {rag_response.confidence:.2f}\n"
-                    f"   • Sources Used: {len(rag_response.sources)}\n"
-                    f"   • Model: {rag_response.model_used}\n"
-                    f"   • Template: {rag_response.template_used}\n"
-                    f"   • Processing Time: {rag_response.processing_time:.2f}s"
-                )
-                
-                # Extract source information
-                sources = []
-                for source in rag_response.sources:
-                    source_info = {
-                        "content": source.get("content", ""),
-                        "metadata": source.get("metadata", {}),
-                        "score": source.get("score", 0.0),
-                        "cited": source.get("cited_in_response", False)
-                    }
-                    if source.get("source_name"):
-                        source_info["source_name"] = source["source_name"]
-                    sources.append(source_info)
-                
-                return {
-                    "analysis": analysis_text,
-                    "roi": None,  # RAG doesn't generate geographic ROI
-                    "evidence": [f"rag_service:success:{rag_response.template_used}"],
-                    "sources": sources,
-                    "confidence": rag_response.confidence,
-                    "rag_metadata": {
-                        "chunks_retrieved": rag_response.chunks_retrieved,
-                        "model_used": rag_response.model_used,
-                        "template_used": rag_response.template_used,
-                        "processing_time": rag_response.processing_time
-                    }
-                }
-            else:
-                # Format error response
-                error_analysis = (
-                    f"📚 RAG Analysis {location_text}\n"
-                    f"{'=' * 50}\n"
-                    f"⚠️ RAG service encountered an error\n"
-                    f"📝 Query: {query}\n"
-                    f"❌ Error: {rag_response.error}\n\n"
-                    f"🔧 Please check the RAG service status and try again."
-                )
-                
-                return {
-                    "analysis": error_analysis,
-                    "roi": None,
-                    "evidence": [f"rag_service:error:{rag_response.error}"],
-                    "sources": [],
-                    "confidence": 0.0
-                }
+            return format_dispatch_response(query, rag_response, location_result)
                 
         except Exception as e:
             logger.error(f"Error in sync RAG service: {e}")
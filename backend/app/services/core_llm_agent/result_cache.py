@@ -0,0 +1,254 @@
+"""
+End-to-end cache for finished GEE query results.
+
+Identical questions ("NDVI of Pune for 2023") otherwise repeat the whole
+pipeline including a multi-minute Earth Engine job. Finished results are
+cached keyed by what was actually computed - (service, analysis type,
+canonical ROI fingerprint, date range, output format) - not by the raw query
+text, so differently worded questions about the same analysis share an entry.
+
+The lifetime of an entry depends on the date range: a period that ended before
+the freshness window is effectively immutable and kept for a long time, while
+a period that includes the current one gets a short TTL because new imagery
+keeps arriving. Results with map tile URLs are additionally capped by the tile
+URL lifetime, since Earth Engine map IDs expire.
+
+An in-memory LRU sits in front of a SQLite file so entries survive restarts
+(storage shared with the other persistent caches, see ttl_cache.py).
+
+Configuration (environment):
+- RESULT_CACHE_ENABLED: "true" (default) / "false"
+- RESULT_CACHE_PATH: SQLite file (default backend/data/query_result_cache.sqlite3)
+- RESULT_CACHE_HISTORICAL_TTL_SECONDS: lifetime for past periods (default 30 days)
+- RESULT_CACHE_CURRENT_TTL_SECONDS: lifetime for periods including today (default 6 hours)
+- RESULT_CACHE_TILE_TTL_SECONDS: cap for results carrying tile URLs (default 12 hours)
+- RESULT_CACHE_FRESHNESS_DAYS: a period is current if it ends within this many days (default 30)
+- RESULT_CACHE_MEMORY_ENTRIES: size of the in-memory LRU (default 256)
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    from .geocode_cache import normalize_place_name
+    from .ttl_cache import PersistentTTLCache, env_enabled
+    from ...utils.geometry_store import ROIGeometryStore
+except ImportError:
+    from app.services.core_llm_agent.geocode_cache import normalize_place_name
+    from app.services.core_llm_agent.ttl_cache import PersistentTTLCache, env_enabled
+    from app.utils.geometry_store import ROIGeometryStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent.parent / "data" / "query_result_cache.sqlite3"
+
+
+def roi_fingerprint(location_result: Any) -> Optional[str]:
+    """Canonical fingerprint of the ROI a query resolved to.
+
+    Mirrors how the dispatcher resolves the ROI: the normalized (name, type)
+    pairs of the matched location entities when there are any, otherwise a
+    hash of the already resolved boundary geometry.
+
+    Args:
+        location_result: LocationParseResult of the query
+
+    Returns:
+        Fingerprint string, or None if the query has no location
+    """
+    entities = getattr(location_result, "entities", None) or []
+    names = sorted(
+        f"{normalize_place_name(entity.matched_name)}/{(entity.type or '').lower()}"
+        for entity in entities if entity.matched_name
+    )
+    if names:
+        return "entities:" + "|".join(names)
+
+    geometry = getattr(location_result, "roi_geometry", None)
+    if isinstance(geometry, dict) and geometry.get("coordinates"):
+        return "geometry:" + ROIGeometryStore.geometry_key(geometry)
+    return None
+
+
+class QueryResultCache(PersistentTTLCache):
+    """In-memory LRU backed by SQLite for finished query results."""
+
+    TABLE = "query_result_cache"
+    COLUMNS = ("service", "analysis_type", "roi", "start_date", "end_date")
+    LABEL = "Query result cache"
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        historical_ttl_seconds: float = 30 * 24 * 3600,
+        current_ttl_seconds: float = 6 * 3600,
+        tile_ttl_seconds: float = 12 * 3600,
+        freshness_days: int = 30,
+        max_memory_entries: int = 256
+    ):
+        """Initialize the cache.
+
+        Args:
+            db_path: SQLite file path (None keeps the cache in memory only)
+            historical_ttl_seconds: Lifetime of results for periods in the past
+            current_ttl_seconds: Lifetime of results for periods including today
+            tile_ttl_seconds: Lifetime cap for results carrying map tile URLs
+            freshness_days: Periods ending within this many days count as current
+            max_memory_entries: Number of entries kept in the in-memory LRU
+        """
+        self.historical_ttl_seconds = historical_ttl_seconds
+        self.current_ttl_seconds = current_ttl_seconds
+        self.tile_ttl_seconds = tile_ttl_seconds
+        self.freshness_days = freshness_days
+
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "skipped": 0}
+
+        super().__init__(db_path, max_memory_entries)
+
+    @staticmethod
+    def make_key(
+        service: str,
+        analysis_type: str,
+        roi: str,
+        period: Tuple[str, str],
+        variant: str = ""
+    ) -> str:
+        """Build the cache key for a resolved analysis.
+
+        Args:
+            service: Service type ("GEE", ...)
+            analysis_type: Analysis type ("ndvi", "lst", ...)
+            roi: Canonical ROI fingerprint (see roi_fingerprint)
+            period: (start_date, end_date) ISO dates that were analysed
+            variant: Output format variant (e.g. "debug")
+
+        Returns:
+            Hex digest key
+        """
+        raw = "\x1f".join([service.upper(), analysis_type.lower(), roi, period[0], period[1], variant])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, period: Tuple[str, str], result: Optional[Dict[str, Any]] = None) -> float:
+        """Lifetime of a result for a date range.
+
+        Args:
+            period: (start_date, end_date) ISO dates that were analysed
+            result: Result being stored (tile URLs cap the lifetime)
+
+        Returns:
+            TTL in seconds
+        """
+        try:
+            end = date.fromisoformat(period[1])
+            current = end >= date.today() - timedelta(days=self.freshness_days)
+        except (TypeError, ValueError):
+            current = True
+
+        ttl = self.current_ttl_seconds if current else self.historical_ttl_seconds
+        analysis_data = (result or {}).get("analysis_data") or {}
+        if analysis_data.get("tile_url") or analysis_data.get("urlFormat"):
+            ttl = min(ttl, self.tile_ttl_seconds)
+        return ttl
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Look up a cached result.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            (result, age_seconds) tuple, or None on a miss
+        """
+        entry = self._lookup(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+        self._stats[f"{entry.tier}_hits"] += 1
+        return json.loads(entry.value), time.time() - entry.created_at
+
+    def set(
+        self,
+        key: str,
+        result: Dict[str, Any],
+        service: str,
+        analysis_type: str,
+        roi: str,
+        period: Tuple[str, str]
+    ) -> None:
+        """Store a finished result.
+
+        Args:
+            key: Cache key from make_key
+            result: Final result dictionary (JSON-serializable)
+            service: Service type
+            analysis_type: Analysis type
+            roi: Canonical ROI fingerprint
+            period: (start_date, end_date) ISO dates that were analysed
+        """
+        try:
+            value = json.dumps(result)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Result not cacheable: {e}")
+            self._stats["skipped"] += 1
+            return
+
+        self._put(
+            key, value, self.ttl_for(period, result),
+            service=service, analysis_type=analysis_type, roi=roi, start_date=period[0], end_date=period[1]
+        )
+        self._stats["stores"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss statistics.
+
+        Returns:
+            Dictionary with counters, hit ratio and TTL configuration
+        """
+        hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+        lookups = hits + self._stats["misses"]
+
+        return {
+            **self._stats,
+            "lookups": lookups,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            **self.storage_stats(),
+            "historical_ttl_seconds": self.historical_ttl_seconds,
+            "current_ttl_seconds": self.current_ttl_seconds,
+            "tile_ttl_seconds": self.tile_ttl_seconds
+        }
+
+
+_cache: Optional[QueryResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[QueryResultCache]:
+    """Get the process-wide query result cache.
+
+    Returns:
+        Shared QueryResultCache, or None if disabled via RESULT_CACHE_ENABLED
+    """
+    global _cache
+
+    if not env_enabled("RESULT_CACHE_ENABLED"):
+        return None
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QueryResultCache(
+                    db_path=os.environ.get("RESULT_CACHE_PATH", str(DEFAULT_CACHE_PATH)) or None,
+                    historical_ttl_seconds=float(os.environ.get("RESULT_CACHE_HISTORICAL_TTL_SECONDS", 30 * 24 * 3600)),
+                    current_ttl_seconds=float(os.environ.get("RESULT_CACHE_CURRENT_TTL_SECONDS", 6 * 3600)),
+                    tile_ttl_seconds=float(os.environ.get("RESULT_CACHE_TILE_TTL_SECONDS", 12 * 3600)),
+                    freshness_days=int(os.environ.get("RESULT_CACHE_FRESHNESS_DAYS", "30")),
+                    max_memory_entries=int(os.environ.get("RESULT_CACHE_MEMORY_ENTRIES", "256"))
+                )
+    return _cache
@@ -2,25 +2,61 @@
 Simple Step Processor - Uses existing working analysis endpoints
 Instead of recreating everything manually, just call the working endpoints
 and show real-time progress steps.
+
+Analyses run as GEE service jobs: the progress the GEE service publishes
+(collection loaded, composite built, each tile reduced) is streamed as it
+happens, and the result is streamed as soon as the job finishes. Calls are
+async (in-process when the GEE service is mounted in this app), so a long
+analysis does not block other clients.
 """
 
+import json
+import time
 import asyncio
 import logging
-import os
 from typing import Dict, Any, AsyncGenerator
 
+import httpx
+
+try:
+    from ...utils.geometry_store import get_geometry_store
+    from ...utils.geojson_utils import count_coordinates, geometry_area_km2
+    from ...gee_service.latency_model import get_latency_model
+    from ...gee_service.jobs import get_job_manager
+    from ...service_locator import get_service_locator
+    from ...config_urls import get_service_url
+    from .http_client import get_async_client
+except ImportError:
+    from app.utils.geometry_store import get_geometry_store
+    from app.utils.geojson_utils import count_coordinates, geometry_area_km2
+    from app.gee_service.latency_model import get_latency_model
+    from app.gee_service.jobs import get_job_manager
+    from app.service_locator import get_service_locator
+    from app.config_urls import get_service_url
+    from app.services.core_llm_agent.http_client import get_async_client
+
 logger = logging.getLogger(__name__)
 
 class SimpleStepProcessor:
     """Simple step processor that uses existing working analysis endpoints"""
     
+    # Stream progress range covered by the GEE job's own progress
+    JOB_PROGRESS_START = 30
+    JOB_PROGRESS_END = 90
+    
+    # A user is watching the stream: admit it ahead of bulk jobs
+    GEE_REQUEST_HEADERS = {"X-Request-Priority": "interactive"}
+    
     def __init__(self):
-        pass
+        self.service_locator = get_service_locator()
     
     async def process_analysis_steps(self, roi: Dict, user_prompt: str) -> AsyncGenerator[Dict[str, Any], None]:
         """Process analysis using existing working endpoints"""
         analysis_type = self._detect_analysis_type(user_prompt)
         
+        # Analyses run on the Earth Engine level of detail of the ROI
+        roi = self._roi_level_of_detail(roi, "gee")
+        
         if analysis_type == "water":
             async for step in self.process_water_analysis_steps(roi, user_prompt):
                 yield step
@@ -45,8 +81,19 @@ class SimpleStepProcessor:
         else:
             return "ndvi"  # Default to NDVI/LULC analysis (most common)
     
-    def _get_optimized_parameters(self, roi: Dict) -> Dict[str, Any]:
+    def _get_optimized_parameters(self, roi: Dict, analysis_type: str = "ndvi", days: int = 92) -> Dict[str, Any]:
         """Get optimized parameters based on ROI size to prevent timeouts"""
+        # Finest scale meeting the latency SLO, once the latency model has history for this analysis
+        model = get_latency_model()
+        if model is not None:
+            try:
+                params = model.choose_parameters(analysis_type, geometry_area_km2(roi), days)
+            except Exception as e:
+                logger.warning(f"⚠️ Latency model unavailable, using area buckets: {e}")
+                params = None
+            if params is not None:
+                return params
+        
         # Estimate area from geometry (rough calculation)
         area_km2 = self._estimate_area_km2(roi)
         
@@ -98,8 +145,6 @@ class SimpleStepProcessor:
     async def _get_fallback_analysis(self, analysis_type: str, roi: Dict, user_prompt: str) -> Dict[str, Any]:
         """Get fallback analysis from search service when GEE service is unavailable"""
         try:
-            import requests
-            
             # Extract location name from ROI or use a default
             location_name = "the area"  # Default fallback
             
@@ -108,8 +153,8 @@ class SimpleStepProcessor:
                 location_name = roi["properties"]["name"]
             
             # Call search service for fallback analysis
-            response = requests.post(
-                f"{os.getenv('SERVICE_BASE_URL', 'http://localhost:8000')}/search/environmental-context",
+            response = await self.service_locator.request(
+                "search", "POST", "/search/environmental-context",
                 json={
                     "location": location_name,
                     "analysis_type": analysis_type,
@@ -155,6 +200,146 @@ class SimpleStepProcessor:
                 "fallback_analysis": True
             }
     
+    async def _stream_gee_analysis(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        timeout: float
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Run a GEE analysis as a job and yield its progress as stream steps.
+        
+        The last item is {"analysis_data": result}. Raises httpx errors like
+        a direct call would (connection errors, timeouts, HTTP error statuses)
+        so callers keep their fallbacks. A job that has not finished when the
+        stream ends (timeout, error or client disconnect) is cancelled.
+        """
+        deadline = time.monotonic() + timeout
+        response = await self.service_locator.request(
+            "gee", "POST", path,
+            json=payload,
+            params={"async": "true"},
+            headers=self.GEE_REQUEST_HEADERS,
+            timeout=httpx.Timeout(min(timeout, 60), connect=10)
+        )
+        response.raise_for_status()
+        if response.status_code != 202:
+            # Service without the job API answered synchronously
+            yield {"analysis_data": response.json()}
+            return
+        
+        job_id = response.json()["job_id"]
+        logger.info(f"📥 Streaming progress of GEE job {job_id} ({path})")
+        updates = self._gee_job_updates(job_id, timeout)
+        finished = False
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise httpx.ReadTimeout(f"GEE job {job_id} did not finish within {timeout:.0f}s")
+                try:
+                    job = await asyncio.wait_for(updates.__anext__(), timeout=remaining)
+                except StopAsyncIteration:
+                    raise RuntimeError(f"GEE job {job_id} disappeared before finishing")
+                except asyncio.TimeoutError:
+                    raise httpx.ReadTimeout(f"GEE job {job_id} did not finish within {timeout:.0f}s")
+                
+                if job["status"] == "succeeded":
+                    finished = True
+                    yield {"analysis_data": job["result"]}
+                    return
+                if job["status"] in ("failed", "cancelled"):
+                    finished = True
+                    raise RuntimeError(job.get("error") or f"GEE analysis {job['status']}")
+                
+                span = self.JOB_PROGRESS_END - self.JOB_PROGRESS_START
+                step = {
+                    "step": 2,
+                    "status": "processing",
+                    "message": job.get("message") or "Running analysis...",
+                    "progress": round(self.JOB_PROGRESS_START + span * job.get("progress", 0) / 100),
+                    "details": f"GEE job {job['status']} ({job.get('progress', 0):.0f}%)"
+                }
+                if job.get("partial"):
+                    step["partial_result"] = job["partial"]
+                yield step
+        finally:
+            await updates.aclose()
+            if not finished:
+                await self._cancel_gee_job(job_id)
+    
+    async def _cancel_gee_job(self, job_id: str) -> None:
+        """Cancel a job nobody is waiting for any more (best effort)."""
+        try:
+            response = await self.service_locator.request(
+                "gee", "DELETE", f"/gee/jobs/{job_id}", timeout=httpx.Timeout(10, connect=10)
+            )
+            response.raise_for_status()
+            logger.info(f"🛑 Cancelled abandoned GEE job {job_id}")
+        except Exception as e:
+            logger.warning(f"Could not cancel GEE job {job_id}: {e}")
+    
+    async def _gee_job_updates(self, job_id: str, timeout: float) -> AsyncGenerator[Dict[str, Any], None]:
+        """Job snapshots as they change: from the job manager in-process, over SSE otherwise."""
+        if self.service_locator.is_local("gee"):
+            async for job in get_job_manager().events(job_id):
+                yield job
+            return
+        
+        url = f"{get_service_url()}/gee/jobs/{job_id}/events"
+        async with get_async_client().stream("GET", url, timeout=httpx.Timeout(timeout, connect=10)) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("data: "):
+                    yield json.loads(line[len("data: "):])
+    
+    async def _run_gee_steps(
+        self,
+        analysis_type: str,
+        path: str,
+        payload: Dict[str, Any],
+        timeout: float,
+        roi: Dict,
+        user_prompt: str,
+        result: Dict[str, Any]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Stream a GEE analysis, falling back to the search service when GEE is
+        unreachable, times out or lacks the endpoint. The analysis result is
+        stored in result["analysis_data"].
+        """
+        label = analysis_type.upper()
+        try:
+            async for update in self._stream_gee_analysis(path, payload, timeout):
+                if "analysis_data" in update:
+                    result["analysis_data"] = update["analysis_data"]
+                else:
+                    yield update
+            logger.info(f"✅ {label} analysis completed successfully")
+            
+        except httpx.ConnectError as e:
+            logger.warning(f"⚠️ GEE service not available, using fallback analysis: {e}")
+            # Fallback to search service analysis
+            result["analysis_data"] = await self._get_fallback_analysis(analysis_type, roi, user_prompt)
+            
+        except httpx.TimeoutException as e:
+            logger.warning(f"⚠️ {label} analysis timed out, using fallback analysis: {e}")
+            # Fallback to search service analysis
+            result["analysis_data"] = await self._get_fallback_analysis(analysis_type, roi, user_prompt)
+            
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                logger.warning(f"⚠️ {label} endpoint not found (404), using fallback analysis: {e}")
+                # Fallback to search service analysis
+                result["analysis_data"] = await self._get_fallback_analysis(analysis_type, roi, user_prompt)
+            else:
+                logger.error(f"❌ {label} service failed: {e}")
+                raise
+            
+        except Exception as e:
+            logger.error(f"❌ {label} service failed: {e}")
+            raise
+    
     async def process_water_analysis_steps(self, roi: Dict, user_prompt: str) -> AsyncGenerator[Dict[str, Any], None]:
         """Process water analysis using existing working endpoint"""
         try:
@@ -169,7 +354,9 @@ class SimpleStepProcessor:
                 "progress": 10,
                 "details": "Preparing analysis parameters"
             }
-            await asyncio.sleep(0.5)
+            
+            # Timeout from the latency model (area buckets until it has history)
+            params = self._get_optimized_parameters(roi, "water", days=1)
             
             # Step 2: Call existing working endpoint
             yield {
@@ -180,43 +367,37 @@ class SimpleStepProcessor:
                 "details": "Processing 2000-2021 water occurrence data"
             }
             
-            try:
-                # Use the water service directly instead of HTTP requests
-                from app.gee_service.services.water_service import WaterService
-                water_service = WaterService()
-                
-                # Call the analysis method directly with optimized parameters
-                analysis_data = water_service.analyze_water_presence(
-                    roi,
-                    year=2023,
-                    threshold=20,
-                    include_seasonal=False  # Disable seasonal analysis for faster processing
-                )
-                logger.info("✅ Water analysis completed successfully")
-                
-            except Exception as e:
-                logger.error(f"❌ Water service failed: {e}")
-                raise
+            outcome = {}
+            async for update in self._run_gee_steps(
+                "water", "/water/analyze",
+                {
+                    "roi": roi,
+                    "year": 2023,
+                    "threshold": 20,
+                    "include_seasonal": False  # Disable seasonal analysis for faster processing
+                },
+                params["timeout"], roi, user_prompt, outcome
+            ):
+                yield update
+            analysis_data = outcome["analysis_data"]
             
             # Step 3: Process results
             yield {
                 "step": 3,
                 "status": "processing",
                 "message": "Processing analysis results...",
-                "progress": 60,
+                "progress": 92,
                 "details": "Calculating water coverage statistics"
             }
-            await asyncio.sleep(1)
             
             # Step 4: Generate visualization
             yield {
                 "step": 4,
                 "status": "processing",
                 "message": "Generating interactive map visualization...",
-                "progress": 80,
+                "progress": 96,
                 "details": "Creating tile URLs and interactive features"
             }
-            await asyncio.sleep(1)
             
             # Step 5: Complete
             logger.info(f"🎯 Preparing final result with analysis_data keys: {list(analysis_data.keys()) if analysis_data else 'None'}")
@@ -267,10 +448,9 @@ class SimpleStepProcessor:
                 "progress": 10,
                 "details": "Preparing temperature analysis parameters"
             }
-            await asyncio.sleep(0.5)
             
             # Get optimized parameters based on area size
-            params = self._get_optimized_parameters(roi)
+            params = self._get_optimized_parameters(roi, "lst")
             logger.info(f"🔧 [LST] Using optimized parameters: scale={params['scale']}, maxPixels={params['maxPixels']}, timeout={params['timeout']}")
             
             # Step 2: Call existing working endpoint
@@ -282,70 +462,41 @@ class SimpleStepProcessor:
                 "details": f"Processing thermal infrared data (scale: {params['scale']}m, maxPixels: {params['maxPixels']:.0e})"
             }
             
-            try:
-                # Use HTTP for LST (like static COT does) to avoid EE context issues
-                import requests
-                
-                # Use roi directly as geometry (same as static COT)
-                response = requests.post(
-                    f"{os.getenv('SERVICE_BASE_URL', 'http://localhost:8000')}/lst/land-surface-temperature",
-                    json={
-                        "geometry": roi,
-                        "startDate": "2023-06-01",
-                        "endDate": "2023-08-31",
-                        "includeUHI": True,
-                        "includeTimeSeries": False,
-                        "scale": params["scale"],
-                        "maxPixels": int(params["maxPixels"]),
-                        "exactComputation": params["exactComputation"]
-                    },
-                    timeout=params["timeout"]
-                )
-                response.raise_for_status()
-                analysis_data = response.json()
-                logger.info("✅ LST analysis completed successfully")
-                
-            except requests.exceptions.ConnectionError as e:
-                logger.warning(f"⚠️ GEE service not available, using fallback analysis: {e}")
-                # Fallback to search service analysis
-                analysis_data = await self._get_fallback_analysis("lst", roi, user_prompt)
-                
-            except requests.exceptions.Timeout as e:
-                logger.warning(f"⚠️ LST analysis timed out, using fallback analysis: {e}")
-                # Fallback to search service analysis
-                analysis_data = await self._get_fallback_analysis("lst", roi, user_prompt)
-                
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 404:
-                    logger.warning(f"⚠️ LST endpoint not found (404), using fallback analysis: {e}")
-                    # Fallback to search service analysis
-                    analysis_data = await self._get_fallback_analysis("lst", roi, user_prompt)
-                else:
-                    raise
-                
-            except Exception as e:
-                logger.error(f"❌ LST service failed: {e}")
-                raise
+            outcome = {}
+            async for update in self._run_gee_steps(
+                "lst", "/lst/land-surface-temperature",
+                {
+                    "geometry": roi,
+                    "startDate": "2023-06-01",
+                    "endDate": "2023-08-31",
+                    "includeUHI": True,
+                    "includeTimeSeries": False,
+                    "scale": params["scale"],
+                    "maxPixels": int(params["maxPixels"]),
+                    "exactComputation": params["exactComputation"]
+                },
+                params["timeout"], roi, user_prompt, outcome
+            ):
+                yield update
+            analysis_data = outcome["analysis_data"]
             
             # Step 3: Process results
             yield {
                 "step": 3,
                 "status": "processing",
                 "message": "Processing temperature results...",
-                "progress": 60,
+                "progress": 92,
                 "details": "Calculating temperature statistics"
             }
-            await asyncio.sleep(1)
             
             # Step 4: Generate visualization
             yield {
                 "step": 4,
                 "status": "processing",
                 "message": "Generating thermal visualization...",
-                "progress": 80,
+                "progress": 96,
                 "details": "Creating temperature map tiles"
             }
-            await asyncio.sleep(1)
             
             # Step 5: Complete
             # Simplify ROI for streaming (reduce polygon points to avoid JSON serialization hang)
@@ -394,10 +545,9 @@ class SimpleStepProcessor:
                 "progress": 10,
                 "details": "Preparing NDVI analysis parameters"
             }
-            await asyncio.sleep(0.5)
             
             # Get optimized parameters based on area size
-            params = self._get_optimized_parameters(roi)
+            params = self._get_optimized_parameters(roi, "ndvi")
             logger.info(f"🔧 [NDVI] Using optimized parameters: scale={params['scale']}, maxPixels={params['maxPixels']}, timeout={params['timeout']}")
             
             # Step 2: Call existing working endpoint
@@ -409,70 +559,41 @@ class SimpleStepProcessor:
                 "details": f"Processing NDVI calculations (scale: {params['scale']}m, maxPixels: {params['maxPixels']:.0e})"
             }
             
-            try:
-                # Use HTTP for NDVI (like static COT does) to avoid EE context issues
-                import requests
-                
-                # Use roi directly as geometry (same as static COT)
-                response = requests.post(
-                    f"{os.getenv('SERVICE_BASE_URL', 'http://localhost:8000')}/ndvi/vegetation-analysis",
-                    json={
-                        "geometry": roi,
-                        "startDate": "2023-06-01",
-                        "endDate": "2023-08-31",
-                        "cloudThreshold": 30,
-                        "scale": params["scale"],
-                        "maxPixels": int(params["maxPixels"]),
-                        "includeTimeSeries": False,
-                        "exactComputation": params["exactComputation"]
-                    },
-                    timeout=params["timeout"]
-                )
-                response.raise_for_status()
-                analysis_data = response.json()
-                logger.info("✅ NDVI analysis completed successfully")
-                
-            except requests.exceptions.ConnectionError as e:
-                logger.warning(f"⚠️ GEE service not available, using fallback analysis: {e}")
-                # Fallback to search service analysis
-                analysis_data = await self._get_fallback_analysis("ndvi", roi, user_prompt)
-                
-            except requests.exceptions.Timeout as e:
-                logger.warning(f"⚠️ NDVI analysis timed out, using fallback analysis: {e}")
-                # Fallback to search service analysis
-                analysis_data = await self._get_fallback_analysis("ndvi", roi, user_prompt)
-                
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 404:
-                    logger.warning(f"⚠️ NDVI endpoint not found (404), using fallback analysis: {e}")
-                    # Fallback to search service analysis
-                    analysis_data = await self._get_fallback_analysis("ndvi", roi, user_prompt)
-                else:
-                    raise
-                
-            except Exception as e:
-                logger.error(f"❌ NDVI service failed: {e}")
-                raise
+            outcome = {}
+            async for update in self._run_gee_steps(
+                "ndvi", "/ndvi/vegetation-analysis",
+                {
+                    "geometry": roi,
+                    "startDate": "2023-06-01",
+                    "endDate": "2023-08-31",
+                    "cloudThreshold": 30,
+                    "scale": params["scale"],
+                    "maxPixels": int(params["maxPixels"]),
+                    "includeTimeSeries": False,
+                    "exactComputation": params["exactComputation"]
+                },
+                params["timeout"], roi, user_prompt, outcome
+            ):
+                yield update
+            analysis_data = outcome["analysis_data"]
             
             # Step 3: Process results
             yield {
                 "step": 3,
                 "status": "processing",
                 "message": "Processing vegetation results...",
-                "progress": 60,
+                "progress": 92,
                 "details": "Calculating NDVI statistics"
             }
-            await asyncio.sleep(1)
             
             # Step 4: Generate visualization
             yield {
                 "step": 4,
                 "status": "processing",
                 "message": "Generating vegetation visualization...",
-                "progress": 80,
+                "progress": 96,
                 "details": "Creating NDVI map tiles"
             }
-            await asyncio.sleep(1)
             
             # Step 5: Complete
             # Simplify ROI for streaming (reduce polygon points to avoid JSON serialization hang)
@@ -507,105 +628,43 @@ class SimpleStepProcessor:
                 "details": "Check server logs for details"
             }
     
+    def _roi_level_of_detail(self, roi: dict, level: str) -> dict:
+        """Get a level of detail of an ROI from the shared geometry store, keeping its extra keys."""
+        if not roi or not isinstance(roi, dict) or roi.get('type') not in ('Polygon', 'MultiPolygon'):
+            return roi
+        
+        geometry = get_geometry_store().lod(roi, level)
+        if geometry is roi:
+            return roi
+        return {**roi, 'type': geometry['type'], 'coordinates': geometry['coordinates']}
+    
     def _simplify_roi_for_streaming(self, roi: dict) -> dict:
         """
-        Simplify ROI polygon to reduce JSON size for streaming while preserving accuracy.
-        Uses adaptive simplification with max 1000 points (good balance of accuracy vs speed).
-        For polygons with angular/important features, preserves key vertices.
+        Get the streaming level of detail of the ROI to keep the streamed JSON small.
+        Levels of detail are precomputed per boundary by the ROI geometry store, so
+        this does not re-simplify the full polygon.
         """
         if not roi or not isinstance(roi, dict):
             return roi
         
-        roi_type = roi.get('type')
-        coordinates = roi.get('coordinates')
-        
-        if roi_type != 'Polygon' or not coordinates or not coordinates[0]:
-            return roi
-        
-        outer_ring = coordinates[0]
-        num_points = len(outer_ring)
-        
-        # More generous limit: 1000 points is still fast (~55KB JSON vs 150KB original)
-        MAX_POINTS = 1000
-        
-        # If already small enough, return as-is
-        if num_points <= MAX_POINTS:
-            logger.info(f"ROI already optimal: {num_points} points (≤{MAX_POINTS})")
+        num_points = self._count_roi_points(roi)
+        simplified = self._roi_level_of_detail(roi, "stream")
+        if simplified is roi:
+            logger.info(f"ROI already optimal: {num_points} points")
             return roi
         
-        # Use improved simplification that preserves shape better
-        simplified_ring = self._adaptive_simplify_polygon(outer_ring, MAX_POINTS)
-        
-        logger.info(f"Simplified ROI: {num_points} → {len(simplified_ring)} points (preserved {len(simplified_ring)/num_points*100:.1f}% of detail)")
+        logger.info(f"Simplified ROI: {num_points} → {self._count_roi_points(simplified)} points")
         
         return {
-            'type': 'Polygon',
-            'coordinates': [simplified_ring],
+            'type': simplified['type'],
+            'coordinates': simplified['coordinates'],
             'display_name': roi.get('display_name'),
             'center': roi.get('center')
         }
     
-    def _adaptive_simplify_polygon(self, ring: list, max_points: int) -> list:
-        """
-        Adaptively simplify polygon by preserving vertices with significant angular changes.
-        This preserves important features like corners, bays, and peninsulas.
-        """
-        if len(ring) <= max_points:
-            return ring
-        
-        # Calculate angular change at each vertex
-        angles = []
-        for i in range(1, len(ring) - 1):
-            prev = ring[i - 1]
-            curr = ring[i]
-            next_pt = ring[i + 1]
-            
-            # Calculate angle using vectors
-            v1 = [curr[0] - prev[0], curr[1] - prev[1]]
-            v2 = [next_pt[0] - curr[0], next_pt[1] - curr[1]]
-            
-            # Dot product and magnitudes
-            dot = v1[0] * v2[0] + v1[1] * v2[1]
-            mag1 = (v1[0]**2 + v1[1]**2)**0.5
-            mag2 = (v2[0]**2 + v2[1]**2)**0.5
-            
-            # Avoid division by zero
-            if mag1 > 0 and mag2 > 0:
-                # Angular change (higher = more important vertex)
-                cos_angle = dot / (mag1 * mag2)
-                cos_angle = max(-1, min(1, cos_angle))  # Clamp to [-1, 1]
-                angle_importance = abs(1 - cos_angle)  # 0 = straight line, 2 = sharp turn
-            else:
-                angle_importance = 0
-            
-            angles.append((i, angle_importance))
-        
-        # Always keep first and last points (polygon closure)
-        important_indices = {0, len(ring) - 1}
-        
-        # Sort by importance and keep the most important vertices
-        angles.sort(key=lambda x: x[1], reverse=True)
-        num_to_keep = max_points - 2  # -2 for first and last
-        
-        for i, _ in angles[:num_to_keep]:
-            important_indices.add(i)
-        
-        # Build simplified ring maintaining order
-        simplified = [ring[i] for i in sorted(important_indices)]
-        
-        # Ensure polygon is closed
-        if simplified[0] != simplified[-1]:
-            simplified.append(simplified[0])
-        
-        return simplified
-    
     def _count_roi_points(self, roi: dict) -> int:
         """Count the number of points in an ROI polygon."""
         if not roi or not isinstance(roi, dict):
             return 0
         
-        coordinates = roi.get('coordinates')
-        if not coordinates or not coordinates[0]:
-            return 0
-        
-        return len(coordinates[0])
+        return count_coordinates(roi)
@@ -0,0 +1,283 @@
+"""
+Single-flight coalescing of identical in-flight GEE analyses.
+
+When a shared dashboard link fires the same GEE-backed query from many users
+at once, every request would otherwise start its own multi-minute Earth Engine
+computation. Calls are keyed by their canonical analysis signature (endpoint,
+ROI fingerprint, dates, scale and the other request parameters): the first
+caller executes, concurrent duplicates await the same result.
+
+Within a process, duplicates wait on a shared future (a thread-safe future, so
+callers on different event loops - e.g. run_sync() worker threads - coalesce
+too). Across processes, an optional Redis lock elects one executor per
+signature; the others poll for the result key it publishes, and take over if
+the lock disappears without a result (the executor died or failed). The
+executor renews its lock every third of the lock TTL while the analysis runs,
+so analyses longer than the TTL keep their lock, and a dead executor's lock
+expires within one TTL.
+
+The executing caller gets its own result object; the shared future holds a
+deep copy, so in-place changes by the executor are never seen by duplicates.
+
+Configuration (environment):
+- SINGLE_FLIGHT_ENABLED: "true" (default) / "false"
+- SINGLE_FLIGHT_REDIS_URL: Redis URL for cross-process coalescing (default: in-process only)
+- SINGLE_FLIGHT_LOCK_TTL_SECONDS: lifetime of the executor lock between renewals (default 60)
+- SINGLE_FLIGHT_RESULT_TTL_SECONDS: how long a finished result stays published (default 300)
+- SINGLE_FLIGHT_POLL_SECONDS: result polling interval of waiting processes (default 1.0)
+"""
+
+import os
+import copy
+import json
+import uuid
+import asyncio
+import hashlib
+import logging
+import threading
+import weakref
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+try:
+    from ...utils.geometry_store import ROIGeometryStore
+except ImportError:
+    from app.utils.geometry_store import ROIGeometryStore
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+# Deletes the lock only if this process still owns it
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Extends the lock only if this process still owns it
+_RENEW_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class _LeaderCancelled(Exception):
+    """The executing caller was cancelled; waiting duplicates should retry."""
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same signature into one execution."""
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        lock_ttl_seconds: float = 60,
+        result_ttl_seconds: float = 300,
+        poll_interval_seconds: float = 1.0,
+        namespace: str = "geollm:singleflight"
+    ):
+        """Initialize single-flight coalescing.
+
+        Args:
+            redis_url: Redis URL for cross-process coalescing (None for in-process only)
+            lock_ttl_seconds: Lifetime of the cross-process executor lock (renewed while executing)
+            result_ttl_seconds: How long a finished result stays published in Redis
+            poll_interval_seconds: Result polling interval of waiting processes
+            namespace: Prefix of the Redis keys
+        """
+        self.redis_url = redis_url if REDIS_AVAILABLE else None
+        self.lock_ttl_seconds = lock_ttl_seconds
+        self.result_ttl_seconds = result_ttl_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.namespace = namespace
+
+        if redis_url and not REDIS_AVAILABLE:
+            logger.warning("⚠️ redis package not installed, single-flight coalescing is in-process only")
+
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # Redis clients are bound to the event loop they were created on
+        self._redis_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+        self._stats = {"executions": 0, "coalesced": 0, "remote_hits": 0, "remote_waits": 0, "lock_renewals": 0, "redis_errors": 0}
+
+    @staticmethod
+    def signature(endpoint: str, payload: Dict[str, Any]) -> str:
+        """Canonical signature of an analysis request.
+
+        Geometries are replaced by their content fingerprint, and the remaining
+        parameters (dates, scale, thresholds, ...) are serialized in key order.
+
+        Args:
+            endpoint: Service URL or endpoint path
+            payload: Request payload
+
+        Returns:
+            Hex digest signature
+        """
+        canonical = {}
+        for name, value in payload.items():
+            if isinstance(value, dict) and "coordinates" in value:
+                canonical[name] = "geometry:" + ROIGeometryStore.geometry_key(value)
+            else:
+                canonical[name] = value
+        raw = endpoint + "\x1f" + json.dumps(canonical, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Signature from signature()
+            fn: Coroutine function performing the analysis (result must be JSON-serializable)
+
+        Returns:
+            The analysis result (duplicates receive a copy)
+        """
+        while True:
+            with self._lock:
+                future = self._inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = Future()
+                    self._inflight[key] = future
+
+            if not leader:
+                self._stats["coalesced"] += 1
+                logger.info(f"🔗 Joining in-flight analysis {key[:12]}")
+                try:
+                    return copy.deepcopy(await asyncio.wrap_future(future))
+                except _LeaderCancelled:
+                    continue
+
+            try:
+                result = await self._run_leader(key, fn)
+                future.set_result(copy.deepcopy(result))
+                return result
+            except asyncio.CancelledError:
+                future.set_exception(_LeaderCancelled())
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics.
+
+        Returns:
+            Dictionary with counters and configuration
+        """
+        return {
+            **self._stats,
+            "in_flight": len(self._inflight),
+            "redis_enabled": bool(self.redis_url)
+        }
+
+    async def _run_leader(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Execute as this process's leader, coordinating with other processes via Redis."""
+        client = self._redis_client()
+        if client is None:
+            self._stats["executions"] += 1
+            return await fn()
+
+        lock_key, result_key = f"{self.namespace}:lock:{key}", f"{self.namespace}:result:{key}"
+        owner = uuid.uuid4().hex
+        try:
+            while True:
+                published = await client.get(result_key)
+                if published is not None:
+                    self._stats["remote_hits"] += 1
+                    logger.info(f"🔗 Using analysis {key[:12]} published by another worker")
+                    return json.loads(published)
+                if await client.set(lock_key, owner, nx=True, px=int(self.lock_ttl_seconds * 1000)):
+                    break
+                self._stats["remote_waits"] += 1
+                await asyncio.sleep(self.poll_interval_seconds)
+        except Exception as e:
+            # Redis trouble must not block the analysis; run it locally
+            self._stats["redis_errors"] += 1
+            logger.warning(f"⚠️ Single-flight Redis unavailable ({e}), executing locally")
+            self._stats["executions"] += 1
+            return await fn()
+
+        renewal = asyncio.create_task(self._renew_lock(client, lock_key, owner))
+        try:
+            self._stats["executions"] += 1
+            result = await fn()
+            try:
+                await client.set(result_key, json.dumps(result), ex=max(1, int(self.result_ttl_seconds)))
+            except Exception as e:
+                self._stats["redis_errors"] += 1
+                logger.warning(f"Single-flight result publish failed: {e}")
+            return result
+        finally:
+            renewal.cancel()
+            try:
+                await client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, owner)
+            except Exception as e:
+                logger.debug(f"Single-flight lock release failed: {e}")
+
+    async def _renew_lock(self, client: Any, lock_key: str, owner: str) -> None:
+        """Keep extending the executor lock while the analysis runs."""
+        ttl_ms = int(self.lock_ttl_seconds * 1000)
+        while True:
+            await asyncio.sleep(self.lock_ttl_seconds / 3)
+            try:
+                if not await client.eval(_RENEW_LOCK_SCRIPT, 1, lock_key, owner, ttl_ms):
+                    logger.warning(f"⚠️ Single-flight lock for {lock_key[-12:]} was lost, another worker may duplicate it")
+                    return
+                self._stats["lock_renewals"] += 1
+            except Exception as e:
+                # Keep trying: the lock is still valid until its TTL runs out
+                self._stats["redis_errors"] += 1
+                logger.debug(f"Single-flight lock renewal failed: {e}")
+
+    def _redis_client(self) -> Optional[Any]:
+        """Get the Redis client for the running event loop (None if not configured)."""
+        if not self.redis_url:
+            return None
+        loop = asyncio.get_running_loop()
+        client = self._redis_clients.get(loop)
+        if client is None:
+            client = redis.from_url(self.redis_url, decode_responses=True)
+            self._redis_clients[loop] = client
+        return client
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """Get the process-wide single-flight coordinator.
+
+    Returns:
+        Shared SingleFlight, or None if disabled via SINGLE_FLIGHT_ENABLED
+    """
+    global _single_flight
+
+    if os.environ.get("SINGLE_FLIGHT_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight(
+                    redis_url=os.environ.get("SINGLE_FLIGHT_REDIS_URL") or None,
+                    lock_ttl_seconds=float(os.environ.get("SINGLE_FLIGHT_LOCK_TTL_SECONDS", "60")),
+                    result_ttl_seconds=float(os.environ.get("SINGLE_FLIGHT_RESULT_TTL_SECONDS", "300")),
+                    poll_interval_seconds=float(os.environ.get("SINGLE_FLIGHT_POLL_SECONDS", "1.0"))
+                )
+    return _single_flight
@@ -0,0 +1,196 @@
+"""
+Shared storage for the persistent caches.
+
+The LLM classification cache, the geocode cache and the query result cache
+all keep an in-memory LRU in front of a SQLite table, with a lifetime per
+entry. PersistentTTLCache implements that storage once; subclasses only
+define the table, the metadata columns stored next to each value, how keys
+are built and how values are serialized.
+
+Every table has the columns (key, value, created_at, expires_at) followed by
+the subclass's metadata columns. A NULL value is a negative entry ("looked up,
+nothing found"). A table left over from an older layout is dropped and
+recreated, since it only holds cached data.
+"""
+
+import os
+import time
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def env_enabled(name: str, default: str = "true") -> bool:
+    """Read an on/off switch from the environment ("1", "true" or "yes" enable it)."""
+    return os.environ.get(name, default).lower() in ("1", "true", "yes")
+
+
+class CacheEntry(NamedTuple):
+    """A live entry found by PersistentTTLCache._lookup."""
+
+    value: Optional[str]
+    created_at: float
+    expires_at: float
+    tier: str  # "memory" or "disk"
+
+
+class PersistentTTLCache:
+    """In-memory LRU backed by a SQLite table, with a lifetime per entry.
+
+    Subclasses set TABLE, COLUMNS (metadata columns, stored for inspection
+    and for queries such as LLMClassificationCache.entries) and LABEL (used
+    in log messages), and build their public get/set API on _lookup/_put.
+    """
+
+    TABLE = ""
+    COLUMNS: Tuple[str, ...] = ()
+    LABEL = "Cache"
+
+    def __init__(self, db_path: Optional[str] = None, max_memory_entries: int = 512):
+        """Initialize the storage.
+
+        Args:
+            db_path: SQLite file path (None keeps the cache in memory only)
+            max_memory_entries: Number of entries kept in the in-memory LRU
+        """
+        self.db_path = str(db_path) if db_path else None
+        self.max_memory_entries = max_memory_entries
+
+        # key -> (serialized value or None for a negative entry, created_at, expires_at)
+        self._memory: "OrderedDict[str, Tuple[Optional[str], float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if self.db_path:
+            self._open()
+
+    def _open(self) -> None:
+        """Open the database, (re)creating the table if its layout changed."""
+        columns = ("key", "value", "created_at", "expires_at") + self.COLUMNS
+        try:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+
+            existing = [row[1] for row in self._conn.execute(f"PRAGMA table_info({self.TABLE})")]
+            if existing and tuple(existing) != columns:
+                logger.info(f"{self.LABEL} table layout changed, recreating {self.TABLE}")
+                self._conn.execute(f"DROP TABLE {self.TABLE}")
+
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.TABLE} ("
+                "key TEXT PRIMARY KEY, value TEXT, created_at REAL, expires_at REAL"
+                + "".join(f", {column} TEXT" for column in self.COLUMNS) + ")"
+            )
+            self._conn.commit()
+            self.purge_expired()
+            logger.info(f"💾 {self.LABEL} at {self.db_path}")
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ {self.LABEL} database unavailable ({e}), using memory only")
+            self._conn = None
+
+    def _lookup(self, key: str) -> Optional[CacheEntry]:
+        """Find a live entry in memory, then in the database.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            CacheEntry (tier "memory" or "disk"), or None on a miss
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at, expires_at = entry
+                if now < expires_at:
+                    self._memory.move_to_end(key)
+                    return CacheEntry(value, created_at, expires_at, "memory")
+                del self._memory[key]
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        f"SELECT value, created_at, expires_at FROM {self.TABLE} WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.warning(f"{self.LABEL} read failed: {e}")
+                    row = None
+
+                if row is not None and now < row[2]:
+                    self._remember(key, row[0], row[1], row[2])
+                    return CacheEntry(row[0], row[1], row[2], "disk")
+
+        return None
+
+    def _put(self, key: str, value: Optional[str], ttl_seconds: float, **columns: Any) -> None:
+        """Write an entry to the LRU and the database.
+
+        Args:
+            key: Cache key
+            value: Serialized value (None for a negative entry)
+            ttl_seconds: Lifetime of the entry
+            **columns: Metadata column values (names from COLUMNS)
+        """
+        now = time.time()
+        expires_at = now + ttl_seconds
+
+        with self._lock:
+            self._remember(key, value, now, expires_at)
+
+            if self._conn is not None:
+                names = ("key", "value", "created_at", "expires_at") + self.COLUMNS
+                values = (key, value, now, expires_at) + tuple(columns.get(column) for column in self.COLUMNS)
+                try:
+                    self._conn.execute(
+                        f"INSERT OR REPLACE INTO {self.TABLE} ({', '.join(names)}) "
+                        f"VALUES ({', '.join('?' for _ in names)})",
+                        values
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"{self.LABEL} write failed: {e}")
+
+    def purge_expired(self) -> int:
+        """Delete expired entries from the database.
+
+        Returns:
+            Number of rows removed
+        """
+        if self._conn is None:
+            return 0
+        try:
+            cursor = self._conn.execute(f"DELETE FROM {self.TABLE} WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"{self.LABEL} purge failed: {e}")
+            return 0
+
+    def clear(self) -> None:
+        """Remove every cached entry (memory and database)."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                try:
+                    self._conn.execute(f"DELETE FROM {self.TABLE}")
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"{self.LABEL} clear failed: {e}")
+
+    def storage_stats(self) -> Dict[str, Any]:
+        """Size and persistence of the storage (merged into subclass stats)."""
+        return {"memory_entries": len(self._memory), "persistent": self._conn is not None}
+
+    def _remember(self, key: str, value: Optional[str], created_at: float, expires_at: float) -> None:
+        """Insert into the in-memory LRU, evicting the least recently used entry."""
+        self._memory[key] = (value, created_at, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
@@ -6,16 +6,20 @@ for optimal accuracy and performance in geospatial query analysis.
 """
 
 import re
+import json
 import time
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 
 try:
-    import requests
-    import json
-    REQUESTS_AVAILABLE = True
+    from ..core_llm_agent.openrouter_client import get_openrouter_client, OpenRouterClient
+    OPENROUTER_CLIENT_AVAILABLE = True
 except ImportError:
-    REQUESTS_AVAILABLE = False
+    try:
+        from app.services.core_llm_agent.openrouter_client import get_openrouter_client, OpenRouterClient
+        OPENROUTER_CLIENT_AVAILABLE = True
+    except ImportError:
+        OPENROUTER_CLIENT_AVAILABLE = False
 
 try:
     from dotenv import load_dotenv
@@ -115,7 +119,7 @@ class HybridQueryAnalyzer:
             import os
             self.openrouter_api_key = os.environ.get("OPENROUTER_API_KEY", "").strip()
             
-        self.llm_available = REQUESTS_AVAILABLE and self.openrouter_api_key
+        self.llm_available = OPENROUTER_CLIENT_AVAILABLE and self.openrouter_api_key
         
         # Confidence thresholds
         self.HIGH_CONFIDENCE_THRESHOLD = 0.8  # Use regex result directly
@@ -207,15 +211,7 @@ Respond with JSON only:
 }}"""
 
         try:
-            # Use OpenRouter API (same as your core_llm_agent.py approach)
-            url = "https://openrouter.ai/api/v1/chat/completions"
-            headers = {
-                "Authorization": f"Bearer {self.openrouter_api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "http://localhost",
-                "X-Title": "GeoLLM Hybrid Query Analyzer",
-            }
-            
+            # Use the shared OpenRouter client (pooled connections, retry, usage stats)
             payload = {
                 "model": "deepseek/deepseek-r1:free",  # Same as your main model
                 "messages": [{"role": "user", "content": prompt}],
@@ -224,15 +220,14 @@ Respond with JSON only:
                 "response_format": {"type": "json_object"},
             }
             
-            resp = requests.post(url, headers=headers, data=json.dumps(payload), timeout=20)
-            resp.raise_for_status()
-            data = resp.json()
-            content = (
-                data.get("choices", [{}])[0]
-                .get("message", {})
-                .get("content", "")
-                .strip()
+            data = get_openrouter_client().chat_completion_sync(
+                payload,
+                timeout=20,
+                component="hybrid_query_analyzer",
+                api_key=self.openrouter_api_key,
+                app_title="GeoLLM Hybrid Query Analyzer"
             )
+            content = OpenRouterClient.message_content(data)
             
             if not content:
                 return {"error": "Empty response from LLM"}
@@ -10,10 +10,11 @@ Extracts and validates ROI from various sources:
 
 import re
 import os
-import requests
 from typing import List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
 
+from app.service_locator import get_service_locator
+
 # Try to import geocoding libraries
 try:
     from geopy.geocoders import GoogleV3
@@ -362,8 +363,10 @@ class ROIHandler:
         try:
             print(f"🔍 ROI Handler: Calling Search API for {location_name} (type: {location_type})")
             print(f"🔍 ROI Handler: Using URL: {self.search_api_url}/search/location-data")
-            response = requests.post(
-                f"{self.search_api_url}/search/location-data",
+            # In-process when the search service is mounted in this app, HTTP otherwise
+            response = get_service_locator().request_sync(
+                "search", "POST", "/search/location-data",
+                base_url=self.search_api_url,
                 json={
                     "location_name": location_name,
                     "location_type": location_type
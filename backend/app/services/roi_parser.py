@@ -3,8 +3,12 @@
 # 1. Gazetteer is a list of all the valid locations of indian cities from json file
 # 2.Fuzzy match finds the best match for the queried city name if the spelling is incorrect
 # 3.Using n-grams to match the multi word cities by checking group of words together
+# 4.A matching index built once at import: exact-hit hash map, then a character-trigram
+#   candidate filter, so only a few candidates are scored (batched with process.cdist)
 
 import json
+from collections import defaultdict
+import numpy as np
 from rapidfuzz import process, fuzz
 import os
 
@@ -32,6 +36,94 @@ original_gazetteer.extend([(state, "state") for state in data.keys()])
 gazetteer_map = {name.lower(): (name, type_) for name, type_ in original_gazetteer}
 lowercase_gazetteer = list(gazetteer_map.keys())
 
+# Candidate filter settings: a gazetteer name is scored only if it shares at least
+# MIN_TRIGRAM_OVERLAP of the n-gram's character trigrams (best MAX_CANDIDATES kept)
+MIN_TRIGRAM_OVERLAP = 0.3
+MAX_CANDIDATES = 50
+
+
+def char_trigrams(text):
+    """Character trigrams of a padded string (word starts/ends get their own trigrams)."""
+    padded = f"  {text} "
+    return {padded[i:i+3] for i in range(len(padded) - 2)}
+
+
+# Trigram -> indices into lowercase_gazetteer (built once at import)
+trigram_index = defaultdict(list)
+for _index, _name in enumerate(lowercase_gazetteer):
+    for _trigram in char_trigrams(_name):
+        trigram_index[_trigram].append(_index)
+
+
+def candidate_indices(query_ngram):
+    """
+    Returns gazetteer indices worth scoring for an n-gram, in gazetteer order.
+    Cost depends on the n-gram's trigram postings, not on the gazetteer size.
+    """
+    trigrams = char_trigrams(query_ngram)
+    shared = defaultdict(int)
+    for trigram in trigrams:
+        for index in trigram_index.get(trigram, ()):
+            shared[index] += 1
+
+    min_shared = max(1, int(len(trigrams) * MIN_TRIGRAM_OVERLAP))
+    hits = sorted(
+        ((count, index) for index, count in shared.items() if count >= min_shared),
+        key=lambda hit: (-hit[0], hit[1])
+    )
+    return sorted(index for _, index in hits[:MAX_CANDIDATES])
+
+
+def _build_match(query_ngram, matched_name_lower, score):
+    """Builds a match dict with the original cased name and type."""
+    original_name, type_ = gazetteer_map[matched_name_lower]
+    return {
+        "query_text": query_ngram,
+        "matched_name": original_name,
+        "type": type_,
+        "confidence": score
+    }
+
+
+def match_ngrams(query_ngrams, confidence_threshold=85):
+    """
+    Matches lowercase n-grams against the gazetteer in one batch.
+    Exact names are answered from the hash map; the rest are scored with a single
+    process.cdist call over the union of their trigram candidates.
+    Returns a dict of n-gram -> match for n-grams scoring above the threshold.
+    """
+    matches = {}
+    pending = []
+
+    for query_ngram in dict.fromkeys(query_ngrams):
+        if query_ngram in gazetteer_map:
+            matches[query_ngram] = _build_match(query_ngram, query_ngram, 100.0)
+            continue
+        candidates = candidate_indices(query_ngram)
+        if candidates:
+            pending.append((query_ngram, candidates))
+
+    if not pending:
+        return matches
+
+    columns = sorted({index for _, candidates in pending for index in candidates})
+    column_of = {index: column for column, index in enumerate(columns)}
+    scores = process.cdist(
+        [query_ngram for query_ngram, _ in pending],
+        [lowercase_gazetteer[index] for index in columns],
+        scorer=fuzz.WRatio
+    )
+
+    for row, (query_ngram, candidates) in enumerate(pending):
+        row_scores = scores[row, [column_of[index] for index in candidates]]
+        # argmax returns the first best candidate, matching extractOne's tie-breaking
+        best = int(np.argmax(row_scores))
+        score = float(row_scores[best])
+        if score >= confidence_threshold:
+            matches[query_ngram] = _build_match(query_ngram, lowercase_gazetteer[candidates[best]], score)
+
+    return matches
+
 def generate_ngrams(tokens, max_n=3):
     ngrams = []
     for n in range(1, max_n + 1):
@@ -44,21 +136,7 @@ def fuzzy_match_place(query_ngram, confidence_threshold=85):
     Finds the best match for a lowercase n-gram from the lowercase gazetteer.
     Returns the original cased name and type if a match is found.
     """
-    # Match against the all-lowercase gazetteer
-    result = process.extractOne(query_ngram, lowercase_gazetteer, scorer=fuzz.WRatio)
-    
-    if result:
-        matched_name_lower, score, _ = result
-        if score >= confidence_threshold:
-            # Retrieve the original cased name and type from the map
-            original_name, type_ = gazetteer_map[matched_name_lower]
-            return {
-                "query_text": query_ngram,
-                "matched_name": original_name,
-                "type": type_,
-                "confidence": score
-            }
-    return None
+    return match_ngrams([query_ngram], confidence_threshold).get(query_ngram)
 
 def roi_parser(user_query, max_ngram_size=3):
     # Convert the entire query to lowercase for consistent processing
@@ -67,6 +145,11 @@ def roi_parser(user_query, max_ngram_size=3):
     all_ngrams = generate_ngrams(tokens, max_n=max_ngram_size)
     sorted_ngrams = sorted(all_ngrams, key=len, reverse=True)
     
+    # Score every stopword-free n-gram in one batch against the index
+    ngram_matches = match_ngrams(
+        [ngram for ngram in all_ngrams if not any(token in STOPWORDS for token in ngram.split())]
+    )
+    
     found_locations = []
     used_tokens = [False] * len(tokens) 
     
@@ -87,10 +170,11 @@ def roi_parser(user_query, max_ngram_size=3):
         if any(token in STOPWORDS for token in ngram_tokens):
             continue
             
-        # Pass the lowercase ngram to the matching function
-        match = fuzzy_match_place(ngram)
+        # Look up the batched match for the lowercase ngram
+        match = ngram_matches.get(ngram)
         
         if match:
+            match = dict(match)
             # Use the original query text for the matched part
             original_ngram_tokens = user_query.split()[start_index : start_index + len(ngram_tokens)]
             match["query_text"] = " ".join(original_ngram_tokens)
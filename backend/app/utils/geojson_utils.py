@@ -0,0 +1,499 @@
+"""
+GeoJSON geometry helpers.
+
+Small utilities for working with GeoJSON geometries returned by
+Nominatim/Overpass before they are cached, streamed or sent to Earth Engine.
+Douglas-Peucker simplification is vectorized with NumPy: all pending splits
+of a line are evaluated in one array pass per recursion level.
+"""
+
+import math
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+INF = float("inf")
+
+# Mean Earth radius in kilometers
+EARTH_RADIUS_KM = 6371.0088
+
+
+def simplify_line(coords: List[List[float]], tolerance: float) -> List[List[float]]:
+    """Simplify a coordinate sequence with the Douglas-Peucker algorithm.
+
+    Args:
+        coords: List of [lng, lat] positions
+        tolerance: Maximum allowed deviation (in degrees)
+
+    Returns:
+        Simplified list of positions (first and last positions are kept)
+    """
+    if len(coords) < 3 or tolerance <= 0:
+        return list(coords)
+
+    # Douglas-Peucker keeps exactly the positions more significant than the tolerance
+    significance = line_significance(coords)
+    return [coords[i] for i in np.flatnonzero(significance > tolerance)]
+
+
+def simplify_ring(ring: List[List[float]], tolerance: float) -> Optional[List[List[float]]]:
+    """Simplify a closed polygon ring.
+
+    Args:
+        ring: Closed list of [lng, lat] positions
+        tolerance: Maximum allowed deviation (in degrees)
+
+    Returns:
+        Simplified closed ring, or None if it collapses below 4 positions
+    """
+    if len(ring) < 4:
+        return None
+
+    simplified = simplify_line(ring, tolerance)
+    if len(simplified) < 4:
+        # Too aggressive for this ring: keep the original rather than degenerating it
+        return ring
+    if simplified[0] != simplified[-1]:
+        simplified.append(simplified[0])
+    return simplified
+
+
+def simplify_geometry(geometry: Dict[str, Any], tolerance: float = 0.001) -> Dict[str, Any]:
+    """Simplify a GeoJSON Polygon/MultiPolygon/LineString geometry.
+
+    Other geometry types are returned unchanged. Interior rings that collapse
+    are dropped; polygons whose exterior ring collapses are kept as-is.
+
+    Args:
+        geometry: GeoJSON geometry dictionary
+        tolerance: Maximum allowed deviation (in degrees, 0.001 ≈ 100 m)
+
+    Returns:
+        New simplified GeoJSON geometry dictionary
+    """
+    if not geometry or tolerance <= 0:
+        return geometry
+
+    geometry_type = geometry.get("type")
+    coordinates = geometry.get("coordinates")
+
+    def simplify_polygon(rings: List[List[List[float]]]) -> List[List[List[float]]]:
+        exterior = simplify_ring(rings[0], tolerance) or rings[0]
+        interiors = [r for r in (simplify_ring(ring, tolerance) for ring in rings[1:]) if r]
+        return [exterior] + interiors
+
+    if geometry_type == "Polygon" and coordinates:
+        return {"type": "Polygon", "coordinates": simplify_polygon(coordinates)}
+    if geometry_type == "MultiPolygon" and coordinates:
+        return {"type": "MultiPolygon", "coordinates": [simplify_polygon(p) for p in coordinates if p]}
+    if geometry_type == "LineString" and coordinates:
+        return {"type": "LineString", "coordinates": simplify_line(coordinates, tolerance)}
+    return geometry
+
+
+def _as_xy(coords: List[List[float]]) -> np.ndarray:
+    """[lng, lat] columns of a coordinate sequence as a float array."""
+    try:
+        return np.asarray(coords, dtype=float)[:, :2]
+    except ValueError:
+        # Positions of mixed dimension (some with altitude)
+        return np.array([c[:2] for c in coords], dtype=float)
+
+
+def _segment_distances(points: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Row-wise distance from points to the segments starts-ends (in coordinate units)."""
+    delta = ends - starts
+    length2 = np.einsum("ij,ij->i", delta, delta)
+    offset = points - starts
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.where(length2 > 0, np.einsum("ij,ij->i", offset, delta) / length2, 0.0)
+    nearest = starts + np.clip(t, 0.0, 1.0)[:, None] * delta
+    return np.hypot(points[:, 0] - nearest[:, 0], points[:, 1] - nearest[:, 1])
+
+
+def line_significance(coords: List[List[float]]) -> np.ndarray:
+    """Douglas-Peucker significance of every position in a coordinate sequence.
+
+    A position's significance is the largest tolerance at which Douglas-Peucker
+    would still keep it (capped by its parent split, so it is monotone). Keeping
+    the k most significant positions gives the Douglas-Peucker simplification
+    with k positions, so any vertex budget can be served from one pass.
+
+    Every split of one recursion level is computed in a single vectorized pass,
+    so the Python overhead grows with the depth of the recursion, not with the
+    number of positions.
+
+    Args:
+        coords: List of [lng, lat] positions
+
+    Returns:
+        Significance per position (endpoints are infinite)
+    """
+    n = len(coords)
+    significance = np.zeros(n)
+    if n == 0:
+        return significance
+    significance[0] = significance[-1] = INF
+    if n < 3:
+        return significance
+
+    xy = _as_xy(coords)
+    firsts = np.array([0])
+    lasts = np.array([n - 1])
+    parents = np.array([INF])
+
+    while firsts.size:
+        interior = lasts - firsts - 1
+        active = interior > 0
+        firsts, lasts, parents, interior = firsts[active], lasts[active], parents[active], interior[active]
+        if not firsts.size:
+            break
+
+        # Flatten the interior positions of every pending split
+        offsets = np.cumsum(interior) - interior
+        split = np.repeat(np.arange(firsts.size), interior)
+        index = firsts[split] + 1 + np.arange(split.size) - offsets[split]
+        distances = _segment_distances(xy[index], xy[firsts[split]], xy[lasts[split]])
+
+        # Farthest position of each split (the first one on ties, like the scalar loop)
+        max_distance = np.maximum.reduceat(distances, offsets)
+        at_max = np.flatnonzero(distances == max_distance[split])
+        _, first_at_max = np.unique(split[at_max], return_index=True)
+        chosen = index[at_max[first_at_max]]
+
+        value = np.minimum(max_distance, parents)
+        significance[chosen] = value
+        firsts, lasts = np.concatenate([firsts, chosen]), np.concatenate([chosen, lasts])
+        parents = np.concatenate([value, value])
+
+    return significance
+
+
+def _polygons(geometry: Dict[str, Any]) -> Optional[List[List[List[List[float]]]]]:
+    """Polygon/MultiPolygon coordinates as a list of polygons (None for other types)."""
+    geometry_type = (geometry or {}).get("type")
+    coordinates = (geometry or {}).get("coordinates") or []
+    if geometry_type == "Polygon":
+        return [coordinates]
+    if geometry_type == "MultiPolygon":
+        return coordinates
+    return None
+
+
+def geometry_significance(geometry: Dict[str, Any]) -> Optional[List[List[np.ndarray]]]:
+    """Per-ring position significance for a Polygon/MultiPolygon.
+
+    Args:
+        geometry: GeoJSON geometry dictionary
+
+    Returns:
+        Nested list [polygon][ring][position], or None for other geometry types
+    """
+    polygons = _polygons(geometry)
+    if polygons is None:
+        return None
+    return [[line_significance(ring) for ring in polygon] for polygon in polygons]
+
+
+def simplify_to_vertex_budget(
+    geometry: Dict[str, Any],
+    max_vertices: int,
+    significance: Optional[List[List[np.ndarray]]] = None
+) -> Dict[str, Any]:
+    """Simplify a Polygon/MultiPolygon to (about) a total vertex budget.
+
+    The most significant positions across all rings are kept. Exterior rings
+    keep at least 4 positions; interior rings that would collapse are dropped.
+
+    Args:
+        geometry: GeoJSON geometry dictionary
+        max_vertices: Target number of positions in the result
+        significance: Precomputed geometry_significance() (computed if None)
+
+    Returns:
+        Simplified GeoJSON geometry (the input itself if already within budget)
+    """
+    polygons = _polygons(geometry)
+    if polygons is None or count_coordinates(geometry) <= max_vertices:
+        return geometry
+
+    if significance is None:
+        significance = geometry_significance(geometry)
+
+    values = np.concatenate([np.asarray(ring, dtype=float) for polygon in significance for ring in polygon] or [np.zeros(0)])
+    finite = values[np.isfinite(values)]
+    keep = max_vertices - (values.size - finite.size)
+    if keep <= 0:
+        threshold = INF
+    elif keep >= finite.size:
+        threshold = -1.0
+    else:
+        # keep-th largest significance without sorting everything
+        threshold = np.partition(finite, finite.size - keep)[finite.size - keep]
+
+    simplified = []
+    for polygon, polygon_significance in zip(polygons, significance):
+        rings = []
+        for ring_index, (ring, ring_significance) in enumerate(zip(polygon, polygon_significance)):
+            ring_significance = np.asarray(ring_significance, dtype=float)
+            kept = np.flatnonzero(ring_significance >= threshold)
+            if kept.size < 4:
+                if ring_index > 0:
+                    continue
+                kept = np.sort(np.argsort(-ring_significance, kind="stable")[:4])
+            rings.append([ring[i] for i in kept])
+        if rings:
+            simplified.append(rings)
+
+    if geometry.get("type") == "Polygon":
+        return {"type": "Polygon", "coordinates": simplified[0]}
+    return {"type": "MultiPolygon", "coordinates": simplified}
+
+
+def count_coordinates(geometry: Dict[str, Any]) -> int:
+    """Count the positions in a GeoJSON geometry.
+
+    Args:
+        geometry: GeoJSON geometry dictionary
+
+    Returns:
+        Number of [lng, lat] positions
+    """
+    def count(value: Any) -> int:
+        if isinstance(value, (list, tuple)) and value and isinstance(value[0], (int, float)):
+            return 1
+        if isinstance(value, (list, tuple)):
+            return sum(count(v) for v in value)
+        return 0
+
+    return count((geometry or {}).get("coordinates", []))
+
+
+def _ring_area_km2(ring: List[List[float]]) -> float:
+    """Approximate area of a closed [lng, lat] ring on the sphere (in km²)."""
+    if len(ring) < 4:
+        return 0.0
+    total = 0.0
+    for (lng1, lat1), (lng2, lat2) in zip((p[:2] for p in ring), (p[:2] for p in ring[1:])):
+        total += math.radians(lng2 - lng1) * (2 + math.sin(math.radians(lat1)) + math.sin(math.radians(lat2)))
+    return abs(total) * EARTH_RADIUS_KM * EARTH_RADIUS_KM / 2.0
+
+
+def geometry_area_km2(geometry: Dict[str, Any]) -> float:
+    """Approximate area of a Polygon/MultiPolygon (holes subtracted).
+
+    Args:
+        geometry: GeoJSON geometry dictionary
+
+    Returns:
+        Area in km² (0 for points, lines and other geometry types)
+    """
+    polygons = _polygons(geometry)
+    if not polygons:
+        return 0.0
+    area = 0.0
+    for polygon in polygons:
+        if polygon:
+            area += _ring_area_km2(polygon[0]) - sum(_ring_area_km2(ring) for ring in polygon[1:])
+    return max(area, 0.0)
+
+
+def geometry_extent(geometry: Dict[str, Any]) -> float:
+    """Larger side of a Polygon/MultiPolygon's bounding box (in degrees).
+
+    Args:
+        geometry: GeoJSON geometry dictionary
+
+    Returns:
+        max(width, height) of the outer rings' bounding box (0 for other geometry types)
+    """
+    polygons = _polygons(geometry)
+    rings = [_as_xy(polygon[0]) for polygon in polygons or [] if polygon and polygon[0]]
+    if not rings:
+        return 0.0
+    points = np.vstack(rings)
+    return float(np.max(points.max(axis=0) - points.min(axis=0)))
+
+
+# Compact wire format: rings as encoded polylines (Google polyline algorithm,
+# lat/lng order, configurable precision). A geometry keeps its "type" and any
+# extra keys; "encoding" and "precision" mark it as encoded.
+GEOMETRY_ENCODING_HEADER = "X-Geometry-Encoding"
+POLYLINE_ENCODING = "polyline"
+DEFAULT_POLYLINE_PRECISION = 5  # 1e-5 degrees ≈ 1 m
+
+_ENCODABLE_TYPES = ("Polygon", "MultiPolygon", "LineString", "MultiLineString")
+
+
+def encode_polyline(coords: List[List[float]], precision: int = DEFAULT_POLYLINE_PRECISION) -> str:
+    """Encode [lng, lat] positions as an encoded polyline string.
+
+    Args:
+        coords: List of [lng, lat] positions
+        precision: Decimal digits kept (5 ≈ 1 m)
+
+    Returns:
+        Encoded polyline (ASCII)
+    """
+    if len(coords) == 0:
+        return ""
+    quantized = np.round(_as_xy(coords)[:, ::-1] * 10 ** precision).astype(np.int64)
+    deltas = np.diff(quantized, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    values = (deltas << 1) ^ (deltas >> 63)  # zigzag: small magnitudes -> small values
+
+    # 5-bit groups per value, least significant first
+    groups = np.ones(values.size, dtype=np.int64)
+    for k in range(1, 13):
+        groups += (values >> (5 * k)) > 0
+    offsets = np.cumsum(groups) - groups
+    owner = np.repeat(np.arange(values.size), groups)
+    k = np.arange(owner.size) - offsets[owner]
+    chunks = (values[owner] >> (5 * k)) & 0x1F
+    chunks |= np.where(k < groups[owner] - 1, 0x20, 0)
+    return (chunks + 63).astype(np.uint8).tobytes().decode("ascii")
+
+
+def decode_polyline(encoded: str, precision: int = DEFAULT_POLYLINE_PRECISION) -> List[List[float]]:
+    """Decode an encoded polyline string to [lng, lat] positions.
+
+    Args:
+        encoded: Encoded polyline (from encode_polyline)
+        precision: Decimal digits used when encoding
+
+    Returns:
+        List of [lng, lat] positions
+    """
+    if not encoded:
+        return []
+    data = np.frombuffer(encoded.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    last = (data & 0x20) == 0
+    starts = np.flatnonzero(np.concatenate([[True], last[:-1]]))
+    owner = np.cumsum(np.concatenate([[0], last[:-1]]))
+    k = np.arange(data.size) - starts[owner]
+    values = np.add.reduceat((data & 0x1F) << (5 * k), starts)
+    deltas = np.where(values & 1, ~(values >> 1), values >> 1)
+    positions = np.cumsum(deltas.reshape(-1, 2), axis=0)[:, ::-1] / 10 ** precision
+    return np.round(positions, precision).tolist()
+
+
+def is_encoded_geometry(value: Any) -> bool:
+    """Whether a value is a geometry in the compact wire format."""
+    return isinstance(value, dict) and value.get("encoding") == POLYLINE_ENCODING and "coordinates" in value
+
+
+def encode_geometry(geometry: Dict[str, Any], precision: int = DEFAULT_POLYLINE_PRECISION) -> Dict[str, Any]:
+    """Encode a Polygon/MultiPolygon/LineString/MultiLineString in the compact wire format.
+
+    Decoding gives back the geometry with coordinates rounded to the precision.
+    Other geometry types (and already encoded geometries) are returned unchanged.
+
+    Args:
+        geometry: GeoJSON geometry dictionary (extra keys are kept)
+        precision: Decimal digits kept (5 ≈ 1 m)
+
+    Returns:
+        Geometry with encoded coordinates
+    """
+    if not isinstance(geometry, dict) or geometry.get("type") not in _ENCODABLE_TYPES or is_encoded_geometry(geometry):
+        return geometry
+    coordinates = geometry.get("coordinates") or []
+    geometry_type = geometry["type"]
+
+    if geometry_type == "LineString":
+        encoded = encode_polyline(coordinates, precision)
+    elif geometry_type == "MultiPolygon":
+        encoded = [[encode_polyline(ring, precision) for ring in polygon] for polygon in coordinates]
+    else:
+        encoded = [encode_polyline(ring, precision) for ring in coordinates]
+    return {**geometry, "coordinates": encoded, "encoding": POLYLINE_ENCODING, "precision": precision}
+
+
+def decode_geometry(geometry: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode a geometry from the compact wire format (plain GeoJSON is returned unchanged).
+
+    Args:
+        geometry: Encoded geometry dictionary
+
+    Returns:
+        GeoJSON geometry dictionary (extra keys are kept)
+    """
+    if not is_encoded_geometry(geometry):
+        return geometry
+    precision = int(geometry.get("precision", DEFAULT_POLYLINE_PRECISION))
+    coordinates = geometry["coordinates"]
+    geometry_type = geometry.get("type")
+
+    if geometry_type == "LineString":
+        decoded = decode_polyline(coordinates, precision)
+    elif geometry_type == "MultiPolygon":
+        decoded = [[decode_polyline(ring, precision) for ring in polygon] for polygon in coordinates]
+    else:
+        decoded = [decode_polyline(ring, precision) for ring in coordinates]
+    plain = {key: value for key, value in geometry.items() if key not in ("encoding", "precision")}
+    plain["coordinates"] = decoded
+    return plain
+
+
+def encode_geometries(value: Any, precision: int = DEFAULT_POLYLINE_PRECISION) -> Any:
+    """Encode every encodable geometry nested in a payload (dicts and lists).
+
+    Args:
+        value: JSON-like payload
+        precision: Decimal digits kept
+
+    Returns:
+        Payload with geometries in the compact wire format (input is not modified)
+    """
+    if isinstance(value, dict):
+        if value.get("type") in _ENCODABLE_TYPES and isinstance(value.get("coordinates"), list):
+            return encode_geometry(value, precision)
+        return {key: encode_geometries(item, precision) for key, item in value.items()}
+    if isinstance(value, list):
+        return [encode_geometries(item, precision) for item in value]
+    return value
+
+
+def decode_geometries(value: Any) -> Any:
+    """Decode every compact geometry nested in a payload (dicts and lists).
+
+    Args:
+        value: JSON-like payload
+
+    Returns:
+        Payload with plain GeoJSON geometries (input is not modified)
+    """
+    if isinstance(value, dict):
+        if is_encoded_geometry(value):
+            return decode_geometry(value)
+        if value.get("type") in _ENCODABLE_TYPES:
+            # Plain geometry: nothing encoded below it
+            return value
+        return {key: decode_geometries(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode_geometries(item) for item in value]
+    return value
+
+
+def requested_geometry_precision(header_value: Optional[str]) -> Optional[int]:
+    """Parse the X-Geometry-Encoding request header.
+
+    Clients opt in with "polyline" (precision 5) or "polylineN" (precision N,
+    1-7). Several comma-separated choices may be listed; the first supported
+    one wins.
+
+    Args:
+        header_value: Header value (None if absent)
+
+    Returns:
+        Polyline precision, or None if the client wants plain GeoJSON
+    """
+    for choice in (header_value or "").split(","):
+        choice = choice.strip().lower()
+        if not choice.startswith(POLYLINE_ENCODING):
+            continue
+        digits = choice[len(POLYLINE_ENCODING):]
+        if not digits:
+            return DEFAULT_POLYLINE_PRECISION
+        if digits.isdigit() and 1 <= int(digits) <= 7:
+            return int(digits)
+    return None
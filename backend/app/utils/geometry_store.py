@@ -0,0 +1,198 @@
+"""
+Multi-resolution ROI geometry store.
+
+Administrative boundaries from Nominatim can carry tens of thousands of
+vertices, but every consumer needs far fewer: Earth Engine computation, map
+display and UI streaming each have their own vertex budget. The store computes
+the Douglas-Peucker significance of a boundary once, precomputes one level of
+detail (LOD) per consumer and caches them, so a request path asks for the LOD
+it needs by vertex budget instead of re-simplifying the full polygon.
+
+Configuration (environment):
+- ROI_LOD_GEE_VERTICES: vertex budget for Earth Engine computation (default 5000)
+- ROI_LOD_DISPLAY_VERTICES: vertex budget for map display (default 2000)
+- ROI_LOD_STREAM_VERTICES: vertex budget for UI streaming (default 1000)
+- ROI_GEOMETRY_STORE_ENTRIES: number of boundaries kept in memory (default 128)
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+try:
+    from .geojson_utils import geometry_significance, simplify_to_vertex_budget, count_coordinates
+except ImportError:
+    from app.utils.geojson_utils import geometry_significance, simplify_to_vertex_budget, count_coordinates
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEVELS = {"gee": 5000, "display": 2000, "stream": 1000}
+
+
+class ROIGeometryStore:
+    """LRU of boundaries with precomputed levels of detail."""
+
+    def __init__(self, levels: Optional[Dict[str, int]] = None, max_entries: int = 128):
+        """Initialize the store.
+
+        Args:
+            levels: Named vertex budgets precomputed for every boundary
+            max_entries: Number of boundaries kept in memory
+        """
+        self.levels = dict(levels or DEFAULT_LEVELS)
+        self.max_entries = max_entries
+
+        # key -> {"geometry", "source", "vertices", "significance", "lods": {budget: {...}}}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # id() of registered geometries -> key (the entry keeps the object alive)
+        self._ids: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+        self._stats = {"requests": 0, "passthrough": 0, "hits": 0, "builds": 0, "lod_builds": 0, "evictions": 0}
+
+    @staticmethod
+    def geometry_key(geometry: Dict[str, Any]) -> str:
+        """Content hash of a geometry (type and coordinates only).
+
+        Args:
+            geometry: GeoJSON geometry dictionary
+
+        Returns:
+            Hex digest key
+        """
+        raw = json.dumps([geometry.get("type"), geometry.get("coordinates")], separators=(",", ":"))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, geometry: Dict[str, Any], max_vertices: int) -> Dict[str, Any]:
+        """Get a version of a geometry with at most (about) max_vertices positions.
+
+        Geometries already within budget (and non-polygon geometries) are
+        returned unchanged. Otherwise the finest precomputed LOD within budget
+        is returned, or one is derived from the cached significance.
+
+        Args:
+            geometry: GeoJSON geometry dictionary (extra keys are ignored)
+            max_vertices: Vertex budget of the consumer
+
+        Returns:
+            GeoJSON geometry dictionary ({"type", "coordinates"})
+        """
+        self._stats["requests"] += 1
+
+        if not geometry or geometry.get("type") not in ("Polygon", "MultiPolygon"):
+            self._stats["passthrough"] += 1
+            return geometry
+        if count_coordinates(geometry) <= max_vertices:
+            self._stats["passthrough"] += 1
+            return geometry
+
+        entry = self._entry(geometry)
+
+        lods = entry["lods"]
+        budget = max((b for b in lods if b <= max_vertices), default=None)
+        if budget is not None and (budget == max_vertices or lods[budget]["vertices"] >= 0.9 * max_vertices):
+            self._stats["hits"] += 1
+            return lods[budget]["geometry"]
+
+        # No close enough LOD: derive one from the cached significance
+        lod = simplify_to_vertex_budget(entry["geometry"], max_vertices, entry["significance"])
+        self._stats["lod_builds"] += 1
+        with self._lock:
+            lods[max_vertices] = {"geometry": lod, "vertices": count_coordinates(lod)}
+            self._ids[id(lod)] = entry["key"]
+        return lod
+
+    def lod(self, geometry: Dict[str, Any], level: str) -> Dict[str, Any]:
+        """Get a named level of detail ("gee", "display" or "stream").
+
+        Args:
+            geometry: GeoJSON geometry dictionary
+            level: Name of a configured level
+
+        Returns:
+            GeoJSON geometry dictionary within the level's vertex budget
+        """
+        return self.get(geometry, self.levels[level])
+
+    def stats(self) -> Dict[str, Any]:
+        """Get store statistics.
+
+        Returns:
+            Dictionary with configured levels, entry count and counters
+        """
+        return {
+            "levels": dict(self.levels),
+            "entries": len(self._entries),
+            **self._stats
+        }
+
+    def _entry(self, geometry: Dict[str, Any]) -> Dict[str, Any]:
+        """Find (or build) the entry for a geometry, precomputing every level."""
+        key = self._ids.get(id(geometry)) or self.geometry_key(geometry)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        clean = {"type": geometry["type"], "coordinates": geometry["coordinates"]}
+        significance = geometry_significance(clean)
+        entry = {"key": key, "geometry": clean, "source": geometry, "vertices": count_coordinates(clean),
+                 "significance": significance, "lods": {}}
+        for budget in sorted(set(self.levels.values())):
+            lod = simplify_to_vertex_budget(clean, budget, significance)
+            entry["lods"][budget] = {"geometry": lod, "vertices": count_coordinates(lod)}
+        self._stats["builds"] += 1
+        logger.info(
+            f"🗺️ Built ROI levels of detail: {entry['vertices']} vertices -> "
+            + ", ".join(f"{name}={entry['lods'][b]['vertices']}" for name, b in self.levels.items())
+        )
+
+        with self._lock:
+            self._entries[key] = entry
+            self._ids[id(geometry)] = key
+            self._ids[id(clean)] = key
+            for lod in entry["lods"].values():
+                self._ids[id(lod["geometry"])] = key
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._forget(evicted)
+                self._stats["evictions"] += 1
+        return entry
+
+    def _forget(self, entry: Dict[str, Any]) -> None:
+        """Drop id() mappings of an evicted entry's geometries."""
+        stale = [obj_id for obj_id, key in self._ids.items() if key == entry["key"]]
+        for obj_id in stale:
+            del self._ids[obj_id]
+
+
+_store: Optional[ROIGeometryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_geometry_store() -> ROIGeometryStore:
+    """Get the process-wide ROI geometry store.
+
+    Returns:
+        Shared ROIGeometryStore configured from the environment
+    """
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ROIGeometryStore(
+                    levels={
+                        "gee": int(os.environ.get("ROI_LOD_GEE_VERTICES", DEFAULT_LEVELS["gee"])),
+                        "display": int(os.environ.get("ROI_LOD_DISPLAY_VERTICES", DEFAULT_LEVELS["display"])),
+                        "stream": int(os.environ.get("ROI_LOD_STREAM_VERTICES", DEFAULT_LEVELS["stream"]))
+                    },
+                    max_entries=int(os.environ.get("ROI_GEOMETRY_STORE_ENTRIES", "128"))
+                )
+    return _store
@@ -0,0 +1,467 @@
+"""
+Request tracing with OpenTelemetry-compatible spans.
+
+A query crosses several stages (NER, intent classification, geocoding,
+dispatch, the GEE computation, formatting) and outbound calls (OpenRouter,
+Nominatim, Tavily, the GEE and search services, RAG). Each of them runs in a
+span; spans of one request share a trace id and form a tree through the
+current span kept in a context variable, so concurrent stages started with
+asyncio.gather and worker threads started with a copied context attach to the
+right parent.
+
+Spans follow the OpenTelemetry data model (128-bit trace ids, 64-bit span ids,
+kind, attributes, status) and are propagated between services with the W3C
+``traceparent`` header. Finished spans go to an in-process exporter that keeps
+the most recent traces in memory, so timing breakdowns work offline without a
+collector. When the OpenTelemetry API is installed, spans are mirrored to it
+as well and reach whatever SDK/exporter the deployment configures. Mirrored
+spans are started in the context of the parent's mirrored span (or of the
+incoming traceparent), so they form the same tree.
+
+Configuration (environment):
+- TRACING_ENABLED: record spans (default true)
+- TRACING_MAX_TRACES: traces kept by the in-process exporter (default 200)
+"""
+
+import os
+import time
+import uuid
+import inspect
+import logging
+import functools
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+try:
+    from opentelemetry import trace as otel_trace
+    OTEL_AVAILABLE = True
+except ImportError:
+    otel_trace = None
+    OTEL_AVAILABLE = False
+
+T = TypeVar("T")
+
+TRACEPARENT_HEADER = "traceparent"
+TRACE_ID_HEADER = "X-Trace-Id"
+
+SPAN_KINDS = ("internal", "server", "client")
+
+
+class Span:
+    """One timed operation of a trace."""
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_span_id", "kind",
+        "start_time", "end_time", "attributes", "status", "status_message"
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_span_id: Optional[str] = None,
+        kind: str = "internal",
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "UNSET"
+        self.status_message: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        """Span duration in milliseconds (None while running)."""
+        return None if self.end_time is None else (self.end_time - self.start_time) * 1000
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Attach an attribute to the span."""
+        self.attributes[key] = value
+
+    def set_error(self, error: Any) -> None:
+        """Mark the span as failed."""
+        self.status = "ERROR"
+        self.status_message = str(error)
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent header value pointing at this span."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Span in the OpenTelemetry JSON shape."""
+        return {
+            "name": self.name,
+            "context": {"trace_id": self.trace_id, "span_id": self.span_id},
+            "parent_id": self.parent_span_id,
+            "kind": f"SPAN_KIND_{self.kind.upper()}",
+            "start_time_unix_nano": int(self.start_time * 1e9),
+            "end_time_unix_nano": int(self.end_time * 1e9) if self.end_time is not None else None,
+            "attributes": self.attributes,
+            "status": {"status_code": f"STATUS_CODE_{self.status}", "description": self.status_message},
+        }
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Parse a W3C traceparent header.
+
+    Args:
+        value: Header value ("00-<trace id>-<parent span id>-<flags>")
+
+    Returns:
+        (trace_id, parent_span_id), or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    trace_id, span_id = parts[1].lower(), parts[2].lower()
+    try:
+        int(trace_id, 16), int(span_id, 16)
+    except ValueError:
+        return None
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id
+
+
+class InMemorySpanExporter:
+    """Keeps finished spans of the most recent traces."""
+
+    def __init__(self, max_traces: int = 200):
+        """Initialize the exporter.
+
+        Args:
+            max_traces: Number of traces kept (oldest evicted first)
+        """
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._exported = 0
+
+    def export(self, span: Span) -> None:
+        """Store a finished span."""
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            spans.append(span)
+            self._exported += 1
+
+    def get_trace(self, trace_id: str) -> List[Span]:
+        """Finished spans of a trace, in start order."""
+        with self._lock:
+            spans = list(self._traces.get(trace_id, ()))
+        return sorted(spans, key=lambda span: span.start_time)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return exporter statistics."""
+        with self._lock:
+            return {"traces": len(self._traces), "max_traces": self.max_traces, "spans_exported": self._exported}
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+# OpenTelemetry mirror of the current span (parent of the next mirrored span)
+_current_otel_span: ContextVar[Any] = ContextVar("current_otel_span", default=None)
+
+
+class Tracer:
+    """Creates spans and keeps the current one per execution context."""
+
+    def __init__(self, exporter: Optional[InMemorySpanExporter] = None, enabled: bool = True):
+        """Initialize the tracer.
+
+        Args:
+            exporter: Exporter receiving finished spans (default in-memory)
+            enabled: Record spans (when False, span() yields None and costs nothing)
+        """
+        self.enabled = enabled
+        self.exporter = exporter or InMemorySpanExporter()
+        self._otel_tracer = otel_trace.get_tracer("geo_llm") if OTEL_AVAILABLE else None
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        kind: str = "internal",
+        attributes: Optional[Dict[str, Any]] = None,
+        traceparent: Optional[str] = None
+    ) -> Iterator[Optional[Span]]:
+        """Run a block in a span.
+
+        Args:
+            name: Span name (e.g. "agent.intent_classification", "openrouter.chat")
+            kind: "internal", "server" (incoming request) or "client" (outbound call)
+            attributes: Span attributes
+            traceparent: Incoming traceparent header to continue (server spans)
+
+        Yields:
+            The span (None when tracing is disabled)
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current_span.get()
+        remote = parse_traceparent(traceparent) if traceparent else None
+        if remote:
+            trace_id, parent_span_id = remote
+        elif parent is not None:
+            trace_id, parent_span_id = parent.trace_id, parent.span_id
+        else:
+            trace_id, parent_span_id = uuid.uuid4().hex, None
+
+        span = Span(name, trace_id, parent_span_id, kind, attributes)
+        token = _current_span.set(span)
+        otel_parent = _current_otel_span.get()
+        otel_span = self._start_otel_span(span, otel_parent, remote)
+        otel_token = _current_otel_span.set(otel_span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            span.end_time = time.time()
+            if span.status == "UNSET":
+                span.status = "OK"
+            try:
+                _current_span.reset(token)
+                _current_otel_span.reset(otel_token)
+            except ValueError:
+                # Reset from another context (e.g. a generator resumed elsewhere)
+                _current_span.set(parent)
+                _current_otel_span.set(otel_parent)
+            self._end_otel_span(otel_span, span)
+            self.exporter.export(span)
+
+    def traced(self, name: Optional[str] = None, kind: str = "internal") -> Callable:
+        """Decorator running a sync or async function in a span.
+
+        Args:
+            name: Span name (default: the function's qualified name)
+            kind: Span kind
+        """
+        def decorator(fn: Callable) -> Callable:
+            span_name = name or fn.__qualname__
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(span_name, kind):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, kind):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    async def trace_call(
+        self,
+        name: str,
+        awaitable: Awaitable[T],
+        kind: str = "internal",
+        attributes: Optional[Dict[str, Any]] = None
+    ) -> T:
+        """Await a coroutine in a span (e.g. one branch of asyncio.gather).
+
+        Args:
+            name: Span name
+            awaitable: Coroutine to await
+            kind: Span kind
+            attributes: Span attributes
+
+        Returns:
+            The coroutine's result
+        """
+        with self.span(name, kind, attributes):
+            return await awaitable
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        """The span of the running context, if any."""
+        return _current_span.get()
+
+    def current_trace_id(self) -> Optional[str]:
+        """Trace id of the running context, if any."""
+        span = _current_span.get()
+        return span.trace_id if span is not None else None
+
+    def inject(self, headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Add the traceparent header of the current span to outbound request headers.
+
+        Args:
+            headers: Request headers (not modified)
+
+        Returns:
+            Headers including traceparent when a span is active
+        """
+        headers = dict(headers or {})
+        span = _current_span.get()
+        if self.enabled and span is not None:
+            headers[TRACEPARENT_HEADER] = span.traceparent
+        return headers
+
+    def breakdown(self, trace_id: Optional[str] = None) -> Dict[str, Any]:
+        """Per-stage timing breakdown of a trace.
+
+        Args:
+            trace_id: Trace to summarize (default: the current one)
+
+        Returns:
+            Dictionary with the trace id, milliseconds per span name (stages)
+            and the finished spans with their offsets from the trace start
+        """
+        trace_id = trace_id or self.current_trace_id()
+        if not trace_id:
+            return {"trace_id": None, "total_ms": 0.0, "stages": {}, "spans": []}
+
+        spans = self.exporter.get_trace(trace_id)
+        starts = [span.start_time for span in spans]
+        ends = [span.end_time for span in spans]
+        current = _current_span.get()
+        if current is not None and current.trace_id == trace_id:
+            # Spans still running (e.g. the request's root span) count up to now
+            starts.append(current.start_time)
+            ends.append(time.time())
+        trace_start = min(starts, default=time.time())
+
+        stages: Dict[str, float] = {}
+        for span in spans:
+            stages[span.name] = round(stages.get(span.name, 0.0) + span.duration_ms, 2)
+        return {
+            "trace_id": trace_id,
+            "total_ms": round((max(ends, default=trace_start) - trace_start) * 1000, 2),
+            "stages": stages,
+            "spans": [
+                {
+                    "name": span.name,
+                    "span_id": span.span_id,
+                    "parent_span_id": span.parent_span_id,
+                    "kind": span.kind,
+                    "start_offset_ms": round((span.start_time - trace_start) * 1000, 2),
+                    "duration_ms": round(span.duration_ms, 2),
+                    "status": span.status,
+                    "attributes": span.attributes,
+                }
+                for span in spans
+            ],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Return tracer statistics."""
+        return {"enabled": self.enabled, "otel_bridge": self._otel_tracer is not None, **self.exporter.stats()}
+
+    def _start_otel_span(self, span: Span, parent: Any = None, remote: Optional[Tuple[str, str]] = None) -> Any:
+        """Mirror a span to the OpenTelemetry API (no-op without a configured SDK).
+
+        Args:
+            span: Span being started
+            parent: Mirrored OpenTelemetry span of the parent span
+            remote: (trace_id, span_id) of an incoming traceparent, which takes precedence
+        """
+        if self._otel_tracer is None:
+            return None
+        try:
+            if remote:
+                parent = otel_trace.NonRecordingSpan(otel_trace.SpanContext(
+                    trace_id=int(remote[0], 16),
+                    span_id=int(remote[1], 16),
+                    is_remote=True,
+                    trace_flags=otel_trace.TraceFlags(otel_trace.TraceFlags.SAMPLED)
+                ))
+            context = otel_trace.set_span_in_context(parent) if parent is not None else None
+            kind = getattr(otel_trace.SpanKind, span.kind.upper(), otel_trace.SpanKind.INTERNAL)
+            return self._otel_tracer.start_span(
+                span.name, context=context, kind=kind, start_time=int(span.start_time * 1e9)
+            )
+        except Exception as e:  # pragma: no cover
+            logger.debug(f"OpenTelemetry span not started: {e}")
+            return None
+
+    @staticmethod
+    def _end_otel_span(otel_span: Any, span: Span) -> None:
+        """Finish the mirrored OpenTelemetry span."""
+        if otel_span is None:
+            return
+        try:
+            for key, value in span.attributes.items():
+                if isinstance(value, (str, bool, int, float)):
+                    otel_span.set_attribute(key, value)
+            otel_span.set_attribute("geo_llm.trace_id", span.trace_id)
+            if span.status == "ERROR":
+                otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, span.status_message))
+            otel_span.end(end_time=int(span.end_time * 1e9))
+        except Exception as e:  # pragma: no cover
+            logger.debug(f"OpenTelemetry span not ended: {e}")
+
+
+class TracingMiddleware:
+    """ASGI middleware running each HTTP request in a server span.
+
+    Continues the caller's trace from the traceparent header and returns the
+    trace id in X-Trace-Id (and traceparent) response headers.
+    """
+
+    def __init__(self, app: Any, service_name: str = "api"):
+        self.app = app
+        self.service_name = service_name
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tracer = get_tracer()
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        name = f"{self.service_name} {scope.get('method', 'GET')} {scope.get('path', '')}"
+        with tracer.span(name, kind="server", attributes={"service.name": self.service_name},
+                         traceparent=headers.get(TRACEPARENT_HEADER)) as span:
+            async def send_with_trace(message: Dict[str, Any]) -> None:
+                if span is not None and message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message.get("status"))
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (TRACE_ID_HEADER.lower().encode("latin-1"), span.trace_id.encode("latin-1")),
+                        (TRACEPARENT_HEADER.encode("latin-1"), span.traceparent.encode("latin-1")),
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer.
+
+    Returns:
+        Shared Tracer configured from the environment
+    """
+    global _tracer
+
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer(
+                    exporter=InMemorySpanExporter(max_traces=int(os.environ.get("TRACING_MAX_TRACES", "200"))),
+                    enabled=os.environ.get("TRACING_ENABLED", "true").lower() in ("1", "true", "yes")
+                )
+    return _tracer
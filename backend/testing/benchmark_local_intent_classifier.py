@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Local Intent Classifier Benchmark
+
+Replays held-out queries through the local TF-IDF fast-path classifier and
+reports accuracy, fast-path coverage at the confidence threshold and
+per-query latency. With --llm the same queries are also classified by the
+OpenRouter LLM path (TopLevelClassifier + GEESubClassifier) for comparison.
+
+The classifier is trained on synthetic query templates, so the benchmark
+only counts queries that none of those templates can produce; matching
+queries are reported and skipped. The built-in set is hand-labelled by the
+routing policy of the LLM prompt; use --queries to replay real labelled
+traffic instead.
+
+The fast path only switches on after calibration on held-out real labelled
+queries (logged LLM classifications and --training-file); without them the
+classifier stays inactive and fast-path coverage is 0. Evaluation queries
+must not be in the training file.
+
+Usage:
+    python backend/testing/benchmark_local_intent_classifier.py
+    python backend/testing/benchmark_local_intent_classifier.py --threshold 0.8 --llm
+    python backend/testing/benchmark_local_intent_classifier.py --queries labelled.jsonl
+    python backend/testing/benchmark_local_intent_classifier.py --training-file logged.jsonl --queries eval.jsonl
+"""
+
+import re
+import sys
+import os
+import json
+import time
+import argparse
+import statistics
+
+# Add current directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+# Held-out queries with their expected routing: (query, service_type, gee_sub_intent).
+# Phrased independently of the training templates, including time-sensitive and
+# factual questions that mention analysis vocabulary
+HELD_OUT_QUERIES = [
+    ("how green were the outskirts of Mumbai after last year's monsoon", "GEE", "NDVI"),
+    ("compare vegetation health between 2019 and 2023 around Nashik", "GEE", "NDVI"),
+    ("has tree canopy around Bengaluru shrunk over the past decade", "GEE", "NDVI"),
+    ("I need a crop vigour layer for farms near Ludhiana", "GEE", "NDVI"),
+    ("which parts of Delhi heat up the most in May", "GEE", "LST"),
+    ("give me a thermal hotspot layer over Ahmedabad for summer 2023", "GEE", "LST"),
+    ("are the industrial zones of Kanpur hotter than the surrounding fields", "GEE", "LST"),
+    ("how much of Gurugram is covered by buildings versus farmland", "GEE", "LULC"),
+    ("break down Hyderabad's area into forest, crops and built-up classes", "GEE", "LULC"),
+    ("has farmland been converted to housing near Noida since 2018", "GEE", "LULC"),
+    ("where did the Brahmaputra overflow its banks in 2022", "GEE", "WATER"),
+    ("how has Chilika lagoon's surface area varied across years", "GEE", "WATER"),
+    ("outline permanent and seasonal surface water near Srinagar", "GEE", "WATER"),
+    ("precipitation anomaly across Vidarbha for the last five monsoons", "GEE", "CLIMATE"),
+    ("long-term drought conditions over Marathwada from satellite records", "GEE", "CLIMATE"),
+    ("organic carbon content of agricultural soils in Haryana", "GEE", "SOIL"),
+    ("estimate how many people are settled inside the Dharavi boundary", "GEE", "POPULATION"),
+    ("density of the highway network around Indore", "GEE", "TRANSPORTATION"),
+    ("current temperature in Delhi", "SEARCH", None),
+    ("latest flood situation in Kerala", "SEARCH", None),
+    ("is it raining in Bengaluru right now", "SEARCH", None),
+    ("air quality index in Delhi today", "SEARCH", None),
+    ("what's happening with the Mumbai coastal road project", "SEARCH", None),
+    ("did the Chennai metro phase 2 open yet", "SEARCH", None),
+    ("is there a map of delhi metro", "SEARCH", None),
+    ("how many people live in Mumbai", "SEARCH", None),
+    ("what is the area of Rajasthan in square kilometres", "SEARCH", None),
+    ("which river flows through Ahmedabad", "SEARCH", None),
+    ("who founded the city of Hyderabad", "SEARCH", None),
+    ("train timings from Pune to Mumbai", "SEARCH", None),
+    ("why is Cherrapunji so wet", "SEARCH", None),
+    ("any cyclone warnings for the Odisha coast this week", "SEARCH", None),
+]
+
+
+def template_patterns():
+    """Regexes for every query the classifier's training templates can produce."""
+    from app.services.core_llm_agent.intent.local_classifier import (
+        GEE_TEMPLATES, SEARCH_TEMPLATES, SEARCH_TOPICS, GENERAL_QUESTIONS
+    )
+    from app.services.core_llm_agent.intent.top_level_classifier import TopLevelClassifier
+    from app.services.core_llm_agent.intent.gee_subclassifier import GEESubClassifier
+
+    def alternation(words):
+        return "(?:" + "|".join(re.escape(word) for word in sorted(set(words), key=len, reverse=True)) + ")"
+
+    gee_keywords = list(TopLevelClassifier.GEE_KEYWORDS)
+    gee_keywords += [kw for keywords in GEESubClassifier.KEYWORD_PATTERNS.values() for kw in keywords]
+    fills = {
+        "gee": {"kw": alternation(gee_keywords), "place": ".+"},
+        "search": {"kw": alternation(TopLevelClassifier.SEARCH_KEYWORDS), "topic": alternation(SEARCH_TOPICS), "place": ".+"},
+        "general": {"place": ".+"},
+    }
+
+    patterns = []
+    for kind, templates in (("gee", GEE_TEMPLATES), ("search", SEARCH_TEMPLATES), ("general", GENERAL_QUESTIONS)):
+        for template in templates:
+            regex = re.escape(template)
+            for name, fill in fills[kind].items():
+                regex = regex.replace(re.escape("{" + name + "}"), fill)
+            patterns.append(re.compile(regex))
+    return patterns
+
+
+def held_out(queries):
+    """Drop queries that the training templates can produce (leaked into training)."""
+    patterns = template_patterns()
+    kept = []
+    for entry in queries:
+        text = entry[0].lower().strip().rstrip("?.! ")
+        if any(pattern.fullmatch(text) for pattern in patterns):
+            print(f"  ⏭️ skipping template-shaped query: {entry[0]}")
+        else:
+            kept.append(entry)
+    return kept
+
+
+def load_queries(path):
+    """Load labelled queries from JSONL ({"query", "service_type", "gee_sub_intent"})."""
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                sub = record.get("gee_sub_intent")
+                queries.append((record["query"], str(record["service_type"]).upper(), str(sub).upper() if sub else None))
+    return queries
+
+def percentile(values, pct):
+    """Return the pct-th percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def benchmark_local(queries, threshold: float, training_file=None, min_calibration: int = 200):
+    """Benchmark the local classifier on held-out queries."""
+    from app.services.core_llm_agent.intent.local_classifier import LocalIntentClassifier
+
+    print("⚡ Training local intent classifier...")
+    classifier = LocalIntentClassifier(
+        threshold=threshold, training_file=training_file, min_calibration_examples=min_calibration
+    )
+    print(f"   Trained in {classifier.training_time:.2f}s")
+    for name, report in classifier.calibration.items():
+        state = "active" if report["active"] else f"inactive ({report['reason']})"
+        print(f"   {name:9s} calibration: {report['examples']} held-out real queries, "
+              f"temperature {report['temperature']:.2f}, fast path {state}")
+
+    # Warm-up
+    classifier.predict(queries[0][0])
+
+    latencies = []
+    top_correct = sub_correct = sub_total = 0
+    gated = gated_correct = 0
+
+    for query, expected_service, expected_sub in queries:
+        start = time.perf_counter()
+        prediction = classifier.predict(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        service = prediction["service_type"].value
+        sub = prediction["gee_sub_intent"].value
+        top_ok = service == expected_service
+        top_correct += top_ok
+        if expected_sub:
+            sub_total += 1
+            sub_correct += sub == expected_sub
+
+        fast = classifier.fast_path(query)
+        if fast:
+            gated += 1
+            fast_service = fast["top_level"]["service_type"].value
+            fast_sub = fast.get("gee_sub", {}).get("gee_sub_intent")
+            gated_correct += fast_service == expected_service and (
+                fast_sub is None or expected_sub is None or fast_sub.value == expected_sub
+            )
+
+        if not fast:
+            path = "llm"
+        elif "gee_sub" in fast or service != "GEE":
+            path = "local"
+        else:
+            path = "local+llm-sub"
+        marker = "✅" if top_ok and (not expected_sub or sub == expected_sub) else "❌"
+        print(f"  {marker} {query[:55]:55s} {service:6s} {prediction['confidence']:.2f} "
+              f"{sub if service == 'GEE' else '-':15s} {prediction['gee_confidence']:.2f}  {path}")
+
+    n = len(queries)
+    return {
+        "top_level_accuracy": top_correct / n,
+        "gee_sub_accuracy": sub_correct / sub_total if sub_total else 0.0,
+        "fast_path_coverage": gated / n,
+        "fast_path_accuracy": gated_correct / gated if gated else 0.0,
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p99_ms": percentile(latencies, 99),
+        "latency_mean_ms": statistics.mean(latencies),
+    }
+
+
+def benchmark_llm(queries):
+    """Benchmark the OpenRouter LLM classification path on held-out queries."""
+    # Measure real LLM round trips, not the classification cache
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+
+    from app.services.core_llm_agent.intent.top_level_classifier import TopLevelClassifier
+    from app.services.core_llm_agent.intent.gee_subclassifier import GEESubClassifier
+
+    top_level = TopLevelClassifier()
+    gee_sub = GEESubClassifier()
+    if not top_level.api_key:
+        print("⚠️ OPENROUTER_API_KEY not set, skipping LLM benchmark")
+        return None
+
+    latencies = []
+    top_correct = sub_correct = sub_total = 0
+
+    for query, expected_service, expected_sub in queries:
+        start = time.perf_counter()
+        top_result = top_level.classify_intent(query)
+        service = top_result["service_type"].value
+        sub = None
+        if service == "GEE":
+            sub = gee_sub.classify_gee_intent(query)["gee_sub_intent"].value
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        top_correct += service == expected_service
+        if expected_sub:
+            sub_total += 1
+            sub_correct += sub == expected_sub
+        print(f"  {query[:60]:60s} {service:6s} {sub or '-':15s} {latencies[-1]:8.0f} ms")
+
+    n = len(queries)
+    return {
+        "top_level_accuracy": top_correct / n,
+        "gee_sub_accuracy": sub_correct / sub_total if sub_total else 0.0,
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p99_ms": percentile(latencies, 99),
+        "latency_mean_ms": statistics.mean(latencies),
+    }
+
+
+def print_summary(name, results):
+    """Print one benchmark summary block."""
+    print(f"\n📊 {name}")
+    print("-" * 40)
+    for key, value in results.items():
+        if key.endswith("_ms"):
+            print(f"  {key:22s} {value:10.3f}")
+        else:
+            print(f"  {key:22s} {value:10.1%}")
+
+
+def main():
+    """Main benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the local fast-path intent classifier")
+    parser.add_argument("--threshold", type=float, default=0.9, help="Fast-path confidence threshold")
+    parser.add_argument("--llm", action="store_true", help="Also benchmark the OpenRouter LLM path")
+    parser.add_argument("--queries", help="JSONL of real labelled queries to replay instead of the built-in set")
+    parser.add_argument("--training-file", help="JSONL of real labelled queries to train and calibrate on")
+    parser.add_argument("--min-calibration", type=int, default=200, help="Held-out real queries needed per model")
+    args = parser.parse_args()
+
+    print("🧪 Local Intent Classifier Benchmark")
+    print("=" * 50)
+    queries = held_out(load_queries(args.queries) if args.queries else HELD_OUT_QUERIES)
+    if args.training_file:
+        training = {entry[0].strip().lower() for entry in load_queries(args.training_file)}
+        leaked = [entry for entry in queries if entry[0].strip().lower() in training]
+        if leaked:
+            print(f"  ⏭️ skipping {len(leaked)} queries that are also in the training file")
+            queries = [entry for entry in queries if entry not in leaked]
+    if not queries:
+        print("❌ No held-out queries to benchmark")
+        return
+    print(f"Held-out queries: {len(queries)}, threshold: {args.threshold}\n")
+
+    local_results = benchmark_local(queries, args.threshold, args.training_file, args.min_calibration)
+    print_summary("Local classifier", local_results)
+
+    if args.llm:
+        print("\n🌐 LLM path")
+        llm_results = benchmark_llm(queries)
+        if llm_results:
+            print_summary("LLM classifier", llm_results)
+            speedup = llm_results["latency_mean_ms"] / max(local_results["latency_mean_ms"], 1e-6)
+            print(f"\n⚡ Local path is {speedup:,.0f}x faster on average")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Polygon Simplification Benchmark
+
+Compares the NumPy-vectorized Douglas-Peucker significance in
+app/utils/geojson_utils.py with the scalar loops it replaced:
+
+- the per-vertex angle loop formerly used to shrink streamed ROIs
+  (SimpleStepProcessor._adaptive_simplify_polygon, outer ring only)
+- the pure-Python Douglas-Peucker significance pass
+
+on synthetic boundaries shaped like administrative polygons (a jagged
+Polygon, and a MultiPolygon with islands and holes like a coastal state).
+The vectorized result is checked against the scalar Douglas-Peucker pass.
+
+Usage:
+    python backend/testing/benchmark_polygon_simplification.py
+    python backend/testing/benchmark_polygon_simplification.py --vertices 50000 --budget 1000 --repeat 5
+"""
+
+import sys
+import os
+import math
+import time
+import random
+import argparse
+import statistics
+
+# Add current directory to path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from app.utils.geojson_utils import (  # noqa: E402
+    line_significance, geometry_significance, simplify_to_vertex_budget, count_coordinates
+)
+
+INF = float("inf")
+
+
+def jagged_ring(n, center=(77.0, 28.0), radius=0.5, seed=0):
+    """Closed ring of n positions around a center with a fractal-like coastline."""
+    rng = random.Random(seed)
+    ring = []
+    for i in range(n - 1):
+        angle = 2 * math.pi * i / (n - 1)
+        r = radius * (1 + 0.15 * math.sin(7 * angle) + 0.05 * math.sin(53 * angle) + 0.02 * rng.random())
+        ring.append([center[0] + r * math.cos(angle), center[1] + r * math.sin(angle)])
+    ring.append(list(ring[0]))
+    return ring
+
+
+def coastal_multipolygon(n):
+    """MultiPolygon with a mainland (with a hole) and islands, n positions in total."""
+    mainland, hole = int(n * 0.7), int(n * 0.1)
+    islands = [int(n * 0.05)] * 4
+    polygons = [[jagged_ring(mainland, radius=1.0, seed=1), jagged_ring(hole, radius=0.1, seed=2)[::-1]]]
+    for k, size in enumerate(islands):
+        polygons.append([jagged_ring(size, center=(78.5 + 0.3 * k, 27.0), radius=0.1, seed=3 + k)])
+    return {"type": "MultiPolygon", "coordinates": polygons}
+
+
+def adaptive_simplify_loop(ring, max_points):
+    """The former per-vertex angle loop (SimpleStepProcessor._adaptive_simplify_polygon)."""
+    if len(ring) <= max_points:
+        return ring
+
+    angles = []
+    for i in range(1, len(ring) - 1):
+        prev, curr, next_pt = ring[i - 1], ring[i], ring[i + 1]
+        v1 = [curr[0] - prev[0], curr[1] - prev[1]]
+        v2 = [next_pt[0] - curr[0], next_pt[1] - curr[1]]
+        dot = v1[0] * v2[0] + v1[1] * v2[1]
+        mag1 = (v1[0] ** 2 + v1[1] ** 2) ** 0.5
+        mag2 = (v2[0] ** 2 + v2[1] ** 2) ** 0.5
+        if mag1 > 0 and mag2 > 0:
+            cos_angle = max(-1, min(1, dot / (mag1 * mag2)))
+            angle_importance = abs(1 - cos_angle)
+        else:
+            angle_importance = 0
+        angles.append((i, angle_importance))
+
+    important_indices = {0, len(ring) - 1}
+    angles.sort(key=lambda x: x[1], reverse=True)
+    for i, _ in angles[:max_points - 2]:
+        important_indices.add(i)
+
+    simplified = [ring[i] for i in sorted(important_indices)]
+    if simplified[0] != simplified[-1]:
+        simplified.append(simplified[0])
+    return simplified
+
+
+def _perpendicular_distance(point, start, end):
+    """Distance from a point to the segment start-end (scalar reference)."""
+    (x, y), (x1, y1), (x2, y2) = point[:2], start[:2], end[:2]
+    dx, dy = x2 - x1, y2 - y1
+    if dx == 0 and dy == 0:
+        return ((x - x1) ** 2 + (y - y1) ** 2) ** 0.5
+    t = max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy)))
+    px, py = x1 + t * dx, y1 + t * dy
+    return ((x - px) ** 2 + (y - py) ** 2) ** 0.5
+
+
+def line_significance_loop(coords):
+    """Pure-Python Douglas-Peucker significance (scalar reference)."""
+    n = len(coords)
+    significance = [0.0] * n
+    if n == 0:
+        return significance
+    significance[0] = significance[-1] = INF
+
+    stack = [(0, n - 1, INF)]
+    while stack:
+        first, last, parent = stack.pop()
+        max_distance, index = -1.0, None
+        for i in range(first + 1, last):
+            distance = _perpendicular_distance(coords[i], coords[first], coords[last])
+            if distance > max_distance:
+                max_distance, index = distance, i
+        if index is None:
+            continue
+        value = min(max_distance, parent)
+        significance[index] = value
+        stack.append((first, index, value))
+        stack.append((index, last, value))
+    return significance
+
+
+def timed(fn, repeat):
+    """Run fn repeat times and return (last result, median milliseconds)."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(timings)
+
+
+def main():
+    """Main benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark vectorized polygon simplification")
+    parser.add_argument("--vertices", type=int, default=20000, help="Positions per synthetic boundary")
+    parser.add_argument("--budget", type=int, default=1000, help="Vertex budget (ROI streaming default)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (median reported)")
+    args = parser.parse_args()
+
+    print("🧪 Polygon Simplification Benchmark")
+    print("=" * 60)
+
+    ring = jagged_ring(args.vertices)
+    polygon = {"type": "Polygon", "coordinates": [ring]}
+    multipolygon = coastal_multipolygon(args.vertices)
+
+    # Correctness: the vectorized pass must match the scalar Douglas-Peucker pass
+    reference = line_significance_loop(ring)
+    vectorized = line_significance(ring)
+    mismatches = sum(1 for a, b in zip(reference, vectorized) if not math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-12))
+    print(f"Significance check on {len(ring)} positions: {'✅ identical' if mismatches == 0 else f'❌ {mismatches} mismatches'}")
+
+    print(f"\n📊 Polygon, {args.vertices} positions -> {args.budget}")
+    print("-" * 60)
+    _, loop_ms = timed(lambda: adaptive_simplify_loop(ring, args.budget), args.repeat)
+    _, scalar_ms = timed(lambda: line_significance_loop(ring), args.repeat)
+    significance, vector_ms = timed(lambda: geometry_significance(polygon), args.repeat)
+    lod, budget_ms = timed(lambda: simplify_to_vertex_budget(polygon, args.budget, significance), args.repeat)
+    print(f"  {'former angle loop (outer ring)':38s} {loop_ms:10.2f} ms")
+    print(f"  {'scalar Douglas-Peucker significance':38s} {scalar_ms:10.2f} ms")
+    print(f"  {'vectorized Douglas-Peucker significance':38s} {vector_ms:10.2f} ms  ({scalar_ms / vector_ms:.1f}x)")
+    print(f"  {'vertex budget from cached significance':38s} {budget_ms:10.2f} ms  -> {count_coordinates(lod)} positions")
+
+    print(f"\n📊 MultiPolygon with hole and islands, {count_coordinates(multipolygon)} positions -> {args.budget}")
+    print("-" * 60)
+    significance, vector_ms = timed(lambda: geometry_significance(multipolygon), args.repeat)
+    lod, budget_ms = timed(lambda: simplify_to_vertex_budget(multipolygon, args.budget, significance), args.repeat)
+    rings = [len(r) for p in lod["coordinates"] for r in p]
+    print(f"  {'vectorized Douglas-Peucker significance':38s} {vector_ms:10.2f} ms")
+    print(f"  {'vertex budget from cached significance':38s} {budget_ms:10.2f} ms  -> {count_coordinates(lod)} positions")
+    print(f"  polygons kept: {len(lod['coordinates'])}, ring sizes: {rings}")
+    print("  (the former angle loop only simplified the outer ring of a Polygon)")
+
+
+if __name__ == "__main__":
+    main()